@@ -0,0 +1,85 @@
+"""
+Buffered writer for activity logs.
+
+log_activity() used to insert one ActivityLog row inside the request for
+every create/update/view. With buffering enabled the rows are queued in
+process and written by a background thread with bulk_create, when:
+
+- ACTIVITY_LOG_BATCH_SIZE rows are waiting,
+- ACTIVITY_LOG_FLUSH_INTERVAL seconds have passed,
+- a request finishes (the writer is woken, the response is not held up),
+- the process exits (atexit).
+
+Rows are only queued once the surrounding transaction commits, so rolled
+back actions are not logged. When the queue is full the row is written
+inline (back-pressure instead of loss); get_metrics() reports queue depth,
+overflow writes and flush timings. The queue and writer thread live in
+core.buffered_writer.
+
+Settings:
+ACTIVITY_LOG_BUFFERED = True           # Queue rows instead of inserting inline
+ACTIVITY_LOG_BATCH_SIZE = 200          # Rows per bulk insert
+ACTIVITY_LOG_FLUSH_INTERVAL = 1.0      # Max seconds a row waits
+ACTIVITY_LOG_QUEUE_SIZE = 10000        # Rows queued before writing inline
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+
+from .buffered_writer import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'ACTIVITY_LOG_BUFFERED', True)
+
+
+class ActivityLogBuffer(BufferedWriter):
+    """In-process queue of unsaved ActivityLog rows with a background writer."""
+
+    thread_name = 'activity-log-writer'
+
+    def __init__(self, batch_size=None, flush_interval=None, max_queue=None, background=True):
+        super().__init__(
+            batch_size=batch_size or getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 200),
+            flush_interval=flush_interval or getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 1.0),
+            max_queue=max_queue or getattr(settings, 'ACTIVITY_LOG_QUEUE_SIZE', 10000),
+            background=background,
+        )
+
+    def write_batch(self, batch):
+        from core.models import ActivityLog
+
+        try:
+            ActivityLog.objects.bulk_create(batch)
+            return len(batch)
+        except Exception as e:
+            # One bad row (e.g. a user deleted meanwhile) must not lose the batch
+            logger.error(f"Bulk activity log write failed, retrying row by row: {e}")
+
+        written = 0
+        for activity in batch:
+            activity.pk = None
+            try:
+                activity.save()
+                written += 1
+            except Exception as e:
+                logger.error(f"Error writing activity log '{activity.description[:80]}': {e}")
+        return written
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Process-wide activity log buffer."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ActivityLogBuffer()
+    return _buffer
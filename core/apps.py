@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .signals import (
+            connect_search_index_signals,
+            connect_dashboard_counter_signals,
+            connect_user_preference_signals,
+            connect_activity_log_signals,
+        )
+        connect_search_index_signals()
+        connect_dashboard_counter_signals()
+        connect_user_preference_signals()
+        connect_activity_log_signals()
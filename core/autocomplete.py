@@ -0,0 +1,325 @@
+"""
+Autocomplete index for global_search_api.
+
+Process-local prefix index over the display text of the documents in the
+global search index (core.search_index). Postings are kept as one sorted
+list of (token, model_path, object_id) tuples, so a prefix lookup is a
+bisect followed by a short forward scan - the same walk a trie would do,
+with far less per-node overhead in Python.
+
+Lookups stop as soon as the top-N result heap is full and no better
+(exact) matches can follow, and give up with partial results once the
+latency budget is spent. Operators scan serial numbers and SKUs, so tail
+latency matters more than recall.
+
+The index loads in a background thread on first use (requests fall back
+to the database search until it is ready), then refreshes incrementally
+from SearchDocument.indexed_at and fully every few minutes to drop rows
+deleted by other processes.
+
+Settings:
+AUTOCOMPLETE_ENABLED = True                 # Use the in-memory index
+AUTOCOMPLETE_LATENCY_BUDGET_MS = 30         # Per-lookup time budget
+AUTOCOMPLETE_REFRESH_SECONDS = 30           # Incremental refresh interval
+AUTOCOMPLETE_FULL_REFRESH_SECONDS = 900     # Full reload interval
+"""
+
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse, NoReverseMatch
+
+from . import search_index
+from .search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+
+# Rows committed slightly out of timestamp order are caught by re-reading
+# a small window behind the watermark (re-applying a document is idempotent).
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+# How many postings to scan between clock checks
+BUDGET_CHECK_INTERVAL = 128
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+class AutocompleteIndex:
+    """
+    In-memory prefix index of search documents.
+
+    Thread-safe: writers hold the lock; lookups read a consistent snapshot
+    of the postings list reference.
+    """
+
+    def __init__(self):
+        self._postings = []   # sorted [(token, model_path, object_id)]
+        self._entries = {}    # (model_path, object_id) -> (display, tokens)
+        self._lock = threading.RLock()
+        self._loading = False
+        self.loaded = False
+        self.watermark = None
+        self.last_refresh = 0.0
+        self.last_full_refresh = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """(Re)build the whole index from the search documents table."""
+        from core.models import SearchDocument
+
+        started = time.time()
+        entries = {}
+        postings = []
+        watermark = None
+
+        rows = SearchDocument.objects.values_list(
+            'model_path', 'object_id', 'display', 'indexed_at'
+        ).iterator(chunk_size=5000)
+
+        for model_path, object_id, display, indexed_at in rows:
+            tokens = frozenset(tokenize(display))
+            entries[(model_path, object_id)] = (display, tokens)
+            postings.extend((token, model_path, object_id) for token in tokens)
+            if watermark is None or indexed_at > watermark:
+                watermark = indexed_at
+
+        postings.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self.watermark = watermark
+            self.loaded = True
+            self.last_refresh = self.last_full_refresh = started
+
+        logger.info(f"Autocomplete index loaded: {len(entries)} documents in {time.time() - started:.1f}s")
+
+    def refresh(self):
+        """Apply documents indexed since the last refresh."""
+        from core.models import SearchDocument
+
+        started = time.time()
+        documents = SearchDocument.objects.all()
+        if self.watermark is not None:
+            documents = documents.filter(indexed_at__gte=self.watermark - WATERMARK_OVERLAP)
+
+        watermark = self.watermark
+        changes = {}
+        for model_path, object_id, display, indexed_at in documents.values_list(
+            'model_path', 'object_id', 'display', 'indexed_at'
+        ).iterator(chunk_size=1000):
+            changes[(model_path, object_id)] = (display, frozenset(tokenize(display)))
+            if watermark is None or indexed_at > watermark:
+                watermark = indexed_at
+
+        with self._lock:
+            self._apply_changes(changes)
+            self.watermark = watermark
+            self.last_refresh = started
+
+    def apply(self, model_path, object_id, display):
+        """Insert or replace one document."""
+        with self._lock:
+            self._apply_changes({(model_path, object_id): (display, frozenset(tokenize(display)))})
+
+    def discard(self, model_path, object_id):
+        """Remove one document (no-op if absent)."""
+        with self._lock:
+            self._apply_changes({(model_path, object_id): None})
+
+    def _apply_changes(self, changes):
+        """
+        Insert, replace (entry) or remove (None) documents, caller holds the lock.
+
+        The postings list is rebuilt once per batch - a filter of the
+        removed postings merged with the sorted new ones - and swapped in,
+        so lookups keep reading the old list until the new one is complete.
+        """
+        removed = set()
+        added = []
+        for key, entry in changes.items():
+            current = self._entries.get(key)
+            if current == entry:
+                continue
+            if current is not None:
+                removed.update((token,) + key for token in current[1])
+            if entry is None:
+                del self._entries[key]
+            else:
+                added.extend((token,) + key for token in entry[1])
+                self._entries[key] = entry
+
+        if not removed and not added:
+            return
+        added.sort()
+        postings = self._postings
+        if removed:
+            postings = [posting for posting in postings if posting not in removed]
+        self._postings = list(heapq.merge(postings, added))
+
+    def ensure_fresh(self):
+        """
+        Schedule a background load/refresh when due.
+
+        Never blocks the caller; returns whether the index is usable now.
+        """
+        now = time.time()
+        if not self.loaded:
+            self._start_background(self.load)
+        elif now - self.last_full_refresh > get_setting('AUTOCOMPLETE_FULL_REFRESH_SECONDS', 900):
+            self._start_background(self.load)
+        elif now - self.last_refresh > get_setting('AUTOCOMPLETE_REFRESH_SECONDS', 30):
+            self._start_background(self.refresh)
+        return self.loaded
+
+    def _start_background(self, target):
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+
+        def run():
+            try:
+                target()
+            except Exception as e:
+                logger.error(f"Autocomplete index refresh failed: {e}")
+            finally:
+                self._loading = False
+                # Worker threads own their connection; don't leak it
+                connection.close()
+
+        threading.Thread(target=run, name='autocomplete-index', daemon=True).start()
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def lookup(self, query, limit=DEFAULT_LIMIT, budget_ms=None, model_order=None):
+        """
+        Find documents whose display tokens prefix-match every query term.
+
+        Exact token matches rank above prefix matches; ties go to the model
+        listed first in model_order, then the shorter display text.
+
+        Returns:
+            (results, partial) - results is a list of
+            {'model_path', 'id', 'display'}; partial is True when the
+            latency budget ran out before the scan finished.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], False
+
+        if budget_ms is None:
+            budget_ms = get_setting('AUTOCOMPLETE_LATENCY_BUDGET_MS', 30)
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        model_rank = {path: i for i, path in enumerate(model_order or [])}
+
+        # Scan the postings of the most selective (longest) term and verify
+        # the remaining terms against each candidate's token set.
+        lead = max(terms, key=len)
+        others = [t for t in terms if t != lead]
+
+        postings = self._postings
+        entries = self._entries
+        heap = []
+        seen = set()
+        partial = False
+        sequence = 0
+
+        i = bisect_left(postings, (lead,))
+        end = len(postings)
+        while i < end:
+            token, model_path, object_id = postings[i]
+            i += 1
+            if not token.startswith(lead):
+                break
+
+            exact = token == lead
+            if len(heap) >= limit and not exact:
+                # Exact matches sort first; only weaker matches remain
+                break
+
+            sequence += 1
+            if sequence % BUDGET_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                partial = True
+                break
+
+            key = (model_path, object_id)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            display, tokens = entry
+            if others and not all(any(tok.startswith(t) for tok in tokens) for t in others):
+                continue
+
+            rank = (1 if exact else 0, -model_rank.get(model_path, len(model_rank)), -len(display))
+            item = (rank, -sequence, model_path, object_id, display)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        results = [
+            {'model_path': model_path, 'id': object_id, 'display': display}
+            for _, _, model_path, object_id, display in sorted(heap, reverse=True)
+        ]
+        return results, partial
+
+
+_index = AutocompleteIndex()
+
+
+def get_index():
+    """Process-wide autocomplete index."""
+    return _index
+
+
+def is_enabled():
+    # Autocomplete is loaded from the search index, so it needs that too
+    return get_setting('AUTOCOMPLETE_ENABLED', True) and search_index.is_enabled()
+
+
+# ============================================================================
+# URL TEMPLATES
+# ============================================================================
+
+_URL_SENTINEL = 987654321
+_url_templates = {}
+
+
+def get_object_url(url_pattern, pk):
+    """
+    Reverse a detail URL by pk without running the resolver per hit.
+
+    Each pattern is reversed once with a sentinel pk and cached as a
+    format string. Returns '' if the pattern is not installed.
+    """
+    template = _url_templates.get(url_pattern)
+    if template is None:
+        try:
+            template = reverse(url_pattern, kwargs={'pk': _URL_SENTINEL}).replace(str(_URL_SENTINEL), '{pk}')
+        except NoReverseMatch:
+            template = ''
+        _url_templates[url_pattern] = template
+    return template.format(pk=pk) if template else ''
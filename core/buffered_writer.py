@@ -0,0 +1,167 @@
+"""
+In-process write buffer with a background writer thread.
+
+Base class for tables that are written on (almost) every request and are
+cheaper to insert in batches: items are queued by the request thread and
+written by a daemon thread when:
+
+- `batch_size` items are waiting,
+- `flush_interval` seconds have passed,
+- request_flush() is called (e.g. when a request finishes),
+- the process exits (atexit).
+
+The queue is bounded: when it is full the item is written inline by the
+request thread (back-pressure instead of loss), so a crash loses at most
+`max_queue` items. get_metrics() reports queue depth, overflow writes and
+flush timings.
+
+Subclasses implement write_batch(); see core.activity_buffer and
+floor_app.operations.analytics.buffer.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """Bounded queue of pending writes drained by a background thread."""
+
+    thread_name = 'buffered-writer'
+
+    def __init__(self, batch_size, flush_interval, max_queue, background=True):
+        self.background = background
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self.metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'flushes': 0,
+            'failed': 0,
+            'overflow_writes': 0,
+            'max_depth': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    def write_batch(self, batch):
+        """Write a list of queued items; returns how many were written."""
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def add(self, item):
+        """Queue an item for writing."""
+        if self.background:
+            self._ensure_writer()
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Writer cannot keep up - slow this request down rather than drop
+            self._bump('overflow_writes')
+            self._write([item])
+            return
+
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            self.metrics['enqueued'] += 1
+            if depth > self.metrics['max_depth']:
+                self.metrics['max_depth'] = depth
+
+        if depth >= self.batch_size:
+            self._wakeup.set()
+
+    def request_flush(self):
+        """Ask the writer to flush soon without waiting for it."""
+        if not self._queue.empty():
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+
+    def flush(self):
+        """Write everything queued so far, in the calling thread."""
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return
+                self._write(batch)
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            written = self.write_batch(batch)
+        except Exception as e:
+            written = 0
+            logger.error(f"{self.thread_name} failed to write {len(batch)} items: {e}")
+
+        with self._metrics_lock:
+            self.metrics['written'] += written
+            self.metrics['failed'] += len(batch) - written
+            self.metrics['flushes'] += 1
+            self.metrics['last_flush_ms'] = (time.perf_counter() - started) * 1000
+
+    def _bump(self, name, amount=1):
+        with self._metrics_lock:
+            self.metrics[name] += amount
+
+    def _ensure_writer(self):
+        # The writer thread does not survive a fork (e.g. preloading servers)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.thread_name} error: {e}")
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+    def get_metrics(self):
+        """Snapshot of writer counters plus current queue depth."""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics.update({
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self.max_queue,
+            'writer_alive': bool(self._thread and self._thread.is_alive()),
+        })
+        return metrics
@@ -3,6 +3,8 @@ Context processors for the core app.
 Injects user preferences and global settings into all templates.
 """
 
+from django.utils.functional import SimpleLazyObject
+
 from .models import UserPreference
 
 
@@ -10,6 +12,10 @@ def user_preferences(request):
     """
     Injects user preference settings into template context.
     This allows templates to access theme, font_size, and table_density.
+
+    Display fields come from the per-user preference cache, so rendering
+    a page does not usually hit the database. The full preference object
+    is only loaded if a template actually uses `user_preferences`.
     """
     context = {
         'theme': 'light',
@@ -20,15 +26,12 @@ def user_preferences(request):
     }
 
     if request.user.is_authenticated:
+        user = request.user
         try:
-            pref = UserPreference.get_or_create_for_user(request.user)
-            context.update({
-                'theme': pref.theme,
-                'font_size': pref.font_size,
-                'table_density': pref.table_density,
-                'sidebar_collapsed': pref.sidebar_collapsed,
-                'user_preferences': pref,
-            })
+            context.update(UserPreference.get_display_preferences(user))
+            context['user_preferences'] = SimpleLazyObject(
+                lambda: UserPreference.get_or_create_for_user(user)
+            )
         except Exception:
             # If there's any issue, use defaults
             pass
@@ -0,0 +1,294 @@
+"""
+Materialized counters for the main dashboard.
+
+main_dashboard used to run one COUNT(*) (and a SUM) per module on every
+load. The figures now live in DashboardCounter rows that are:
+
+- adjusted in place by post_save/post_delete signals (see core.signals),
+  using the change in each object's contribution to a counter, once the
+  saving transaction commits;
+- reconciled against the real aggregates periodically:
+      python manage.py reconcile_dashboard_counters
+  (run from cron) which also repairs drift from bulk updates/deletes that
+  bypass signals;
+- read by the dashboard with a single query.
+
+Counters whose model is not installed read as 0. A counter with no row yet
+is computed on first read.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from floor_app.mixins import SoftDeleteManager
+
+logger = logging.getLogger(__name__)
+
+
+class Counter:
+    """
+    Definition of one dashboard figure.
+
+    Args:
+        key: '<summary>.<name>' - the dashboard context dict and entry
+        model_path: 'app_label.ModelName'
+        filters: Field equality / '__in' lookups the row must match
+        excludes: Field equality / '__in' lookups the row must not match
+        sum_field: Sum this field instead of counting rows
+    """
+
+    def __init__(self, key, model_path, filters=None, excludes=None, sum_field=None):
+        self.key = key
+        self.model_path = model_path
+        self.filters = dict(filters or {})
+        self.excludes = dict(excludes or {})
+        self.sum_field = sum_field
+
+    @property
+    def summary(self):
+        return self.key.split('.')[0]
+
+    @property
+    def name(self):
+        return self.key.split('.')[1]
+
+    def get_model(self):
+        """Model class, or None if its app is not installed."""
+        try:
+            return apps.get_model(self.model_path)
+        except (LookupError, ValueError):
+            return None
+
+    def get_filters(self, model):
+        # Mirror the implicit "alive" filter of soft-delete default managers
+        filters = dict(self.filters)
+        if isinstance(model._default_manager, SoftDeleteManager):
+            filters.setdefault('is_deleted', False)
+        return filters
+
+    def get_fields(self, model):
+        """Fields a row's contribution depends on."""
+        fields = {lookup.split('__')[0] for lookup in self.get_filters(model)}
+        fields |= {lookup.split('__')[0] for lookup in self.excludes}
+        if self.sum_field:
+            fields.add(self.sum_field)
+        return fields
+
+    def compute(self, model):
+        """Aggregate the real value from the source table."""
+        queryset = model._base_manager.filter(**self.get_filters(model))
+        if self.excludes:
+            queryset = queryset.exclude(**self.excludes)
+        if self.sum_field:
+            return queryset.aggregate(total=Sum(self.sum_field))['total'] or Decimal('0')
+        return queryset.aggregate(total=Count('pk'))['total']
+
+    def contribution(self, model, values):
+        """What one row (as a field -> value mapping) adds to the counter."""
+        if values is None:
+            return 0
+        if not all(_matches(values, lookup, v) for lookup, v in self.get_filters(model).items()):
+            return 0
+        if any(_matches(values, lookup, v) for lookup, v in self.excludes.items()):
+            return 0
+        if self.sum_field:
+            return values.get(self.sum_field) or 0
+        return 1
+
+
+def _matches(values, lookup, expected):
+    if lookup.endswith('__in'):
+        return values.get(lookup[:-4]) in expected
+    return values.get(lookup) == expected
+
+
+COUNTERS = [
+    Counter('hr_summary.employees', 'hr.HREmployee', filters={'is_deleted': False}),
+    Counter('hr_summary.departments', 'hr.Department'),
+    Counter('inventory_summary.items', 'inventory.Item'),
+    Counter('inventory_summary.serial_units', 'inventory.SerialUnit'),
+    Counter('production_summary.job_cards', 'production.JobCard'),
+    Counter('production_summary.batches', 'production.ProductionBatch'),
+    Counter('evaluation_summary.sessions', 'evaluation.EvaluationSession'),
+    Counter('evaluation_summary.bit_types', 'evaluation.BitType'),
+    Counter('purchasing_summary.suppliers', 'purchasing.Supplier'),
+    Counter('purchasing_summary.pos', 'purchasing.PurchaseOrder'),
+    Counter('qrcodes_summary.codes', 'qrcodes.QRCode'),
+    Counter('qrcodes_summary.equipment', 'qrcodes.Equipment'),
+    Counter('knowledge_summary.articles', 'knowledge.Article'),
+    Counter('knowledge_summary.courses', 'knowledge.TrainingCourse'),
+    Counter('maintenance_summary.assets', 'maintenance.Asset'),
+    Counter('maintenance_summary.work_orders', 'maintenance.WorkOrder',
+            filters={'status__in': ['OPEN', 'IN_PROGRESS']}),
+    Counter('quality_summary.open_ncrs', 'quality.NonconformanceReport', excludes={'status': 'CLOSED'}),
+    Counter('quality_summary.dispositions', 'quality.QualityDisposition'),
+    Counter('planning_summary.schedules', 'planning.ProductionSchedule'),
+    Counter('planning_summary.kpis', 'planning.KPIDefinition', filters={'is_active': True}),
+    Counter('sales_summary.customers', 'sales.Customer', filters={'is_deleted': False}),
+    Counter('sales_summary.opportunities', 'sales.SalesOpportunity', filters={'is_deleted': False}),
+    Counter('sales_summary.orders', 'sales.SalesOrder', filters={'is_deleted': False}),
+    Counter('sales_summary.drilling_runs', 'sales.DrillingRun', filters={'is_deleted': False}),
+    Counter('finance_summary.erp_references', 'core.ERPReference'),
+    Counter('finance_summary.pending_sync', 'core.ERPReference', filters={'sync_status': 'pending'}),
+    Counter('finance_summary.loss_events', 'core.LossOfSaleEvent'),
+    Counter('finance_summary.total_loss', 'core.LossOfSaleEvent', sum_field='estimated_loss_amount'),
+]
+
+
+def get_counters_by_model():
+    """Map installed model classes to the counters defined on them."""
+    by_model = {}
+    for counter in COUNTERS:
+        model = counter.get_model()
+        if model is not None:
+            by_model.setdefault(model, []).append(counter)
+    return by_model
+
+
+def _as_number(counter, value):
+    return value if counter.sum_field else int(value)
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def get_summaries():
+    """
+    All dashboard figures as {'hr_summary': {'employees': n, ...}, ...}.
+
+    One query in the steady state; missing counter rows are computed and
+    stored on the way. A module whose counters fail to compute shows zeros
+    instead of failing the whole dashboard.
+    """
+    from core.models import DashboardCounter
+
+    stored = dict(DashboardCounter.objects.values_list('key', 'value'))
+
+    summaries = {}
+    failed = set()
+    for counter in COUNTERS:
+        value = stored.get(counter.key)
+        if value is None and counter.summary not in failed:
+            try:
+                value = reconcile_counter(counter)
+            except Exception:
+                logger.exception(f"Dashboard counter {counter.key} could not be computed")
+                failed.add(counter.summary)
+        summaries.setdefault(counter.summary, {})[counter.name] = _as_number(counter, value or 0)
+
+    for summary in failed:
+        summaries[summary] = dict.fromkeys(summaries[summary], 0)
+    return summaries
+
+
+# ============================================================================
+# INCREMENTAL MAINTENANCE
+# ============================================================================
+
+def snapshot(instance, counters):
+    """Stored field values an existing row contributes with (before a save)."""
+    model = type(instance)
+    if instance.pk is None:
+        return None
+    fields = set()
+    for counter in counters:
+        fields |= counter.get_fields(model)
+    if not fields:
+        return {}
+    return model._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+def instance_values(instance, counters):
+    model = type(instance)
+    fields = set()
+    for counter in counters:
+        fields |= counter.get_fields(model)
+    return {field: getattr(instance, field, None) for field in fields}
+
+
+def apply_change(instance, counters, before, after):
+    """
+    Move each counter by the change in the instance's contribution.
+
+    The increments run once the saving transaction commits, so saves do
+    not hold counter row locks (and queue behind each other) for the rest
+    of their transaction. Counters without a stored row are left alone;
+    they are computed (including this change) on first read.
+    """
+    model = type(instance)
+    deltas = {}
+    for counter in counters:
+        delta = counter.contribution(model, after) - counter.contribution(model, before)
+        if delta:
+            deltas[counter.key] = deltas.get(counter.key, 0) + delta
+    if deltas:
+        transaction.on_commit(lambda: _increment(deltas))
+
+
+def _increment(deltas):
+    from core.models import DashboardCounter
+
+    now = timezone.now()
+    try:
+        # Fixed key order, so concurrent commits cannot deadlock on the rows
+        for key in sorted(deltas):
+            DashboardCounter.objects.filter(key=key).update(
+                value=F('value') + deltas[key],
+                updated_at=now,
+            )
+    except Exception as e:
+        # Reconciliation repairs any drift
+        logger.error(f"Error updating dashboard counters {', '.join(sorted(deltas))}: {e}")
+
+
+# ============================================================================
+# RECONCILIATION
+# ============================================================================
+
+def reconcile_counter(counter):
+    """
+    Recompute one counter from its source table and store it.
+
+    The counter row is locked while counting so concurrent signal updates
+    queue behind it instead of being overwritten.
+    """
+    from core.models import DashboardCounter
+
+    model = counter.get_model()
+
+    with transaction.atomic():
+        row, created = DashboardCounter.objects.select_for_update().get_or_create(key=counter.key)
+        value = Decimal(counter.compute(model) if model is not None else 0)
+        drift = value - row.value
+        row.value = value
+        row.reconciled_at = timezone.now()
+        row.save(update_fields=['value', 'reconciled_at', 'updated_at'])
+
+    if drift and not created:
+        logger.info(f"Dashboard counter {counter.key} drifted by {drift}")
+    return value
+
+
+def reconcile(keys=None):
+    """
+    Recompute counters from the source tables.
+
+    Returns:
+        dict of key -> (stored value before, real value)
+    """
+    from core.models import DashboardCounter
+
+    stored = dict(DashboardCounter.objects.values_list('key', 'value'))
+    results = {}
+    for counter in COUNTERS:
+        if keys and counter.key not in keys:
+            continue
+        before = stored.get(counter.key)
+        results[counter.key] = (before, reconcile_counter(counter))
+    return results
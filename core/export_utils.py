@@ -7,14 +7,31 @@ Provides unified export functionality across all modules supporting:
 - PDF export
 - Custom column selection
 - Filtered data export
+- Streaming CSV/XLSX export for large querysets (constant memory)
 """
 
 import csv
 import io
+import itertools
+import logging
+import tempfile
+import time
 from datetime import datetime
-from django.http import HttpResponse
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
 from django.utils.text import slugify
 
+logger = logging.getLogger(__name__)
+
+# Rows fetched per database round trip when streaming
+DEFAULT_CHUNK_SIZE = 2000
+
+# CSV rows buffered into each streamed chunk
+CSV_ROWS_PER_CHUNK = 500
+
 
 class DataExporter:
     """
@@ -36,9 +53,13 @@ class DataExporter:
 
         # Export to PDF
         response = exporter.to_pdf(title="My Report")
+
+        # Stream large exports (constant memory)
+        response = exporter.to_csv_stream()
+        response = exporter.to_excel_stream()
     """
 
-    def __init__(self, queryset, fields, headers=None, filename='export'):
+    def __init__(self, queryset, fields, headers=None, filename='export', chunk_size=None):
         """
         Initialize exporter.
 
@@ -47,11 +68,18 @@ class DataExporter:
             fields: List of field names to export
             headers: List of header labels (defaults to fields if not provided)
             filename: Base filename for export (without extension)
+            chunk_size: Rows fetched per database round trip when iterating
         """
         self.queryset = queryset
         self.fields = fields
         self.headers = headers or fields
         self.filename = slugify(filename)
+        self.chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        # Filled in by iter_rows(): rows, queries, seconds
+        self.stats = {}
+
+    def _get_timestamped_filename(self, extension):
+        return f'{self.filename}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
 
     def _get_field_value(self, obj, field):
         """Get field value from object, handling nested fields and callables."""
@@ -82,16 +110,133 @@ class DataExporter:
         except Exception:
             return ''
 
+    def _get_projection(self):
+        """
+        Return the fields as a values_list() projection, or None.
+
+        A projection is only used when every field is a concrete column,
+        reached through forward foreign keys - callables, properties and
+        paths ending in a relation (rendered with str()) need the objects.
+        """
+        model = self.queryset.model
+        for path in self.fields:
+            current = model
+            parts = path.split('__')
+            for depth, part in enumerate(parts):
+                try:
+                    field = current._meta.get_field(part)
+                except FieldDoesNotExist:
+                    return None
+                if depth < len(parts) - 1:
+                    if not field.is_relation or not (field.many_to_one or field.one_to_one) or field.auto_created:
+                        return None
+                    current = field.related_model
+                elif field.is_relation or not field.concrete:
+                    return None
+        return list(self.fields)
+
+    def _get_related_lookups(self):
+        """
+        Plan the joins needed to render the field paths from objects.
+
+        Forward foreign keys/one-to-ones along a path (including one the path
+        ends on, which is rendered with str()) are joined with
+        select_related; generic foreign keys are prefetched. To-many paths
+        are not planned: _get_field_value cannot render them, so loading
+        them would only add queries.
+
+        Returns:
+            (select_related, prefetch_related) lists of lookups
+        """
+        select_related = set()
+        prefetch_related = set()
+
+        for path in self.fields:
+            current = self.queryset.model
+            parts = path.split('__')
+            for depth, part in enumerate(parts):
+                lookup = '__'.join(parts[:depth + 1])
+                try:
+                    field = current._meta.get_field(part)
+                except FieldDoesNotExist:
+                    # Property or callable - nothing further to plan
+                    break
+                if not field.is_relation or not (field.many_to_one or field.one_to_one):
+                    break
+                if isinstance(field, GenericForeignKey):
+                    prefetch_related.add(lookup)
+                    break
+                select_related.add(lookup)
+                current = field.related_model
+
+        return sorted(select_related), sorted(prefetch_related)
+
+    def get_object_queryset(self):
+        """The queryset with the joins/prefetches the field paths need."""
+        queryset = self.queryset
+        select_related, prefetch_related = self._get_related_lookups()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def iter_rows(self):
+        """
+        Yield export rows (lists of strings) one at a time.
+
+        Rows are fetched in chunks of chunk_size with a server-side cursor
+        where the database supports it, from a values_list() projection when
+        possible, so memory use does not grow with the row count. Otherwise
+        related objects are loaded with planned select_related /
+        prefetch_related instead of one lazy fetch per row and hop.
+
+        Query count and timing are logged at DEBUG level and kept in
+        self.stats.
+        """
+        projection = self._get_projection()
+        stats = {'rows': 0, 'queries': 0, 'seconds': 0.0}
+        self.stats = stats
+
+        def count_queries(execute, sql, params, many, context):
+            stats['queries'] += 1
+            return execute(sql, params, many, context)
+
+        if projection is not None:
+            rows = self.queryset.values_list(*projection).iterator(chunk_size=self.chunk_size)
+
+            def render(values):
+                return ['' if value is None else str(value) for value in values]
+        else:
+            rows = self.get_object_queryset().iterator(chunk_size=self.chunk_size)
+
+            def render(obj):
+                return [self._get_field_value(obj, field) for field in self.fields]
+
+        # The wrapper is only installed while fetching and rendering a row,
+        # not while the consumer holds the generator between rows
+        wrapper = connections[self.queryset.db].execute_wrapper
+        started = time.perf_counter()
+        try:
+            while True:
+                with wrapper(count_queries):
+                    row = next(rows, None)
+                    if row is None:
+                        break
+                    values = render(row)
+                stats['rows'] += 1
+                yield values
+        finally:
+            stats['seconds'] = time.perf_counter() - started
+            logger.debug(
+                f"Exported {stats['rows']} {self.queryset.model.__name__} rows in "
+                f"{stats['queries']} queries ({stats['seconds']:.2f}s, "
+                f"{'projection' if projection is not None else 'objects'})"
+            )
+
     def _prepare_data(self):
         """Prepare data rows for export."""
-        rows = []
-        for obj in self.queryset:
-            row = []
-            for field in self.fields:
-                value = self._get_field_value(obj, field)
-                row.append(value)
-            rows.append(row)
-        return rows
+        return list(self.iter_rows())
 
     def to_csv(self):
         """Export to CSV format."""
@@ -109,6 +254,36 @@ class DataExporter:
 
         return response
 
+    def _iter_csv(self):
+        """Yield CSV text in chunks of CSV_ROWS_PER_CHUNK rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.headers)
+
+        pending = 1
+        for row in self.iter_rows():
+            writer.writerow(row)
+            pending += 1
+            if pending >= CSV_ROWS_PER_CHUNK:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        if pending:
+            yield buffer.getvalue()
+
+    def to_csv_stream(self):
+        """
+        Export to CSV as a streaming response.
+
+        The first bytes go out as soon as the first chunk of rows is read,
+        and memory stays constant regardless of the row count.
+        """
+        response = StreamingHttpResponse(self._iter_csv(), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{self._get_timestamped_filename("csv")}"'
+        return response
+
     def to_excel(self):
         """Export to Excel (XLSX) format."""
         try:
@@ -168,6 +343,58 @@ class DataExporter:
 
         return response
 
+    def to_excel_stream(self):
+        """
+        Export to Excel (XLSX) with constant memory.
+
+        Uses an openpyxl write-only workbook, spooled to a temporary file and
+        streamed from there (XLSX is a zip archive, so it cannot be sent
+        before the last row is written). Columns are sized from the headers
+        since write-only sheets cannot be measured after the fact.
+        """
+        try:
+            import openpyxl
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font, PatternFill, Alignment
+            from openpyxl.utils import get_column_letter
+        except ImportError:
+            # Fallback to CSV if openpyxl not installed
+            return self.to_csv_stream()
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title='Export')
+
+        for col, header in enumerate(self.headers, 1):
+            ws.column_dimensions[get_column_letter(col)].width = min(max(len(str(header)) + 2, 12), 50)
+
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in self.iter_rows():
+            ws.append(row)
+
+        output = tempfile.TemporaryFile()
+        wb.save(output)
+        output.seek(0)
+
+        # FileResponse streams the file in blocks and closes it when done
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=self._get_timestamped_filename('xlsx'),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
     def to_pdf(self, title='Export Report', orientation='portrait'):
         """
         Export to PDF format.
@@ -216,8 +443,9 @@ class DataExporter:
         elements.append(Spacer(1, 0.3 * inch))
 
         # Prepare table data
+        # Only 1000 rows are rendered; read one more to know if there are more
         data = [self.headers]
-        data.extend(self._prepare_data())
+        data.extend(itertools.islice(self.iter_rows(), 1001))
 
         # Limit data if too many rows (PDF performance)
         if len(data) > 1001:  # 1000 data rows + 1 header
@@ -324,7 +552,7 @@ class ExportHistory:
             return []
 
 
-def export_queryset(request, queryset, fields, headers=None, filename='export', format='csv'):
+def export_queryset(request, queryset, fields, headers=None, filename='export', format='csv', stream=None):
     """
     Helper function to quickly export a queryset.
 
@@ -335,9 +563,12 @@ def export_queryset(request, queryset, fields, headers=None, filename='export',
         headers: List of header labels
         filename: Base filename
         format: 'csv', 'excel', or 'pdf'
+        stream: Use the streaming (constant memory) CSV/Excel path. Defaults
+            to streaming when the queryset has more than
+            EXPORT_STREAMING_THRESHOLD rows.
 
     Returns:
-        HttpResponse with exported file
+        HttpResponse (or a streaming response) with exported file
     """
     exporter = DataExporter(
         queryset=queryset,
@@ -346,19 +577,24 @@ def export_queryset(request, queryset, fields, headers=None, filename='export',
         filename=filename
     )
 
+    record_count = queryset.count()
+
     # Track export
     if hasattr(request, 'user') and request.user.is_authenticated:
         ExportHistory.add_export(
             user=request.user,
             export_type=format,
             model_name=queryset.model.__name__,
-            record_count=queryset.count()
+            record_count=record_count
         )
 
+    if stream is None:
+        stream = record_count > getattr(settings, 'EXPORT_STREAMING_THRESHOLD', 10000)
+
     # Export based on format
     if format == 'excel':
-        return exporter.to_excel()
+        return exporter.to_excel_stream() if stream else exporter.to_excel()
     elif format == 'pdf':
         return exporter.to_pdf(title=f"{queryset.model._meta.verbose_name_plural} Report")
     else:  # csv
-        return exporter.to_csv()
+        return exporter.to_csv_stream() if stream else exporter.to_csv()
@@ -65,6 +65,31 @@ def health_check(request):
             'message': str(e)
         }
 
+    # Activity log writer back-pressure (informational)
+    from . import activity_buffer
+    if activity_buffer.is_enabled():
+        metrics = activity_buffer.get_buffer().get_metrics()
+        saturated = metrics['queue_depth'] >= metrics['queue_capacity']
+        health_status['components']['activity_log'] = dict(
+            metrics, status='degraded' if saturated else 'healthy'
+        )
+
+    # Page view / session heartbeat writer (informational)
+    from floor_app.operations.analytics import buffer as analytics_buffer
+    if analytics_buffer.is_enabled():
+        metrics = analytics_buffer.get_buffer().get_metrics()
+        saturated = metrics['queue_depth'] >= metrics['queue_capacity']
+        health_status['components']['analytics'] = dict(
+            metrics, status='degraded' if saturated else 'healthy'
+        )
+
+    # Time request telemetry adds per request (informational)
+    from floor_app.operations.analytics.middleware import telemetry
+    stats = telemetry.overhead.as_dict()
+    health_status['components']['telemetry'] = dict(
+        stats, status='degraded' if stats['avg_ms'] > stats['budget_ms'] else 'healthy'
+    )
+
     # Check Python version
     health_status['components']['python'] = {
         'status': 'healthy',
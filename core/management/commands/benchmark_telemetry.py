@@ -0,0 +1,107 @@
+"""
+Management command to measure the per-request cost of request telemetry.
+
+Runs the same synthetic request through the old middleware stack
+(CurrentRequestMiddleware + AnalyticsMiddleware + EventTrackingMiddleware)
+and through TelemetryMiddleware with equivalent sinks, and reports the
+time each adds on top of a bare view, against
+ANALYTICS_TELEMETRY_BUDGET_MS. Writes are made inside a transaction that
+is rolled back, and buffered rows are discarded.
+
+Usage:
+    python manage.py benchmark_telemetry
+    python manage.py benchmark_telemetry --path /inventory/ --requests 5000 --user admin
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import Resolver404, resolve
+
+from floor_app.middleware import CurrentRequestMiddleware
+from floor_app.operations.analytics import buffer as analytics_buffer
+from floor_app.operations.analytics import telemetry
+from floor_app.operations.analytics.middleware import (
+    AnalyticsMiddleware, EventTrackingMiddleware, TelemetryMiddleware,
+)
+from floor_app.operations.analytics.middleware.telemetry import OverheadStats
+from floor_app.operations.analytics.models import UserSession
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the per-request overhead of request telemetry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='Path the synthetic requests are for')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per stack')
+        parser.add_argument('--user', help='Username to attach (default: first superuser)')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No user to attach - pass --user')
+
+        try:
+            match = resolve(options['path'])
+        except Resolver404:
+            match = None
+
+        def view(request):
+            request.resolver_match = match
+            return HttpResponse('ok')
+
+        n = options['requests']
+        factory = RequestFactory()
+        session_store = import_module(settings.SESSION_ENGINE).SessionStore
+        budget = getattr(settings, 'ANALYTICS_TELEMETRY_BUDGET_MS', 1.0)
+
+        with transaction.atomic(), override_settings(ANALYTICS_BUFFERED=True):
+            analytics_session = UserSession.objects.create(user=user, session_key='benchmark')
+
+            def make_request():
+                request = factory.get(options['path'], {'page': '2'})
+                request.user = user
+                request.session = session_store()
+                request.session._session_cache = {'analytics_session_id': analytics_session.pk}
+                return request
+
+            stacks = [
+                ('bare view', view),
+                ('old stack', CurrentRequestMiddleware(AnalyticsMiddleware(EventTrackingMiddleware(view)))),
+                ('telemetry', TelemetryMiddleware(view, sinks=[
+                    telemetry.PageViewSink(), telemetry.AppEventSink(), telemetry.ErrorLogSink(),
+                ], stats=OverheadStats(budget))),
+            ]
+
+            original_buffer = analytics_buffer._buffer
+            analytics_buffer._buffer = analytics_buffer.TelemetryBuffer(max_queue=n * 4, background=False)
+            try:
+                timings = {}
+                for name, handler in stacks:
+                    requests = [make_request() for _ in range(n)]
+                    started = time.perf_counter()
+                    for request in requests:
+                        handler(request)
+                    timings[name] = (time.perf_counter() - started) * 1000 / n
+            finally:
+                analytics_buffer._buffer = original_buffer
+                transaction.set_rollback(True)
+
+        self.stdout.write(f"{n} requests to {options['path']} "
+                          f"({match.view_name if match else 'unresolved'}), budget {budget} ms")
+        bare = timings.pop('bare view')
+        for name, per_request in timings.items():
+            overhead = per_request - bare
+            verdict = self.style.SUCCESS('within budget') if overhead <= budget else self.style.ERROR('OVER budget')
+            self.stdout.write(f'  - {name:9} +{overhead:7.3f} ms per request  {verdict}')
@@ -0,0 +1,83 @@
+"""
+Management command to purge aged log and event rows.
+
+Applies the retention policies in core.retention (ActivityLog,
+Notification, AppEvent, PageView, ScanLog, GPSTrackingLog), deleting in
+bounded pk-range batches with a pause between batches.
+
+Usage:
+    python manage.py purge_old_records --dry-run
+    python manage.py purge_old_records
+    python manage.py purge_old_records --model analytics.PageView --days 30
+    python manage.py purge_old_records --batch-size 10000 --sleep 0.5 --max-batches 100
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import retention
+
+
+class Command(BaseCommand):
+    help = 'Delete log/event rows older than their retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Only purge this model path (repeatable), e.g. analytics.PageView',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Override the retention period (requires a single --model)',
+        )
+        parser.add_argument('--batch-size', type=int, help='Width of each pk range')
+        parser.add_argument('--sleep', type=float, help='Seconds to pause between batches')
+        parser.add_argument('--max-batches', type=int, help='Stop each model after this many batches')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        policies = retention.get_policies()
+        model_paths = options['models'] or list(policies)
+
+        unknown = [m for m in model_paths if m not in policies]
+        if unknown:
+            raise CommandError(f"No retention policy for: {', '.join(unknown)}")
+        if options['days'] is not None and len(model_paths) != 1:
+            raise CommandError('--days requires exactly one --model')
+
+        total = 0
+        for model_path in model_paths:
+            policy = policies[model_path]
+            if options['days'] is not None:
+                policy.days = options['days']
+
+            result = retention.purge(
+                policy,
+                batch_size=options['batch_size'],
+                sleep=options['sleep'],
+                dry_run=options['dry_run'],
+                max_batches=options['max_batches'],
+            )
+
+            if result.get('skipped'):
+                self.stdout.write(f'  - {model_path}: skipped ({result["skipped"]})')
+            elif options['dry_run']:
+                total += result['would_delete']
+                self.stdout.write(
+                    f'  - {model_path}: {result["would_delete"]} rows older than '
+                    f'{result["cutoff"]:%Y-%m-%d} ({policy.days} days)'
+                )
+            else:
+                total += result['deleted']
+                self.stdout.write(
+                    f'  - {model_path}: deleted {result["deleted"]} rows in '
+                    f'{result["batches"]} batches ({result["seconds"]:.1f}s)'
+                )
+
+        verb = 'would be deleted' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(f'{total} rows {verb}'))
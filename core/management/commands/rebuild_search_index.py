@@ -0,0 +1,49 @@
+"""
+Management command to rebuild the global search index.
+
+Usage:
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model hr.HRPeople --model inventory.Item
+    python manage.py rebuild_search_index --batch-size 1000
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search_index
+from core.search_utils import GlobalSearch
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the global search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Only rebuild this model path (repeatable), e.g. hr.HRPeople',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=search_index.DEFAULT_BATCH_SIZE,
+            help='Objects indexed per bulk write',
+        )
+
+    def handle(self, *args, **options):
+        model_paths = options['models']
+        if model_paths:
+            unknown = [m for m in model_paths if m not in GlobalSearch.SEARCHABLE_MODELS]
+            if unknown:
+                raise CommandError(f"Not searchable: {', '.join(unknown)}")
+
+        self.stdout.write('Rebuilding search index...')
+        results = search_index.rebuild(model_paths=model_paths, batch_size=options['batch_size'])
+
+        for model_path, count in results.items():
+            self.stdout.write(f'  - {model_path}: {count} documents')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt: {sum(results.values())} documents'
+        ))
+        if not search_index.is_enabled():
+            self.stdout.write('Set SEARCH_INDEX_ENABLED=True to search through the index.')
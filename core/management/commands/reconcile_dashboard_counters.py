@@ -0,0 +1,48 @@
+"""
+Management command to reconcile the materialized dashboard counters.
+
+Recomputes every counter from its source table, repairing drift from bulk
+updates/deletes that bypass signals. Schedule it periodically (e.g. hourly
+from cron).
+
+Usage:
+    python manage.py reconcile_dashboard_counters
+    python manage.py reconcile_dashboard_counters --key hr_summary.employees
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import dashboard_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the main dashboard counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--key',
+            action='append',
+            dest='keys',
+            help='Only reconcile this counter (repeatable), e.g. hr_summary.employees',
+        )
+
+    def handle(self, *args, **options):
+        keys = options['keys']
+        if keys:
+            known = {counter.key for counter in dashboard_counters.COUNTERS}
+            unknown = [k for k in keys if k not in known]
+            if unknown:
+                raise CommandError(f"Unknown counters: {', '.join(unknown)}")
+
+        results = dashboard_counters.reconcile(keys=keys)
+
+        drifted = 0
+        for key, (before, value) in results.items():
+            if before is None:
+                self.stdout.write(f'  - {key}: initialised at {value}')
+            elif before != value:
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f'  - {key}: {before} -> {value}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {len(results)} counters ({drifted} drifted)'
+        ))
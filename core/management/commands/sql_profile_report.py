@@ -0,0 +1,77 @@
+"""
+Management command to list the views that spend the most time in SQL.
+
+By default it merges the aggregates that web processes running
+TelemetryMiddleware with its QueryProfileSink publish to the cache (this needs a cache shared
+between processes, e.g. Redis). With --url it profiles the given paths in
+this process instead, which works anywhere.
+
+Usage:
+    python manage.py sql_profile_report
+    python manage.py sql_profile_report --sort n_plus_one --limit 10
+    python manage.py sql_profile_report --url /inventory/items/ --url /sales/ --user admin --repeat 3
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core import query_profiler
+
+
+class Command(BaseCommand):
+    help = 'Show the most expensive views by SQL time, query count and N+1 suspects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=sorted(query_profiler.SORT_KEYS), default='sql_ms')
+        parser.add_argument('--limit', type=int, default=20, help='Number of views to show')
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='Profile this path in-process instead (repeatable)')
+        parser.add_argument('--user', help='Username to log in as for --url')
+        parser.add_argument('--repeat', type=int, default=1, help='Requests per --url')
+
+    def handle(self, *args, **options):
+        if options['urls']:
+            aggregate = self._profile_urls(options['urls'], options['user'], options['repeat'])
+        else:
+            aggregate = query_profiler.get_published()
+            if not aggregate:
+                self.stdout.write(self.style.WARNING(
+                    'No published profiles - is SQL_PROFILER_ENABLED set and the cache shared? '
+                    'Use --url to profile paths in this process.'
+                ))
+                return
+
+        rows = query_profiler.build_report(aggregate, sort=options['sort'], limit=options['limit'])
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']}: {row['requests']} req | queries avg {row['avg_queries']} "
+                f"p95 {row['p95_queries']} max {row['max_queries']} | "
+                f"SQL ms avg {row['avg_sql_ms']} p95 {row['p95_sql_ms']} total {row['total_sql_ms']}"
+            )
+            for suspect in row['n_plus_one'][:3]:
+                self.stdout.write(
+                    f"    N+1 x{suspect['max_repeats']} in {suspect['requests']} req: "
+                    f"{suspect['fingerprint'][:160]}"
+                )
+
+    def _profile_urls(self, urls, username, repeat):
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        if username:
+            User = get_user_model()
+            try:
+                client.force_login(User.objects.get(username=username))
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user: {username}")
+
+        store = query_profiler.ProfileStore()
+        for url in urls:
+            for _ in range(repeat):
+                with query_profiler.RequestProfile() as profile:
+                    response = client.get(url)
+                match = getattr(response, 'resolver_match', None)
+                view_name = match.view_name if match else url
+                if response.status_code >= 400:
+                    self.stdout.write(self.style.WARNING(f'{url} returned {response.status_code}'))
+                store.record(view_name, profile)
+        return store.aggregate()
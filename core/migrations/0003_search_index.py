@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0002_activitylog_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.BigIntegerField(help_text='ID of indexed object')),
+                ('model_path', models.CharField(db_index=True, help_text='Model path as configured in GlobalSearch (e.g., hr.HRPeople)', max_length=100)),
+                ('display', models.CharField(blank=True, default='', help_text='Display text shown in search results', max_length=255)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(help_text='Type of indexed object', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'core_search_document',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text='Normalized (lowercased) token', max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1, help_text='Ranking weight of the field the token came from')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='core.searchdocument')),
+            ],
+            options={
+                'verbose_name': 'Search Token',
+                'verbose_name_plural': 'Search Tokens',
+                'db_table': 'core_search_token',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['token'], name='ix_search_token_prefix', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['token', 'document'], name='ix_search_token_doc'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchtoken',
+            constraint=models.UniqueConstraint(fields=('document', 'token'), name='unique_search_token'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Counter key (e.g., hr_summary.employees)', max_length=100, unique=True)),
+                ('value', models.DecimalField(decimal_places=2, default=0, help_text='Current row count or summed amount', max_digits=20)),
+                ('reconciled_at', models.DateTimeField(blank=True, help_text='When the value was last recomputed from the source table', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Dashboard Counter',
+                'verbose_name_plural': 'Dashboard Counters',
+                'db_table': 'core_dashboard_counter',
+                'ordering': ['key'],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dashboard_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearchFilter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('module', models.CharField(blank=True, default='', help_text='Module the filter applies to (blank for all)', max_length=50)),
+                ('filters', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_filters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saved Filter',
+                'verbose_name_plural': 'Saved Filters',
+                'db_table': 'core_saved_filter',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'module', 'name'), name='unique_saved_filter')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchHistoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(max_length=255)),
+                ('module', models.CharField(blank=True, default='', help_text='Module the search was limited to (blank for all)', max_length=50)),
+                ('searched_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_history', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Search History Entry',
+                'verbose_name_plural': 'Search History',
+                'db_table': 'core_search_history',
+                'ordering': ['-searched_at'],
+                'indexes': [models.Index(fields=['user', '-searched_at'], name='ix_search_history_recent')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'query'), name='unique_search_history_query')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_activity_log_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Sequence key (e.g., purchasing.purchaseorder.po_number:PO-2026-)', max_length=150, unique=True)),
+                ('last_value', models.BigIntegerField(default=0, help_text='Highest number reserved so far')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document Sequence',
+                'verbose_name_plural': 'Document Sequences',
+                'db_table': 'core_document_sequence',
+                'ordering': ['key'],
+            },
+        ),
+    ]
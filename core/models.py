@@ -7,19 +7,32 @@ Includes:
 - Cost Centers and organizational units
 - Loss of Sale tracking
 - Finance integration support
+- Global search index (tokenized inverted index)
+- Materialized dashboard counters
+- Document number sequences
+- Search history and saved filters
 """
 from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from collections import OrderedDict
 from decimal import Decimal
+import threading
+import time
 
 
 # ============================================================================
 # USER PREFERENCES
 # ============================================================================
 
+# Per-process display preferences, used when the cache is not shared:
+# user_id -> (expires_at, display), least recently used first
+_local_display = OrderedDict()
+_local_display_lock = threading.Lock()
+
 class UserPreference(models.Model):
     """
     Stores user-specific UI preferences including themes, font sizes,
@@ -127,6 +140,105 @@ class UserPreference(models.Model):
         preference, created = cls.objects.get_or_create(user=user)
         return preference
 
+    # Fields the base templates need on every page (see core.context_processors)
+    DISPLAY_FIELDS = ('theme', 'font_size', 'table_density', 'sidebar_collapsed')
+    DISPLAY_CACHE_TIMEOUT = 3600
+    # Without a shared cache other workers' saves show up within this long
+    DISPLAY_LOCAL_TTL = 30
+    DISPLAY_LOCAL_SIZE = 1024
+
+    @staticmethod
+    def _display_version_key(user_id):
+        return f'user_pref_version:{user_id}'
+
+    @staticmethod
+    def _display_cache():
+        """
+        The default cache if all workers share it, else None.
+
+        A process-local cache (LocMemCache, the default without CACHES)
+        would only see version bumps made by its own worker, so the others
+        would keep serving stale preferences until the entries expire.
+        """
+        from django.core.cache import caches
+        from django.core.cache.backends.dummy import DummyCache
+        from django.core.cache.backends.locmem import LocMemCache
+
+        cache = caches['default']
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            return None
+        return cache
+
+    @classmethod
+    def _load_display_preferences(cls, user_id):
+        display = cls.objects.filter(user_id=user_id).values(*cls.DISPLAY_FIELDS).first()
+        if display is None:
+            display = {name: cls._meta.get_field(name).get_default() for name in cls.DISPLAY_FIELDS}
+        return display
+
+    @classmethod
+    def _get_local_display_preferences(cls, user_id):
+        now = time.monotonic()
+        with _local_display_lock:
+            entry = _local_display.get(user_id)
+            if entry is not None and entry[0] > now:
+                _local_display.move_to_end(user_id)
+                return entry[1]
+
+        display = cls._load_display_preferences(user_id)
+        with _local_display_lock:
+            _local_display[user_id] = (now + cls.DISPLAY_LOCAL_TTL, display)
+            _local_display.move_to_end(user_id)
+            while len(_local_display) > cls.DISPLAY_LOCAL_SIZE:
+                _local_display.popitem(last=False)
+        return display
+
+    @classmethod
+    def get_display_preferences(cls, user):
+        """
+        Get the display fields for a user, cached per user.
+
+        Cache entries are keyed by a per-user version stamp that is bumped
+        whenever the preferences are saved (see invalidate_display_cache),
+        so a stale read can never be cached under the current version.
+        Without a cache shared by all workers (CACHES) the version stamp
+        cannot be shared either, so entries are kept per process for
+        DISPLAY_LOCAL_TTL seconds instead. Only DISPLAY_FIELDS are loaded;
+        users without a row get the defaults.
+        """
+        cache = cls._display_cache()
+        if cache is None:
+            return cls._get_local_display_preferences(user.pk)
+
+        version_key = cls._display_version_key(user.pk)
+        version = cache.get(version_key)
+        if version is None:
+            # Time-based start, so a stamp lost to eviction never goes backwards
+            cache.add(version_key, int(time.time() * 1000), None)
+            version = cache.get(version_key)
+
+        data_key = f'user_pref_display:{user.pk}:{version}'
+        display = cache.get(data_key)
+        if display is None:
+            display = cls._load_display_preferences(user.pk)
+            cache.set(data_key, display, cls.DISPLAY_CACHE_TIMEOUT)
+        return display
+
+    @classmethod
+    def invalidate_display_cache(cls, user_id):
+        """Bump the user's version stamp so cached display fields are reloaded."""
+        with _local_display_lock:
+            _local_display.pop(user_id, None)
+
+        cache = cls._display_cache()
+        if cache is None:
+            return
+        try:
+            cache.incr(cls._display_version_key(user_id))
+        except ValueError:
+            # No stamp cached - nothing can be stale
+            pass
+
 
 # ============================================================================
 # COST CENTER / ORGANIZATIONAL UNITS
@@ -1107,8 +1219,8 @@ class ActivityLog(models.Model):
         help_text='Browser user agent string'
     )
 
-    # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Metadata (set when the action is logged, not when a buffered row is written)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         db_table = 'core_activity_log'
@@ -1125,3 +1237,271 @@ class ActivityLog(models.Model):
     def __str__(self):
         username = self.user.username if self.user else 'System'
         return f"{username} {self.action} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+# ============================================================================
+# GLOBAL SEARCH INDEX
+# ============================================================================
+
+class SearchDocument(models.Model):
+    """
+    One indexed record per searchable object.
+
+    Holds the pre-rendered display text so search results can be built
+    without loading the source objects. Maintained by core.search_index.
+    """
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        help_text='Type of indexed object'
+    )
+
+    object_id = models.BigIntegerField(
+        help_text='ID of indexed object'
+    )
+
+    content_object = GenericForeignKey('content_type', 'object_id')
+
+    model_path = models.CharField(
+        max_length=100,
+        db_index=True,
+        help_text='Model path as configured in GlobalSearch (e.g., hr.HRPeople)'
+    )
+
+    display = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text='Display text shown in search results'
+    )
+
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_search_document'
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_type', 'object_id'],
+                name='unique_search_document'
+            )
+        ]
+        indexes = [
+            # Incremental autocomplete refresh reads rows indexed since the last one
+            models.Index(fields=['indexed_at'], name='ix_search_document_indexed'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_path}:{self.object_id} - {self.display}"
+
+
+class SearchToken(models.Model):
+    """
+    Inverted index entry: one normalized token of a SearchDocument.
+
+    Tokens are stored lowercased so prefix lookups can use a plain
+    (pattern-ops) b-tree index instead of scanning the source tables.
+    """
+
+    document = models.ForeignKey(
+        SearchDocument,
+        on_delete=models.CASCADE,
+        related_name='tokens'
+    )
+
+    token = models.CharField(
+        max_length=64,
+        help_text='Normalized (lowercased) token'
+    )
+
+    weight = models.PositiveSmallIntegerField(
+        default=1,
+        help_text='Ranking weight of the field the token came from'
+    )
+
+    class Meta:
+        db_table = 'core_search_token'
+        verbose_name = 'Search Token'
+        verbose_name_plural = 'Search Tokens'
+        indexes = [
+            # opclasses are only applied on PostgreSQL; other backends ignore them
+            models.Index(fields=['token'], name='ix_search_token_prefix', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['token', 'document'], name='ix_search_token_doc'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'token'],
+                name='unique_search_token'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.document_id}"
+
+
+# ============================================================================
+# DASHBOARD COUNTERS
+# ============================================================================
+
+class DashboardCounter(models.Model):
+    """
+    Materialized figure shown on the main dashboard.
+
+    Adjusted incrementally by signals and periodically reconciled against
+    the source tables (see core.dashboard_counters).
+    """
+
+    key = models.CharField(
+        max_length=100,
+        unique=True,
+        help_text='Counter key (e.g., hr_summary.employees)'
+    )
+
+    value = models.DecimalField(
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+        help_text='Current row count or summed amount'
+    )
+
+    reconciled_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the value was last recomputed from the source table'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_dashboard_counter'
+        verbose_name = 'Dashboard Counter'
+        verbose_name_plural = 'Dashboard Counters'
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+# ============================================================================
+# DOCUMENT SEQUENCES
+# ============================================================================
+
+class DocumentSequence(models.Model):
+    """
+    Last number handed out for one document numbering sequence.
+
+    Rows are locked with select_for_update while numbers are reserved
+    (see core.sequences); a row is seeded from the highest existing
+    document number the first time its key is used.
+    """
+
+    key = models.CharField(
+        max_length=150,
+        unique=True,
+        help_text='Sequence key (e.g., purchasing.purchaseorder.po_number:PO-2026-)'
+    )
+
+    last_value = models.BigIntegerField(
+        default=0,
+        help_text='Highest number reserved so far'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_document_sequence'
+        verbose_name = 'Document Sequence'
+        verbose_name_plural = 'Document Sequences'
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.key} = {self.last_value}"
+
+
+# ============================================================================
+# SEARCH HISTORY AND SAVED FILTERS
+# ============================================================================
+
+class SearchHistoryEntry(models.Model):
+    """
+    One recent search of a user (see core.search_utils.SearchHistory).
+
+    One row per distinct query; repeating a search refreshes searched_at.
+    Rows beyond the newest SearchHistory.MAX_ENTRIES are trimmed.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='search_history'
+    )
+
+    query = models.CharField(max_length=255)
+
+    module = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text='Module the search was limited to (blank for all)'
+    )
+
+    searched_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'core_search_history'
+        verbose_name = 'Search History Entry'
+        verbose_name_plural = 'Search History'
+        ordering = ['-searched_at']
+        indexes = [
+            models.Index(fields=['user', '-searched_at'], name='ix_search_history_recent'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'query'],
+                name='unique_search_history_query'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.query}"
+
+
+class SavedSearchFilter(models.Model):
+    """A named filter preset of a user (see core.search_utils.SavedFilter)."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_filters'
+    )
+
+    name = models.CharField(max_length=100)
+
+    module = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text='Module the filter applies to (blank for all)'
+    )
+
+    filters = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'core_saved_filter'
+        verbose_name = 'Saved Filter'
+        verbose_name_plural = 'Saved Filters'
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'module', 'name'],
+                name='unique_saved_filter'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.module or 'all'})"
@@ -2,11 +2,15 @@
 Notification and Activity Logging Utilities
 
 Provides easy-to-use functions for creating notifications and logging activities.
+Activity logs are written through the buffered writer in core.activity_buffer
+(ACTIVITY_LOG_BUFFERED), so logging does not add an insert to the request.
 """
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
-from django.utils import timezone
+from django.db import transaction
+
+from . import activity_buffer
 
 User = get_user_model()
 
@@ -120,7 +124,8 @@ def log_activity(user, action, description, related_object=None, extra_data=None
         request: Optional HttpRequest object to capture IP and user agent
 
     Returns:
-        ActivityLog object
+        ActivityLog object (unsaved until the buffer flushes when
+        ACTIVITY_LOG_BUFFERED is on)
     """
     from core.models import ActivityLog
 
@@ -149,7 +154,12 @@ def log_activity(user, action, description, related_object=None, extra_data=None
         # Get user agent
         activity.user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
 
-    activity.save()
+    if activity_buffer.is_enabled():
+        # Queue once committed, so rolled back actions are not logged
+        buffer = activity_buffer.get_buffer()
+        transaction.on_commit(lambda: buffer.add(activity))
+    else:
+        activity.save()
     return activity
 
 
@@ -248,43 +258,34 @@ def cleanup_old_notifications(days=90):
     """
     Clean up old read notifications.
 
+    Deletes in bounded batches through core.retention.
+
     Args:
         days: Delete read notifications older than this many days
 
     Returns:
         Number of notifications deleted
     """
-    from core.models import Notification
-    from datetime import timedelta
+    from core import retention
 
-    cutoff_date = timezone.now() - timedelta(days=days)
-    old_notifications = Notification.objects.filter(
-        is_read=True,
-        read_at__lt=cutoff_date
-    )
-    count = old_notifications.count()
-    old_notifications.delete()
-    return count
+    return retention.purge(retention.get_policy('core.Notification', days=days))['deleted']
 
 
 def cleanup_old_activities(days=365):
     """
     Clean up old activity logs.
 
+    Deletes in bounded batches through core.retention.
+
     Args:
         days: Delete activities older than this many days
 
     Returns:
         Number of activities deleted
     """
-    from core.models import ActivityLog
-    from datetime import timedelta
+    from core import retention
 
-    cutoff_date = timezone.now() - timedelta(days=days)
-    old_activities = ActivityLog.objects.filter(created_at__lt=cutoff_date)
-    count = old_activities.count()
-    old_activities.delete()
-    return count
+    return retention.purge(retention.get_policy('core.ActivityLog', days=days))['deleted']
 
 
 # Decorator for automatic activity logging
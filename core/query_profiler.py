@@ -0,0 +1,335 @@
+"""
+Per-view SQL profiling.
+
+TelemetryMiddleware (analytics.middleware.telemetry) with its
+QueryProfileSink wraps a sample of requests with a database execute
+wrapper and records, per resolved view name:
+
+- queries per request and total SQL time, as fixed-bucket histograms;
+- repeated query fingerprints (the same statement with different
+  parameters run many times in one request - the usual N+1 shape).
+
+Samples are aggregated into one-minute slots and the report merges the
+slots of the rolling window, so memory stays bounded by
+views x slots regardless of traffic. Each process also publishes its
+aggregate to the cache so the management command can merge them:
+
+    python manage.py sql_profile_report --limit 20
+    python manage.py sql_profile_report --url /inventory/items/ --user admin
+
+Staff can read the same report as JSON from /api/sql-profile/.
+
+Settings:
+SQL_PROFILER_ENABLED = False              # Profile sampled requests
+SQL_PROFILER_SAMPLE_RATE = 0.05           # Fraction of requests profiled
+SQL_PROFILER_DUPLICATE_THRESHOLD = 5      # Repeats of one fingerprint = N+1 suspect
+SQL_PROFILER_SLOW_MS = 500                # Log requests with more SQL time than this
+SQL_PROFILER_WINDOW_SECONDS = 3600        # Rolling window of the report
+SQL_PROFILER_PUBLISH_SECONDS = 60         # How often a process publishes to the cache
+"""
+
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+SLOT_SECONDS = 60
+
+# Upper bucket edges; the last bucket is open-ended
+QUERY_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+TIME_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Suspects kept per view and slot, so one noisy view cannot grow unbounded
+MAX_SUSPECTS = 20
+
+CACHE_INDEX_KEY = 'sql_profiler:processes'
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_enabled():
+    return get_setting('SQL_PROFILER_ENABLED', False)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Normalize a statement so the same query with other parameters matches.
+
+    Django already sends parameters separately; this folds IN lists of any
+    length and the few literals inlined by raw SQL.
+    """
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    return _NUMBER_RE.sub('?', sql)
+
+
+def _bucket(edges, value):
+    for index, edge in enumerate(edges):
+        if value <= edge:
+            return index
+    return len(edges)
+
+
+class RequestProfile:
+    """
+    Collects the queries run while the context is active.
+
+    Usage:
+        with RequestProfile() as profile:
+            response = get_response(request)
+        profile.query_count, profile.sql_ms, profile.duplicates()
+    """
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.fingerprints = Counter()
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for conn in connections.all():
+            self._stack.enter_context(conn.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        return False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_ms += (time.perf_counter() - started) * 1000
+            self.query_count += 1
+            self.fingerprints[sql] += 1
+
+    def duplicates(self, threshold=None):
+        """{fingerprint: repeats} for statements run at least `threshold` times."""
+        if threshold is None:
+            threshold = get_setting('SQL_PROFILER_DUPLICATE_THRESHOLD', 5)
+        repeated = Counter()
+        for sql, count in self.fingerprints.items():
+            repeated[fingerprint(sql)] += count
+        return {fp: count for fp, count in repeated.items() if count >= threshold}
+
+
+def _new_stats():
+    return {
+        'requests': 0,
+        'queries': 0,
+        'sql_ms': 0.0,
+        'max_queries': 0,
+        'max_sql_ms': 0.0,
+        'query_hist': [0] * (len(QUERY_BUCKETS) + 1),
+        'time_hist': [0] * (len(TIME_BUCKETS_MS) + 1),
+        # fingerprint -> [requests flagged, max repeats in one request]
+        'suspects': {},
+    }
+
+
+def _merge_stats(into, stats):
+    into['requests'] += stats['requests']
+    into['queries'] += stats['queries']
+    into['sql_ms'] += stats['sql_ms']
+    into['max_queries'] = max(into['max_queries'], stats['max_queries'])
+    into['max_sql_ms'] = max(into['max_sql_ms'], stats['max_sql_ms'])
+    for hist in ('query_hist', 'time_hist'):
+        into[hist] = [a + b for a, b in zip(into[hist], stats[hist])]
+    for fp, (requests, repeats) in stats['suspects'].items():
+        current = into['suspects'].setdefault(fp, [0, 0])
+        current[0] += requests
+        current[1] = max(current[1], repeats)
+
+
+def _percentile(hist, edges, fraction, maximum):
+    """Upper edge of the bucket holding the given fraction of samples."""
+    total = sum(hist)
+    if not total:
+        return 0
+    running = 0
+    for index, count in enumerate(hist):
+        running += count
+        if running >= total * fraction:
+            # The open-ended bucket is bounded by the largest sample
+            return edges[index] if index < len(edges) else maximum
+    return maximum
+
+
+class ProfileStore:
+    """Rolling per-view aggregate of sampled request profiles."""
+
+    def __init__(self, window_seconds=None):
+        self.window_seconds = window_seconds or get_setting('SQL_PROFILER_WINDOW_SECONDS', 3600)
+        self._slots = {}  # slot start -> {view_name: stats}
+        self._lock = threading.Lock()
+        self._last_publish = 0.0
+
+    def record(self, view_name, profile, now=None):
+        """Add one request's profile to the current slot."""
+        now = now or time.time()
+        duplicates = profile.duplicates()
+        slot = int(now // SLOT_SECONDS) * SLOT_SECONDS
+
+        with self._lock:
+            views = self._slots.get(slot)
+            if views is None:
+                views = self._slots[slot] = {}
+                self._expire(now)
+            stats = views.get(view_name)
+            if stats is None:
+                stats = views[view_name] = _new_stats()
+
+            stats['requests'] += 1
+            stats['queries'] += profile.query_count
+            stats['sql_ms'] += profile.sql_ms
+            stats['max_queries'] = max(stats['max_queries'], profile.query_count)
+            stats['max_sql_ms'] = max(stats['max_sql_ms'], profile.sql_ms)
+            stats['query_hist'][_bucket(QUERY_BUCKETS, profile.query_count)] += 1
+            stats['time_hist'][_bucket(TIME_BUCKETS_MS, profile.sql_ms)] += 1
+
+            for fp, repeats in duplicates.items():
+                suspect = stats['suspects'].get(fp)
+                if suspect is None:
+                    if len(stats['suspects']) >= MAX_SUSPECTS:
+                        continue
+                    suspect = stats['suspects'][fp] = [0, 0]
+                suspect[0] += 1
+                suspect[1] = max(suspect[1], repeats)
+
+        slow_ms = get_setting('SQL_PROFILER_SLOW_MS', 500)
+        if profile.sql_ms >= slow_ms or duplicates:
+            worst = max(duplicates.items(), key=lambda item: item[1], default=None)
+            logger.warning(
+                f"SQL profile {view_name}: {profile.query_count} queries, {profile.sql_ms:.1f} ms"
+                + (f", N+1 suspect x{worst[1]}: {worst[0][:200]}" if worst else "")
+            )
+
+        if now - self._last_publish >= get_setting('SQL_PROFILER_PUBLISH_SECONDS', 60):
+            self._last_publish = now
+            self.publish()
+
+    def _expire(self, now):
+        oldest = now - self.window_seconds
+        for slot in [s for s in self._slots if s + SLOT_SECONDS <= oldest]:
+            del self._slots[slot]
+
+    def aggregate(self, now=None):
+        """Merged {view_name: stats} over the rolling window."""
+        oldest = (now or time.time()) - self.window_seconds
+        merged = {}
+        with self._lock:
+            for slot, views in self._slots.items():
+                if slot + SLOT_SECONDS <= oldest:
+                    continue
+                for view_name, stats in views.items():
+                    _merge_stats(merged.setdefault(view_name, _new_stats()), stats)
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._slots.clear()
+
+    def publish(self):
+        """Store this process's aggregate in the cache for sql_profile_report."""
+        key = f'sql_profiler:{socket.gethostname()}:{os.getpid()}'
+        try:
+            cache.set(key, self.aggregate(), self.window_seconds)
+            keys = cache.get(CACHE_INDEX_KEY) or []
+            if key not in keys:
+                cache.set(CACHE_INDEX_KEY, keys + [key], None)
+        except Exception as e:
+            logger.error(f"Error publishing SQL profile: {e}")
+
+
+def get_published():
+    """Merge the aggregates published by all processes."""
+    merged = {}
+    keys = cache.get(CACHE_INDEX_KEY) or []
+    published = cache.get_many(keys)
+    for aggregate in published.values():
+        for view_name, stats in aggregate.items():
+            _merge_stats(merged.setdefault(view_name, _new_stats()), stats)
+    # Forget processes whose entries expired
+    if len(published) != len(keys):
+        cache.set(CACHE_INDEX_KEY, list(published), None)
+    return merged
+
+
+SORT_KEYS = {
+    'sql_ms': lambda row: row['total_sql_ms'],
+    'queries': lambda row: row['avg_queries'],
+    'requests': lambda row: row['requests'],
+    'n_plus_one': lambda row: sum(s['requests'] for s in row['n_plus_one']),
+}
+
+
+def build_report(aggregate, sort='sql_ms', limit=20):
+    """
+    Rank views by cost.
+
+    Returns:
+        list of dicts with per-view averages, maxima, approximate p95 from
+        the histograms and the N+1 suspects (most frequent first)
+    """
+    rows = []
+    for view_name, stats in aggregate.items():
+        requests = stats['requests'] or 1
+        suspects = sorted(stats['suspects'].items(), key=lambda item: (-item[1][0], -item[1][1]))
+        rows.append({
+            'view': view_name,
+            'requests': stats['requests'],
+            'avg_queries': round(stats['queries'] / requests, 1),
+            'max_queries': stats['max_queries'],
+            'p95_queries': _percentile(stats['query_hist'], QUERY_BUCKETS, 0.95, stats['max_queries']),
+            'total_sql_ms': round(stats['sql_ms'], 1),
+            'avg_sql_ms': round(stats['sql_ms'] / requests, 1),
+            'max_sql_ms': round(stats['max_sql_ms'], 1),
+            'p95_sql_ms': _percentile(stats['time_hist'], TIME_BUCKETS_MS, 0.95,
+                                      round(stats['max_sql_ms'], 1)),
+            'query_histogram': dict(zip(_bucket_labels(QUERY_BUCKETS), stats['query_hist'])),
+            'sql_ms_histogram': dict(zip(_bucket_labels(TIME_BUCKETS_MS), stats['time_hist'])),
+            'n_plus_one': [
+                {'fingerprint': fp, 'requests': flagged, 'max_repeats': repeats}
+                for fp, (flagged, repeats) in suspects
+            ],
+        })
+    rows.sort(key=SORT_KEYS.get(sort, SORT_KEYS['sql_ms']), reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def _bucket_labels(edges):
+    return [f'<={edge}' for edge in edges] + [f'>{edges[-1]}']
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide profile store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore()
+    return _store
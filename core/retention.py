@@ -0,0 +1,222 @@
+"""
+Retention engine for append-only log and event tables.
+
+Deletes aged rows in bounded (integer) primary-key ranges instead of one
+unbounded DELETE, so a purge never holds long locks or produces one huge
+transaction, and sleeps between batches to leave room for other work.
+
+How a purge walks a table:
+1. Find the first row at/after the cutoff through the index on bound_field
+   (rows are appended, so every older candidate has a lower pk).
+2. Delete `pk in [lo, lo + batch_size) AND <date> < cutoff [AND filters]`,
+   one autocommitted batch at a time, skipping empty pk gaps.
+
+Models without reverse relations are deleted with a raw DELETE (no
+collector, no per-object signals); others go through QuerySet.delete()
+batch by batch so cascades still run.
+
+With ANALYTICS_ARCHIVE_ENABLED, AppEvent and PageView rows are copied
+into the analytics columnar archive before they are purged, whichever
+path (purge_old_records, cleanup_old_events) runs the purge.
+
+Policies can be overridden per model in settings:
+RETENTION_POLICIES = {
+    'analytics.PageView': {'days': 30},
+    'qrcodes.ScanLog': None,              # Never purge
+}
+RETENTION_BATCH_SIZE = 5000
+RETENTION_SLEEP_SECONDS = 0.1
+
+Usage:
+    python manage.py purge_old_records --dry-run
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
+from django.db import transaction
+from django.db.models import DO_NOTHING
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_SLEEP_SECONDS = 0.1
+
+DEFAULT_POLICIES = {
+    'core.ActivityLog': {'date_field': 'created_at', 'days': 365},
+    # Only read notifications; read_at is not ordered by pk, created_at is
+    'core.Notification': {'date_field': 'read_at', 'bound_field': 'created_at', 'days': 90,
+                          'filters': {'is_read': True}},
+    'analytics.AppEvent': {'date_field': 'timestamp', 'days': 90},
+    'analytics.PageView': {'date_field': 'timestamp', 'days': 180},
+    'qrcodes.ScanLog': {'date_field': 'scan_timestamp', 'days': 365},
+    'gps_system.GPSTrackingLog': {'date_field': 'recorded_at', 'days': 90},
+}
+
+
+class RetentionPolicy:
+    """
+    How long rows of one model are kept.
+
+    Args:
+        model_path: 'app_label.ModelName'
+        date_field: Rows with this field older than the cutoff are purged
+        days: Retention period
+        bound_field: Indexed, insert-ordered date field used to find the pk
+            bound of the purge (defaults to date_field)
+        filters: Extra conditions a row must match to be purged
+    """
+
+    def __init__(self, model_path, date_field, days, bound_field=None, filters=None):
+        self.model_path = model_path
+        self.date_field = date_field
+        self.days = days
+        self.bound_field = bound_field or date_field
+        self.filters = dict(filters or {})
+
+    def get_model(self):
+        """Model class, or None if its app is not installed."""
+        try:
+            return apps.get_model(self.model_path)
+        except (LookupError, ValueError):
+            return None
+
+    def get_cutoff(self, now=None):
+        return (now or timezone.now()) - timedelta(days=self.days)
+
+
+def get_policies():
+    """Active policies: the defaults merged with RETENTION_POLICIES."""
+    overrides = getattr(settings, 'RETENTION_POLICIES', {})
+    policies = {}
+    for model_path in {**DEFAULT_POLICIES, **overrides}:
+        if model_path in overrides and overrides[model_path] is None:
+            continue
+        config = {**DEFAULT_POLICIES.get(model_path, {}), **(overrides.get(model_path) or {})}
+        policies[model_path] = RetentionPolicy(model_path, **config)
+    return policies
+
+
+def get_policy(model_path, days=None):
+    """Policy for one model, optionally with a different retention period."""
+    policy = get_policies().get(model_path)
+    if policy is None:
+        raise ValueError(f"No retention policy for {model_path}")
+    if days is not None:
+        policy.days = days
+    return policy
+
+
+def _has_cascades(model):
+    """Whether deleting rows of the model must go through the collector."""
+    if model._meta.many_to_many:
+        return True
+    if any(isinstance(field, GenericRelation) for field in model._meta.private_fields):
+        return True
+    return any(
+        rel.many_to_many or rel.on_delete is not DO_NOTHING
+        for rel in model._meta.related_objects
+    )
+
+
+def purge(policy, batch_size=None, sleep=None, dry_run=False, max_batches=None):
+    """
+    Delete rows older than the policy's cutoff in pk-range batches.
+
+    Args:
+        policy: RetentionPolicy
+        batch_size: Width of each pk range
+        sleep: Seconds to pause between batches
+        dry_run: Only count the rows that would be deleted
+        max_batches: Stop after this many batches (resume on the next run)
+
+    Returns:
+        dict with 'model', 'cutoff', 'deleted' (or 'would_delete'),
+        'batches' and 'seconds'
+    """
+    batch_size = batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    if sleep is None:
+        sleep = getattr(settings, 'RETENTION_SLEEP_SECONDS', DEFAULT_SLEEP_SECONDS)
+
+    started = time.perf_counter()
+    cutoff = policy.get_cutoff()
+    result = {'model': policy.model_path, 'cutoff': cutoff, 'batches': 0}
+
+    model = policy.get_model()
+    if model is None:
+        result.update({'deleted': 0, 'skipped': 'not installed', 'seconds': 0.0})
+        return result
+
+    manager = model._base_manager
+    aged = manager.filter(**{f'{policy.date_field}__lt': cutoff}, **policy.filters)
+
+    # pk of the first row at/after the cutoff - nothing above it is old enough
+    upper = manager.filter(**{f'{policy.bound_field}__gte': cutoff}).order_by(
+        policy.bound_field, 'pk'
+    ).values_list('pk', flat=True).first()
+    if upper is not None:
+        aged = aged.filter(pk__lt=upper)
+
+    if dry_run:
+        result.update({'would_delete': aged.count(), 'seconds': time.perf_counter() - started})
+        return result
+
+    _archive(policy.model_path, cutoff)
+
+    raw = not _has_cascades(model)
+    deleted = 0
+    lo = aged.order_by('pk').values_list('pk', flat=True).first()
+
+    while lo is not None:
+        hi = lo + batch_size
+        batch = aged.filter(pk__gte=lo, pk__lt=hi)
+
+        with transaction.atomic():
+            if raw:
+                # Plain DELETE ... WHERE: no collector, no per-object signals
+                count = batch._raw_delete(batch.db)
+            else:
+                count, _ = batch.delete()
+        deleted += count
+        result['batches'] += 1
+
+        if max_batches and result['batches'] >= max_batches:
+            break
+
+        # Jump over pk gaps instead of walking empty ranges
+        lo = aged.filter(pk__gte=hi).order_by('pk').values_list('pk', flat=True).first()
+        if lo is not None and sleep:
+            time.sleep(sleep)
+
+    result.update({'deleted': deleted, 'seconds': time.perf_counter() - started})
+    logger.info(
+        f"Purged {deleted} {policy.model_path} rows older than {cutoff:%Y-%m-%d} "
+        f"in {result['batches']} batches ({result['seconds']:.1f}s)"
+    )
+    return result
+
+
+def _archive(model_path, cutoff):
+    """Archive rows older than `cutoff` first, for models the analytics archive keeps."""
+    if not getattr(settings, 'ANALYTICS_ARCHIVE_ENABLED', False):
+        return
+    from floor_app.operations.analytics import archive
+
+    if model_path in archive.ARCHIVED_MODELS:
+        # Never purge rows that are not archived yet
+        archive.archive_events(model_path, before=cutoff)
+
+
+def purge_all(model_paths=None, **kwargs):
+    """Run purge() for every active policy (or the given model paths)."""
+    results = []
+    for model_path, policy in get_policies().items():
+        if model_paths and model_path not in model_paths:
+            continue
+        results.append(purge(policy, **kwargs))
+    return results
@@ -0,0 +1,370 @@
+"""
+Global search index for the Floor Management System.
+
+Maintains a tokenized inverted index (SearchDocument / SearchToken) over the
+models configured in GlobalSearch.SEARCHABLE_MODELS, so a search is answered
+by one indexed lookup instead of one icontains scan per model.
+
+The index is kept up to date by signals (see core.signals) and can be
+rebuilt from scratch with:
+    python manage.py rebuild_search_index
+"""
+
+import logging
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Q, Case, When, Value, F, IntegerField, Max, Sum, Window
+from django.db.models.functions import RowNumber
+
+logger = logging.getLogger(__name__)
+
+# Word characters without the underscore, so "ITEM-001" and "WH_01" split
+# into separate tokens. Unicode aware (Arabic names are indexed too).
+TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+MAX_TOKEN_LENGTH = 64
+MAX_DISPLAY_LENGTH = 255
+DEFAULT_BATCH_SIZE = 500
+
+
+def is_enabled():
+    """Whether GlobalSearch should query the index (SEARCH_INDEX_ENABLED).
+
+    Off by default: turn it on once rebuild_search_index has backfilled
+    the rows that existed before the index was added.
+    """
+    return getattr(settings, 'SEARCH_INDEX_ENABLED', False)
+
+
+def tokenize(text):
+    """Split text into normalized (casefolded) tokens."""
+    if not text:
+        return []
+    return [t[:MAX_TOKEN_LENGTH] for t in TOKEN_RE.findall(str(text).casefold())]
+
+
+def get_display_text(obj, display_fields):
+    """Get display text for an object."""
+    parts = []
+    for field in display_fields:
+        try:
+            if hasattr(obj, field):
+                value = getattr(obj, field)
+                if callable(value):
+                    value = value()
+                if value:
+                    parts.append(str(value))
+        except Exception:
+            continue
+
+    return ' - '.join(parts) if parts else str(obj)
+
+
+def _resolve_path(obj, path):
+    """Follow a 'person__first_name_en' style path on an instance."""
+    value = obj
+    for part in path.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+_registry = None
+
+
+def get_registry():
+    """
+    Map model classes to their search configuration.
+
+    Returns a dict of:
+        model -> {'model_path', 'config', 'select_related'}
+    plus a 'dependencies' list of (related_model, model, lookup) tuples used
+    to re-index objects when a related record they display/search changes.
+    Models that are not installed are skipped.
+    """
+    global _registry
+    if _registry is not None:
+        return _registry
+
+    from core.search_utils import GlobalSearch
+
+    models_map = {}
+    dependencies = []
+
+    for model_path, config in GlobalSearch.SEARCHABLE_MODELS.items():
+        try:
+            app_label, model_name = model_path.split('.')
+            model = apps.get_model(app_label, model_name)
+        except (ValueError, LookupError):
+            continue
+
+        select_related = set()
+        seen_lookups = set()
+
+        relation_paths = [f for f in config['fields'] if '__' in f]
+        relation_paths += [f"{f}__" for f in config['display_fields']]
+
+        for path in relation_paths:
+            parts = path.split('__')[:-1]
+            current = model
+            for depth, part in enumerate(parts):
+                try:
+                    field = current._meta.get_field(part)
+                except Exception:
+                    break
+                if not field.is_relation or not (field.many_to_one or field.one_to_one):
+                    break
+                lookup = '__'.join(parts[:depth + 1])
+                select_related.add(lookup)
+                current = field.related_model
+                if (current, lookup) not in seen_lookups:
+                    seen_lookups.add((current, lookup))
+                    dependencies.append((current, model, lookup))
+
+        models_map[model] = {
+            'model_path': model_path,
+            'config': config,
+            'select_related': sorted(select_related),
+        }
+
+    _registry = {'models': models_map, 'dependencies': dependencies}
+    return _registry
+
+
+def get_entry(model):
+    """Get registry entry for a model class (None if not searchable)."""
+    return get_registry()['models'].get(model)
+
+
+# ============================================================================
+# INDEXING
+# ============================================================================
+
+def build_document(obj, config):
+    """
+    Build (display, {token: weight}) for an object.
+
+    Fields listed first in the configuration get the highest weight.
+    """
+    fields = config['fields']
+    tokens = {}
+    for position, field in enumerate(fields):
+        weight = len(fields) - position
+        for token in tokenize(_resolve_path(obj, field)):
+            if tokens.get(token, 0) < weight:
+                tokens[token] = weight
+
+    display = get_display_text(obj, config['display_fields'])[:MAX_DISPLAY_LENGTH]
+    return display, tokens
+
+
+def _is_indexable(obj):
+    """Soft-deleted records are kept out of the index."""
+    return not getattr(obj, 'is_deleted', False)
+
+
+def _write_documents(model, entry, objs):
+    """Replace the index documents for a batch of objects of one model."""
+    from core.models import SearchDocument, SearchToken
+
+    content_type = ContentType.objects.get_for_model(model)
+    object_ids = [obj.pk for obj in objs]
+
+    built = []
+    for obj in objs:
+        if _is_indexable(obj):
+            built.append((obj.pk,) + build_document(obj, entry['config']))
+
+    with transaction.atomic():
+        SearchDocument.objects.filter(
+            content_type=content_type,
+            object_id__in=object_ids,
+        ).delete()
+
+        documents = SearchDocument.objects.bulk_create([
+            SearchDocument(
+                content_type=content_type,
+                object_id=pk,
+                model_path=entry['model_path'],
+                display=display,
+            )
+            for pk, display, _ in built
+        ])
+
+        if documents and documents[0].pk is None:
+            # Backend cannot return ids from bulk inserts
+            id_map = dict(
+                SearchDocument.objects.filter(
+                    content_type=content_type,
+                    object_id__in=[pk for pk, _, _ in built],
+                ).values_list('object_id', 'id')
+            )
+        else:
+            id_map = {doc.object_id: doc.pk for doc in documents}
+
+        SearchToken.objects.bulk_create([
+            SearchToken(document_id=id_map[pk], token=token, weight=weight)
+            for pk, _, tokens in built
+            for token, weight in tokens.items()
+        ], batch_size=DEFAULT_BATCH_SIZE)
+
+    return len(built)
+
+
+def index_object(obj):
+    """Index (or re-index) a single object. No-op for non-searchable models."""
+    entry = get_entry(type(obj))
+    if entry is None:
+        return 0
+    return _write_documents(type(obj), entry, [obj])
+
+
+def remove_object(obj):
+    """Remove an object from the index."""
+    from core.models import SearchDocument
+
+    if get_entry(type(obj)) is None:
+        return 0
+    deleted, _ = SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(type(obj)),
+        object_id=obj.pk,
+    ).delete()
+    return deleted
+
+
+def index_queryset(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Index every object of a queryset in batches. Returns documents written."""
+    model = queryset.model
+    entry = get_entry(model)
+    if entry is None:
+        return 0
+
+    if entry['select_related']:
+        queryset = queryset.select_related(*entry['select_related'])
+
+    written = 0
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            written += _write_documents(model, entry, batch)
+            batch = []
+    if batch:
+        written += _write_documents(model, entry, batch)
+    return written
+
+
+def reindex_dependents(instance):
+    """Re-index searchable objects that search or display a related record."""
+    written = 0
+    for related_model, model, lookup in get_registry()['dependencies']:
+        if isinstance(instance, related_model):
+            manager = getattr(model, 'all_objects', model._default_manager)
+            written += index_queryset(manager.filter(**{lookup: instance.pk}))
+    return written
+
+
+def rebuild(model_paths=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Rebuild the index from scratch.
+
+    Args:
+        model_paths: Optional list of model paths (e.g., ['hr.HRPeople'])
+        batch_size: Objects per bulk write
+
+    Returns:
+        dict of model_path -> documents written
+    """
+    from core.models import SearchDocument
+
+    results = {}
+    for model, entry in get_registry()['models'].items():
+        model_path = entry['model_path']
+        if model_paths and model_path not in model_paths:
+            continue
+
+        SearchDocument.objects.filter(model_path=model_path).delete()
+        queryset = model._default_manager.all()
+        if hasattr(model, 'is_deleted'):
+            queryset = queryset.filter(is_deleted=False)
+        results[model_path] = index_queryset(queryset.order_by('pk'), batch_size=batch_size)
+
+    return results
+
+
+# ============================================================================
+# QUERYING
+# ============================================================================
+
+def search(query, model_paths=None, limit_per_model=10):
+    """
+    Ranked lookup against the index.
+
+    Every query token must prefix-match a token of the document (AND
+    semantics). Documents are scored by the summed field weights of the
+    matching tokens, with exact token matches counting double.
+
+    Returns:
+        dict of model_path -> list of {'id', 'display', 'score'}, best first
+    """
+    from core.models import SearchToken
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return {}
+
+    matches_any = Q()
+    for term in terms:
+        matches_any |= Q(token__startswith=term)
+
+    tokens = SearchToken.objects.filter(matches_any)
+    if model_paths is not None:
+        tokens = tokens.filter(document__model_path__in=model_paths)
+
+    term_hits = {
+        f'hit_{i}': Max(Case(
+            When(token__startswith=term, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        for i, term in enumerate(terms)
+    }
+
+    score = Sum(Case(
+        When(token__in=terms, then=F('weight') * 2),
+        default=F('weight'),
+        output_field=IntegerField(),
+    ))
+
+    # One query for all models, ranked within each model so a model with
+    # many strong hits cannot crowd the others out of their limit
+    rows = (
+        tokens.values('document_id', 'document__model_path', 'document__object_id', 'document__display')
+        .annotate(score=score, **term_hits)
+        .filter(**{name: 1 for name in term_hits})
+        .annotate(rank=Window(
+            RowNumber(),
+            partition_by=F('document__model_path'),
+            order_by=[F('score').desc(), F('document_id').asc()],
+        ))
+        .filter(rank__lte=limit_per_model)
+        .order_by('document__model_path', 'rank')
+    )
+
+    results = {}
+    for row in rows:
+        results.setdefault(row['document__model_path'], []).append({
+            'id': row['document__object_id'],
+            'display': row['document__display'],
+            'score': row['score'],
+        })
+    return results
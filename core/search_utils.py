@@ -2,12 +2,22 @@
 Global search utilities for the Floor Management System.
 
 Provides unified search across all modules with intelligent ranking and filtering.
+Searches are answered from the inverted index in core.search_index; the
+per-model icontains scan is kept as a fallback.
 """
 
+import logging
+import random
+
+from django.db import DatabaseError
 from django.db.models import Q, Value, CharField
 from django.db.models.functions import Concat
 from django.apps import apps
 
+from . import search_index
+
+logger = logging.getLogger(__name__)
+
 
 class GlobalSearch:
     """
@@ -93,7 +103,7 @@ class GlobalSearch:
         },
     }
 
-    def __init__(self, query, modules=None, limit_per_model=10):
+    def __init__(self, query, modules=None, limit_per_model=10, use_index=None):
         """
         Initialize global search.
 
@@ -101,17 +111,71 @@ class GlobalSearch:
             query: Search query string
             modules: List of modules to search (None = all)
             limit_per_model: Maximum results per model
+            use_index: Query the search index (None = SEARCH_INDEX_ENABLED setting)
         """
         self.query = query.strip()
         self.modules = modules or []
         self.limit_per_model = limit_per_model
+        self.use_index = search_index.is_enabled() if use_index is None else use_index
         self.results = []
 
+    def get_model_paths(self):
+        """Model paths to search, honouring the module filter."""
+        return [
+            model_path for model_path in self.SEARCHABLE_MODELS
+            if not self.modules or model_path.split('.')[0] in self.modules
+        ]
+
     def execute(self):
         """Execute search across all configured models."""
         if not self.query or len(self.query) < 2:
             return []
 
+        if self.use_index:
+            try:
+                return self._execute_indexed()
+            except DatabaseError as e:
+                # Index tables missing or unavailable - fall back to scanning
+                logger.warning(f"Search index unavailable, falling back to scan: {e}")
+
+        return self._execute_scan()
+
+    def _execute_indexed(self):
+        """Execute search with a single ranked lookup against the search index."""
+        model_paths = self.get_model_paths()
+        hits = search_index.search(
+            self.query,
+            model_paths=model_paths,
+            limit_per_model=self.limit_per_model,
+        )
+
+        results = []
+        for model_path in model_paths:
+            if not hits.get(model_path):
+                continue
+            config = self.SEARCHABLE_MODELS[model_path]
+            model_results = [
+                {
+                    'id': hit['id'],
+                    'url_pattern': config['url_pattern'],
+                    'display': hit['display'],
+                    'model_label': config['label'],
+                    'score': hit['score'],
+                }
+                for hit in hits[model_path]
+            ]
+            results.append({
+                'model_label': config['label'],
+                'model_icon': config['icon'],
+                'model_path': model_path,
+                'count': len(model_results),
+                'results': model_results,
+            })
+
+        return results
+
+    def _execute_scan(self):
+        """Execute search by scanning each configured model."""
         results = []
 
         for model_path, config in self.SEARCHABLE_MODELS.items():
@@ -175,19 +239,7 @@ class GlobalSearch:
 
     def _get_display_text(self, obj, display_fields):
         """Get display text for an object."""
-        parts = []
-        for field in display_fields:
-            try:
-                if hasattr(obj, field):
-                    value = getattr(obj, field)
-                    if callable(value):
-                        value = value()
-                    if value:
-                        parts.append(str(value))
-            except Exception:
-                continue
-
-        return ' - '.join(parts) if parts else str(obj)
+        return search_index.get_display_text(obj, display_fields)
 
 
 class AdvancedFilter:
@@ -255,106 +307,136 @@ class AdvancedFilter:
 
 
 class SearchHistory:
-    """Track and manage user search history."""
+    """
+    Track and manage user search history.
 
-    @staticmethod
-    def add_search(user, query, module=None):
-        """Add search to user's history."""
-        from core.models import UserPreference
+    Stored in SearchHistoryEntry: one row per distinct query, written with
+    a single upsert, and read newest-first through the (user, searched_at)
+    index.
+    """
 
-        pref = UserPreference.get_or_create_for_user(user)
+    MAX_ENTRIES = 20
 
-        # Get existing search history
-        search_history = pref.preferences_json.get('search_history', [])
+    # Trim rows beyond MAX_ENTRIES on about one in this many writes
+    TRIM_EVERY = 10
 
-        # Add new search (avoid duplicates)
-        search_item = {
-            'query': query,
-            'module': module,
-            'timestamp': str(timezone.now())
-        }
+    @staticmethod
+    def add_search(user, query, module=None):
+        """Add search to user's history."""
+        from core.models import SearchHistoryEntry
 
-        # Remove if already exists
-        search_history = [s for s in search_history if s['query'] != query]
+        query = query[:255]
+        SearchHistoryEntry.objects.bulk_create(
+            [SearchHistoryEntry(user=user, query=query, module=module or '', searched_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['user', 'query'],
+            update_fields=['module', 'searched_at'],
+        )
 
-        # Add to beginning
-        search_history.insert(0, search_item)
+        if random.randrange(SearchHistory.TRIM_EVERY) == 0:
+            SearchHistory.trim(user)
 
-        # Keep only last 20 searches
-        search_history = search_history[:20]
+    @staticmethod
+    def trim(user):
+        """Delete the user's entries beyond the newest MAX_ENTRIES."""
+        from core.models import SearchHistoryEntry
 
-        # Save
-        pref.preferences_json['search_history'] = search_history
-        pref.save()
+        stale = SearchHistoryEntry.objects.filter(user=user).order_by(
+            '-searched_at', '-id'
+        ).values_list('id', flat=True)[SearchHistory.MAX_ENTRIES:]
+        SearchHistoryEntry.objects.filter(id__in=list(stale)).delete()
 
     @staticmethod
-    def get_recent_searches(user, limit=10):
+    def get_recent_searches(user, limit=MAX_ENTRIES):
         """Get user's recent searches."""
-        from core.models import UserPreference
+        from core.models import SearchHistoryEntry
 
         try:
-            pref = UserPreference.get_or_create_for_user(user)
-            search_history = pref.preferences_json.get('search_history', [])
-            return search_history[:limit]
+            entries = SearchHistoryEntry.objects.filter(user=user).order_by(
+                '-searched_at', '-id'
+            ).values('query', 'module', 'searched_at')[:min(limit, SearchHistory.MAX_ENTRIES)]
+            return [
+                {
+                    'query': entry['query'],
+                    'module': entry['module'] or None,
+                    'timestamp': str(entry['searched_at']),
+                }
+                for entry in entries
+            ]
         except Exception:
             return []
 
+    @staticmethod
+    def clear_history(user):
+        """Delete all of a user's search history."""
+        from core.models import SearchHistoryEntry
 
-class SavedFilter:
-    """Save and load filter presets."""
+        SearchHistoryEntry.objects.filter(user=user).delete()
 
-    @staticmethod
-    def save_filter(user, name, filters, module=None):
-        """Save a filter preset."""
-        from core.models import UserPreference
 
-        pref = UserPreference.get_or_create_for_user(user)
+class SavedFilter:
+    """
+    Save and load filter presets.
 
-        # Get existing saved filters
-        saved_filters = pref.preferences_json.get('saved_filters', {})
+    Stored in SavedSearchFilter, one row per (user, module, name).
+    """
 
-        # Add new filter
-        filter_key = f"{module}_{name}" if module else name
-        saved_filters[filter_key] = {
-            'name': name,
-            'module': module,
-            'filters': filters,
-            'created_at': str(timezone.now())
+    @staticmethod
+    def _to_dict(saved):
+        return {
+            'name': saved.name,
+            'module': saved.module or None,
+            'filters': saved.filters,
+            'created_at': str(saved.created_at),
         }
 
-        # Save
-        pref.preferences_json['saved_filters'] = saved_filters
-        pref.save()
+    @staticmethod
+    def save_filter(user, name, filters, module=None):
+        """Save a filter preset (replacing one with the same name and module)."""
+        from core.models import SavedSearchFilter
+
+        now = timezone.now()
+        SavedSearchFilter.objects.bulk_create(
+            [SavedSearchFilter(user=user, name=name, module=module or '', filters=filters,
+                               created_at=now, updated_at=now)],
+            update_conflicts=True,
+            unique_fields=['user', 'module', 'name'],
+            update_fields=['filters', 'updated_at'],
+        )
 
     @staticmethod
     def get_saved_filters(user, module=None):
-        """Get user's saved filters."""
-        from core.models import UserPreference
+        """Get user's saved filters, optionally limited to one module."""
+        from core.models import SavedSearchFilter
 
         try:
-            pref = UserPreference.get_or_create_for_user(user)
-            saved_filters = pref.preferences_json.get('saved_filters', {})
-
+            saved_filters = SavedSearchFilter.objects.filter(user=user)
             if module:
-                # Filter by module
-                return {k: v for k, v in saved_filters.items() if v.get('module') == module}
-
-            return saved_filters
+                saved_filters = saved_filters.filter(module=module)
+            return [SavedFilter._to_dict(saved) for saved in saved_filters.order_by('name')]
         except Exception:
-            return {}
+            return []
 
     @staticmethod
-    def delete_filter(user, filter_key):
-        """Delete a saved filter."""
-        from core.models import UserPreference
+    def get_filter(user, name, module=None):
+        """Get the filters of a saved preset by name (None if not found)."""
+        from core.models import SavedSearchFilter
+
+        saved_filters = SavedSearchFilter.objects.filter(user=user, name=name)
+        if module:
+            saved_filters = saved_filters.filter(module=module)
+        saved = saved_filters.order_by('module').first()
+        return saved.filters if saved else None
 
-        pref = UserPreference.get_or_create_for_user(user)
-        saved_filters = pref.preferences_json.get('saved_filters', {})
+    @staticmethod
+    def delete_filter(user, name, module=None):
+        """Delete a saved filter."""
+        from core.models import SavedSearchFilter
 
-        if filter_key in saved_filters:
-            del saved_filters[filter_key]
-            pref.preferences_json['saved_filters'] = saved_filters
-            pref.save()
+        saved_filters = SavedSearchFilter.objects.filter(user=user, name=name)
+        if module:
+            saved_filters = saved_filters.filter(module=module)
+        saved_filters.delete()
 
 
 # Timezone import for timestamps
@@ -0,0 +1,201 @@
+"""
+Document number sequences.
+
+Document numbers (PO-2026-00042, TXN20260101000007, ...) used to be
+generated by reading the highest matching number with a prefix scan and
+adding one: an index scan on every insert, and two concurrent inserts
+could both receive the same number. They now come from DocumentSequence
+counter rows:
+
+- next_value() locks the counter row with select_for_update, reserves
+  the next number and releases the lock when the surrounding transaction
+  commits, so concurrent callers never see the same value; a rolled-back
+  transaction also rolls back its reservation;
+- a counter is created the first time its key is used, seeded from the
+  highest existing document number (the old prefix scan, run once);
+- high-rate sequences (inventory transaction numbers) reserve a block of
+  DOCUMENT_SEQUENCE_BLOCK_SIZE numbers per process and hand them out from
+  memory, so posting does not serialize on the counter row. Numbers from
+  different processes then interleave, and the unused rest of a block is
+  skipped when the process exits.
+
+Usage:
+    from core import sequences
+
+    number = sequences.next_number(PurchaseOrder.all_objects, 'po_number', 'PO-2026-', width=5)
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+
+
+class _Block:
+    """
+    Numbers of a reserved block not handed out yet.
+
+    Registered as an on_commit callback of the reserving transaction: its
+    numbers become available to the whole process once the reservation
+    has committed.
+    """
+
+    def __init__(self, key, first, last):
+        self.key = key
+        self.next = first
+        self.last = last
+
+    @property
+    def remaining(self):
+        return self.last - self.next + 1
+
+    def take(self):
+        value = self.next
+        self.next += 1
+        return value
+
+    def __call__(self):
+        if self.remaining > 0:
+            with _lock:
+                _blocks[self.key] = self
+
+
+# Committed blocks of this process, by (database alias, key)
+_blocks = {}
+_lock = threading.Lock()
+
+
+def block_size():
+    return max(1, getattr(settings, 'DOCUMENT_SEQUENCE_BLOCK_SIZE', 20))
+
+
+def sequence_key(queryset, field, prefix):
+    """Counter key of the numbers in `field` starting with `prefix`."""
+    return f"{queryset.model._meta.label_lower}.{field}:{prefix}"
+
+
+def last_number(queryset, field, prefix):
+    """Highest numeric suffix after `prefix` in `field`, or 0 (the prefix scan)."""
+    last = queryset.filter(**{f'{field}__startswith': prefix}).order_by(f'-{field}').values_list(
+        field, flat=True
+    ).first()
+    if not last:
+        return 0
+    try:
+        return int(last[len(prefix):].rsplit('-', 1)[-1])
+    except ValueError:
+        return 0
+
+
+def reserve(key, count=1, seed=None, using='default'):
+    """
+    Reserve `count` consecutive numbers of a sequence.
+
+    Args:
+        key: Sequence key
+        count: Numbers to reserve
+        seed: Callable returning the last number already in use, called
+            when the counter row does not exist yet
+        using: Database alias
+
+    Returns:
+        int: First reserved number
+    """
+    from core.models import DocumentSequence
+
+    sequences = DocumentSequence.objects.using(using)
+    with transaction.atomic(using=using):
+        row = sequences.select_for_update().filter(key=key).first()
+        if row is None:
+            start = seed() if seed else 0
+            try:
+                with transaction.atomic(using=using):
+                    sequences.create(key=key, last_value=start + count)
+                return start + 1
+            except IntegrityError:
+                # Another caller created the counter first
+                row = sequences.select_for_update().get(key=key)
+
+        first = row.last_value + 1
+        row.last_value += count
+        row.save(update_fields=['last_value', 'updated_at'])
+        return first
+
+
+def _pending_block(key, using):
+    """Block reserved earlier in the current (uncommitted) transaction."""
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        return None
+    # A rollback drops its callbacks, and with them the blocks it reserved
+    for _sids, func, _robust in connection.run_on_commit:
+        if isinstance(func, _Block) and func.key == key and func.remaining > 0:
+            return func
+    return None
+
+
+def next_value(key, seed=None, block=False, using='default'):
+    """
+    Next number of a sequence.
+
+    Args:
+        key: Sequence key
+        seed: See reserve()
+        block: Serve the number from a per-process block of reserved
+            numbers (DOCUMENT_SEQUENCE_BLOCK_SIZE)
+        using: Database alias
+
+    Returns:
+        int
+    """
+    size = block_size() if block else 1
+    if size == 1:
+        return reserve(key, seed=seed, using=using)
+
+    with _lock:
+        committed = _blocks.get((using, key))
+        if committed is not None:
+            value = committed.take()
+            if committed.remaining <= 0:
+                del _blocks[(using, key)]
+            return value
+
+    pending = _pending_block((using, key), using)
+    if pending is not None:
+        return pending.take()
+
+    first = reserve(key, count=size, seed=seed, using=using)
+    # Outside a transaction the callback runs at once
+    transaction.on_commit(_Block((using, key), first + 1, first + size - 1), using=using)
+    return first
+
+
+def next_number(queryset, field, prefix, width, block=False):
+    """
+    Next document number `prefix` + zero-padded sequence number.
+
+    Args:
+        queryset: Documents numbered by the sequence (include soft-deleted
+            rows), used to seed a new counter
+        field: Number field
+        prefix: Fixed part of the number, e.g. 'PO-2026-'
+        width: Digits of the sequence number
+        block: See next_value()
+
+    Returns:
+        str
+    """
+    using = router.db_for_write(queryset.model)
+    value = next_value(
+        sequence_key(queryset, field, prefix),
+        seed=lambda: last_number(queryset, field, prefix),
+        block=block,
+        using=using,
+    )
+    return f"{prefix}{value:0{width}d}"
+
+
+def reset_blocks():
+    """Forget the blocks held by this process (tests, after fork)."""
+    with _lock:
+        _blocks.clear()
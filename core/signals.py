@@ -0,0 +1,175 @@
+"""
+Signal handlers for the core app.
+
+Keeps the global search index (core.search_index) in sync with the models
+listed in GlobalSearch.SEARCHABLE_MODELS and with the related records they
+search or display, keeps the materialized dashboard counters
+(core.dashboard_counters) current, invalidates cached user display
+preferences and flushes buffered activity logs after each request.
+"""
+
+import logging
+
+from django.db import transaction
+from django.core.signals import request_finished
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from . import search_index, autocomplete, dashboard_counters, activity_buffer
+
+logger = logging.getLogger(__name__)
+
+
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Re-index a searchable object after it is saved."""
+    if raw:
+        return
+    try:
+        search_index.index_object(instance)
+        if getattr(instance, 'is_deleted', False):
+            _discard_autocomplete(instance)
+    except Exception as e:
+        # Never break the save because of the index; rebuild_search_index repairs it
+        logger.error(f"Error indexing {sender.__name__} {instance.pk}: {e}")
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop a searchable object from the index after it is deleted."""
+    try:
+        search_index.remove_object(instance)
+        _discard_autocomplete(instance)
+    except Exception as e:
+        logger.error(f"Error removing {sender.__name__} {instance.pk} from search index: {e}")
+
+
+def _discard_autocomplete(instance):
+    """
+    Drop a removed object from this process's autocomplete index.
+
+    Additions reach the index through its incremental refresh; removals are
+    not visible there, so apply them here (other processes pick them up on
+    their next full reload).
+    """
+    entry = search_index.get_entry(type(instance))
+    if entry is not None:
+        autocomplete.get_index().discard(entry['model_path'], instance.pk)
+
+
+def update_dependent_search_documents(sender, instance, raw=False, **kwargs):
+    """Re-index searchable objects that reference a changed related record."""
+    if raw:
+        return
+    try:
+        search_index.reindex_dependents(instance)
+    except Exception as e:
+        logger.error(f"Error re-indexing dependents of {sender.__name__} {instance.pk}: {e}")
+
+
+def connect_search_index_signals():
+    """Connect index maintenance handlers for every installed searchable model."""
+    registry = search_index.get_registry()
+
+    for model in registry['models']:
+        post_save.connect(update_search_index, sender=model,
+                          dispatch_uid=f'search_index_save_{model._meta.label}')
+        post_delete.connect(remove_from_search_index, sender=model,
+                            dispatch_uid=f'search_index_delete_{model._meta.label}')
+
+    for related_model in {dep[0] for dep in registry['dependencies']}:
+        post_save.connect(update_dependent_search_documents, sender=related_model,
+                          dispatch_uid=f'search_index_dependents_{related_model._meta.label}')
+
+
+# ============================================================================
+# DASHBOARD COUNTERS
+# ============================================================================
+
+_counters_by_model = {}
+
+
+def snapshot_dashboard_counters(sender, instance, raw=False, **kwargs):
+    """Remember what an existing row contributed before it is overwritten."""
+    if raw:
+        return
+    try:
+        instance._dashboard_counter_values = dashboard_counters.snapshot(
+            instance, _counters_by_model[sender]
+        )
+    except Exception as e:
+        instance._dashboard_counter_values = None
+        logger.error(f"Error reading dashboard counters for {sender.__name__} {instance.pk}: {e}")
+
+
+def update_dashboard_counters(sender, instance, created=False, raw=False, **kwargs):
+    """Apply the change in a saved row's contribution to the counters."""
+    if raw:
+        return
+    counters = _counters_by_model[sender]
+    before = None if created else getattr(instance, '_dashboard_counter_values', None)
+    try:
+        dashboard_counters.apply_change(
+            instance, counters, before, dashboard_counters.instance_values(instance, counters)
+        )
+    except Exception as e:
+        # Reconciliation repairs any drift
+        logger.error(f"Error updating dashboard counters for {sender.__name__} {instance.pk}: {e}")
+
+
+def remove_from_dashboard_counters(sender, instance, **kwargs):
+    """Take a deleted row's contribution off the counters."""
+    counters = _counters_by_model[sender]
+    try:
+        dashboard_counters.apply_change(
+            instance, counters, dashboard_counters.instance_values(instance, counters), None
+        )
+    except Exception as e:
+        logger.error(f"Error updating dashboard counters for {sender.__name__} {instance.pk}: {e}")
+
+
+def connect_dashboard_counter_signals():
+    """Connect counter maintenance handlers for every installed counted model."""
+    _counters_by_model.update(dashboard_counters.get_counters_by_model())
+
+    for model in _counters_by_model:
+        label = model._meta.label
+        pre_save.connect(snapshot_dashboard_counters, sender=model,
+                         dispatch_uid=f'dashboard_counters_pre_save_{label}')
+        post_save.connect(update_dashboard_counters, sender=model,
+                          dispatch_uid=f'dashboard_counters_save_{label}')
+        post_delete.connect(remove_from_dashboard_counters, sender=model,
+                            dispatch_uid=f'dashboard_counters_delete_{label}')
+
+
+# ============================================================================
+# USER PREFERENCES
+# ============================================================================
+
+def invalidate_user_display_preferences(sender, instance, **kwargs):
+    """Drop cached display preferences once the change is committed."""
+    user_id = instance.user_id
+    # After commit, so a concurrent reader cannot re-cache the old row
+    transaction.on_commit(lambda: sender.invalidate_display_cache(user_id))
+
+
+def connect_user_preference_signals():
+    """Connect cache invalidation for UserPreference."""
+    from .models import UserPreference
+
+    post_save.connect(invalidate_user_display_preferences, sender=UserPreference,
+                      dispatch_uid='user_preference_cache_save')
+    post_delete.connect(invalidate_user_display_preferences, sender=UserPreference,
+                        dispatch_uid='user_preference_cache_delete')
+
+
+# ============================================================================
+# ACTIVITY LOG BUFFER
+# ============================================================================
+
+def flush_activity_logs(sender, **kwargs):
+    """Wake the activity log writer once a request is done."""
+    activity_buffer.get_buffer().request_flush()
+
+
+def connect_activity_log_signals():
+    """Connect request-end flushing when activity logs are buffered."""
+    if activity_buffer.is_enabled():
+        request_finished.connect(flush_activity_logs, dispatch_uid='activity_log_request_flush')
@@ -0,0 +1,78 @@
+"""
+Tests for the Buffered Activity Log Writer
+
+Tests core.activity_buffer and its use by log_activity:
+- Batched bulk writes
+- Back-pressure when the queue is full
+- Logging only after commit
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core import activity_buffer
+from core.activity_buffer import ActivityLogBuffer
+from core.models import ActivityLog
+from core.notification_utils import log_activity
+
+User = get_user_model()
+
+
+class TestActivityLogBuffer(TestCase):
+    """Test the buffer itself (no background thread)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='auditor', password='testpass123')
+
+    def make_activity(self, i):
+        return ActivityLog(user=self.user, action='VIEW', description=f'Viewed item {i}')
+
+    def test_flush_writes_in_batches(self):
+        buffer = ActivityLogBuffer(batch_size=4, background=False)
+        for i in range(10):
+            buffer.add(self.make_activity(i))
+
+        self.assertEqual(ActivityLog.objects.count(), 0)
+        with self.assertNumQueries(3):
+            buffer.flush()
+
+        self.assertEqual(ActivityLog.objects.count(), 10)
+        metrics = buffer.get_metrics()
+        self.assertEqual(metrics['written'], 10)
+        self.assertEqual(metrics['flushes'], 3)
+        self.assertEqual(metrics['queue_depth'], 0)
+
+    def test_full_queue_writes_inline(self):
+        buffer = ActivityLogBuffer(max_queue=2, background=False)
+        for i in range(3):
+            buffer.add(self.make_activity(i))
+
+        self.assertEqual(ActivityLog.objects.count(), 1)
+        metrics = buffer.get_metrics()
+        self.assertEqual(metrics['overflow_writes'], 1)
+        self.assertEqual(metrics['queue_depth'], 2)
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=True)
+class TestBufferedLogActivity(TestCase):
+    """Test log_activity with buffering enabled."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='buffered', password='testpass123')
+        self.original_buffer = activity_buffer._buffer
+        activity_buffer._buffer = ActivityLogBuffer(background=False)
+
+    def tearDown(self):
+        activity_buffer._buffer = self.original_buffer
+
+    def test_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            activity = log_activity(self.user, 'UPDATE', 'Updated settings')
+            self.assertEqual(activity_buffer.get_buffer().get_metrics()['queue_depth'], 0)
+
+        self.assertIsNone(activity.pk)
+        activity_buffer.get_buffer().flush()
+
+        saved = ActivityLog.objects.get()
+        self.assertEqual(saved.description, 'Updated settings')
+        self.assertEqual(saved.created_at, activity.created_at)
@@ -0,0 +1,117 @@
+"""
+Tests for the Materialized Dashboard Counters
+
+Tests that signal-maintained counters match the real aggregates:
+- Create / update / delete adjustments
+- Reconciliation after changes that bypass signals
+- Dashboard reads
+"""
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import dashboard_counters
+from core.models import DashboardCounter, LossOfSaleCause, LossOfSaleEvent
+
+
+class TestDashboardCounters(TestCase):
+    """Test counter maintenance."""
+
+    def setUp(self):
+        self.cause = LossOfSaleCause.objects.create(code='EQ', name='Equipment failure')
+        self.event = self.create_event('LOS-001', '1000.00')
+        # Materialize the counters
+        dashboard_counters.get_summaries()
+
+    def create_event(self, reference, amount):
+        return LossOfSaleEvent.objects.create(
+            reference_number=reference,
+            title=f'Event {reference}',
+            cause=self.cause,
+            description='Rig down',
+            event_date=date(2026, 1, 1),
+            estimated_loss_amount=Decimal(amount),
+        )
+
+    def finance(self):
+        return dashboard_counters.get_summaries()['finance_summary']
+
+    def test_initial_values(self):
+        self.assertEqual(self.finance()['loss_events'], 1)
+        self.assertEqual(self.finance()['total_loss'], Decimal('1000.00'))
+
+    def test_create_update_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.create_event('LOS-002', '250.50')
+        self.assertEqual(self.finance()['loss_events'], 2)
+        self.assertEqual(self.finance()['total_loss'], Decimal('1250.50'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.estimated_loss_amount = Decimal('50.00')
+            second.save()
+        self.assertEqual(self.finance()['total_loss'], Decimal('1050.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.delete()
+        self.assertEqual(self.finance(), {
+            'erp_references': 0,
+            'pending_sync': 0,
+            'loss_events': 1,
+            'total_loss': Decimal('50.00'),
+        })
+
+    def test_counters_move_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_event('LOS-002', '250.50')
+        # Nothing written inside the saving transaction
+        self.assertEqual(self.finance()['loss_events'], 1)
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertEqual(self.finance()['loss_events'], 2)
+
+    def test_single_query_read(self):
+        with self.assertNumQueries(1):
+            dashboard_counters.get_summaries()
+
+    def test_reconcile_repairs_bulk_changes(self):
+        # queryset.update() does not send signals
+        LossOfSaleEvent.objects.update(estimated_loss_amount=Decimal('10.00'))
+        self.assertEqual(self.finance()['total_loss'], Decimal('1000.00'))
+
+        out = StringIO()
+        call_command('reconcile_dashboard_counters', '--key', 'finance_summary.total_loss', stdout=out)
+
+        self.assertIn('(1 drifted)', out.getvalue())
+        self.assertEqual(self.finance()['total_loss'], Decimal('10.00'))
+
+    def test_missing_counter_is_computed_on_read(self):
+        DashboardCounter.objects.filter(key='finance_summary.loss_events').delete()
+        self.assertEqual(self.finance()['loss_events'], 1)
+        self.assertTrue(DashboardCounter.objects.filter(key='finance_summary.loss_events').exists())
+
+    def test_failing_module_shows_zeros(self):
+        DashboardCounter.objects.filter(key__startswith='finance_summary.').delete()
+        DashboardCounter.objects.filter(key='hr_summary.departments').delete()
+
+        def compute(counter, model):
+            if counter.key == 'finance_summary.pending_sync':
+                raise RuntimeError('table missing')
+            return original(counter, model)
+
+        original = dashboard_counters.Counter.compute
+        with mock.patch.object(dashboard_counters.Counter, 'compute', compute), \
+                self.assertLogs('core.dashboard_counters', 'ERROR'):
+            summaries = dashboard_counters.get_summaries()
+
+        self.assertEqual(summaries['finance_summary'], dict.fromkeys(
+            ['erp_references', 'pending_sync', 'loss_events', 'total_loss'], 0
+        ))
+        # Other modules are still counted
+        self.assertEqual(summaries['hr_summary']['departments'], 0)
+        self.assertTrue(DashboardCounter.objects.filter(key='hr_summary.departments').exists())
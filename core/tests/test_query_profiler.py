@@ -0,0 +1,113 @@
+"""
+Tests for the SQL Profiler
+
+Tests core.query_profiler:
+- Query counting and N+1 fingerprinting
+- Rolling per-view aggregation and the report
+- Staff-only endpoint and the report command
+"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import query_profiler
+from core.models import ActivityLog
+
+User = get_user_model()
+
+
+class TestRequestProfile(TestCase):
+    """Test per-request query collection."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='profiled', password='testpass123')
+
+    def test_fingerprint_folds_in_lists_and_literals(self):
+        self.assertEqual(
+            query_profiler.fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            query_profiler.fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            query_profiler.fingerprint("SELECT 1 FROM t WHERE name = 'a' LIMIT 10"),
+            'SELECT ? FROM t WHERE name = ? LIMIT ?',
+        )
+
+    def test_counts_queries_and_detects_repeats(self):
+        with query_profiler.RequestProfile() as profile:
+            for _ in range(6):
+                User.objects.filter(pk=self.user.pk).exists()
+            ActivityLog.objects.count()
+
+        self.assertEqual(profile.query_count, 7)
+        self.assertGreaterEqual(profile.sql_ms, 0)
+        duplicates = profile.duplicates(threshold=5)
+        self.assertEqual(list(duplicates.values()), [6])
+        self.assertIn('auth_user', next(iter(duplicates)))
+
+
+class TestProfileStore(TestCase):
+    """Test rolling aggregation and reporting."""
+
+    def make_profile(self, queries, sql_ms, repeated=0):
+        profile = query_profiler.RequestProfile()
+        profile.query_count = queries
+        profile.sql_ms = sql_ms
+        if repeated:
+            profile.fingerprints['SELECT * FROM item WHERE id = %s'] = repeated
+        return profile
+
+    def test_report_ranks_views(self):
+        store = query_profiler.ProfileStore(window_seconds=600)
+        store.record('core:home', self.make_profile(3, 4.0), now=1000)
+        store.record('core:home', self.make_profile(5, 6.0), now=1010)
+        store.record('inventory:item_list', self.make_profile(60, 80.0, repeated=50), now=1020)
+
+        rows = query_profiler.build_report(store.aggregate(now=1030))
+        self.assertEqual([row['view'] for row in rows], ['inventory:item_list', 'core:home'])
+
+        home = rows[1]
+        self.assertEqual(home['requests'], 2)
+        self.assertEqual(home['avg_queries'], 4.0)
+        self.assertEqual(home['max_queries'], 5)
+        self.assertEqual(home['p95_queries'], 5)
+        self.assertEqual(home['n_plus_one'], [])
+
+        suspect = rows[0]['n_plus_one'][0]
+        self.assertEqual(suspect['requests'], 1)
+        self.assertEqual(suspect['max_repeats'], 50)
+
+    def test_window_expires_old_slots(self):
+        store = query_profiler.ProfileStore(window_seconds=120)
+        store.record('core:home', self.make_profile(3, 4.0), now=1000)
+        store.record('core:home', self.make_profile(3, 4.0), now=2000)
+
+        self.assertEqual(store.aggregate(now=2000)['core:home']['requests'], 1)
+
+
+class TestProfileReport(TestCase):
+    """Test the report endpoint and command."""
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        query_profiler.get_store().reset()
+
+    def test_endpoint_is_staff_only(self):
+        User.objects.create_user(username='plain', password='testpass123')
+        self.client.login(username='plain', password='testpass123')
+        self.assertEqual(self.client.get(reverse('core:sql_profile_api')).status_code, 302)
+
+        self.client.login(username='staff', password='testpass123')
+        response = self.client.get(reverse('core:sql_profile_api'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['views'], [])
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_command_profiles_urls(self):
+        out = StringIO()
+        call_command('sql_profile_report', '--url', reverse('core:sql_profile_api'),
+                     '--user', 'staff', stdout=out)
+        self.assertIn('core:sql_profile_api: 1 req', out.getvalue())
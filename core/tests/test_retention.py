@@ -0,0 +1,79 @@
+"""
+Tests for the Retention Engine
+
+Tests core.retention:
+- Only aged rows matching the policy are deleted
+- Batching and dry runs
+- Per-model policy overrides
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import retention
+from core.models import ActivityLog, Notification
+from core.notification_utils import cleanup_old_notifications
+
+User = get_user_model()
+
+
+class TestRetention(TestCase):
+    """Test purging aged rows."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='retained', password='testpass123')
+        now = timezone.now()
+        for i in range(7):
+            ActivityLog.objects.create(user=self.user, action='VIEW', description=f'old {i}',
+                                       created_at=now - timedelta(days=400 + i))
+        for i in range(3):
+            ActivityLog.objects.create(user=self.user, action='VIEW', description=f'new {i}',
+                                       created_at=now - timedelta(days=i))
+
+    def test_purge_in_batches(self):
+        result = retention.purge(retention.get_policy('core.ActivityLog'), batch_size=3, sleep=0)
+
+        self.assertEqual(result['deleted'], 7)
+        self.assertEqual(result['batches'], 3)
+        self.assertEqual(
+            sorted(ActivityLog.objects.values_list('description', flat=True)),
+            ['new 0', 'new 1', 'new 2'],
+        )
+
+    def test_dry_run_only_counts(self):
+        result = retention.purge(retention.get_policy('core.ActivityLog'), dry_run=True)
+        self.assertEqual(result['would_delete'], 7)
+        self.assertEqual(ActivityLog.objects.count(), 10)
+
+    def test_max_batches_resumes(self):
+        policy = retention.get_policy('core.ActivityLog')
+        self.assertEqual(retention.purge(policy, batch_size=2, sleep=0, max_batches=1)['deleted'], 2)
+        self.assertEqual(retention.purge(policy, batch_size=2, sleep=0)['deleted'], 5)
+
+    def test_notifications_respect_filters(self):
+        old = timezone.now() - timedelta(days=200)
+        read = Notification.objects.create(user=self.user, title='Read', message='x',
+                                           is_read=True, read_at=old)
+        unread = Notification.objects.create(user=self.user, title='Unread', message='x')
+        Notification.objects.filter(pk__in=[read.pk, unread.pk]).update(created_at=old)
+
+        self.assertEqual(cleanup_old_notifications(days=90), 1)
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['Unread'])
+
+    @override_settings(RETENTION_POLICIES={'core.ActivityLog': {'days': 500}, 'analytics.PageView': None})
+    def test_policy_overrides(self):
+        policies = retention.get_policies()
+        self.assertEqual(policies['core.ActivityLog'].days, 500)
+        self.assertEqual(policies['core.ActivityLog'].date_field, 'created_at')
+        self.assertNotIn('analytics.PageView', policies)
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command('purge_old_records', '--model', 'core.ActivityLog', '--dry-run', stdout=out)
+        self.assertIn('core.ActivityLog: 7 rows', out.getvalue())
+        self.assertEqual(ActivityLog.objects.count(), 10)
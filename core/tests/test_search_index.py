@@ -0,0 +1,169 @@
+"""
+Tests for the Global Search Index
+
+Tests the inverted index behind GlobalSearch:
+- Tokenization
+- Signal-driven index maintenance
+- Ranked, prefix-matching lookups
+- Rebuild management command
+- In-memory autocomplete index
+"""
+
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+
+from core import search_index
+from core.autocomplete import AutocompleteIndex
+from core.models import CostCenter, SearchDocument, SearchToken
+from core.search_utils import GlobalSearch
+
+User = get_user_model()
+
+
+class TestTokenize(TestCase):
+    """Test token normalization."""
+
+    def test_splits_codes_and_lowercases(self):
+        self.assertEqual(search_index.tokenize('CC-001 Main_Hall'), ['cc', '001', 'main', 'hall'])
+
+    def test_empty_values(self):
+        self.assertEqual(search_index.tokenize(None), [])
+        self.assertEqual(search_index.tokenize(''), [])
+
+
+@override_settings(SEARCH_INDEX_ENABLED=True)
+class TestSearchIndex(TestCase):
+    """Test index maintenance and querying."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='indexer', password='testpass123')
+        self.production = CostCenter.objects.create(
+            code='CC-001',
+            name='Production Cost Center',
+            description='Shop floor',
+            created_by=self.user,
+        )
+        self.workshop = CostCenter.objects.create(
+            code='CC-002',
+            name='Workshop',
+            description='Production support',
+            created_by=self.user,
+        )
+
+    def test_save_indexes_object(self):
+        document = SearchDocument.objects.get(model_path='core.CostCenter', object_id=self.production.pk)
+        self.assertEqual(document.display, 'CC-001 - Production Cost Center')
+        self.assertTrue(SearchToken.objects.filter(document=document, token='production').exists())
+
+    def test_update_replaces_tokens(self):
+        self.production.name = 'Assembly Cost Center'
+        self.production.save()
+
+        hits = search_index.search('assembly', model_paths=['core.CostCenter'])
+        self.assertEqual([h['id'] for h in hits['core.CostCenter']], [self.production.pk])
+        self.assertEqual(search_index.search('cost prod', model_paths=['core.CostCenter']), {})
+
+    def test_delete_removes_document(self):
+        pk = self.workshop.pk
+        self.workshop.delete()
+        self.assertFalse(SearchDocument.objects.filter(model_path='core.CostCenter', object_id=pk).exists())
+
+    def test_prefix_and_all_terms_must_match(self):
+        hits = search_index.search('prod cost', model_paths=['core.CostCenter'])
+        self.assertEqual([h['id'] for h in hits['core.CostCenter']], [self.production.pk])
+
+    def test_ranking_prefers_earlier_fields(self):
+        # "production" is in the name of CC-001 but only the description of CC-002
+        hits = search_index.search('production', model_paths=['core.CostCenter'])
+        self.assertEqual(
+            [h['id'] for h in hits['core.CostCenter']],
+            [self.production.pk, self.workshop.pk],
+        )
+
+    def test_limit_applies_per_model(self):
+        content_type = ContentType.objects.get_for_model(CostCenter)
+        for object_id, (model_path, weight) in enumerate([('test.Many', 10)] * 5 + [('test.Few', 1)], start=1000):
+            document = SearchDocument.objects.create(
+                content_type=content_type, object_id=object_id, model_path=model_path, display=model_path,
+            )
+            SearchToken.objects.create(document=document, token='gauge', weight=weight)
+
+        hits = search_index.search('gauge', model_paths=['test.Many', 'test.Few'], limit_per_model=2)
+        self.assertEqual(len(hits['test.Many']), 2)
+        self.assertEqual([h['id'] for h in hits['test.Few']], [1005])
+
+    def test_global_search_uses_index(self):
+        results = GlobalSearch(query='CC-002').execute()
+        cost_centers = next(r for r in results if r['model_path'] == 'core.CostCenter')
+        self.assertEqual(cost_centers['results'][0]['id'], self.workshop.pk)
+        self.assertIn('score', cost_centers['results'][0])
+
+    def test_index_and_scan_agree(self):
+        indexed = GlobalSearch(query='Workshop', modules=['core']).execute()
+        scanned = GlobalSearch(query='Workshop', modules=['core'], use_index=False).execute()
+        self.assertEqual(
+            [r['id'] for r in indexed[0]['results']],
+            [r['id'] for r in scanned[0]['results']],
+        )
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', '--model', 'core.CostCenter', stdout=out)
+
+        self.assertIn('core.CostCenter: 2 documents', out.getvalue())
+        self.assertEqual(SearchDocument.objects.filter(model_path='core.CostCenter').count(), 2)
+
+
+class TestAutocompleteIndex(TestCase):
+    """Test the in-memory autocomplete index."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='completer', password='testpass123')
+        self.cutter = CostCenter.objects.create(code='CUT-100', name='Cutter Line', created_by=self.user)
+        self.cutting = CostCenter.objects.create(code='CUT-200', name='Cutting Room', created_by=self.user)
+        self.index = AutocompleteIndex()
+        self.index.load()
+
+    def lookup_ids(self, query, **kwargs):
+        results, _ = self.index.lookup(query, **kwargs)
+        return [r['id'] for r in results]
+
+    def test_exact_token_ranks_first(self):
+        self.assertEqual(self.lookup_ids('cutt'), [self.cutter.pk, self.cutting.pk])
+        self.assertEqual(self.lookup_ids('cutter'), [self.cutter.pk])
+        self.assertEqual(set(self.lookup_ids('cut')), {self.cutter.pk, self.cutting.pk})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.lookup_ids('cut room'), [self.cutting.pk])
+
+    def test_limit(self):
+        self.assertEqual(len(self.lookup_ids('cut', limit=1)), 1)
+
+    def test_incremental_refresh_and_discard(self):
+        added = CostCenter.objects.create(code='CUT-300', name='Cutter Repair', created_by=self.user)
+        self.index.refresh()
+        self.assertIn(added.pk, self.lookup_ids('repair'))
+
+        self.index.discard('core.CostCenter', added.pk)
+        self.assertEqual(self.lookup_ids('repair'), [])
+
+    def test_refresh_replaces_changed_documents(self):
+        self.cutter.name = 'Grinder Line'
+        self.cutter.save()
+        CostCenter.objects.create(code='CUT-400', name='Cutter Store', created_by=self.user)
+        self.index.refresh()
+
+        self.assertNotIn(self.cutter.pk, self.lookup_ids('cutter'))
+        self.assertEqual(self.lookup_ids('grinder'), [self.cutter.pk])
+        self.assertEqual(self.index._postings, sorted(self.index._postings))
+
+    def test_zero_budget_returns_partial(self):
+        for i in range(300):
+            self.index.apply('core.CostCenter', 10000 + i, f'CUT-{i} Bulk')
+        results, partial = self.index.lookup('bulk', budget_ms=0)
+        self.assertTrue(partial)
+        self.assertLessEqual(len(results), 20)
@@ -0,0 +1,105 @@
+"""
+Tests for Document Number Sequences
+
+Tests the counter-backed document number allocator:
+- Seeding a new counter from existing document numbers
+- Consecutive numbers from one counter row
+- Per-process block reservation
+- Rolled-back reservations
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core import sequences
+from core.models import DocumentSequence, LossOfSaleCause, LossOfSaleEvent
+
+
+class TestSequences(TestCase):
+    """Test number allocation inside a transaction."""
+
+    def setUp(self):
+        sequences.reset_blocks()
+        self.cause = LossOfSaleCause.objects.create(code='EQ', name='Equipment failure')
+
+    def create_event(self, reference):
+        return LossOfSaleEvent.objects.create(
+            reference_number=reference,
+            title=f'Event {reference}',
+            cause=self.cause,
+            description='Rig down',
+            event_date='2026-01-01',
+            estimated_loss_amount=Decimal('0.00'),
+        )
+
+    def test_new_counter_starts_at_one(self):
+        number = sequences.next_number(LossOfSaleEvent.objects, 'reference_number', 'LOS-2026-', width=4)
+        self.assertEqual(number, 'LOS-2026-0001')
+
+    def test_new_counter_seeded_from_existing_numbers(self):
+        self.create_event('LOS-2026-0007')
+        self.create_event('LOS-2025-0042')
+
+        number = sequences.next_number(LossOfSaleEvent.objects, 'reference_number', 'LOS-2026-', width=4)
+        self.assertEqual(number, 'LOS-2026-0008')
+
+    def test_consecutive_numbers(self):
+        numbers = [
+            sequences.next_number(LossOfSaleEvent.objects, 'reference_number', 'LOS-2026-', width=4)
+            for _ in range(3)
+        ]
+        self.assertEqual(numbers, ['LOS-2026-0001', 'LOS-2026-0002', 'LOS-2026-0003'])
+
+        key = sequences.sequence_key(LossOfSaleEvent.objects, 'reference_number', 'LOS-2026-')
+        self.assertEqual(DocumentSequence.objects.get(key=key).last_value, 3)
+
+    def test_counter_not_reseeded(self):
+        sequences.next_value('test:A')
+        # The counter row exists, the seed is not consulted again
+        self.assertEqual(sequences.next_value('test:A', seed=lambda: 99), 2)
+
+    def test_last_number_ignores_malformed_numbers(self):
+        self.create_event('LOS-2026-X')
+        self.assertEqual(sequences.last_number(LossOfSaleEvent.objects, 'reference_number', 'LOS-2026-'), 0)
+
+    @override_settings(DOCUMENT_SEQUENCE_BLOCK_SIZE=5)
+    def test_block_served_within_transaction(self):
+        values = [sequences.next_value('test:B', block=True) for _ in range(7)]
+        self.assertEqual(values, [1, 2, 3, 4, 5, 6, 7])
+        # Two blocks reserved
+        self.assertEqual(DocumentSequence.objects.get(key='test:B').last_value, 10)
+
+
+@override_settings(DOCUMENT_SEQUENCE_BLOCK_SIZE=5)
+class TestSequenceBlocks(TransactionTestCase):
+    """Test block reservation across transactions."""
+
+    def setUp(self):
+        sequences.reset_blocks()
+
+    def tearDown(self):
+        sequences.reset_blocks()
+
+    def test_committed_block_reused(self):
+        self.assertEqual(sequences.next_value('test:C', block=True), 1)
+        self.assertEqual(sequences.next_value('test:C', block=True), 2)
+        self.assertEqual(DocumentSequence.objects.get(key='test:C').last_value, 5)
+
+    def test_other_process_skips_reserved_block(self):
+        sequences.next_value('test:D', block=True)
+        # A new process does not see this process' block
+        sequences.reset_blocks()
+        self.assertEqual(sequences.next_value('test:D', block=True), 6)
+
+    def test_rolled_back_block_released(self):
+        try:
+            with transaction.atomic():
+                self.assertEqual(sequences.next_value('test:E', block=True), 1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertFalse(DocumentSequence.objects.filter(key='test:E').exists())
+        self.assertEqual(sequences.next_value('test:E', block=True), 1)
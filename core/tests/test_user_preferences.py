@@ -0,0 +1,107 @@
+"""
+Tests for User Preference Caching
+
+Tests the per-user display preference cache used by the
+user_preferences context processor:
+- Cached reads
+- Version-stamp invalidation on save
+- Short-lived per-process caching without a shared cache
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+
+from core.context_processors import user_preferences
+from core import models as core_models
+from core.models import UserPreference
+
+User = get_user_model()
+
+# Shared by every worker on the host, unlike the default LocMemCache
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'floor_mgmt_test_cache'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class TestDisplayPreferenceCache(TestCase):
+    """Test cached display preferences."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='themed', password='testpass123')
+
+    def test_defaults_without_row(self):
+        display = UserPreference.get_display_preferences(self.user)
+        self.assertEqual(display, {
+            'theme': 'light',
+            'font_size': 'normal',
+            'table_density': 'normal',
+            'sidebar_collapsed': False,
+        })
+        self.assertFalse(UserPreference.objects.filter(user=self.user).exists())
+
+    def test_cached_after_first_read(self):
+        UserPreference.objects.create(user=self.user, theme='dark')
+        UserPreference.get_display_preferences(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(UserPreference.get_display_preferences(self.user)['theme'], 'dark')
+
+    def test_save_invalidates(self):
+        pref = UserPreference.objects.create(user=self.user, theme='dark')
+        UserPreference.get_display_preferences(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pref.font_size = 'large'
+            pref.save()
+
+        self.assertEqual(UserPreference.get_display_preferences(self.user)['font_size'], 'large')
+
+    def test_context_processor_does_not_query(self):
+        UserPreference.objects.create(user=self.user, table_density='compact')
+        request = RequestFactory().get('/')
+        request.user = self.user
+        user_preferences(request)
+
+        with self.assertNumQueries(0):
+            context = user_preferences(request)
+        self.assertEqual(context['table_density'], 'compact')
+        self.assertEqual(context['user_preferences'].table_density, 'compact')
+
+
+class TestDisplayPreferencesWithoutSharedCache(TestCase):
+    """A per-process cache cannot see other workers' version stamps."""
+
+    def setUp(self):
+        core_models._local_display.clear()
+        self.user = User.objects.create_user(username='local', password='testpass123')
+        self.pref = UserPreference.objects.create(user=self.user, theme='dark')
+        UserPreference.get_display_preferences(self.user)
+
+    def test_cached_within_ttl(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(UserPreference.get_display_preferences(self.user)['theme'], 'dark')
+
+    def test_reloaded_after_ttl(self):
+        # Changed behind this process' back, as another worker would
+        UserPreference.objects.filter(pk=self.pref.pk).update(theme='light')
+        later = core_models.time.monotonic() + UserPreference.DISPLAY_LOCAL_TTL + 1
+        with mock.patch.object(core_models.time, 'monotonic', return_value=later):
+            with self.assertNumQueries(1):
+                self.assertEqual(UserPreference.get_display_preferences(self.user)['theme'], 'light')
+
+    def test_save_invalidates_local_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pref.theme = 'high_contrast'
+            self.pref.save()
+
+        self.assertEqual(UserPreference.get_display_preferences(self.user)['theme'], 'high_contrast')
@@ -34,6 +34,7 @@ urlpatterns = [
     # API Endpoints
     path("api/user-preferences/table-columns/", views.TableColumnsAPIView.as_view(), name="api_table_columns"),
     path("api/search/", views.global_search_api, name="global_search_api"),
+    path("api/sql-profile/", views.sql_profile_api, name="sql_profile_api"),
 
     # Global Search
     path("search/", views.global_search, name="global_search"),
@@ -24,7 +24,6 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.admin.models import LogEntry
 from django.contrib.sessions.models import Session
 from django.urls import reverse_lazy
-from floor_app.operations.hr.models import HREmployee, Department
 import json
 
 from .models import (
@@ -43,141 +42,15 @@ from .forms import (
     UserPermissionsForm,
 )
 from .search_utils import GlobalSearch, SearchHistory
+from . import autocomplete, dashboard_counters, query_profiler
 
 
 @login_required
 def main_dashboard(request):
     """Main application dashboard."""
-    # HR Summary
-    hr_summary = {
-        "employees": HREmployee.objects.filter(is_deleted=False).count(),
-        "departments": Department.objects.count(),
-    }
-
-    # Inventory Summary
-    try:
-        from floor_app.operations.inventory.models import Item, SerialUnit
-        inventory_summary = {
-            "items": Item.objects.count(),
-            "serial_units": SerialUnit.objects.count(),
-        }
-    except Exception:
-        inventory_summary = {"items": 0, "serial_units": 0}
-
-    # Production Summary
-    try:
-        from floor_app.operations.production.models import JobCard, ProductionBatch
-        production_summary = {
-            "job_cards": JobCard.objects.count(),
-            "batches": ProductionBatch.objects.count(),
-        }
-    except Exception:
-        production_summary = {"job_cards": 0, "batches": 0}
-
-    # Evaluation Summary
-    try:
-        from floor_app.operations.evaluation.models import EvaluationSession, BitType
-        evaluation_summary = {
-            "sessions": EvaluationSession.objects.count(),
-            "bit_types": BitType.objects.count(),
-        }
-    except Exception:
-        evaluation_summary = {"sessions": 0, "bit_types": 0}
-
-    # Purchasing Summary
-    try:
-        from floor_app.operations.purchasing.models import Supplier, PurchaseOrder
-        purchasing_summary = {
-            "suppliers": Supplier.objects.count(),
-            "pos": PurchaseOrder.objects.count(),
-        }
-    except Exception:
-        purchasing_summary = {"suppliers": 0, "pos": 0}
-
-    # QRCodes Summary
-    try:
-        from floor_app.operations.qrcodes.models import QRCode, Equipment
-        qrcodes_summary = {
-            "codes": QRCode.objects.count(),
-            "equipment": Equipment.objects.count(),
-        }
-    except Exception:
-        qrcodes_summary = {"codes": 0, "equipment": 0}
-
-    # Knowledge Summary
-    try:
-        from floor_app.operations.knowledge.models import Article, TrainingCourse
-        knowledge_summary = {
-            "articles": Article.objects.count(),
-            "courses": TrainingCourse.objects.count(),
-        }
-    except Exception:
-        knowledge_summary = {"articles": 0, "courses": 0}
-
-    # Maintenance Summary
-    try:
-        from floor_app.operations.maintenance.models import Asset, WorkOrder
-        maintenance_summary = {
-            "assets": Asset.objects.count(),
-            "work_orders": WorkOrder.objects.filter(status__in=['OPEN', 'IN_PROGRESS']).count(),
-        }
-    except Exception:
-        maintenance_summary = {"assets": 0, "work_orders": 0}
-
-    # Quality Summary
-    try:
-        from floor_app.operations.quality.models import NonconformanceReport, QualityDisposition
-        quality_summary = {
-            "open_ncrs": NonconformanceReport.objects.exclude(status='CLOSED').count(),
-            "dispositions": QualityDisposition.objects.count(),
-        }
-    except Exception:
-        quality_summary = {"open_ncrs": 0, "dispositions": 0}
-
-    # Planning Summary
-    try:
-        from floor_app.operations.planning.models import ProductionSchedule, KPIDefinition
-        planning_summary = {
-            "schedules": ProductionSchedule.objects.count(),
-            "kpis": KPIDefinition.objects.filter(is_active=True).count(),
-        }
-    except Exception:
-        planning_summary = {"schedules": 0, "kpis": 0}
-
-    # Sales Summary
-    try:
-        from floor_app.operations.sales.models import Customer, SalesOpportunity, SalesOrder, DrillingRun
-        sales_summary = {
-            "customers": Customer.objects.filter(is_deleted=False).count(),
-            "opportunities": SalesOpportunity.objects.filter(is_deleted=False).count(),
-            "orders": SalesOrder.objects.filter(is_deleted=False).count(),
-            "drilling_runs": DrillingRun.objects.filter(is_deleted=False).count(),
-        }
-    except Exception:
-        sales_summary = {"customers": 0, "opportunities": 0, "orders": 0, "drilling_runs": 0}
-
-    # Finance summary
-    finance_summary = {
-        "erp_references": ERPReference.objects.count(),
-        "pending_sync": ERPReference.objects.filter(sync_status='pending').count(),
-        "loss_events": LossOfSaleEvent.objects.count(),
-        "total_loss": LossOfSaleEvent.objects.aggregate(total=Sum('estimated_loss_amount'))['total'] or 0,
-    }
-
-    context = {
-        "hr_summary": hr_summary,
-        "inventory_summary": inventory_summary,
-        "production_summary": production_summary,
-        "evaluation_summary": evaluation_summary,
-        "purchasing_summary": purchasing_summary,
-        "qrcodes_summary": qrcodes_summary,
-        "knowledge_summary": knowledge_summary,
-        "maintenance_summary": maintenance_summary,
-        "quality_summary": quality_summary,
-        "planning_summary": planning_summary,
-        "sales_summary": sales_summary,
-        "finance_summary": finance_summary,
-    }
+    # Module summaries (hr_summary, inventory_summary, ...) come from the
+    # materialized counters - one query instead of a COUNT per figure
+    context = dashboard_counters.get_summaries()
 
     return render(request, "core/main_dashboard.html", context)
 
@@ -918,25 +791,79 @@ def global_search_api(request):
     if not query or len(query) < 2:
         return JsonResponse({'results': []})
 
+    index = autocomplete.get_index()
+    if autocomplete.is_enabled() and index.ensure_fresh():
+        return _autocomplete_from_index(request, index, query)
+
     # Execute search with lower limit for autocomplete
     search = GlobalSearch(query=query, limit_per_model=5)
     results = search.execute()
 
+    # Rank across models (index results carry a score; scan results do not)
+    hits = [
+        (model_group, item)
+        for model_group in results
+        for item in model_group['results']
+    ]
+    hits.sort(key=lambda hit: hit[1].get('score', 0), reverse=True)
+
     # Format results for autocomplete
+    base_url = request.build_absolute_uri('/')[:-1]
+    formatted_results = []
+    for model_group, item in hits[:autocomplete.DEFAULT_LIMIT]:
+        formatted_results.append({
+            'id': item['id'],
+            'text': item['display'],
+            'icon': model_group['model_icon'],
+            'label': model_group['model_label'],
+            'url': base_url + autocomplete.get_object_url(item['url_pattern'], item['id']),
+        })
+
+    return JsonResponse({'results': formatted_results})
+
+
+def _autocomplete_from_index(request, index, query):
+    """Answer global_search_api from the in-memory autocomplete index."""
+    searchable = GlobalSearch.SEARCHABLE_MODELS
+    hits, partial = index.lookup(query, model_order=list(searchable))
+
+    base_url = request.build_absolute_uri('/')[:-1]
     formatted_results = []
-    for model_group in results:
-        for item in model_group['results']:
-            formatted_results.append({
-                'id': item['id'],
-                'text': item['display'],
-                'icon': model_group['model_icon'],
-                'label': model_group['model_label'],
-                'url': request.build_absolute_uri(
-                    reverse(item['url_pattern'], kwargs={'pk': item['id']})
-                ),
-            })
-
-    return JsonResponse({'results': formatted_results[:20]})
+    for hit in hits:
+        config = searchable.get(hit['model_path'])
+        if config is None:
+            continue
+        formatted_results.append({
+            'id': hit['id'],
+            'text': hit['display'],
+            'icon': config['icon'],
+            'label': config['label'],
+            'url': base_url + autocomplete.get_object_url(config['url_pattern'], hit['id']),
+        })
+
+    return JsonResponse({'results': formatted_results, 'partial': partial})
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def sql_profile_api(request):
+    """
+    Per-view SQL profile of this process (see core.query_profiler).
+
+    Query params: sort (sql_ms, queries, requests, n_plus_one), limit
+    """
+    sort = request.GET.get('sort', 'sql_ms')
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        limit = 20
+
+    store = query_profiler.get_store()
+    return JsonResponse({
+        'enabled': query_profiler.is_enabled(),
+        'window_seconds': store.window_seconds,
+        'views': query_profiler.build_report(store.aggregate(), sort=sort, limit=limit),
+    })
 
 
 # Health check endpoints
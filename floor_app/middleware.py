@@ -5,12 +5,19 @@ _local = threading.local()
 def get_current_request():
     return getattr(_local, "request", None)
 
+def get_current_user():
+    request = get_current_request()
+    return getattr(request, "user", None) if request is not None else None
+
+def set_current_request(request):
+    _local.request = request
+
 class CurrentRequestMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
     def __call__(self, request):
-        _local.request = request
+        set_current_request(request)
         try:
             return self.get_response(request)
         finally:
-            _local.request = None
+            set_current_request(None)
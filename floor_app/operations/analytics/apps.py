@@ -12,3 +12,10 @@ class AnalyticsConfig(AppConfig):
             import floor_app.operations.analytics.signals  # noqa
         except ImportError:
             pass
+
+        try:
+            from floor_app.operations.analytics.rule_engine import triggers
+        except ImportError:
+            return
+        if triggers.is_enabled():
+            triggers.connect()
@@ -0,0 +1,481 @@
+"""
+Columnar archive of aged AppEvent and PageView rows.
+
+Raw events are purged after their retention period (cleanup_old_events,
+core.retention), which leaves nothing to compute year-over-year usage
+from. archive_events() copies aged rows, before they are purged, into one
+directory per model and month:
+
+    <ANALYTICS_ARCHIVE_ROOT>/<app_label.model>/<YYYY-MM>/
+        timestamp.col   epoch seconds (int64), rows sorted by time
+        user.col        user id (int64, -1 for anonymous)
+        view.col        dictionary code of view_name / url_name (int32)
+        category.col    dictionary code of event_category / module (int32)
+        duration.col    duration_ms / load_time_ms (int64, -1 if unknown)
+        index.json      row count, time range, dictionaries and how far
+                        the month has been archived
+
+Columns are raw machine arrays (the stdlib array module, no NumPy), so
+EventArchive maps them with mmap and answers counts, group-bys and trends
+over any range with C-level iteration and without touching the database;
+the sorted timestamp column is binary-searched for the range bounds.
+
+Writes are crash-safe: column files are appended first and index.json is
+replaced last, so rows beyond the indexed count are ignored by readers and
+truncated by the next run, which resumes from the indexed position.
+A run holds an exclusive lock on the model directory (.lock), so
+overlapping runs (archive_old_events and a purge archiving first) take
+turns instead of appending to the same month files.
+
+Settings:
+ANALYTICS_ARCHIVE_ROOT = BASE_DIR / 'archive' / 'analytics'
+ANALYTICS_ARCHIVE_AFTER_DAYS = 30        # Archive rows older than this
+ANALYTICS_ARCHIVE_ENABLED = True         # Archive before the retention purge
+
+Usage:
+    python manage.py archive_analytics_events
+    EventArchive('analytics.AppEvent').trend(start, end, period='month', category='Inventory')
+"""
+
+import json
+import logging
+import mmap
+import operator
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import reduce
+from itertools import compress
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+UTC = dt_timezone.utc
+
+INDEX_VERSION = 1
+
+# Column name -> array typecode
+COLUMNS = {
+    'timestamp': 'q',
+    'user': 'q',
+    'view': 'i',
+    'category': 'i',
+    'duration': 'q',
+}
+
+# Columns stored as codes into index.json dictionaries
+DICTIONARY_COLUMNS = ('view', 'category')
+
+# Stored for NULL users and durations
+NULL = -1
+
+# Model -> date field and the field stored in each column
+ARCHIVED_MODELS = {
+    'analytics.AppEvent': {
+        'date_field': 'timestamp', 'user': 'user_id', 'view': 'view_name',
+        'category': 'event_category', 'duration': 'duration_ms',
+    },
+    'analytics.PageView': {
+        'date_field': 'timestamp', 'user': 'user_id', 'view': 'url_name',
+        'category': 'module', 'duration': 'load_time_ms',
+    },
+}
+
+DEFAULT_BATCH_SIZE = 20000
+
+
+def get_root():
+    return Path(getattr(settings, 'ANALYTICS_ARCHIVE_ROOT', Path(settings.BASE_DIR) / 'archive' / 'analytics'))
+
+
+def _epoch(moment):
+    return int(moment.timestamp())
+
+
+def _month_start(moment):
+    moment = moment.astimezone(UTC)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month_start):
+    return (month_start + timedelta(days=32)).replace(day=1)
+
+
+class MonthPartition:
+    """The archived rows of one model and month."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.index = self._read_index()
+
+    @property
+    def rows(self):
+        return self.index['rows']
+
+    @property
+    def archived_through(self):
+        """Rows with a timestamp before this (epoch seconds) are archived."""
+        return self.index['archived_through']
+
+    def _read_index(self):
+        path = self.directory / 'index.json'
+        if not path.exists():
+            return {
+                'version': INDEX_VERSION, 'rows': 0, 'byteorder': sys.byteorder,
+                'columns': dict(COLUMNS), 'dictionaries': {name: [] for name in DICTIONARY_COLUMNS},
+                'min_timestamp': None, 'max_timestamp': None, 'archived_through': None,
+            }
+        with open(path) as f:
+            index = json.load(f)
+        if index['byteorder'] != sys.byteorder:
+            raise ValueError(f"{self.directory} was written on a {index['byteorder']}-endian machine")
+        return index
+
+    def _write_index(self):
+        path = self.directory / 'index.json'
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _column_path(self, name):
+        return self.directory / f'{name}.col'
+
+    def append(self, batches, archived_through):
+        """
+        Append time-sorted rows and mark the month archived up to
+        `archived_through` (epoch seconds).
+
+        batches: iterable of row lists, each row (timestamp, user, view,
+            category, duration) with timestamp in epoch seconds
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        rows = self.index['rows']
+
+        # Drop whatever a failed run appended after the last index write
+        for name, typecode in COLUMNS.items():
+            path = self._column_path(name)
+            with open(path, 'ab') as f:
+                f.truncate(rows * array(typecode).itemsize)
+
+        dictionaries = self.index['dictionaries']
+        codes = {name: {value: i for i, value in enumerate(dictionaries[name])} for name in DICTIONARY_COLUMNS}
+        files = {name: open(self._column_path(name), 'ab') for name in COLUMNS}
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+                for timestamp, user, view, category, duration in batch:
+                    columns['timestamp'].append(timestamp)
+                    columns['user'].append(NULL if user is None else user)
+                    columns['duration'].append(NULL if duration is None else duration)
+                    for name, value in (('view', view or ''), ('category', category or '')):
+                        code = codes[name].get(value)
+                        if code is None:
+                            code = codes[name][value] = len(dictionaries[name])
+                            dictionaries[name].append(value)
+                        columns[name].append(code)
+
+                for name, values in columns.items():
+                    values.tofile(files[name])
+                if self.index['min_timestamp'] is None:
+                    self.index['min_timestamp'] = columns['timestamp'][0]
+                self.index['max_timestamp'] = columns['timestamp'][-1]
+                rows += len(batch)
+        finally:
+            for f in files.values():
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+
+        added = rows - self.index['rows']
+        self.index['rows'] = rows
+        self.index['archived_through'] = archived_through
+        self._write_index()
+        return added
+
+    @contextmanager
+    def columns(self):
+        """Memory-mapped columns, as memoryviews of `rows` items each."""
+        with ExitStack() as stack:
+            views = {}
+            if self.rows:
+                for name, typecode in self.index['columns'].items():
+                    f = stack.enter_context(open(self._column_path(name), 'rb'))
+                    mapped = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                    view = memoryview(mapped).cast(typecode)[:self.rows]
+                    # Released before the map is closed
+                    stack.callback(view.release)
+                    views[name] = view
+            yield views
+
+
+# ============================================================================
+# ARCHIVING
+# ============================================================================
+
+def _partition_dirs(model_path, root=None):
+    model_dir = (Path(root) if root else get_root()) / model_path.lower()
+    if not model_dir.exists():
+        return []
+    return sorted(path for path in model_dir.iterdir() if (path / 'index.json').exists())
+
+
+@contextmanager
+def _exclusive_lock(directory):
+    """Hold an exclusive lock on `directory` (blocks until it is free)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / '.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 seconds
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _row_batches(queryset, fields, batch_size):
+    batch = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=batch_size):
+        batch.append((_epoch(row[0]),) + row[1:])
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    yield batch
+
+
+def archive_events(model_path='analytics.AppEvent', before=None, batch_size=None, root=None):
+    """
+    Copy rows older than `before` into the monthly column files.
+
+    Resumes where the previous run stopped, so each row is archived once;
+    rows are not deleted (the retention purge does that).
+
+    Args:
+        model_path: One of ARCHIVED_MODELS
+        before: Archive rows with a timestamp before this (default: now -
+            ANALYTICS_ARCHIVE_AFTER_DAYS); truncated to whole seconds
+        batch_size: Rows fetched and appended at a time
+
+    Returns:
+        dict with 'model', 'rows', 'months' and 'archived_through'
+    """
+    spec = ARCHIVED_MODELS.get(model_path)
+    if spec is None:
+        raise ValueError(f"No archive layout for {model_path}")
+    batch_size = batch_size or getattr(settings, 'ANALYTICS_ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    if before is None:
+        before = timezone.now() - timedelta(days=getattr(settings, 'ANALYTICS_ARCHIVE_AFTER_DAYS', 30))
+    before = before.replace(microsecond=0)
+
+    model = apps.get_model(model_path)
+    date_field = spec['date_field']
+    fields = [date_field] + [spec[name] for name in ('user', 'view', 'category', 'duration')]
+    manager = model._base_manager
+    result = {'model': model_path, 'rows': 0, 'months': 0, 'archived_through': None}
+
+    model_dir = (Path(root) if root else get_root()) / model_path.lower()
+    # Read the resume point and append under the lock: one run at a time
+    with _exclusive_lock(model_dir):
+        partitions = _partition_dirs(model_path, root)
+        start = None
+        if partitions:
+            through = MonthPartition(partitions[-1]).archived_through
+            start = datetime.fromtimestamp(through, UTC)
+        else:
+            first = manager.filter(**{f'{date_field}__lt': before}).order_by(date_field).values_list(
+                date_field, flat=True
+            ).first()
+            if first is None:
+                return result
+            start = first
+
+        month = _month_start(start)
+        while month < before:
+            window_start = max(start, month)
+            window_end = min(before, _next_month(month))
+            if window_start < window_end:
+                rows = manager.filter(**{
+                    f'{date_field}__gte': window_start, f'{date_field}__lt': window_end,
+                }).order_by(date_field, 'pk')
+                partition = MonthPartition(model_dir / f'{month:%Y-%m}')
+                added = partition.append(_row_batches(rows, fields, batch_size), _epoch(window_end))
+                result['rows'] += added
+                result['months'] += 1
+                result['archived_through'] = window_end
+            month = _next_month(month)
+
+    logger.info(
+        f"Archived {result['rows']} {model_path} rows in {result['months']} months "
+        f"(through {result['archived_through']})"
+    )
+    return result
+
+
+def archive_all(**kwargs):
+    return [archive_events(model_path, **kwargs) for model_path in ARCHIVED_MODELS]
+
+
+# ============================================================================
+# QUERYING
+# ============================================================================
+
+def _selected(views, lo, hi, codes):
+    """Selector over rows [lo, hi) matching every {column: code}, or None."""
+    selectors = [map(code.__eq__, views[name][lo:hi]) for name, code in codes.items()]
+    if not selectors:
+        return None
+    return reduce(lambda a, b: map(operator.and_, a, b), selectors)
+
+
+class EventArchive:
+    """
+    Read-only queries over the archived rows of one model.
+
+    Ranges are [start, end) datetimes (None = unbounded). Filters are
+    column=value pairs: view='inventory:item_list', category='Inventory',
+    user=42 (None matches anonymous rows).
+    """
+
+    def __init__(self, model_path='analytics.AppEvent', root=None):
+        if model_path not in ARCHIVED_MODELS:
+            raise ValueError(f"No archive layout for {model_path}")
+        self.model_path = model_path
+        self.root = root
+
+    def partitions(self, start=None, end=None):
+        for directory in _partition_dirs(self.model_path, self.root):
+            month = datetime.strptime(directory.name, '%Y-%m').replace(tzinfo=UTC)
+            if (end is None or month < end) and (start is None or _next_month(month) > start):
+                yield MonthPartition(directory)
+
+    @property
+    def archived_through(self):
+        """Datetime up to which rows are archived, or None."""
+        directories = _partition_dirs(self.model_path, self.root)
+        if not directories:
+            return None
+        return datetime.fromtimestamp(MonthPartition(directories[-1]).archived_through, UTC)
+
+    def _codes(self, partition, filters):
+        """Filter values as stored codes; None if nothing can match."""
+        codes = {}
+        for name, value in filters.items():
+            if name in DICTIONARY_COLUMNS:
+                try:
+                    codes[name] = partition.index['dictionaries'][name].index(value)
+                except ValueError:
+                    return None
+            elif name == 'user':
+                codes[name] = NULL if value is None else int(value)
+            else:
+                raise ValueError(f"Cannot filter archived events by {name}")
+        return codes
+
+    def _scan(self, start, end, filters, scan_partition):
+        """Call scan_partition(views, lo, hi, selector, partition) per month."""
+        start_ts = _epoch(start) if start else None
+        end_ts = _epoch(end) if end else None
+        for partition in self.partitions(start, end):
+            codes = self._codes(partition, filters)
+            if codes is None or not partition.rows:
+                continue
+            with partition.columns() as views:
+                timestamps = views['timestamp']
+                lo = bisect_left(timestamps, start_ts) if start_ts is not None else 0
+                hi = bisect_left(timestamps, end_ts) if end_ts is not None else partition.rows
+                if lo < hi:
+                    scan_partition(views, lo, hi, codes, partition)
+
+    def count(self, start=None, end=None, **filters):
+        total = 0
+
+        def scan(views, lo, hi, codes, partition):
+            nonlocal total
+            selector = _selected(views, lo, hi, codes)
+            total += (hi - lo) if selector is None else sum(selector)
+
+        self._scan(start, end, filters, scan)
+        return total
+
+    def group_by(self, column, start=None, end=None, **filters):
+        """Counter of rows per value of `column` (view, category or user)."""
+        if column not in ('view', 'category', 'user'):
+            raise ValueError(f"Cannot group archived events by {column}")
+        totals = Counter()
+
+        def scan(views, lo, hi, codes, partition):
+            values = views[column][lo:hi]
+            selector = _selected(views, lo, hi, codes)
+            counts = Counter(values if selector is None else compress(values, selector))
+            if column in DICTIONARY_COLUMNS:
+                dictionary = partition.index['dictionaries'][column]
+                counts = {dictionary[code]: n for code, n in counts.items()}
+            elif NULL in counts:
+                counts[None] = counts.pop(NULL)
+            totals.update(counts)
+
+        self._scan(start, end, filters, scan)
+        return totals
+
+    def unique_users(self, start=None, end=None, **filters):
+        """Distinct signed-in users (exact)."""
+        users = set(self.group_by('user', start, end, **filters))
+        users.discard(None)
+        return len(users)
+
+    def trend(self, start=None, end=None, period='month', **filters):
+        """
+        Row counts per UTC day or month, oldest first.
+
+        Returns:
+            dict: period start (date) -> count
+        """
+        if period not in ('day', 'month'):
+            raise ValueError(f"Unknown trend period: {period}. Use day or month")
+        totals = Counter()
+
+        def scan(views, lo, hi, codes, partition):
+            if period == 'month':
+                selector = _selected(views, lo, hi, codes)
+                month = datetime.strptime(partition.directory.name, '%Y-%m').date()
+                totals[month] += (hi - lo) if selector is None else sum(selector)
+                return
+            timestamps = views['timestamp'][lo:hi]
+            selector = _selected(views, lo, hi, codes)
+            days = map((86400).__rfloordiv__, timestamps if selector is None else compress(timestamps, selector))
+            for day, n in Counter(days).items():
+                totals[datetime.fromtimestamp(day * 86400, UTC).date()] += n
+
+        self._scan(start, end, filters, scan)
+        return dict(sorted(totals.items()))
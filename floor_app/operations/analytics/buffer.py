@@ -0,0 +1,131 @@
+"""
+Buffered ingestion of page views and session heartbeats.
+
+AnalyticsMiddleware used to run a UserSession lookup, an INSERT into
+analytics_page_view and an UPDATE of the session's last_activity inside
+every authenticated request. With buffering enabled it only queues:
+
+- an unsaved PageView (its session counts as active at its timestamp),
+- or, for requests that do not record a page view, a heartbeat
+  (session_id, time).
+
+The background writer turns each batch into one bulk INSERT per model
+(page views, and AppEvent rows queued by the telemetry sinks) plus one
+UPDATE setting last_activity for every session seen in the batch (the
+latest time per session).
+
+A crash loses at most ANALYTICS_BUFFER_QUEUE_SIZE queued items, typically
+the last ANALYTICS_BUFFER_FLUSH_INTERVAL seconds of traffic; when the queue
+is full, requests write inline instead of dropping rows.
+
+Settings:
+ANALYTICS_BUFFERED = True                  # Queue instead of writing in the request
+ANALYTICS_BUFFER_BATCH_SIZE = 500          # Items per flush
+ANALYTICS_BUFFER_FLUSH_INTERVAL = 2.0      # Max seconds an item waits
+ANALYTICS_BUFFER_QUEUE_SIZE = 5000         # Bound on items lost in a crash
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+
+from core.buffered_writer import BufferedWriter
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'ANALYTICS_BUFFERED', True)
+
+
+class Heartbeat:
+    """A session was active at `timestamp` (no page view recorded)."""
+
+    __slots__ = ('session_id', 'timestamp')
+
+    def __init__(self, session_id, timestamp):
+        self.session_id = session_id
+        self.timestamp = timestamp
+
+
+class TelemetryBuffer(BufferedWriter):
+    """Queue of unsaved PageView/AppEvent rows and session heartbeats."""
+
+    thread_name = 'analytics-writer'
+
+    def __init__(self, batch_size=None, flush_interval=None, max_queue=None, background=True):
+        super().__init__(
+            batch_size=batch_size or getattr(settings, 'ANALYTICS_BUFFER_BATCH_SIZE', 500),
+            flush_interval=flush_interval or getattr(settings, 'ANALYTICS_BUFFER_FLUSH_INTERVAL', 2.0),
+            max_queue=max_queue or getattr(settings, 'ANALYTICS_BUFFER_QUEUE_SIZE', 5000),
+            background=background,
+        )
+
+    def write_batch(self, batch):
+        rows_by_model = {}
+        last_seen = {}
+        for item in batch:
+            if not isinstance(item, Heartbeat):
+                rows_by_model.setdefault(type(item), []).append(item)
+                if not hasattr(item, 'session_id'):
+                    continue
+            # Page views and heartbeats mark their session active
+            if item.session_id:
+                previous = last_seen.get(item.session_id)
+                if previous is None or item.timestamp > previous:
+                    last_seen[item.session_id] = item.timestamp
+
+        written = sum(self._write_rows(model, rows) for model, rows in rows_by_model.items())
+        self._touch_sessions(last_seen)
+        # Heartbeats are coalesced, so count them all as written
+        return written + sum(isinstance(item, Heartbeat) for item in batch)
+
+    def _write_rows(self, model, rows):
+        try:
+            model.objects.bulk_create(rows)
+            return len(rows)
+        except Exception as e:
+            # e.g. a session deleted meanwhile - keep the other rows
+            logger.error(f"Bulk {model.__name__} write failed, retrying row by row: {e}")
+
+        written = 0
+        for row in rows:
+            row.pk = None
+            try:
+                row.save()
+                written += 1
+            except Exception as e:
+                logger.error(f"Error writing {model.__name__} row: {e}")
+        return written
+
+    def _touch_sessions(self, last_seen):
+        """One UPDATE moving last_activity forward for every session seen."""
+        from .models import UserSession
+
+        if not last_seen:
+            return
+        try:
+            UserSession.objects.filter(pk__in=last_seen).update(
+                last_activity=Case(
+                    *[When(pk=pk, then=Value(ts)) for pk, ts in last_seen.items()],
+                    output_field=DateTimeField(),
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error updating session activity for {len(last_seen)} sessions: {e}")
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Process-wide telemetry buffer."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = TelemetryBuffer()
+    return _buffer
@@ -0,0 +1,45 @@
+"""
+Management command to copy aged analytics events into the columnar archive.
+
+Runs the same archiving as the daily archive_old_events task; --stats then
+prints the archived rows per month, read from the archive files only.
+
+Usage:
+    python manage.py archive_analytics_events
+    python manage.py archive_analytics_events --model analytics.PageView --days 60 --stats
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from floor_app.operations.analytics import archive
+
+
+class Command(BaseCommand):
+    help = 'Archive aged AppEvent / PageView rows into monthly column files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(archive.ARCHIVED_MODELS),
+                            help='Archive this model only (default: all)')
+        parser.add_argument('--days', type=int, help='Archive rows older than N days')
+        parser.add_argument('--batch-size', type=int, help='Rows fetched and appended at a time')
+        parser.add_argument('--stats', action='store_true', help='Print archived rows per month')
+
+    def handle(self, *args, **options):
+        kwargs = {'batch_size': options['batch_size']}
+        if options['days'] is not None:
+            kwargs['before'] = timezone.now() - timedelta(days=options['days'])
+
+        model_paths = [options['model']] if options['model'] else list(archive.ARCHIVED_MODELS)
+        for model_path in model_paths:
+            result = archive.archive_events(model_path, **kwargs)
+            self.stdout.write(self.style.SUCCESS(
+                f"{model_path}: archived {result['rows']} rows in {result['months']} months "
+                f"(through {result['archived_through']})"
+            ))
+
+            if options['stats']:
+                events = archive.EventArchive(model_path)
+                for month, count in events.trend(period='month').items():
+                    self.stdout.write(f"  {month:%Y-%m}  {count:>10}")
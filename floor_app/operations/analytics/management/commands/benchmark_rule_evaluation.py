@@ -0,0 +1,106 @@
+"""
+Management command to compare set-based and per-object rule evaluation.
+
+Creates synthetic AppEvent rows (default 100,000) inside a transaction
+that is rolled back, then evaluates the same rules with the condition
+compiled into SQL and with ConditionParser per object, and checks both
+report the same matches.
+
+Usage:
+    python manage.py benchmark_rule_evaluation
+    python manage.py benchmark_rule_evaluation --rows 20000 --repeat 5
+"""
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from floor_app.operations.analytics.models import AppEvent, AutomationRule
+from floor_app.operations.analytics.rule_engine.compiler import compile_condition
+from floor_app.operations.analytics.rule_engine.evaluator import RuleEvaluator
+
+CONDITIONS = {
+    'threshold': {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 2900},
+    'age': {'type': 'age', 'field': 'timestamp', 'operator': '>', 'value': 29, 'unit': 'days'},
+    'field_comparison': {'type': 'field_comparison', 'field1': 'duration_ms', 'operator': '<', 'field2': 'object_id'},
+    'compound': {'type': 'compound', 'operator': 'AND', 'conditions': [
+        {'type': 'threshold', 'field': 'event_category', 'operator': 'in', 'value': ['Inventory', 'Quality']},
+        {'type': 'age', 'field': 'timestamp', 'operator': '<', 'value': 1, 'unit': 'days'},
+    ]},
+    'compound + custom': {'type': 'compound', 'operator': 'AND', 'conditions': [
+        {'type': 'threshold', 'field': 'event_category', 'operator': '==', 'value': 'Quality'},
+        {'type': 'custom', 'expression': 'obj.duration_ms > 2500'},
+    ]},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rule evaluation in SQL against per-object Python evaluation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic target rows')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per rule and mode (best is reported)')
+        parser.add_argument('--condition', help='Benchmark this JSON condition (over AppEvent) only')
+
+    def handle(self, *args, **options):
+        conditions = CONDITIONS
+        if options['condition']:
+            try:
+                conditions = {'custom condition': json.loads(options['condition'])}
+            except ValueError as e:
+                raise CommandError(f"Invalid --condition JSON: {e}")
+
+        with transaction.atomic():
+            try:
+                self._create_rows(options['rows'])
+                for name, condition_def in conditions.items():
+                    self._benchmark(name, condition_def, options['repeat'])
+            finally:
+                transaction.set_rollback(True)
+
+    def _create_rows(self, n):
+        started = time.perf_counter()
+        rng = random.Random(42)
+        now = timezone.now()
+        categories = ['Inventory', 'Production', 'Quality', 'HR', '']
+        # Ages stay an hour away from whole days, so rows do not cross an
+        # age threshold between the SQL and the Python runs
+        AppEvent.objects.bulk_create((
+            AppEvent(
+                event_type='PAGE_VIEW',
+                view_name=f'benchmark:view_{i % 50}',
+                event_category=rng.choice(categories),
+                duration_ms=rng.randint(0, 3000) if i % 10 else None,
+                object_id=rng.randint(0, 3000),
+                timestamp=now - timedelta(days=rng.randint(0, 29), minutes=rng.randint(60, 60 * 23)),
+            )
+            for i in range(n)
+        ), batch_size=5000)
+        self.stdout.write(f"Created {n} AppEvent rows in {time.perf_counter() - started:.1f}s")
+
+    def _benchmark(self, name, condition_def, repeat):
+        rule = AutomationRule(target_model='analytics.AppEvent', condition_definition=condition_def)
+        compiled = compile_condition(AppEvent, condition_def)
+
+        timings, results = {}, {}
+        for mode, use_sql in (('sql', True), ('python', False)):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results[mode] = RuleEvaluator(rule, use_sql=use_sql).evaluate()
+                elapsed = (time.perf_counter() - started) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            timings[mode] = best
+
+        matches = results['sql']['context']['triggered_count']
+        same = matches == results['python']['context']['triggered_count']
+        mode = 'exact' if compiled.is_exact else 'sql + residual'
+        verdict = self.style.SUCCESS('same result') if same else self.style.ERROR('RESULTS DIFFER')
+        self.stdout.write(
+            f"  - {name:18} {mode:14} sql {timings['sql']:9.1f} ms  python {timings['python']:9.1f} ms  "
+            f"x{timings['python'] / max(timings['sql'], 0.001):6.1f}  {matches} matches  {verdict}"
+        )
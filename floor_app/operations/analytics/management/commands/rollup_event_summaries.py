@@ -0,0 +1,38 @@
+"""
+Management command to fold new AppEvents into the EventSummary tiers.
+
+Runs the same incremental rollup as the hourly generate_event_summaries
+task; --rebuild-days first recomputes the recent HOUR rows (and the tiers
+above them) from AppEvent.
+
+Usage:
+    python manage.py rollup_event_summaries
+    python manage.py rollup_event_summaries --rebuild-days 7
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from floor_app.operations.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Incrementally roll up AppEvents into hourly/daily/weekly/monthly summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Events per rollup batch')
+        parser.add_argument('--rebuild-days', type=int,
+                            help='Recompute summaries of the last N days from AppEvent first')
+
+    def handle(self, *args, **options):
+        if options['rebuild_days']:
+            now = timezone.now()
+            rows = rollups.rebuild(now - timedelta(days=options['rebuild_days']), now)
+            self.stdout.write(f'Rebuilt {rows} hourly summary rows')
+
+        result = rollups.rollup_events(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {result['events']} events in {result['batches']} batches "
+            f"(watermark {result['watermark']})"
+        ))
@@ -1,5 +1,6 @@
 """Analytics Middleware"""
 from .event_tracker import EventTrackingMiddleware
 from .analytics_tracker import AnalyticsMiddleware
+from .telemetry import TelemetryMiddleware
 
-__all__ = ['EventTrackingMiddleware', 'AnalyticsMiddleware']
+__all__ = ['EventTrackingMiddleware', 'AnalyticsMiddleware', 'TelemetryMiddleware']
@@ -1,27 +1,22 @@
 """
 Middleware for automatic analytics tracking
+
+Page views and session heartbeats are queued and bulk-written in the
+background when ANALYTICS_BUFFERED is set (see analytics.buffer).
+
+Superseded by TelemetryMiddleware (analytics.middleware.telemetry), which
+also covers CurrentRequestMiddleware and EventTrackingMiddleware.
 """
 from django.utils import timezone
 from django.urls import resolve
 from floor_app.operations.analytics.models import PageView, UserSession, ErrorLog
 from floor_app.operations.analytics.utils import get_client_ip, get_module_from_url
+from floor_app.operations.analytics import buffer as analytics_buffer
+# The request lives in the one thread-local shared with CurrentRequestMiddleware
+from floor_app.middleware import get_current_request, get_current_user, set_current_request  # noqa: F401
 import time
 
 
-# Thread-local storage for current user
-_thread_locals = {}
-
-
-def get_current_user():
-    """Get the current user from thread-local storage"""
-    return _thread_locals.get('user', None)
-
-
-def get_current_request():
-    """Get the current request from thread-local storage"""
-    return _thread_locals.get('request', None)
-
-
 class AnalyticsMiddleware:
     """
     Middleware to automatically track page views and user activities
@@ -31,9 +26,8 @@ class AnalyticsMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # Store request and user in thread-local storage for access in signals
-        _thread_locals['request'] = request
-        _thread_locals['user'] = getattr(request, 'user', None)
+        # Store request in thread-local storage for access in signals
+        set_current_request(request)
 
         # Start timer for page load time
         start_time = time.time()
@@ -46,42 +40,48 @@ class AnalyticsMiddleware:
 
         # Track page view (only for authenticated users and successful responses)
         if hasattr(request, 'user') and request.user.is_authenticated:
+            session_id = request.session.get('analytics_session_id')
+            page_view = None
             if response.status_code < 400:  # Only track successful requests
-                self.track_page_view(request, load_time_ms)
+                page_view = self.track_page_view(request, load_time_ms, session_id)
 
-            # Update session last activity
-            self.update_session_activity(request)
+            # Update session last activity (a buffered page view already does)
+            if page_view is None or not analytics_buffer.is_enabled():
+                self.update_session_activity(request, session_id)
 
         # Clean up thread-local storage
-        _thread_locals.pop('request', None)
-        _thread_locals.pop('user', None)
+        set_current_request(None)
 
         return response
 
-    def track_page_view(self, request, load_time_ms):
-        """Track a page view"""
-        try:
-            # Get session
-            session = None
+    def track_page_view(self, request, load_time_ms, session_id=None):
+        """
+        Track a page view.
+
+        Returns the PageView (queued when buffering is enabled), or None if
+        there is no analytics session to attach it to.
+        """
+        if session_id is None:
             session_id = request.session.get('analytics_session_id')
-            if session_id:
-                try:
-                    session = UserSession.objects.get(id=session_id)
-                except UserSession.DoesNotExist:
-                    pass
+        if not session_id:
+            # PageView.session is required
+            return None
 
-            # Get URL information
+        try:
+            # Get URL information; the URL dispatcher already resolved it
             url = request.path
             url_name = ''
+            view_name = ''
             module = ''
 
             try:
-                resolved = resolve(request.path)
+                resolved = getattr(request, 'resolver_match', None) or resolve(request.path)
                 url_name = resolved.url_name or ''
+                view_name = resolved.view_name or ''
                 module = get_module_from_url(url_name)
                 if not module and resolved.namespace:
                     module = resolved.namespace
-            except:
+            except Exception:
                 pass
 
             # Get query parameters
@@ -90,28 +90,42 @@ class AnalyticsMiddleware:
             # Get referrer
             referrer = request.META.get('HTTP_REFERER', '')
 
-            # Create page view record
-            PageView.objects.create(
-                session=session,
+            page_view = PageView(
+                session_id=session_id,
                 user=request.user,
                 url=url[:500],  # Limit length
                 url_name=url_name[:100],
                 module=module[:50],
-                view_name=resolved.view_name[:100] if resolved else '',
+                view_name=view_name[:100],
                 referrer=referrer[:500],
                 load_time_ms=load_time_ms,
                 query_params=query_params
             )
 
+            if analytics_buffer.is_enabled():
+                analytics_buffer.get_buffer().add(page_view)
+            else:
+                page_view.save()
+            return page_view
+
         except Exception as e:
             # Don't let tracking errors break the application
             print(f"Error tracking page view: {e}")
+            return None
 
-    def update_session_activity(self, request):
+    def update_session_activity(self, request, session_id=None):
         """Update last activity time for the session"""
         try:
-            session_id = request.session.get('analytics_session_id')
-            if session_id:
+            if session_id is None:
+                session_id = request.session.get('analytics_session_id')
+            if not session_id:
+                return
+            if analytics_buffer.is_enabled():
+                # Coalesced into one UPDATE per flush by the writer
+                analytics_buffer.get_buffer().add(
+                    analytics_buffer.Heartbeat(session_id, timezone.now())
+                )
+            else:
                 UserSession.objects.filter(id=session_id).update(
                     last_activity=timezone.now()
                 )
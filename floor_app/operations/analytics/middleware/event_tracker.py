@@ -3,6 +3,8 @@ Event Tracking Middleware
 
 Automatically logs page views and requests to AppEvent model.
 
+Superseded by TelemetryMiddleware with AppEventSink (analytics.telemetry).
+
 Configuration in settings.py:
 MIDDLEWARE = [
     ...
@@ -34,7 +36,7 @@ class EventTrackingMiddleware(MiddlewareMixin):
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
         self.enabled = getattr(settings, 'ANALYTICS_TRACKING_ENABLED', True)
         self.track_anonymous = getattr(settings, 'ANALYTICS_TRACK_ANONYMOUS', False)
         self.excluded_paths = getattr(settings, 'ANALYTICS_EXCLUDED_PATHS', [
@@ -0,0 +1,178 @@
+"""
+Single-pass request telemetry middleware.
+
+Replaces this stack, which stored the request in three thread-locals,
+timed each request three times and resolved/categorized its URL twice:
+
+    'floor_app.middleware.CurrentRequestMiddleware',
+    'core.middleware.QueryProfilingMiddleware',
+    'floor_app.operations.analytics.middleware.AnalyticsMiddleware',
+    'floor_app.operations.analytics.middleware.EventTrackingMiddleware',
+
+with:
+
+    'floor_app.operations.analytics.middleware.TelemetryMiddleware',
+
+The request is built into one RequestEvent and handed to the sinks listed in
+ANALYTICS_TELEMETRY_SINKS (see analytics.telemetry).
+
+Overhead budget: the time spent in this middleware and its sinks (not in
+the view) is measured on every request and should stay below
+ANALYTICS_TELEMETRY_BUDGET_MS (1 ms). Requests over budget are counted and
+reported by get_metrics() / the health endpoint; benchmark it with:
+
+    python manage.py benchmark_telemetry
+"""
+import logging
+import random
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from floor_app.middleware import set_current_request
+from floor_app.operations.analytics import telemetry
+from floor_app.operations.analytics.utils import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+
+class OverheadStats:
+    """Running totals of the time telemetry adds to each request."""
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.over_budget = 0
+
+    def add(self, overhead_ms):
+        with self._lock:
+            self.requests += 1
+            self.total_ms += overhead_ms
+            if overhead_ms > self.max_ms:
+                self.max_ms = overhead_ms
+            if overhead_ms > self.budget_ms:
+                self.over_budget += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'avg_ms': round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+                'max_ms': round(self.max_ms, 3),
+                'over_budget': self.over_budget,
+                'budget_ms': self.budget_ms,
+            }
+
+
+# Stats of the installed middleware, for the health endpoint
+overhead = OverheadStats(getattr(settings, 'ANALYTICS_TELEMETRY_BUDGET_MS', 1.0))
+
+
+class TelemetryMiddleware:
+    """Record one telemetry event per request and fan it out to the sinks."""
+
+    def __init__(self, get_response, sinks=None, stats=None):
+        from core import query_profiler
+
+        self.get_response = get_response
+        if sinks is None:
+            paths = getattr(settings, 'ANALYTICS_TELEMETRY_SINKS', telemetry.DEFAULT_SINKS)
+            sinks = [import_string(path)() for path in paths]
+        self.sinks = sinks
+        self.stats = stats or overhead
+
+        self.profile_sample_rate = (
+            getattr(settings, 'SQL_PROFILER_SAMPLE_RATE', 0.05) if query_profiler.is_enabled() else 0
+        )
+        self._request_profile = query_profiler.RequestProfile
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        set_current_request(request)
+        request._telemetry_exception = None
+
+        profile = None
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate:
+            profile = self._request_profile()
+
+        try:
+            view_started = time.perf_counter()
+            if profile is None:
+                response = self.get_response(request)
+            else:
+                # Queries run while a streaming response is consumed are not counted
+                with profile:
+                    response = self.get_response(request)
+            view_finished = time.perf_counter()
+
+            try:
+                event = self.build_event(request, response, view_finished - view_started, profile)
+                for sink in self.sinks:
+                    try:
+                        sink.handle(event)
+                    except Exception as e:
+                        # Don't let tracking errors break the application
+                        logger.error(f"Telemetry sink {type(sink).__name__} failed: {e}")
+            except Exception as e:
+                logger.error(f"Error building telemetry event: {e}")
+
+            self.stats.add(
+                ((view_started - started) + (time.perf_counter() - view_finished)) * 1000
+            )
+            return response
+        finally:
+            set_current_request(None)
+
+    def process_exception(self, request, exception):
+        """Keep the view's exception for ErrorLogSink; the response is a 500."""
+        request._telemetry_exception = (
+            exception.__class__.__name__,
+            str(exception),
+            traceback.format_exc(),
+        )
+        return None
+
+    @staticmethod
+    def build_event(request, response, duration, profile):
+        """One immutable RequestEvent for the finished request."""
+        match = getattr(request, 'resolver_match', None)
+        route = telemetry.describe_route(match, request.path)
+
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+
+        session = getattr(request, 'session', None)
+        session_key = ''
+        analytics_session_id = None
+        if session is not None:
+            session_key = session.session_key or ''
+            if user_id is not None:
+                analytics_session_id = session.get('analytics_session_id')
+
+        meta = request.META
+        return telemetry.RequestEvent(
+            timestamp=timezone.now(),
+            path=request.path,
+            method=request.method,
+            status_code=response.status_code,
+            duration_ms=int(duration * 1000),
+            event_type=telemetry.get_event_type(request.method, route, request.GET),
+            route=route,
+            user_id=user_id,
+            session_key=session_key,
+            analytics_session_id=analytics_session_id,
+            query_string=meta.get('QUERY_STRING', ''),
+            query_params=tuple(request.GET.items()),
+            referrer=meta.get('HTTP_REFERER', ''),
+            client_ip=get_client_ip(request),
+            user_agent=meta.get('HTTP_USER_AGENT', ''),
+            sql_profile=profile,
+            exception=request._telemetry_exception,
+        )
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_page_view_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Rollup this watermark belongs to', max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0, help_text='Highest source row id aggregated so far')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup Watermark',
+                'verbose_name_plural': 'Rollup Watermarks',
+                'db_table': 'analytics_rollup_watermark',
+            },
+        ),
+        migrations.AddField(
+            model_name='eventsummary',
+            name='duration_samples',
+            field=models.IntegerField(default=0, help_text='Number of events with a duration'),
+        ),
+        migrations.AddField(
+            model_name='eventsummary',
+            name='duration_total_ms',
+            field=models.FloatField(default=0, help_text='Sum of request durations'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_event_summary_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventsummary',
+            name='user_sketch',
+            field=models.BinaryField(blank=True, default=b'', help_text='Distinct-user sketch'),
+        ),
+        migrations.AddField(
+            model_name='requesttrend',
+            name='requester_sketch',
+            field=models.BinaryField(blank=True, default=b'', help_text='Distinct-requester sketch'),
+        ),
+        migrations.AddField(
+            model_name='requesttrend',
+            name='unique_requesters',
+            field=models.IntegerField(default=0, help_text='Distinct known requesters'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from datetime import timezone as dt_timezone
+
+from django.db import migrations
+
+
+def drop_replayed_hours(apps, schema_editor):
+    """
+    Drop the HOUR rows the first rollup_events() run will rebuild.
+
+    The old generate_summary task wrote HOUR rows for the events still in
+    AppEvent. The watermark starts below all of them, and rollup_events()
+    adds onto existing rows, so those rows would be counted twice. Rows of
+    hours before the oldest retained event are kept: their events are gone.
+    """
+    AppEvent = apps.get_model('analytics', 'AppEvent')
+    EventSummary = apps.get_model('analytics', 'EventSummary')
+    RollupWatermark = apps.get_model('analytics', 'RollupWatermark')
+
+    watermark, _ = RollupWatermark.objects.get_or_create(name='event_summary')
+    if watermark.last_id:
+        # rollup_events() has already run; its rows are incremental
+        return
+
+    first = AppEvent.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+    if first is None:
+        return
+    first_hour = first.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    EventSummary.objects.filter(
+        period_type='HOUR', period_start__gte=first_hour, event_type='', user__isnull=True,
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_summary_user_sketches'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_replayed_hours, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,7 @@ Analytics Models Export
 from .event import (
     AppEvent,
     EventSummary,
+    RollupWatermark,
 )
 from .information_request import (
     InformationRequest,
@@ -30,6 +31,7 @@ __all__ = [
     # Event tracking
     'AppEvent',
     'EventSummary',
+    'RollupWatermark',
     # Information requests
     'InformationRequest',
     'RequestTrend',
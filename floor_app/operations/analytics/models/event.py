@@ -316,6 +316,25 @@ class EventSummary(models.Model):
         help_text="Average request duration"
     )
 
+    # Additive parts of the average, so rollups can merge rows
+    duration_total_ms = models.FloatField(
+        default=0,
+        help_text="Sum of request durations"
+    )
+
+    duration_samples = models.IntegerField(
+        default=0,
+        help_text="Number of events with a duration"
+    )
+
+    # HyperLogLog of the users (analytics.hll), so rows can be merged
+    user_sketch = models.BinaryField(
+        blank=True,
+        default=b'',
+        editable=False,
+        help_text="Distinct-user sketch"
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -341,81 +360,46 @@ class EventSummary(models.Model):
     def generate_summary(cls, period_type, start_time, end_time):
         """
         Generate summary for a time period.
-        Called from scheduled task.
+
+        Recomputes the window from AppEvent; the scheduled task uses the
+        incremental analytics.rollups.rollup_events() instead.
         """
-        from django.db.models import Count, Avg
-
-        # Get events in period
-        events = AppEvent.objects.filter(
-            timestamp__gte=start_time,
-            timestamp__lt=end_time
-        )
-
-        # Overall summary
-        overall = events.aggregate(
-            count=Count('id'),
-            unique_users=Count('user', distinct=True),
-            avg_duration=Avg('duration_ms')
-        )
-
-        cls.objects.update_or_create(
-            period_type=period_type,
-            period_start=start_time,
-            period_end=end_time,
-            event_type='',
-            view_name='',
-            event_category='',
-            user=None,
-            defaults={
-                'event_count': overall['count'] or 0,
-                'unique_users': overall['unique_users'] or 0,
-                'avg_duration_ms': overall['avg_duration'],
-            }
-        )
-
-        # By view name
-        view_summaries = events.values('view_name').annotate(
-            count=Count('id'),
-            unique_users=Count('user', distinct=True),
-            avg_duration=Avg('duration_ms')
-        )
-
-        for summary in view_summaries:
-            cls.objects.update_or_create(
-                period_type=period_type,
-                period_start=start_time,
-                period_end=end_time,
-                event_type='',
-                view_name=summary['view_name'],
-                event_category='',
-                user=None,
-                defaults={
-                    'event_count': summary['count'],
-                    'unique_users': summary['unique_users'],
-                    'avg_duration_ms': summary['avg_duration'],
-                }
-            )
+        from floor_app.operations.analytics.rollups import summarize
+
+        summarize(period_type, start_time, end_time)
+
+    @classmethod
+    def unique_users_between(cls, start_time, end_time, view_name='', event_category=''):
+        """Estimated distinct users in a window, merged from summary sketches."""
+        from floor_app.operations.analytics.rollups import unique_users_between
+
+        return unique_users_between(start_time, end_time, view_name, event_category)
+
 
-        # By category
-        cat_summaries = events.values('event_category').annotate(
-            count=Count('id'),
-            unique_users=Count('user', distinct=True),
-            avg_duration=Avg('duration_ms')
-        )
-
-        for summary in cat_summaries:
-            if summary['event_category']:
-                cls.objects.update_or_create(
-                    period_type=period_type,
-                    period_start=start_time,
-                    period_end=end_time,
-                    event_type='',
-                    view_name='',
-                    event_category=summary['event_category'],
-                    user=None,
-                    defaults={
-                        'event_count': summary['count'],
-                        'unique_users': summary['unique_users'],
-                        'avg_duration_ms': summary['avg_duration'],
-                    }
-                )
+class RollupWatermark(models.Model):
+    """
+    Progress of an incremental rollup: the last source row already aggregated.
+
+    See analytics.rollups.
+    """
+
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Rollup this watermark belongs to"
+    )
+
+    last_id = models.BigIntegerField(
+        default=0,
+        help_text="Highest source row id aggregated so far"
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "analytics_rollup_watermark"
+        verbose_name = "Rollup Watermark"
+        verbose_name_plural = "Rollup Watermarks"
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
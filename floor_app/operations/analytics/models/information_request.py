@@ -13,6 +13,7 @@ Business Value:
 from django.db import models
 from django.utils import timezone
 from floor_app.mixins import AuditMixin, SoftDeleteMixin
+from floor_app.operations.analytics.hll import HyperLogLog, merge_all
 
 
 class InformationRequest(AuditMixin, SoftDeleteMixin):
@@ -395,6 +396,19 @@ class RequestTrend(models.Model):
         help_text="Average response time"
     )
 
+    unique_requesters = models.IntegerField(
+        default=0,
+        help_text="Distinct known requesters"
+    )
+
+    # HyperLogLog of the requesters (analytics.hll), so periods can be merged
+    requester_sketch = models.BinaryField(
+        blank=True,
+        default=b'',
+        editable=False,
+        help_text="Distinct-requester sketch"
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -435,6 +449,18 @@ class RequestTrend(models.Model):
             avg_response=Avg('response_time_minutes')
         )
 
+        # Requester sketches, overall ('') and per category, in one query
+        sketches = {}
+        for category, requester_id in requests.filter(
+            requester__isnull=False
+        ).values_list('request_category', 'requester_id').distinct():
+            for key in ('', category):
+                sketches.setdefault(key, HyperLogLog()).add(requester_id)
+
+        def requester_fields(category):
+            sketch = sketches.get(category) or HyperLogLog()
+            return {'unique_requesters': sketch.count(), 'requester_sketch': sketch.to_bytes()}
+
         cls.objects.update_or_create(
             period_type=period_type,
             period_start=start_time,
@@ -446,6 +472,7 @@ class RequestTrend(models.Model):
                 'open_requests': overall_stats['open'] or 0,
                 'repeated_requests': overall_stats['repeated'] or 0,
                 'avg_response_time_minutes': overall_stats['avg_response'],
+                **requester_fields(''),
             }
         )
 
@@ -470,5 +497,11 @@ class RequestTrend(models.Model):
                     'open_requests': stats['open'],
                     'repeated_requests': stats['repeated'],
                     'avg_response_time_minutes': stats['avg_response'],
+                    **requester_fields(stats['request_category']),
                 }
             )
+
+    @classmethod
+    def unique_requesters_between(cls, trends):
+        """Estimated distinct requesters across trend rows, e.g. a month of DAY rows."""
+        return merge_all(trends.values_list('requester_sketch', flat=True)).count()
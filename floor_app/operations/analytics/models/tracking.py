@@ -72,7 +72,8 @@ class PageView(models.Model):
     module = models.CharField(max_length=50, blank=True, db_index=True)  # hr, inventory, production, etc.
     view_name = models.CharField(max_length=100, blank=True)
 
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the view happened, not when the buffered row is written
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
     referrer = models.CharField(max_length=500, blank=True)
 
     # Performance metrics
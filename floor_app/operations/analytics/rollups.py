@@ -0,0 +1,435 @@
+"""
+Incremental, tiered rollups of AppEvent into EventSummary.
+
+EventSummary.generate_summary rescanned every event of the period (three
+times: overall, per view, per category) on each run, and the DAY summary
+rescanned raw events again. rollup_events() instead:
+
+1. reads only events above a watermark (RollupWatermark, the last
+   aggregated AppEvent id), in id ranges of ROLLUP_BATCH_SIZE;
+2. adds their counts and duration sums to the HOUR rows they fall in;
+3. re-derives the DAY rows containing a touched hour from HOUR rows, and
+   the WEEK and MONTH rows containing a touched day from DAY rows;
+4. writes each tier with one bulk_update plus one bulk_create.
+
+Work is proportional to the new events and the periods they touch, not to
+history. Each batch and its watermark move commit together, so a failed
+run is simply retried. Period boundaries are UTC, as the hourly task has
+always used.
+
+The watermark only moves past events older than ROLLUP_SAFETY_LAG_SECONDS.
+Ids are handed out before commit, so a transaction still holding id N
+while N+1 commits would otherwise have N skipped for good; holding back
+the newest events leaves such transactions that long to commit. Migration
+0006 drops the HOUR rows the old generate_summary task wrote over the
+retained events, so the first run rebuilds them instead of adding to them.
+
+Rows have event_type '' and user NULL; view_name / event_category are ''
+for the overall row (the unique constraint cannot see NULL users, so rows
+are matched in Python instead of with ON CONFLICT).
+
+unique_users is not additive, so each row also stores a HyperLogLog
+sketch of its users (analytics.hll): HOUR sketches absorb the users of new
+events, higher tiers merge the sketches below them, and
+unique_users_between() answers any window from DAY and HOUR sketches
+without reading AppEvent. Rows written before sketches existed are given
+one by `rollup_event_summaries --rebuild-days N`.
+
+Usage:
+    python manage.py rollup_event_summaries
+    python manage.py rollup_event_summaries --rebuild-days 7
+"""
+
+import calendar
+import logging
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .hll import HyperLogLog, merge_all
+
+logger = logging.getLogger(__name__)
+
+UTC = dt_timezone.utc
+
+WATERMARK_NAME = 'event_summary'
+
+# Grouping columns of each summary row family; None is the overall row
+DIMENSIONS = (None, 'view_name', 'event_category')
+
+# (tier, tier it is derived from)
+DERIVED_TIERS = (('DAY', 'HOUR'), ('WEEK', 'DAY'), ('MONTH', 'DAY'))
+
+TRUNCATE = {'HOUR': TruncHour, 'DAY': TruncDay, 'WEEK': TruncWeek, 'MONTH': TruncMonth}
+
+
+def period_bounds(period_type, moment):
+    """(start, end) in UTC of the period containing `moment`."""
+    moment = moment.astimezone(UTC)
+    if period_type == 'HOUR':
+        start = moment.replace(minute=0, second=0, microsecond=0)
+        return start, start + timedelta(hours=1)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period_type == 'DAY':
+        return day, day + timedelta(days=1)
+    if period_type == 'WEEK':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if period_type == 'MONTH':
+        start = day.replace(day=1)
+        days = calendar.monthrange(start.year, start.month)[1]
+        return start, start + timedelta(days=days)
+    raise ValueError(f"Unknown period type: {period_type}")
+
+
+def _row_key(period_start, dimension, value):
+    """(period_start, view_name, event_category) of a summary row."""
+    return (
+        period_start,
+        value if dimension == 'view_name' else '',
+        value if dimension == 'event_category' else '',
+    )
+
+
+def _dimension_filter(dimension):
+    # Events without a view/category only count towards the overall row
+    return {f'{dimension}__gt': ''} if dimension else {}
+
+
+# ============================================================================
+# AGGREGATION
+# ============================================================================
+
+def aggregate_events(events, period_type=None, period_start=None):
+    """
+    Counts and duration sums of `events`, per period and dimension.
+
+    Args:
+        events: AppEvent queryset
+        period_type: Bucket events into periods of this type, or
+        period_start: put every event in this one period
+
+    Returns:
+        {(period_start, view_name, event_category): [count, duration_total, duration_samples]}
+    """
+    totals = {}
+    for dimension in DIMENSIONS:
+        queryset = events.filter(**_dimension_filter(dimension))
+        group_by = [dimension] if dimension else []
+        if period_type:
+            queryset = queryset.annotate(period=TRUNCATE[period_type]('timestamp', tzinfo=UTC))
+            group_by.append('period')
+
+        metrics = {
+            'count': Count('id'),
+            'duration_total': Sum('duration_ms'),
+            'duration_samples': Count('duration_ms'),
+        }
+        if group_by:
+            rows = queryset.values(*group_by).annotate(**metrics).order_by()
+        else:
+            rows = [queryset.aggregate(**metrics)]
+
+        for row in rows:
+            start = row['period'] if period_type else period_start
+            key = _row_key(start, dimension, row.get(dimension))
+            totals[key] = [row['count'], float(row['duration_total'] or 0), row['duration_samples']]
+    return totals
+
+
+def user_sketches(events, period_type=None, period_start=None):
+    """
+    HyperLogLog of the users behind each summary row key of `events`.
+
+    One query for all dimensions: the distinct (period, view, category,
+    user) tuples. Anonymous events are not counted, as with Count('user').
+    """
+    events = events.filter(user__isnull=False)
+    fields = ['view_name', 'event_category', 'user_id']
+    if period_type:
+        events = events.annotate(period=TRUNCATE[period_type]('timestamp', tzinfo=UTC))
+        fields.insert(0, 'period')
+
+    sketches = {}
+    for row in events.values_list(*fields).distinct().order_by():
+        start = row[0] if period_type else period_start
+        view_name, event_category, user_id = row[-3:]
+        for dimension, value in ((None, None), ('view_name', view_name), ('event_category', event_category)):
+            if dimension and not value:
+                continue
+            key = _row_key(start, dimension, value)
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = HyperLogLog()
+            sketch.add(user_id)
+    return sketches
+
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+def upsert_summaries(period_type, totals, sketches, add=False, period_end=None):
+    """
+    Write summary rows with one bulk_update and one bulk_create.
+
+    Args:
+        totals: {key: [count, duration_total, duration_samples]}
+        sketches: {key: HyperLogLog of the users}
+        add: Add `totals` (and merge `sketches`) into the stored values
+            instead of replacing them
+        period_end: End of every row (default: end of its period)
+    """
+    from .models import EventSummary
+
+    if not totals:
+        return 0
+
+    existing = {
+        (row.period_start, row.view_name, row.event_category): row
+        for row in EventSummary.objects.filter(
+            period_type=period_type,
+            period_start__in={key[0] for key in totals},
+            event_type='',
+            user__isnull=True,
+        )
+    }
+
+    now = timezone.now()
+    to_update, to_create = [], []
+    for key, (count, duration_total, duration_samples) in totals.items():
+        row = existing.get(key)
+        if row is None:
+            period_start, view_name, event_category = key
+            row = EventSummary(
+                period_type=period_type,
+                period_start=period_start,
+                period_end=period_end or period_bounds(period_type, period_start)[1],
+                view_name=view_name,
+                event_category=event_category,
+            )
+            to_create.append(row)
+        else:
+            # bulk_update does not apply auto_now
+            row.updated_at = now
+            to_update.append(row)
+
+        sketch = sketches.get(key) or HyperLogLog()
+        if add and row.pk:
+            if row.user_sketch:
+                sketch = HyperLogLog.from_bytes(row.user_sketch).merge(sketch)
+            row.event_count += count
+            row.duration_total_ms += duration_total
+            row.duration_samples += duration_samples
+        else:
+            row.event_count = count
+            row.duration_total_ms = duration_total
+            row.duration_samples = duration_samples
+        row.avg_duration_ms = (
+            row.duration_total_ms / row.duration_samples if row.duration_samples else None
+        )
+        row.user_sketch = sketch.to_bytes()
+        row.unique_users = sketch.count()
+
+    if to_update:
+        EventSummary.objects.bulk_update(to_update, [
+            'event_count', 'unique_users', 'user_sketch', 'avg_duration_ms',
+            'duration_total_ms', 'duration_samples', 'updated_at',
+        ])
+    if to_create:
+        EventSummary.objects.bulk_create(to_create)
+    return len(totals)
+
+
+def derive_tier(period_type, source_type, period_starts):
+    """Recompute `period_type` rows for the given periods from `source_type` rows."""
+    from .models import EventSummary
+
+    if not period_starts:
+        return 0
+    period_starts = set(period_starts)
+    window_start = min(period_starts)
+    window_end = period_bounds(period_type, max(period_starts))[1]
+
+    totals = {}
+    sketches = {}
+    rows = EventSummary.objects.filter(
+        period_type=source_type,
+        period_start__gte=window_start,
+        period_start__lt=window_end,
+        event_type='',
+        user__isnull=True,
+    ).values_list('period_start', 'view_name', 'event_category',
+                  'event_count', 'duration_total_ms', 'duration_samples', 'user_sketch')
+
+    for source_start, view_name, event_category, count, duration_total, duration_samples, user_sketch in rows:
+        start = period_bounds(period_type, source_start)[0]
+        if start not in period_starts:
+            continue
+        key = (start, view_name, event_category)
+        total = totals.setdefault(key, [0, 0.0, 0])
+        total[0] += count
+        total[1] += duration_total
+        total[2] += duration_samples
+        if user_sketch:
+            sketch = HyperLogLog.from_bytes(user_sketch)
+            sketches[key] = sketches[key].merge(sketch) if key in sketches else sketch
+
+    # Rows whose view/category no longer appears below are stale
+    stale = [
+        pk for pk, *key in EventSummary.objects.filter(
+            period_type=period_type, period_start__in=period_starts, event_type='', user__isnull=True,
+        ).values_list('pk', 'period_start', 'view_name', 'event_category')
+        if tuple(key) not in totals
+    ]
+    if stale:
+        EventSummary.objects.filter(pk__in=stale).delete()
+
+    return upsert_summaries(period_type, totals, sketches)
+
+
+def _derive_all(touched_hours):
+    touched = {'HOUR': set(touched_hours)}
+    for period_type, source_type in DERIVED_TIERS:
+        starts = {period_bounds(period_type, start)[0] for start in touched[source_type]}
+        derive_tier(period_type, source_type, starts)
+        touched[period_type] = starts
+    return touched
+
+
+# ============================================================================
+# ENTRY POINTS
+# ============================================================================
+
+def rollup_events(batch_size=None):
+    """
+    Aggregate AppEvents added since the last run into all summary tiers.
+
+    Returns:
+        dict with 'events' aggregated, 'batches' and the new 'watermark'
+    """
+    from .models import AppEvent, RollupWatermark
+
+    batch_size = batch_size or getattr(settings, 'ROLLUP_BATCH_SIZE', 50000)
+    lag = getattr(settings, 'ROLLUP_SAFETY_LAG_SECONDS', 300)
+    result = {'events': 0, 'batches': 0, 'watermark': None}
+
+    while True:
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+            # Batches end on a settled event; newer ids may still have
+            # lower uncommitted neighbours
+            pending = AppEvent.objects.filter(
+                id__gt=watermark.last_id, timestamp__lt=timezone.now() - timedelta(seconds=lag)
+            )
+            upper = pending.filter(
+                id__lte=watermark.last_id + batch_size
+            ).order_by('-id').values_list('id', flat=True).first()
+            if upper is None:
+                # Skip an id gap wider than a batch, or stop when caught up
+                upper = pending.order_by('id').values_list('id', flat=True).first()
+                if upper is None:
+                    result['watermark'] = watermark.last_id
+                    return result
+
+            events = AppEvent.objects.filter(id__gt=watermark.last_id, id__lte=upper)
+            totals = aggregate_events(events, period_type='HOUR')
+            upsert_summaries('HOUR', totals, user_sketches(events, period_type='HOUR'), add=True)
+            _derive_all({key[0] for key in totals})
+
+            result['events'] += sum(total[0] for key, total in totals.items() if key[1:] == ('', ''))
+            result['batches'] += 1
+            watermark.last_id = upper
+            watermark.save(update_fields=['last_id', 'updated_at'])
+            result['watermark'] = upper
+
+
+def rebuild(start_time, end_time):
+    """
+    Recompute HOUR rows between two times from AppEvent, and their tiers.
+
+    For repairs, e.g. after restoring events or for rows written before
+    the rollup tracked duration sums.
+    """
+    from .models import AppEvent, EventSummary, RollupWatermark
+
+    start = period_bounds('HOUR', start_time)[0]
+    end = period_bounds('HOUR', end_time)[0]
+    if end < end_time:
+        end += timedelta(hours=1)
+
+    # Catch up first: events above the watermark are left to the next
+    # rollup_events(), so they must not be counted here as well
+    rollup_events()
+
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=WATERMARK_NAME)
+        EventSummary.objects.filter(
+            period_type='HOUR', period_start__gte=start, period_start__lt=end,
+            event_type='', user__isnull=True,
+        ).delete()
+        events = AppEvent.objects.filter(
+            timestamp__gte=start, timestamp__lt=end, id__lte=watermark.last_id
+        )
+        totals = aggregate_events(events, period_type='HOUR')
+        upsert_summaries('HOUR', totals, user_sketches(events, period_type='HOUR'))
+
+        hours = set()
+        moment = start
+        while moment < end:
+            hours.add(moment)
+            moment += timedelta(hours=1)
+        _derive_all(hours)
+    return len(totals)
+
+
+def summarize(period_type, start_time, end_time):
+    """Summary rows for one arbitrary window, straight from AppEvent."""
+    from .models import AppEvent
+
+    events = AppEvent.objects.filter(timestamp__gte=start_time, timestamp__lt=end_time)
+    totals = aggregate_events(events, period_start=start_time)
+
+    # The overall row exists even for an empty window
+    totals.setdefault(_row_key(start_time, None, None), [0, 0.0, 0])
+    return upsert_summaries(
+        period_type, totals, user_sketches(events, period_start=start_time), period_end=end_time
+    )
+
+
+def unique_users_between(start_time, end_time, view_name='', event_category=''):
+    """
+    Estimated distinct users between two times, from summary sketches.
+
+    Whole days come from DAY rows and the hours at either edge from HOUR
+    rows, so no AppEvent is read. The window is widened to whole hours.
+    """
+    from .models import EventSummary
+
+    start = period_bounds('HOUR', start_time)[0]
+    end = period_bounds('HOUR', end_time)[0]
+    if end < end_time:
+        end += timedelta(hours=1)
+
+    first_day = period_bounds('DAY', start)[0]
+    if first_day < start:
+        first_day += timedelta(days=1)
+    last_day = period_bounds('DAY', end)[0]
+
+    if first_day < last_day:
+        window = (
+            Q(period_type='DAY', period_start__gte=first_day, period_start__lt=last_day)
+            | Q(period_type='HOUR', period_start__gte=start, period_start__lt=first_day)
+            | Q(period_type='HOUR', period_start__gte=last_day, period_start__lt=end)
+        )
+    else:
+        window = Q(period_type='HOUR', period_start__gte=start, period_start__lt=end)
+
+    sketches = EventSummary.objects.filter(
+        window, view_name=view_name, event_category=event_category, event_type='', user__isnull=True,
+    ).values_list('user_sketch', flat=True)
+    return merge_all(sketches).count()
@@ -6,10 +6,12 @@ Safe, data-driven rule processing.
 
 from .evaluator import RuleEvaluator
 from .conditions import ConditionParser
+from .compiler import compile_condition
 from .actions import ActionExecutor
 
 __all__ = [
     'RuleEvaluator',
     'ConditionParser',
+    'compile_condition',
     'ActionExecutor',
 ]
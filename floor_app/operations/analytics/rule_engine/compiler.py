@@ -0,0 +1,268 @@
+"""
+Condition Compiler
+
+Translates JSON condition definitions into ORM filters, so a rule runs as
+one filtered query over its target model instead of a Python evaluation
+per object.
+
+Compiled:
+- threshold: field <op> value          -> Q(field__<lookup>=value)
+- age: now - field <op> N units        -> Q(field__<flipped lookup>=now - N units)
+- field_comparison: field1 <op> field2 -> Q(field1__<lookup>=F(field2))
+- compound AND/OR of the above
+
+Anything else (custom, queryset_count, regex, paths through properties,
+JSON or reverse relations) is left as a residual condition that the
+caller checks in Python with ConditionParser. For AND, the compiled parts
+still narrow the query and only the residual parts run per object; an OR
+with any residual part runs entirely in Python.
+
+The compiled filter matches the same objects as ConditionParser, NULLs
+included: comparisons with NULL never match, NULL == NULL does. The text
+operators (contains, startswith, endswith) compile to LIKE, so they only
+compile where LIKE is case-sensitive like Python (PostgreSQL) and the
+path cannot be NULL (Python compares str(None)); elsewhere they stay
+residual.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, models, router
+from django.db.models import F, Q
+from django.utils import timezone
+
+# ConditionParser operator -> field lookup
+LOOKUPS = {
+    '==': 'exact',
+    '>': 'gt',
+    '>=': 'gte',
+    '<': 'lt',
+    '<=': 'lte',
+    'in': 'in',
+    'contains': 'contains',
+    'startswith': 'startswith',
+    'endswith': 'endswith',
+}
+
+# age <op> N  <=>  field <flipped op> now - N
+AGE_LOOKUPS = {'>': 'lt', '>=': 'lte', '<': 'gt', '<=': 'gte', '==': 'exact'}
+
+UNIT_SECONDS = {
+    'seconds': 1,
+    'minutes': 60,
+    'hours': 3600,
+    'days': 86400,
+    'weeks': 604800,
+}
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+# Backends whose LIKE is case-sensitive, as str methods are
+CASE_SENSITIVE_LIKE = ('postgresql',)
+
+
+class NotCompilable(Exception):
+    """The condition cannot be expressed as an ORM filter."""
+
+
+@dataclass
+class CompiledCondition:
+    """
+    ORM filter for a condition, plus what is left to check in Python.
+
+    q: Filter every matching object satisfies (Q() = no narrowing)
+    residual: Condition definition still to evaluate per object, or None
+        when `q` alone selects exactly the matching objects
+    """
+
+    q: Q
+    residual: Optional[dict] = None
+
+    @property
+    def is_exact(self):
+        return self.residual is None
+
+
+def resolve_field(model, path):
+    """
+    ORM lookup path and model field for a dotted attribute path.
+
+    Only concrete fields and forward relations compile: ConditionParser
+    reads attributes, which for properties, reverse relations or JSON keys
+    mean something SQL cannot reproduce.
+    """
+    parts = path.split('.')
+    opts = model._meta
+    for i, part in enumerate(parts):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            raise NotCompilable(f"{path}: '{part}' is not a field of {opts.label}")
+        if not getattr(field, 'concrete', False) or field.many_to_many:
+            raise NotCompilable(f"{path}: '{part}' is not a concrete field")
+
+        if i < len(parts) - 1:
+            if not field.is_relation or part == field.attname != field.name:
+                raise NotCompilable(f"{path}: '{part}' is not a relation")
+            opts = field.related_model._meta
+        elif field.is_relation and part == field.name:
+            # obj.stage is an instance; compare 'stage_id' instead
+            raise NotCompilable(f"{path}: compare '{field.attname}' instead of the related object")
+        elif isinstance(field, models.JSONField):
+            raise NotCompilable(f"{path}: JSON fields are evaluated in Python")
+    return '__'.join(parts), field
+
+
+def _nullable(model, path):
+    """Whether any field along a dotted path allows NULL."""
+    opts = model._meta
+    for part in path.split('.'):
+        field = opts.get_field(part)
+        if field.null:
+            return True
+        if field.is_relation:
+            opts = field.related_model._meta
+    return False
+
+
+def _equal(lookup, value):
+    if value is None:
+        return Q(**{f'{lookup}__isnull': True})
+    return Q(**{lookup: value})
+
+
+def compile_threshold(model, condition_def):
+    field_path = condition_def.get('field')
+    operator_str = condition_def.get('operator', '==')
+    value = condition_def.get('value')
+    if not field_path:
+        raise NotCompilable("Field name required for threshold condition")
+
+    lookup, field = resolve_field(model, field_path)
+
+    if operator_str == '==':
+        return _equal(lookup, value)
+    if operator_str == '!=':
+        # ~Q() also matches NULL columns, like None != value in Python
+        return ~_equal(lookup, value)
+    if operator_str in ('in', 'not_in'):
+        if not isinstance(value, (list, tuple)):
+            raise NotCompilable("'in' needs a list to compile")
+        q = Q(**{f'{lookup}__in': [v for v in value if v is not None]})
+        if None in value:
+            q |= Q(**{f'{lookup}__isnull': True})
+        return q if operator_str == 'in' else ~q
+    if operator_str in ('contains', 'startswith', 'endswith'):
+        if not isinstance(field, TEXT_FIELDS) or not isinstance(value, str):
+            raise NotCompilable(f"'{operator_str}' only compiles for text fields")
+        if connections[router.db_for_read(model)].vendor not in CASE_SENSITIVE_LIKE:
+            raise NotCompilable(f"'{operator_str}' is case-insensitive on this database")
+        if _nullable(model, field_path):
+            raise NotCompilable(f"'{operator_str}' on a nullable path is evaluated in Python")
+        return Q(**{f'{lookup}__{LOOKUPS[operator_str]}': value})
+    if operator_str in ('>', '>=', '<', '<='):
+        if value is None:
+            # None cannot be ordered: never matches
+            return Q(pk__in=[])
+        return Q(**{f'{lookup}__{LOOKUPS[operator_str]}': value})
+    raise NotCompilable(f"Operator '{operator_str}' is evaluated in Python")
+
+
+def compile_age(model, condition_def):
+    field_path = condition_def.get('field')
+    operator_str = condition_def.get('operator', '>')
+    value = condition_def.get('value')
+    unit = condition_def.get('unit', 'hours')
+    if not field_path:
+        raise NotCompilable("Field name required for age condition")
+    if unit not in UNIT_SECONDS or operator_str not in AGE_LOOKUPS or not isinstance(value, (int, float)):
+        raise NotCompilable(f"Age condition '{operator_str} {value} {unit}' is evaluated in Python")
+
+    lookup, field = resolve_field(model, field_path)
+    if not isinstance(field, models.DateTimeField):
+        raise NotCompilable(f"{field_path}: age only compiles for datetime fields")
+
+    cutoff = timezone.now() - timedelta(seconds=value * UNIT_SECONDS[unit])
+    return Q(**{f'{lookup}__{AGE_LOOKUPS[operator_str]}': cutoff})
+
+
+def compile_field_comparison(model, condition_def):
+    field1 = condition_def.get('field1')
+    field2 = condition_def.get('field2')
+    operator_str = condition_def.get('operator', '==')
+    if not field1 or not field2:
+        raise NotCompilable("Both field1 and field2 required for field comparison")
+
+    lookup1, _ = resolve_field(model, field1)
+    lookup2, _ = resolve_field(model, field2)
+    both_null = Q(**{f'{lookup1}__isnull': True, f'{lookup2}__isnull': True})
+    both_set = Q(**{f'{lookup1}__isnull': False, f'{lookup2}__isnull': False})
+
+    if operator_str == '==':
+        return (both_set & Q(**{lookup1: F(lookup2)})) | both_null
+    if operator_str == '!=':
+        one_null = Q(**{f'{lookup1}__isnull': True}) ^ Q(**{f'{lookup2}__isnull': True})
+        return (both_set & ~Q(**{lookup1: F(lookup2)})) | one_null
+    if operator_str in ('>', '>=', '<', '<='):
+        return Q(**{f'{lookup1}__{LOOKUPS[operator_str]}': F(lookup2)})
+    raise NotCompilable(f"Operator '{operator_str}' is evaluated in Python")
+
+
+COMPILERS = {
+    'threshold': compile_threshold,
+    'age': compile_age,
+    'field_comparison': compile_field_comparison,
+}
+
+
+def compile_condition(model, condition_def):
+    """
+    Compile a condition definition against a target model.
+
+    Returns:
+        CompiledCondition; never raises for valid-but-uncompilable
+        conditions, which come back as residuals.
+    """
+    condition_type = condition_def.get('type', 'threshold')
+
+    if condition_type == 'compound':
+        return _compile_compound(model, condition_def)
+
+    compiler = COMPILERS.get(condition_type)
+    if compiler is None:
+        return CompiledCondition(Q(), condition_def)
+    try:
+        return CompiledCondition(compiler(model, condition_def))
+    except NotCompilable:
+        return CompiledCondition(Q(), condition_def)
+
+
+def _compile_compound(model, condition_def):
+    compound_operator = condition_def.get('operator', 'AND').upper()
+    conditions = condition_def.get('conditions', [])
+    if not conditions or compound_operator not in ('AND', 'OR'):
+        # Let ConditionParser report the error
+        return CompiledCondition(Q(), condition_def)
+
+    parts = [compile_condition(model, cond_def) for cond_def in conditions]
+
+    if compound_operator == 'OR':
+        if not all(part.is_exact for part in parts):
+            return CompiledCondition(Q(), condition_def)
+        q = Q()
+        for part in parts:
+            q |= part.q
+        return CompiledCondition(q)
+
+    q = Q()
+    for part in parts:
+        q &= part.q
+    residuals = [part.residual for part in parts if part.residual is not None]
+    if not residuals:
+        return CompiledCondition(q)
+    if len(residuals) == 1:
+        return CompiledCondition(q, residuals[0])
+    return CompiledCondition(q, {'type': 'compound', 'operator': 'AND', 'conditions': residuals})
@@ -10,328 +10,437 @@ Supported condition types:
 - queryset_count: Count matching records
 - compound: AND/OR combinations
 - custom: Limited safe eval (with whitelist)
+
+A definition is compiled once into a tree of condition nodes: operators,
+field accessors, target models and custom expressions are resolved at
+compile time, so evaluating an object only reads its fields and compares.
+compile_rule() caches the tree per AutomationRule and reuses it until the
+rule's condition_definition changes.
+
+queryset_count results are shared by every rule evaluated in the same
+pass (see count_pass): identical (model, filters) counts run once, and
+prefetch_counts() folds the counts of one model into a single
+conditional-aggregation query.
 """
 
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
 from django.utils import timezone
 from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Q
 from decimal import Decimal
+import json
+import logging
 import operator
 import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# Operator mapping
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    'in': lambda a, b: a in b,
+    'not_in': lambda a, b: a not in b,
+    'contains': lambda a, b: b in a,
+    'startswith': lambda a, b: str(a).startswith(str(b)),
+    'endswith': lambda a, b: str(a).endswith(str(b)),
+    'regex': lambda a, b: bool(re.match(b, str(a))),
+}
+
+UNIT_SECONDS = {
+    'seconds': 1,
+    'minutes': 60,
+    'hours': 3600,
+    'days': 86400,
+    'weeks': 604800,
+}
+
+# Custom expressions: only simple attribute access and arithmetic
+CUSTOM_EXPRESSION_PATTERN = re.compile(r'^obj(\.[a-zA-Z_][a-zA-Z0-9_]*)+\s*[<>=!]+\s*.*$')
+
+
+def _walk(obj, parts):
+    value = obj
+    for part in parts:
+        if value is None:
+            return None
+
+        # Support dict access
+        if isinstance(value, dict):
+            value = value.get(part)
+        else:
+            # Object attribute access
+            value = getattr(value, part, None)
 
+    return value
 
-class ConditionParser:
+
+def field_accessor(field_path):
     """
-    Parses and evaluates JSON condition definitions.
+    Pre-resolved getter for a dotted field path.
+
+    Examples:
+    - "quantity_on_hand" -> obj.quantity_on_hand
+    - "stage.average_duration_hours" -> obj.stage.average_duration_hours
+    - "job_card.customer_name" -> obj.job_card.customer_name
 
-    Thread-safe, no arbitrary code execution.
+    Missing attributes and None along the path give None; dicts (e.g.
+    JSON field values) are read by key.
     """
+    parts = tuple(field_path.split('.'))
 
-    # Operator mapping
-    OPERATORS = {
-        '==': operator.eq,
-        '!=': operator.ne,
-        '>': operator.gt,
-        '>=': operator.ge,
-        '<': operator.lt,
-        '<=': operator.le,
-        'in': lambda a, b: a in b,
-        'not_in': lambda a, b: a not in b,
-        'contains': lambda a, b: b in a,
-        'startswith': lambda a, b: str(a).startswith(str(b)),
-        'endswith': lambda a, b: str(a).endswith(str(b)),
-        'regex': lambda a, b: bool(re.match(b, str(a))),
-    }
+    if len(parts) > 1:
+        def get(obj):
+            if not obj:
+                return None
+            return _walk(obj, parts)
+        return get
 
-    def __init__(self, condition_def):
-        """
-        Initialize parser with condition definition.
+    getter = operator.attrgetter(parts[0])
 
-        condition_def: dict - JSON condition structure
-        """
-        self.condition_def = condition_def
-        self.condition_type = condition_def.get('type', 'threshold')
+    def get(obj):
+        if not obj:
+            return None
+        if isinstance(obj, dict):
+            return obj.get(parts[0])
+        try:
+            return getter(obj)
+        except AttributeError:
+            return None
+    return get
 
-    def evaluate(self, target_object=None, context=None):
-        """
-        Evaluate condition.
 
-        Returns:
-            dict:
-                - result: bool (True if condition met)
-                - context: dict (explanation of evaluation)
-                - comment: str (human-readable explanation)
-        """
-        context = context or {}
+def safe_subtract(a, b):
+    """
+    Safely subtract two values, handling None and type mismatches.
+    """
+    try:
+        if a is None or b is None:
+            return None
 
-        try:
-            if self.condition_type == 'threshold':
-                return self._eval_threshold(target_object, context)
-            elif self.condition_type == 'age':
-                return self._eval_age(target_object, context)
-            elif self.condition_type == 'field_comparison':
-                return self._eval_field_comparison(target_object, context)
-            elif self.condition_type == 'queryset_count':
-                return self._eval_queryset_count(target_object, context)
-            elif self.condition_type == 'compound':
-                return self._eval_compound(target_object, context)
-            elif self.condition_type == 'custom':
-                return self._eval_custom(target_object, context)
-            else:
-                raise ValueError(f"Unknown condition type: {self.condition_type}")
+        # Convert to same type if needed
+        if isinstance(a, Decimal) or isinstance(b, Decimal):
+            return float(Decimal(str(a)) - Decimal(str(b)))
+        else:
+            return a - b
+    except (TypeError, ValueError):
+        return None
 
-        except Exception as e:
-            return {
-                'result': False,
-                'context': {'error': str(e)},
-                'comment': f"Evaluation error: {str(e)}"
-            }
 
-    def _eval_threshold(self, obj, context):
-        """
-        Evaluate threshold condition.
-
-        Example:
-        {
-            "type": "threshold",
-            "field": "quantity_on_hand",
-            "operator": "<",
-            "value": 10
-        }
-        """
-        field_name = self.condition_def.get('field')
-        operator_str = self.condition_def.get('operator', '==')
-        threshold_value = self.condition_def.get('value')
+def _get_operator(operator_str):
+    if operator_str not in OPERATORS:
+        raise ValueError(f"Invalid operator: {operator_str}")
+    return OPERATORS[operator_str]
+
+
+# ============================================================================
+# CONDITION NODES
+# ============================================================================
+
+class ConditionNode:
+    """
+    One compiled condition.
+
+    evaluate() returns the result dict of ConditionParser.evaluate();
+    test() only the boolean. Both may raise - ConditionTree turns errors
+    into a failed result.
+    """
+
+    def evaluate(self, obj, context):
+        raise NotImplementedError
+
+    def test(self, obj, context):
+        return self.evaluate(obj, context)['result']
+
 
-        if not field_name:
+class InvalidCondition(ConditionNode):
+    """A definition that failed to compile; raises its error when evaluated."""
+
+    def __init__(self, error):
+        self.error = error
+
+    def evaluate(self, obj, context):
+        raise self.error
+
+
+class ThresholdCondition(ConditionNode):
+    """
+    Evaluate threshold condition.
+
+    Example:
+    {
+        "type": "threshold",
+        "field": "quantity_on_hand",
+        "operator": "<",
+        "value": 10
+    }
+    """
+
+    def __init__(self, condition_def):
+        self.field_name = condition_def.get('field')
+        self.operator_str = condition_def.get('operator', '==')
+        self.threshold_value = condition_def.get('value')
+
+        if not self.field_name:
             raise ValueError("Field name required for threshold condition")
 
-        # Get field value
-        current_value = self._get_field_value(obj, field_name)
+        self.get_value = field_accessor(self.field_name)
+        self.op_func = _get_operator(self.operator_str)
 
-        # Get operator
-        if operator_str not in self.OPERATORS:
-            raise ValueError(f"Invalid operator: {operator_str}")
-        op_func = self.OPERATORS[operator_str]
+    def test(self, obj, context):
+        return self.op_func(self.get_value(obj), self.threshold_value)
 
-        # Evaluate
-        result = op_func(current_value, threshold_value)
+    def evaluate(self, obj, context):
+        current_value = self.get_value(obj)
+        result = self.op_func(current_value, self.threshold_value)
 
         return {
             'result': result,
             'context': {
-                'field': field_name,
+                'field': self.field_name,
                 'current_value': str(current_value),
-                'operator': operator_str,
-                'threshold': threshold_value,
-                'difference': self._safe_subtract(current_value, threshold_value),
+                'operator': self.operator_str,
+                'threshold': self.threshold_value,
+                'difference': safe_subtract(current_value, self.threshold_value),
             },
-            'comment': f"{field_name} ({current_value}) {operator_str} {threshold_value}: {result}"
+            'comment': f"{self.field_name} ({current_value}) {self.operator_str} {self.threshold_value}: {result}"
         }
 
-    def _eval_age(self, obj, context):
-        """
-        Evaluate age-based condition.
-
-        Example:
-        {
-            "type": "age",
-            "field": "entered_at",
-            "operator": ">",
-            "value": 24,
-            "unit": "hours"
-        }
 
-        Units: seconds, minutes, hours, days, weeks
-        """
-        field_name = self.condition_def.get('field')
-        operator_str = self.condition_def.get('operator', '>')
-        threshold_value = self.condition_def.get('value')
-        unit = self.condition_def.get('unit', 'hours')
+class AgeCondition(ConditionNode):
+    """
+    Evaluate age-based condition.
+
+    Example:
+    {
+        "type": "age",
+        "field": "entered_at",
+        "operator": ">",
+        "value": 24,
+        "unit": "hours"
+    }
+
+    Units: seconds, minutes, hours, days, weeks
+    """
+
+    def __init__(self, condition_def):
+        self.field_name = condition_def.get('field')
+        self.operator_str = condition_def.get('operator', '>')
+        self.threshold_value = condition_def.get('value')
+        self.unit = condition_def.get('unit', 'hours')
 
-        if not field_name:
+        if not self.field_name:
             raise ValueError("Field name required for age condition")
 
-        # Get datetime field value
-        dt_value = self._get_field_value(obj, field_name)
+        self.get_value = field_accessor(self.field_name)
+        # A null field is reported before a bad unit or operator
+        self.error = None
+        self.unit_seconds = UNIT_SECONDS.get(self.unit)
+        self.op_func = OPERATORS.get(self.operator_str)
+        if self.unit_seconds is None:
+            self.error = ValueError(f"Invalid time unit: {self.unit}")
+        elif self.op_func is None:
+            self.error = ValueError(f"Invalid operator: {self.operator_str}")
+
+    def _age(self, dt_value):
+        if self.error:
+            raise self.error
+        return (timezone.now() - dt_value).total_seconds() / self.unit_seconds
+
+    def test(self, obj, context):
+        dt_value = self.get_value(obj)
+        if not dt_value:
+            return False
+        return self.op_func(self._age(dt_value), self.threshold_value)
+
+    def evaluate(self, obj, context):
+        dt_value = self.get_value(obj)
         if not dt_value:
             return {
                 'result': False,
-                'context': {'error': f"{field_name} is null"},
-                'comment': f"{field_name} is null, cannot evaluate age"
+                'context': {'error': f"{self.field_name} is null"},
+                'comment': f"{self.field_name} is null, cannot evaluate age"
             }
 
-        # Calculate age
-        now = timezone.now()
-        age_delta = now - dt_value
-
-        # Convert to requested unit
-        unit_seconds = {
-            'seconds': 1,
-            'minutes': 60,
-            'hours': 3600,
-            'days': 86400,
-            'weeks': 604800,
-        }
-
-        if unit not in unit_seconds:
-            raise ValueError(f"Invalid time unit: {unit}")
-
-        age_in_unit = age_delta.total_seconds() / unit_seconds[unit]
-
-        # Get operator
-        if operator_str not in self.OPERATORS:
-            raise ValueError(f"Invalid operator: {operator_str}")
-        op_func = self.OPERATORS[operator_str]
-
-        # Evaluate
-        result = op_func(age_in_unit, threshold_value)
+        age_in_unit = self._age(dt_value)
+        result = self.op_func(age_in_unit, self.threshold_value)
 
         return {
             'result': result,
             'context': {
-                'field': field_name,
+                'field': self.field_name,
                 'datetime_value': dt_value.isoformat(),
                 'age': round(age_in_unit, 2),
-                'unit': unit,
-                'operator': operator_str,
-                'threshold': threshold_value,
+                'unit': self.unit,
+                'operator': self.operator_str,
+                'threshold': self.threshold_value,
             },
-            'comment': f"{field_name} age ({age_in_unit:.1f} {unit}) {operator_str} {threshold_value}: {result}"
+            'comment': f"{self.field_name} age ({age_in_unit:.1f} {self.unit}) {self.operator_str} {self.threshold_value}: {result}"
         }
 
-    def _eval_field_comparison(self, obj, context):
-        """
-        Compare two fields.
-
-        Example:
-        {
-            "type": "field_comparison",
-            "field1": "actual_quantity",
-            "operator": "<",
-            "field2": "required_quantity"
-        }
-        """
-        field1_name = self.condition_def.get('field1')
-        field2_name = self.condition_def.get('field2')
-        operator_str = self.condition_def.get('operator', '==')
 
-        if not field1_name or not field2_name:
+class FieldComparisonCondition(ConditionNode):
+    """
+    Compare two fields.
+
+    Example:
+    {
+        "type": "field_comparison",
+        "field1": "actual_quantity",
+        "operator": "<",
+        "field2": "required_quantity"
+    }
+    """
+
+    def __init__(self, condition_def):
+        self.field1_name = condition_def.get('field1')
+        self.field2_name = condition_def.get('field2')
+        self.operator_str = condition_def.get('operator', '==')
+
+        if not self.field1_name or not self.field2_name:
             raise ValueError("Both field1 and field2 required for field comparison")
 
-        # Get values
-        value1 = self._get_field_value(obj, field1_name)
-        value2 = self._get_field_value(obj, field2_name)
+        self.get_value1 = field_accessor(self.field1_name)
+        self.get_value2 = field_accessor(self.field2_name)
+        self.op_func = _get_operator(self.operator_str)
 
-        # Get operator
-        if operator_str not in self.OPERATORS:
-            raise ValueError(f"Invalid operator: {operator_str}")
-        op_func = self.OPERATORS[operator_str]
+    def test(self, obj, context):
+        return self.op_func(self.get_value1(obj), self.get_value2(obj))
 
-        # Evaluate
-        result = op_func(value1, value2)
+    def evaluate(self, obj, context):
+        value1 = self.get_value1(obj)
+        value2 = self.get_value2(obj)
+        result = self.op_func(value1, value2)
 
         return {
             'result': result,
             'context': {
-                'field1': field1_name,
+                'field1': self.field1_name,
                 'value1': str(value1),
-                'operator': operator_str,
-                'field2': field2_name,
+                'operator': self.operator_str,
+                'field2': self.field2_name,
                 'value2': str(value2),
-                'difference': self._safe_subtract(value1, value2),
+                'difference': safe_subtract(value1, value2),
             },
-            'comment': f"{field1_name} ({value1}) {operator_str} {field2_name} ({value2}): {result}"
+            'comment': f"{self.field1_name} ({value1}) {self.operator_str} {self.field2_name} ({value2}): {result}"
         }
 
-    def _eval_queryset_count(self, obj, context):
-        """
-        Evaluate queryset count condition.
-
-        Example:
-        {
-            "type": "queryset_count",
-            "model": "inventory.CutterDetail",
-            "filters": {"category": "ENO_RECLAIMED"},
-            "operator": ">",
-            "value": 50
-        }
 
-        Note: This is safer than allowing arbitrary queryset expressions.
-        """
-        model_path = self.condition_def.get('model')
-        filters = self.condition_def.get('filters', {})
-        operator_str = self.condition_def.get('operator', '>')
-        threshold_value = self.condition_def.get('value')
+class QuerysetCountCondition(ConditionNode):
+    """
+    Evaluate queryset count condition.
+
+    Example:
+    {
+        "type": "queryset_count",
+        "model": "inventory.CutterDetail",
+        "filters": {"category": "ENO_RECLAIMED"},
+        "operator": ">",
+        "value": 50
+    }
+
+    Note: This is safer than allowing arbitrary queryset expressions.
+    """
+
+    def __init__(self, condition_def):
+        self.model_path = condition_def.get('model')
+        self.filters = condition_def.get('filters', {})
+        self.operator_str = condition_def.get('operator', '>')
+        self.threshold_value = condition_def.get('value')
 
-        if not model_path:
+        if not self.model_path:
             raise ValueError("Model path required for queryset_count")
 
-        # Get model
         try:
-            app_label, model_name = model_path.split('.')
-            model = apps.get_model(app_label, model_name)
+            app_label, model_name = self.model_path.split('.')
+            self.model = apps.get_model(app_label, model_name)
         except (ValueError, LookupError) as e:
-            raise ValueError(f"Invalid model path: {model_path}: {e}")
+            raise ValueError(f"Invalid model path: {self.model_path}: {e}")
+
+        self.op_func = _get_operator(self.operator_str)
+        self.cache_key = (self.model._meta.label_lower, _definition_key(self.filters))
 
-        # Build queryset
-        qs = model.objects.filter(**filters)
-        count = qs.count()
+    def query_count(self):
+        return self.model.objects.filter(**self.filters).count()
 
-        # Get operator
-        if operator_str not in self.OPERATORS:
-            raise ValueError(f"Invalid operator: {operator_str}")
-        op_func = self.OPERATORS[operator_str]
+    def count(self):
+        """The count, shared with the other rules of the current pass."""
+        cache = _count_cache.get()
+        if cache is None:
+            return self.query_count()
+        return cache.get(self.cache_key, self.query_count)
 
-        # Evaluate
-        result = op_func(count, threshold_value)
+    def evaluate(self, obj, context):
+        count = self.count()
+        result = self.op_func(count, self.threshold_value)
 
         return {
             'result': result,
             'context': {
-                'model': model_path,
-                'filters': filters,
+                'model': self.model_path,
+                'filters': self.filters,
                 'count': count,
-                'operator': operator_str,
-                'threshold': threshold_value,
+                'operator': self.operator_str,
+                'threshold': self.threshold_value,
             },
-            'comment': f"{model_path} count ({count}) {operator_str} {threshold_value}: {result}"
+            'comment': f"{self.model_path} count ({count}) {self.operator_str} {self.threshold_value}: {result}"
         }
 
-    def _eval_compound(self, obj, context):
-        """
-        Evaluate compound condition (AND/OR).
-
-        Example:
-        {
-            "type": "compound",
-            "operator": "AND",
-            "conditions": [
-                {"type": "threshold", "field": "stock", "operator": "<", "value": 10},
-                {"type": "age", "field": "last_usage", "operator": ">", "value": 90, "unit": "days"}
-            ]
-        }
-        """
-        compound_operator = self.condition_def.get('operator', 'AND').upper()
-        conditions = self.condition_def.get('conditions', [])
+
+class CompoundCondition(ConditionNode):
+    """
+    Evaluate compound condition (AND/OR).
+
+    Example:
+    {
+        "type": "compound",
+        "operator": "AND",
+        "conditions": [
+            {"type": "threshold", "field": "stock", "operator": "<", "value": 10},
+            {"type": "age", "field": "last_usage", "operator": ">", "value": 90, "unit": "days"}
+        ]
+    }
+    """
+
+    def __init__(self, condition_def):
+        self.compound_operator = condition_def.get('operator', 'AND').upper()
+        conditions = condition_def.get('conditions', [])
 
         if not conditions:
             raise ValueError("Conditions list required for compound condition")
 
-        if compound_operator not in ['AND', 'OR']:
-            raise ValueError(f"Invalid compound operator: {compound_operator}. Use AND or OR")
+        if self.compound_operator not in ['AND', 'OR']:
+            raise ValueError(f"Invalid compound operator: {self.compound_operator}. Use AND or OR")
+
+        # Each sub-condition fails on its own, as a separate parser would
+        self.children = [ConditionTree(cond_def) for cond_def in conditions]
+
+    def test(self, obj, context):
+        if self.compound_operator == 'AND':
+            return all(child.test(obj, context) for child in self.children)
+        return any(child.test(obj, context) for child in self.children)
 
+    def evaluate(self, obj, context):
         results = []
         all_context = []
 
-        for cond_def in conditions:
-            parser = ConditionParser(cond_def)
-            result = parser.evaluate(obj, context)
+        for child in self.children:
+            result = child.evaluate(obj, context)
             results.append(result['result'])
             all_context.append(result['context'])
 
         # Evaluate compound
-        if compound_operator == 'AND':
+        if self.compound_operator == 'AND':
             final_result = all(results)
         else:  # OR
             final_result = any(results)
@@ -339,100 +448,325 @@ class ConditionParser:
         return {
             'result': final_result,
             'context': {
-                'operator': compound_operator,
+                'operator': self.compound_operator,
                 'sub_conditions': all_context,
                 'individual_results': results,
             },
-            'comment': f"{compound_operator} of {len(conditions)} conditions: {final_result}"
+            'comment': f"{self.compound_operator} of {len(self.children)} conditions: {final_result}"
         }
 
-    def _eval_custom(self, obj, context):
-        """
-        Evaluate custom expression (limited, safe eval).
 
-        Example:
-        {
-            "type": "custom",
-            "expression": "obj.time_in_stage_hours > (obj.stage.average_duration_hours * 1.5)"
-        }
+class CustomCondition(ConditionNode):
+    """
+    Evaluate custom expression (limited, safe eval).
 
-        WARNING: This allows limited Python expressions.
-        Only use with trusted inputs and in controlled environment.
-        Whitelist approach: only allow specific attribute access patterns.
-        """
-        expression = self.condition_def.get('expression')
+    Example:
+    {
+        "type": "custom",
+        "expression": "obj.time_in_stage_hours > (obj.stage.average_duration_hours * 1.5)"
+    }
 
-        if not expression:
+    WARNING: This allows limited Python expressions.
+    Only use with trusted inputs and in controlled environment.
+    Whitelist approach: only allow specific attribute access patterns.
+    """
+
+    def __init__(self, condition_def):
+        self.expression = condition_def.get('expression')
+
+        if not self.expression:
             raise ValueError("Expression required for custom condition")
 
         # Safety check: only allow simple attribute access and arithmetic
         # No function calls except basic arithmetic
-        allowed_pattern = r'^obj(\.[a-zA-Z_][a-zA-Z0-9_]*)+\s*[<>=!]+\s*.*$'
-        if not re.match(allowed_pattern, expression.replace(' ', '')):
-            raise ValueError(f"Expression not allowed: {expression}")
+        if not CUSTOM_EXPRESSION_PATTERN.match(self.expression.replace(' ', '')):
+            raise ValueError(f"Expression not allowed: {self.expression}")
+
+        try:
+            self.code = compile(self.expression, '<rule condition>', 'eval')
+        except SyntaxError as e:
+            raise ValueError(f"Custom expression evaluation failed: {e}")
 
+    def _run(self, obj):
         # Build safe evaluation context
         safe_context = {
             'obj': obj,
             '__builtins__': {},  # No built-in functions
         }
-
         try:
-            # Evaluate expression
-            result = eval(expression, safe_context)
+            return eval(self.code, safe_context)
+        except Exception as e:
+            raise ValueError(f"Custom expression evaluation failed: {e}")
 
-            return {
-                'result': bool(result),
-                'context': {
-                    'expression': expression,
-                    'evaluated_result': result,
-                },
-                'comment': f"Custom expression '{expression}': {result}"
-            }
+    def test(self, obj, context):
+        return bool(self._run(obj))
+
+    def evaluate(self, obj, context):
+        result = self._run(obj)
 
+        return {
+            'result': bool(result),
+            'context': {
+                'expression': self.expression,
+                'evaluated_result': result,
+            },
+            'comment': f"Custom expression '{self.expression}': {result}"
+        }
+
+
+NODE_TYPES = {
+    'threshold': ThresholdCondition,
+    'age': AgeCondition,
+    'field_comparison': FieldComparisonCondition,
+    'queryset_count': QuerysetCountCondition,
+    'compound': CompoundCondition,
+    'custom': CustomCondition,
+}
+
+
+class ConditionTree:
+    """
+    A condition definition compiled once, evaluated many times.
+
+    Errors - at compile or evaluation time - give a failed result rather
+    than an exception, as ConditionParser always has.
+    """
+
+    def __init__(self, condition_def):
+        self.condition_def = condition_def
+        self.condition_type = condition_def.get('type', 'threshold')
+
+        node_type = NODE_TYPES.get(self.condition_type)
+        try:
+            if node_type is None:
+                raise ValueError(f"Unknown condition type: {self.condition_type}")
+            self.root = node_type(condition_def)
         except Exception as e:
-            raise ValueError(f"Custom expression evaluation failed: {e}")
+            self.root = InvalidCondition(e)
 
-    def _get_field_value(self, obj, field_path):
+    def evaluate(self, target_object=None, context=None):
         """
-        Get field value from object, supporting dot notation.
+        Evaluate condition.
 
-        Examples:
-        - "quantity_on_hand" -> obj.quantity_on_hand
-        - "stage.average_duration_hours" -> obj.stage.average_duration_hours
-        - "job_card.customer_name" -> obj.job_card.customer_name
+        Returns:
+            dict:
+                - result: bool (True if condition met)
+                - context: dict (explanation of evaluation)
+                - comment: str (human-readable explanation)
         """
-        if not obj:
-            return None
+        try:
+            return self.root.evaluate(target_object, context or {})
+        except Exception as e:
+            return {
+                'result': False,
+                'context': {'error': str(e)},
+                'comment': f"Evaluation error: {str(e)}"
+            }
 
-        parts = field_path.split('.')
-        value = obj
+    def test(self, target_object=None, context=None):
+        """evaluate()['result'] without building the explanation."""
+        try:
+            return bool(self.root.test(target_object, context or {}))
+        except Exception:
+            return False
 
-        for part in parts:
-            if value is None:
-                return None
+    def iter_nodes(self):
+        """Every node of the tree, depth first."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, CompoundCondition):
+                stack.extend(child.root for child in reversed(node.children))
+
+
+class ConditionParser(ConditionTree):
+    """
+    Parses and evaluates JSON condition definitions.
+
+    Thread-safe, no arbitrary code execution. Kept as the public entry
+    point; the definition is compiled on construction (see ConditionTree).
+    """
+
+    OPERATORS = OPERATORS
+
+
+# ============================================================================
+# PER-RULE CACHE
+# ============================================================================
+
+_RULE_CACHE_SIZE = 1024
+
+_rule_cache = OrderedDict()
+_rule_cache_lock = threading.Lock()
+
+
+def _definition_key(condition_def):
+    return json.dumps(condition_def, sort_keys=True, default=str)
 
-            # Support dict access
-            if isinstance(value, dict):
-                value = value.get(part)
-            else:
-                # Object attribute access
-                value = getattr(value, part, None)
 
+def compile_rule(rule):
+    """
+    Compiled condition tree of an AutomationRule, cached per rule.
+
+    A hit on (pk, updated_at) skips all work. Executions also bump
+    updated_at (run statistics), so on a miss the definition itself is
+    compared and the tree is only rebuilt if it changed.
+    """
+    if rule.pk is None:
+        return ConditionTree(rule.condition_definition)
+
+    with _rule_cache_lock:
+        entry = _rule_cache.get(rule.pk)
+        if entry is not None:
+            _rule_cache.move_to_end(rule.pk)
+    if entry is not None and entry[0] == rule.updated_at:
+        return entry[2]
+
+    definition_key = _definition_key(rule.condition_definition)
+    if entry is not None and entry[1] == definition_key:
+        tree = entry[2]
+    else:
+        tree = ConditionTree(rule.condition_definition)
+
+    with _rule_cache_lock:
+        _rule_cache[rule.pk] = (rule.updated_at, definition_key, tree)
+        _rule_cache.move_to_end(rule.pk)
+        while len(_rule_cache) > _RULE_CACHE_SIZE:
+            _rule_cache.popitem(last=False)
+    return tree
+
+
+def clear_rule_cache():
+    with _rule_cache_lock:
+        _rule_cache.clear()
+
+
+# ============================================================================
+# PER-PASS COUNT CACHE
+# ============================================================================
+
+_count_cache = ContextVar('automation_count_cache', default=None)
+
+
+class CountCache:
+    """
+    queryset_count results of one evaluation pass, keyed by
+    (model, normalized filters).
+
+    Thread-safe: rules running in parallel share it, and a count requested
+    by several rules at once is queried once. Failed counts are not cached.
+    Counts are a snapshot - changes made by actions later in the pass are
+    not seen.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.queries = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __getstate__(self):
+        # Process workers get a copy of the prefetched counts
+        return {'counts': dict(self.counts), 'queries': 0, 'hits': 0}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.counts = state['counts']
+
+    def get(self, key, query):
+        with self._lock:
+            if key in self.counts:
+                self.hits += 1
+                return self.counts[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self.counts:
+                    self.hits += 1
+                    return self.counts[key]
+            value = query()
+            with self._lock:
+                self.counts[key] = value
+                self.queries += 1
         return value
 
-    def _safe_subtract(self, a, b):
+    def prefetch(self, nodes):
         """
-        Safely subtract two values, handling None and type mismatches.
+        Count the given QuerysetCountConditions up front, one aggregate
+        query per model (Count('pk', filter=...) per distinct filter set).
+
+        Filters that go through a multi-valued relation are left to their
+        own count() - the joins of one would multiply the rows counted
+        for the others. A model whose batch fails (e.g. a bad field name)
+        is skipped; its counts then fail or succeed one by one.
         """
-        try:
-            if a is None or b is None:
-                return None
+        by_model = defaultdict(dict)
+        for node in nodes:
+            if (isinstance(node, QuerysetCountCondition) and node.cache_key not in self.counts
+                    and _single_valued(node.model, node.filters)):
+                by_model[node.model][node.cache_key] = node.filters
+
+        for model, filters_by_key in by_model.items():
+            if len(filters_by_key) < 2:
+                continue
+            keys = list(filters_by_key)
+            aggregates = {
+                f'count_{i}': Count('pk', filter=Q(**filters_by_key[key]))
+                for i, key in enumerate(keys)
+            }
+            try:
+                with transaction.atomic():
+                    row = model.objects.aggregate(**aggregates)
+            except Exception as e:
+                logger.debug(f"Batched counts for {model._meta.label} failed: {e}")
+                continue
+            with self._lock:
+                for i, key in enumerate(keys):
+                    self.counts.setdefault(key, row[f'count_{i}'])
+                self.queries += 1
+
+
+def _single_valued(model, filters):
+    """True if no filter lookup follows a reverse or many-to-many relation."""
+    if not isinstance(filters, dict):
+        return False
+    for lookup in filters:
+        opts = model._meta
+        for part in str(lookup).split('__'):
+            field = next((f for f in opts.get_fields() if f.name == part or getattr(f, 'attname', None) == part), None)
+            if field is None:
+                # A lookup or transform (gte, in, date...) ends the path
+                break
+            if field.one_to_many or field.many_to_many:
+                return False
+            if not field.is_relation:
+                break
+            if field.related_model is None:
+                # Generic foreign key
+                return False
+            opts = field.related_model._meta
+    return True
+
+
+@contextmanager
+def count_pass(cache=None):
+    """
+    Share queryset_count results within the block.
 
-            # Convert to same type if needed
-            if isinstance(a, Decimal) or isinstance(b, Decimal):
-                return float(Decimal(str(a)) - Decimal(str(b)))
-            else:
-                return a - b
-        except (TypeError, ValueError):
-            return None
+    Nested passes reuse the outer cache unless one is given explicitly.
+    """
+    if cache is None:
+        cache = _count_cache.get() or CountCache()
+    token = _count_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _count_cache.reset(token)
+
+
+def prefetch_counts(rules, cache):
+    """Batch the queryset_count conditions of the given AutomationRules."""
+    cache.prefetch(node for rule in rules for node in compile_rule(rule).iter_nodes())
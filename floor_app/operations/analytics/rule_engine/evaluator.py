@@ -6,12 +6,25 @@ Coordinates rule execution:
 2. Evaluate condition
 3. Record result
 4. Trigger action if needed
+
+Rules with a target model run set-based: the condition is compiled to an
+ORM filter (see compiler) and the matching objects come from one query.
+Only conditions the compiler cannot express are checked per object in
+Python, over the rows the compiled part already narrowed down.
 """
 
 from django.apps import apps
-from .conditions import ConditionParser
+from django.db.models import Count
+from .compiler import compile_condition
+from .conditions import ConditionTree, compile_rule, count_pass
 import time
 
+# Triggered objects described in the execution context
+CONTEXT_OBJECT_LIMIT = 10
+
+# Rows fetched per round trip when a residual condition runs in Python
+ITERATOR_CHUNK_SIZE = 2000
+
 
 class RuleEvaluator:
     """
@@ -24,13 +37,18 @@ class RuleEvaluator:
     - Performance tracking
     """
 
-    def __init__(self, rule):
+    def __init__(self, rule, use_sql=True):
         """
         Initialize evaluator with a rule.
 
         rule: AutomationRule instance
+        use_sql: Compile the condition into the target query; False
+            evaluates every target object in Python (for benchmarks)
         """
         self.rule = rule
+        self.use_sql = use_sql
+        # Compiled once per rule definition, shared across runs
+        self.condition = compile_rule(rule)
 
     def evaluate(self, target_object=None, context=None):
         """
@@ -52,48 +70,20 @@ class RuleEvaluator:
         context = context or {}
 
         try:
-            # Get target objects if not provided
-            if target_object is None:
-                target_objects = self._get_target_objects()
-            else:
-                target_objects = [target_object]
-
-            # If no target objects, evaluate as global rule
-            if not target_objects:
-                result = self._evaluate_single(None, context)
-            else:
-                # Evaluate for each target object
-                # For now, trigger if ANY object matches
-                # TODO: Add option for ALL vs ANY
-                triggered_objects = []
-                all_contexts = []
-
-                for obj in target_objects:
-                    result = self._evaluate_single(obj, context)
-                    if result['result']:
-                        triggered_objects.append({
-                            'object': obj,
-                            'context': result['context']
-                        })
-                    all_contexts.append(result['context'])
-
-                # Final result
-                result = {
-                    'result': len(triggered_objects) > 0,
-                    'context': {
-                        'triggered_count': len(triggered_objects),
-                        'total_evaluated': len(target_objects),
-                        'triggered_objects': [
-                            {
-                                'object_id': getattr(t['object'], 'id', None),
-                                'object_str': str(t['object']),
-                                'context': t['context']
-                            }
-                            for t in triggered_objects[:10]  # Limit to 10 for JSON size
-                        ],
-                    },
-                    'comment': f"Triggered for {len(triggered_objects)} of {len(target_objects)} objects"
-                }
+            # queryset_count conditions are counted once, not per object
+            with count_pass():
+                if target_object is not None:
+                    result = self._evaluate_objects([target_object], 1, context)
+                else:
+                    queryset = self._get_target_objects()
+                    if queryset is None:
+                        # No target model - global rule
+                        result = self._evaluate_single(None, context)
+                    elif self.use_sql:
+                        result = self._evaluate_queryset(queryset, context)
+                    else:
+                        total = queryset.count()
+                        result = self._evaluate_objects(queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE), total, context)
 
             # Calculate duration
             duration_ms = int((time.time() - start_time) * 1000)
@@ -111,47 +101,107 @@ class RuleEvaluator:
 
     def _evaluate_single(self, target_object, context):
         """Evaluate rule for a single target object."""
-        parser = ConditionParser(self.rule.condition_definition)
-        return parser.evaluate(target_object=target_object, context=context)
+        return self.condition.evaluate(target_object=target_object, context=context)
+
+    def _evaluate_queryset(self, queryset, context):
+        """
+        Evaluate rule over every target object with the condition in SQL.
+
+        One aggregate query counts targets and matches; only the objects
+        reported in the context are fetched. A residual (uncompilable)
+        condition is checked in Python over the pre-filtered rows.
+        """
+        compiled = compile_condition(queryset.model, self.rule.condition_definition)
+
+        if compiled.is_exact:
+            counts = queryset.aggregate(total=Count('pk'), matched=Count('pk', filter=compiled.q))
+            if not counts['total']:
+                return self._evaluate_single(None, context)
+            sample = queryset.filter(compiled.q)[:CONTEXT_OBJECT_LIMIT]
+            return self._summarize(
+                [(obj, self._evaluate_single(obj, context)['context']) for obj in sample],
+                counts['matched'], counts['total'],
+            )
+
+        total = queryset.count()
+        candidates = queryset.filter(compiled.q).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        residual = ConditionTree(compiled.residual)
+        return self._evaluate_objects(candidates, total, context, condition=residual)
+
+    def _evaluate_objects(self, objects, total, context, condition=None):
+        """Evaluate rule per object in Python; `total` is the number of targets."""
+        if not total:
+            return self._evaluate_single(None, context)
+
+        condition = condition or self.condition
+        triggered = []
+        matched = 0
+        for obj in objects:
+            if condition.test(target_object=obj, context=context):
+                matched += 1
+                if len(triggered) < CONTEXT_OBJECT_LIMIT:
+                    # Explanation of the whole condition, not just the residual
+                    triggered.append((obj, self._evaluate_single(obj, context)['context']))
+        return self._summarize(triggered, matched, total)
+
+    def _summarize(self, triggered, matched, total):
+        return {
+            'result': matched > 0,
+            'context': {
+                'triggered_count': matched,
+                'total_evaluated': total,
+                'triggered_objects': [
+                    {
+                        'object_id': getattr(obj, 'id', None),
+                        'object_str': str(obj),
+                        'context': obj_context,
+                    }
+                    for obj, obj_context in triggered
+                ],
+            },
+            'comment': f"Triggered for {matched} of {total} objects"
+        }
 
     def _get_target_objects(self):
         """
         Get target objects based on rule configuration.
 
-        Returns queryset or list of objects to evaluate.
+        Returns a queryset of every target object, or None for a global rule.
         """
         if not self.rule.target_model:
             # No specific target model - global rule
-            return []
+            return None
 
         try:
             # Parse model path
             app_label, model_name = self.rule.target_model.split('.')
             model = apps.get_model(app_label, model_name)
 
-            # Get all objects (can be customized with filters)
+            # All objects - the condition narrows them in SQL
             # TODO: Add filter configuration to rule
-            qs = model.objects.all()
-
-            # Limit to reasonable number for performance
-            # Can make this configurable per rule
-            return list(qs[:1000])
+            return model.objects.order_by('pk')
 
         except (ValueError, LookupError) as e:
             raise ValueError(f"Invalid target model: {self.rule.target_model}: {e}")
 
     @classmethod
-    def evaluate_all_active_rules(cls, rule_scope=None):
+    def evaluate_all_active_rules(cls, rule_scope=None, executor=None, workers=None, timeout=None):
         """
         Evaluate all active rules.
 
+        Rules run in parallel with per-rule timeouts (see runner.RuleRunner).
+
         Args:
             rule_scope: Optional filter by scope
+            executor: 'thread', 'process' or 'serial' (default: setting)
+            workers: Pool size (default: setting)
+            timeout: Seconds per rule (default: setting)
 
         Returns:
             dict with results summary
         """
         from floor_app.operations.analytics.models import AutomationRule
+        from .runner import RuleRunner
 
         # Get rules to evaluate
         rules = AutomationRule.objects.filter(is_active=True, is_approved=True)
@@ -162,32 +212,5 @@ class RuleEvaluator:
         # Filter by trigger mode (only scheduled for this method)
         rules = rules.filter(trigger_mode='SCHEDULED')
 
-        results = {
-            'total_evaluated': 0,
-            'total_triggered': 0,
-            'total_errors': 0,
-            'rule_results': [],
-        }
-
-        for rule in rules:
-            try:
-                execution = rule.execute()
-
-                results['total_evaluated'] += 1
-                if execution.was_triggered:
-                    results['total_triggered'] += 1
-
-                results['rule_results'].append({
-                    'rule_code': rule.rule_code,
-                    'triggered': execution.was_triggered,
-                    'comment': execution.comment,
-                })
-
-            except Exception as e:
-                results['total_errors'] += 1
-                results['rule_results'].append({
-                    'rule_code': rule.rule_code,
-                    'error': str(e),
-                })
-
-        return results
+        runner = RuleRunner(executor=executor, workers=workers, timeout=timeout)
+        return runner.run(list(rules))
@@ -0,0 +1,240 @@
+"""
+Rule Runner
+
+Runs a batch of automation rules (the scheduled pass) on a worker pool, so
+one slow rule - a heavy queryset_count, a webhook action - no longer
+delays the others:
+
+- each rule runs in its own worker with its own database connection,
+  closed when the rule finishes (no transaction or session state leaks
+  between rules);
+- each rule has a timeout: the batch stops waiting for it after
+  AUTOMATION_RULE_TIMEOUT_SECONDS and reports it as 'timeout'. On
+  PostgreSQL the rule's statements are also cancelled by the server
+  (statement_timeout); otherwise a thread cannot be stopped and finishes
+  in the background, so the rules still queued behind it are moved to a
+  fresh pool instead of waiting for its worker;
+- the whole batch has a deadline (one timeout per round of rules, plus
+  one): anything still unfinished then is reported as 'timeout';
+- a rule that raises is reported as 'error' and does not affect the rest.
+
+All rules of a batch share one queryset_count cache (conditions.count_pass),
+prefetched with one aggregate query per counted model. Process workers
+get a copy of the prefetched counts.
+
+The summary keeps the keys evaluate_all_active_rules has always returned
+and adds per-rule status and duration.
+
+Settings:
+AUTOMATION_RULE_EXECUTOR = 'thread'        # 'thread', 'process' or 'serial'
+AUTOMATION_RULE_WORKERS = 4                # Pool size
+AUTOMATION_RULE_TIMEOUT_SECONDS = 60       # Per rule
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .conditions import CountCache, count_pass, prefetch_counts
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ('thread', 'process', 'serial')
+
+# How often the batch checks running rules against their timeout
+POLL_SECONDS = 0.1
+
+
+def _set_statement_timeout(timeout):
+    if connection.vendor == 'postgresql' and timeout:
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [int(timeout * 1000)])
+
+
+def execute_rule(rule_id, timeout=None, isolated=True, count_cache=None):
+    """
+    Execute one rule; never raises.
+
+    isolated: The rule runs in a pool worker - give it a fresh connection
+        with a statement timeout, and close it afterwards.
+    count_cache: CountCache shared by the batch
+
+    Returns:
+        dict with rule_id, rule_code, status ('ok' / 'error'), triggered,
+        comment, duration_ms
+    """
+    from floor_app.operations.analytics.models import AutomationRule
+
+    started = time.monotonic()
+    result = {'rule_id': rule_id, 'rule_code': None, 'status': 'ok', 'triggered': False, 'comment': ''}
+    try:
+        if isolated:
+            _set_statement_timeout(timeout)
+        rule = AutomationRule.objects.get(pk=rule_id)
+        result['rule_code'] = rule.rule_code
+        with count_pass(count_cache):
+            execution = rule.execute()
+        result['triggered'] = execution.was_triggered
+        result['comment'] = execution.comment
+        if rule.last_status == 'error':
+            # execute() records its own errors
+            result['status'] = 'error'
+            result['error'] = rule.last_error
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    finally:
+        if isolated:
+            connection.close()
+    result['duration_ms'] = int((time.monotonic() - started) * 1000)
+    return result
+
+
+def _init_process():
+    # Spawned (not forked) workers need Django set up
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class RuleRunner:
+    """Runs rules in parallel with per-rule timeouts."""
+
+    def __init__(self, executor=None, workers=None, timeout=None):
+        self.executor = executor or getattr(settings, 'AUTOMATION_RULE_EXECUTOR', 'thread')
+        self.workers = workers or getattr(settings, 'AUTOMATION_RULE_WORKERS', 4)
+        self.timeout = timeout or getattr(settings, 'AUTOMATION_RULE_TIMEOUT_SECONDS', 60)
+        if self.executor not in EXECUTORS:
+            raise ValueError(f"Unknown rule executor: {self.executor}. Use one of {', '.join(EXECUTORS)}")
+
+    def run(self, rules):
+        """
+        Execute the rules and summarize the batch.
+
+        rules: AutomationRule instances (each is reloaded by its worker)
+
+        Returns:
+            dict: total_evaluated, total_triggered, total_errors,
+                total_timeouts, duration_ms, executor, workers,
+                count_queries, count_cache_hits and
+                rule_results (one dict per rule, slowest first)
+        """
+        started = time.monotonic()
+        rules = list(rules)
+        rule_codes = {rule.pk: rule.rule_code for rule in rules}
+        rule_ids = list(rule_codes)
+
+        count_cache = CountCache()
+        prefetch_counts(rules, count_cache)
+
+        if self.executor == 'serial' or len(rule_ids) <= 1:
+            results = [execute_rule(rule_id, isolated=False, count_cache=count_cache) for rule_id in rule_ids]
+        else:
+            results = self._run_pool(rule_ids, count_cache)
+        for result in results:
+            result['rule_code'] = result['rule_code'] or rule_codes.get(result['rule_id'])
+
+        summary = {
+            'total_evaluated': sum(r['status'] == 'ok' for r in results),
+            'total_triggered': sum(bool(r['triggered']) for r in results),
+            'total_errors': sum(r['status'] == 'error' for r in results),
+            'total_timeouts': sum(r['status'] == 'timeout' for r in results),
+            'duration_ms': int((time.monotonic() - started) * 1000),
+            'executor': self.executor,
+            'workers': self.workers,
+            'count_queries': count_cache.queries,
+            'count_cache_hits': count_cache.hits,
+            'rule_results': sorted(results, key=lambda r: r['duration_ms'], reverse=True),
+        }
+        for result in results:
+            if result['status'] != 'ok':
+                logger.warning(f"Automation rule {result['rule_code']} "
+                               f"{result['status']}: {result.get('error', '')}")
+        return summary
+
+    def _new_pool(self):
+        if self.executor == 'process':
+            # Forked workers must not share the parent's sockets
+            connections.close_all()
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='automation-rule')
+
+    def _run_pool(self, rule_ids, count_cache):
+        pools = [self._new_pool()]
+
+        def submit(rule_id):
+            return pools[-1].submit(execute_rule, rule_id, self.timeout, True, count_cache)
+
+        futures = {submit(rule_id): rule_id for rule_id in rule_ids}
+        # Each round of `workers` rules gets at most one timeout, so this
+        # only trips if the pool stops making progress altogether
+        rounds = math.ceil(len(rule_ids) / self.workers)
+        deadline = time.monotonic() + self.timeout * (rounds + 1)
+        running_since = {}
+        results = []
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(self._result(future, futures[future], running_since))
+
+                now = time.monotonic()
+                if now > deadline:
+                    for future in pending:
+                        since = running_since.get(future, now)
+                        results.append(self._timeout(futures[future], 'Batch deadline passed', now - since))
+                    break
+
+                stuck = False
+                for future in list(pending):
+                    if not future.running():
+                        continue
+                    since = running_since.setdefault(future, now)
+                    if now - since > self.timeout:
+                        pending.discard(future)
+                        results.append(self._timeout(
+                            futures[future], f"Still running after {self.timeout}s", now - since,
+                        ))
+                        stuck = True
+
+                # The timed-out rules keep their workers; run the queued rules elsewhere
+                queued = [future for future in pending if future.cancel()] if stuck else []
+                if queued:
+                    pools[-1].shutdown(wait=False)
+                    pools.append(self._new_pool())
+                    for future in queued:
+                        pending.discard(future)
+                        replacement = submit(futures[future])
+                        futures[replacement] = futures[future]
+                        pending.add(replacement)
+        finally:
+            # Do not wait for rules that timed out
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    @staticmethod
+    def _timeout(rule_id, error, elapsed):
+        return {
+            'rule_id': rule_id, 'rule_code': None, 'status': 'timeout', 'triggered': False,
+            'comment': '', 'error': error, 'duration_ms': int(elapsed * 1000),
+        }
+
+    @staticmethod
+    def _result(future, rule_id, running_since):
+        try:
+            return future.result()
+        except Exception as e:
+            # e.g. a process worker died
+            return {
+                'rule_id': rule_id, 'rule_code': None, 'status': 'error', 'triggered': False,
+                'comment': '', 'error': str(e),
+                'duration_ms': int((time.monotonic() - running_since.get(future, time.monotonic())) * 1000),
+            }
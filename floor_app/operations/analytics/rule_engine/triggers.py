@@ -0,0 +1,431 @@
+"""
+Event-driven rule triggering.
+
+Rules with trigger_mode='EVENT' run when the data they read changes,
+instead of on a schedule that rescans every target:
+
+1. RuleDependencyIndex maps (model, field) to the EVENT rules whose
+   conditions read that field. It is built from the compiled condition
+   trees and refreshed when a rule is saved or deleted (in this process)
+   and every AUTOMATION_RULE_INDEX_TTL seconds (for rules changed by other
+   processes).
+2. post_save / post_delete receivers are connected only to indexed models.
+   A save queues the affected rules for the changed object alone; fields
+   changed are taken from update_fields, or from a snapshot of the
+   watched fields taken when the instance was loaded.
+3. RuleTriggerQueue collects triggers for AUTOMATION_RULE_DEBOUNCE_SECONDS
+   and coalesces them: each rule runs once per window, for the distinct
+   objects that changed, or once over all its targets when more than
+   AUTOMATION_RULE_MAX_OBJECTS changed or when the condition depends on
+   a count rather than on the object.
+
+Triggers are queued on transaction commit, so rolled-back changes do not
+fire rules. Saves made by rule actions (e.g. UPDATE_FIELD) do not trigger
+rules again.
+
+The index is built on the first request of a process; other processes
+(workers, shells) call ensure_index().
+
+Dependencies followed:
+- threshold / age / field_comparison: the first field of each path on the
+  target model (changes to related rows are not followed)
+- custom: every obj.<field> in the expression
+- queryset_count: any create/delete of the counted model, and updates of
+  its filter fields; these run the whole rule
+- fields that are not model fields (properties): any save of the model
+
+Settings:
+AUTOMATION_EVENT_RULES_ENABLED = True      # Connect the receivers at startup
+AUTOMATION_RULE_DEBOUNCE_SECONDS = 2.0     # Coalescing window per rule
+AUTOMATION_RULE_MAX_OBJECTS = 50           # Above this, run the whole rule once
+AUTOMATION_RULE_INDEX_TTL = 60             # Seconds between index refreshes
+"""
+
+import logging
+import re
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+from core.buffered_writer import BufferedWriter
+
+from .conditions import (
+    AgeCondition, CustomCondition, FieldComparisonCondition, QuerysetCountCondition,
+    ThresholdCondition, compile_rule, count_pass, prefetch_counts,
+)
+
+logger = logging.getLogger(__name__)
+
+# Any save of the model (a non-field attribute may read anything)
+ANY_FIELD = '*'
+
+# Rows added or removed (creates and deletes only)
+ROW_COUNT = '#'
+
+# Scopes: evaluate the changed object, or the whole rule
+OBJECT = 'object'
+RULE = 'rule'
+
+CUSTOM_FIELD_PATTERN = re.compile(r'\bobj\.([A-Za-z_][A-Za-z0-9_]*)')
+
+# Models whose saves never trigger rules (the rule engine's own records)
+EXCLUDED_MODELS = {'analytics.automationrule', 'analytics.automationruleexecution'}
+
+
+class RuleDependencyIndex:
+    """(model, field) -> {rule_id: scope} for active, approved EVENT rules."""
+
+    def __init__(self, rules=()):
+        self.models = {}
+        self.built_at = time.monotonic()
+        for rule in rules:
+            try:
+                self.add_rule(rule)
+            except Exception as e:
+                logger.error(f"Cannot index automation rule {rule.rule_code}: {e}")
+        self.attnames = {
+            model: [model._meta.get_field(name).attname for name in by_field if name not in (ANY_FIELD, ROW_COUNT)]
+            for model, by_field in self.models.items()
+        }
+
+    def add_rule(self, rule):
+        target = _get_model(rule.target_model) if rule.target_model else None
+
+        for node in compile_rule(rule).iter_nodes():
+            if isinstance(node, (ThresholdCondition, AgeCondition)):
+                paths = [node.field_name]
+            elif isinstance(node, FieldComparisonCondition):
+                paths = [node.field1_name, node.field2_name]
+            elif isinstance(node, CustomCondition):
+                paths = CUSTOM_FIELD_PATTERN.findall(node.expression)
+            elif isinstance(node, QuerysetCountCondition):
+                self._add(node.model, ROW_COUNT, rule.pk, RULE)
+                for lookup in node.filters:
+                    self._add(node.model, _field_name(node.model, lookup.split('__')[0]), rule.pk, RULE)
+                continue
+            else:
+                continue
+
+            if target is None:
+                continue
+            for path in paths:
+                self._add(target, _field_name(target, path.split('.')[0]), rule.pk, OBJECT)
+
+    def _add(self, model, field_name, rule_id, scope):
+        if model._meta.label_lower in EXCLUDED_MODELS:
+            return
+        rules = self.models.setdefault(model, {}).setdefault(field_name, {})
+        # A rule that needs a full run for any reason always gets one
+        if rules.get(rule_id) != RULE:
+            rules[rule_id] = scope
+
+    def watched_fields(self, model):
+        """Attnames to snapshot for change detection."""
+        return self.attnames.get(model, ())
+
+    def affected(self, model, changed_fields=None, deleted=False):
+        """
+        {rule_id: scope} for a change to an instance of `model`.
+
+        changed_fields: field names that changed, or None for a create
+            or an unknown change (every rule watching the model).
+        """
+        by_field = self.models.get(model)
+        if not by_field:
+            return {}
+
+        affected = {}
+        for field_name, rules in by_field.items():
+            if not deleted and not self._field_applies(field_name, changed_fields):
+                continue
+            for rule_id, scope in rules.items():
+                if deleted and scope == OBJECT:
+                    # The object is gone; only counts can change
+                    continue
+                if affected.get(rule_id) != RULE:
+                    affected[rule_id] = scope
+        return affected
+
+    @staticmethod
+    def _field_applies(field_name, changed_fields):
+        if changed_fields is None:
+            # A create, or a save whose changes are unknown
+            return True
+        if field_name == ROW_COUNT:
+            # An update leaves the row count as it was
+            return False
+        return field_name == ANY_FIELD or field_name in changed_fields
+
+
+def _get_model(model_path):
+    app_label, model_name = model_path.split('.')
+    return apps.get_model(app_label, model_name)
+
+
+def _field_name(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # A property or method: it may read anything on the instance
+        return ANY_FIELD
+    if not field.concrete:
+        # Reverse relations and generic foreign keys have no column to watch
+        return ANY_FIELD
+    return field.name
+
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+class RuleTrigger:
+    """A rule to run for one object (object_pk) or over all targets (None)."""
+
+    __slots__ = ('rule_id', 'object_pk')
+
+    def __init__(self, rule_id, object_pk=None):
+        self.rule_id = rule_id
+        self.object_pk = object_pk
+
+
+_executing = threading.local()
+
+
+class RuleTriggerQueue(BufferedWriter):
+    """Debounces and coalesces rule triggers, then runs the rules."""
+
+    thread_name = 'rule-triggers'
+
+    def __init__(self, debounce=None, max_objects=None, max_queue=10000, background=True):
+        super().__init__(
+            # Flushed by the timer only, so each flush is one debounce window
+            batch_size=max_queue,
+            flush_interval=debounce or getattr(settings, 'AUTOMATION_RULE_DEBOUNCE_SECONDS', 2.0),
+            max_queue=max_queue,
+            background=background,
+        )
+        self.max_objects = max_objects or getattr(settings, 'AUTOMATION_RULE_MAX_OBJECTS', 50)
+
+    def write_batch(self, batch):
+        from floor_app.operations.analytics.models import AutomationRule
+
+        pending = {}
+        for trigger in batch:
+            if trigger.object_pk is None:
+                pending[trigger.rule_id] = None
+            elif pending.get(trigger.rule_id, ()) is not None:
+                pending.setdefault(trigger.rule_id, set()).add(trigger.object_pk)
+
+        rules = AutomationRule.objects.in_bulk(list(pending))
+        rules = {
+            rule_id: rule for rule_id, rule in rules.items()
+            if rule.trigger_mode == 'EVENT' and rule.is_active and rule.is_approved
+        }
+        _executing.active = True
+        try:
+            # Rules of one flush share their queryset_count results
+            with count_pass() as count_cache:
+                prefetch_counts(rules.values(), count_cache)
+                for rule_id, object_pks in pending.items():
+                    rule = rules.get(rule_id)
+                    if rule is None:
+                        continue
+                    try:
+                        self._run(rule, object_pks)
+                    except Exception as e:
+                        logger.error(f"Event-triggered rule {rule.rule_code} failed: {e}")
+        finally:
+            _executing.active = False
+        return len(batch)
+
+    def _run(self, rule, object_pks):
+        context = {'trigger': 'event'}
+        if object_pks is None or len(object_pks) > self.max_objects or not rule.target_model:
+            # One set-based run instead of a storm of single-object runs
+            rule.execute(context=context)
+            return
+        for obj in _get_model(rule.target_model).objects.filter(pk__in=object_pks):
+            rule.execute(target_object=obj, context=context)
+
+
+# ============================================================================
+# INDEX LIFECYCLE AND RECEIVERS
+# ============================================================================
+
+_index = None
+_queue = None
+_lock = threading.Lock()
+
+SNAPSHOT_ATTR = '_rule_trigger_snapshot'
+
+# Rule fields the index depends on; saves of other fields (run statistics)
+# do not rebuild it
+INDEXED_RULE_FIELDS = {
+    'condition_definition', 'target_model', 'trigger_mode', 'is_active', 'is_approved', 'is_deleted',
+}
+
+
+def is_enabled():
+    return getattr(settings, 'AUTOMATION_EVENT_RULES_ENABLED', True)
+
+
+def get_queue():
+    """Process-wide trigger queue."""
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                _queue = RuleTriggerQueue()
+    return _queue
+
+
+def get_index():
+    return _index
+
+
+def build_index():
+    """(Re)build the dependency index and connect receivers to its models."""
+    from floor_app.operations.analytics.models import AutomationRule
+
+    global _index
+    rules = AutomationRule.objects.filter(is_active=True, is_approved=True, trigger_mode='EVENT')
+    index = RuleDependencyIndex(rules)
+
+    with _lock:
+        previous = _index.models if _index else {}
+        _index = index
+    for model in previous:
+        if model not in index.models:
+            _disconnect(model)
+    for model in index.models:
+        _connect(model)
+    return index
+
+
+def ensure_index():
+    """Build the index if missing or older than AUTOMATION_RULE_INDEX_TTL."""
+    ttl = getattr(settings, 'AUTOMATION_RULE_INDEX_TTL', 60)
+    if _index is None or time.monotonic() - _index.built_at > ttl:
+        rebuild_index()
+
+
+def rebuild_index():
+    global _index
+    try:
+        build_index()
+    except Exception as e:
+        # e.g. before migrations ran; retried after the TTL
+        logger.error(f"Cannot build automation rule index: {e}")
+        with _lock:
+            if _index is None:
+                _index = RuleDependencyIndex()
+
+
+def invalidate_index(sender, update_fields=None, **kwargs):
+    """Rebuild after the current transaction when a rule definition changed."""
+    if update_fields and not INDEXED_RULE_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(rebuild_index)
+
+
+def disconnect_all():
+    """Disconnect every model receiver and drop the index."""
+    global _index
+    with _lock:
+        models = list(_index.models) if _index else []
+        _index = None
+    for model in models:
+        _disconnect(model)
+
+
+def _uid(signal_name, model):
+    return f'rule_trigger_{signal_name}_{model._meta.label_lower}'
+
+
+def _connect(model):
+    post_init.connect(snapshot_instance, sender=model, weak=False, dispatch_uid=_uid('init', model))
+    post_save.connect(model_saved, sender=model, weak=False, dispatch_uid=_uid('save', model))
+    post_delete.connect(model_deleted, sender=model, weak=False, dispatch_uid=_uid('delete', model))
+
+
+def _disconnect(model):
+    post_init.disconnect(sender=model, dispatch_uid=_uid('init', model))
+    post_save.disconnect(sender=model, dispatch_uid=_uid('save', model))
+    post_delete.disconnect(sender=model, dispatch_uid=_uid('delete', model))
+
+
+def snapshot_instance(sender, instance, **kwargs):
+    """Remember watched field values as loaded, to detect changes on save."""
+    index = _index
+    if index is None:
+        return
+    # Deferred fields are not in __dict__ and are not snapshotted
+    values = instance.__dict__
+    instance.__dict__[SNAPSHOT_ATTR] = {
+        attname: values[attname] for attname in index.watched_fields(sender) if attname in values
+    }
+
+
+def _changed_fields(index, sender, instance, update_fields):
+    if update_fields is not None:
+        return {_field_name(sender, name) for name in update_fields}
+    snapshot = instance.__dict__.get(SNAPSHOT_ATTR)
+    if snapshot is None:
+        return None
+    changed = set()
+    for attname in index.watched_fields(sender):
+        if attname not in snapshot or snapshot[attname] != instance.__dict__.get(attname):
+            changed.add(_field_name(sender, attname))
+    return changed
+
+
+def model_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    index = _index
+    if index is None or raw or getattr(_executing, 'active', False):
+        return
+    changed = None if created else _changed_fields(index, sender, instance, update_fields)
+    snapshot_instance(sender, instance)
+    _enqueue(index.affected(sender, changed), instance.pk)
+
+
+def model_deleted(sender, instance, **kwargs):
+    index = _index
+    if index is None or getattr(_executing, 'active', False):
+        return
+    _enqueue(index.affected(sender, deleted=True), None)
+
+
+def _enqueue(affected, object_pk):
+    if not affected:
+        return
+    triggers = [
+        RuleTrigger(rule_id, object_pk if scope == OBJECT else None)
+        for rule_id, scope in affected.items()
+    ]
+
+    def queue_triggers():
+        queue = get_queue()
+        for trigger in triggers:
+            queue.add(trigger)
+
+    transaction.on_commit(queue_triggers)
+
+
+def _on_request(**kwargs):
+    # Builds the index on the first request; then cheap until the TTL passes
+    ensure_index()
+
+
+def connect():
+    """Called from AppConfig.ready(): build the index on the first request."""
+    from floor_app.operations.analytics.models import AutomationRule
+
+    request_started.connect(_on_request, weak=False, dispatch_uid='rule_trigger_refresh')
+    post_save.connect(invalidate_index, sender=AutomationRule, weak=False, dispatch_uid='rule_trigger_rule_saved')
+    post_delete.connect(invalidate_index, sender=AutomationRule, weak=False, dispatch_uid='rule_trigger_rule_deleted')
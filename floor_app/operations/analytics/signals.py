@@ -23,25 +23,9 @@ from django.utils import timezone
 #         pass
 
 
-# Example: Trigger event-driven rules
-# @receiver(post_save, sender='inventory.Item')
-# def trigger_inventory_rules(sender, instance, created, **kwargs):
-#     """
-#     Example: When inventory changes, trigger relevant rules.
-#     """
-#     from floor_app.operations.analytics.models import AutomationRule
-#
-#     # Get rules that watch this model
-#     rules = AutomationRule.objects.filter(
-#         is_active=True,
-#         is_approved=True,
-#         trigger_mode='EVENT',
-#         target_model='inventory.Item'
-#     )
-#
-#     for rule in rules:
-#         # Execute rule for this specific object
-#         rule.execute(target_object=instance)
+# Event-driven rules (trigger_mode='EVENT') are run by
+# floor_app.operations.analytics.rule_engine.triggers, which connects
+# receivers only to the models and fields the active rules read.
 
 
 def connect_signals():
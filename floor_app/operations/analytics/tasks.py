@@ -64,25 +64,17 @@ def generate_event_summaries():
     """
     Generate event summaries for analytics.
 
-    Runs periodically (hourly/daily) to pre-aggregate data.
+    Runs periodically (hourly) to fold new events into the HOUR rows and
+    the DAY/WEEK/MONTH rows derived from them.
     """
     try:
-        from floor_app.operations.analytics.models import EventSummary
+        from floor_app.operations.analytics.rollups import rollup_events
 
-        now = timezone.now()
-
-        # Hourly summary
-        hour_start = now.replace(minute=0, second=0, microsecond=0)
-        hour_end = hour_start + timedelta(hours=1)
-        EventSummary.generate_summary('HOUR', hour_start, hour_end)
-
-        # Daily summary (if start of day)
-        if now.hour == 0:
-            day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            EventSummary.generate_summary('DAY', day_start, day_end)
-
-        logger.info("Event summaries generated successfully")
+        result = rollup_events()
+        logger.info(
+            f"Event summaries generated successfully: {result['events']} events "
+            f"in {result['batches']} batches (watermark {result['watermark']})"
+        )
 
     except Exception as e:
         logger.error(f"Error generating event summaries: {e}")
@@ -128,7 +120,8 @@ def run_automation_rules(rule_scope=None):
 
         logger.info(
             f"Automation rules executed: {results['total_evaluated']} evaluated, "
-            f"{results['total_triggered']} triggered, {results['total_errors']} errors"
+            f"{results['total_triggered']} triggered, {results['total_errors']} errors, "
+            f"{results['total_timeouts']} timed out in {results['duration_ms']} ms"
         )
 
         return results
@@ -187,13 +180,14 @@ def cleanup_old_events(days=90):
     Runs weekly to remove old event logs.
     """
     try:
-        from floor_app.operations.analytics.models import AppEvent
+        from core import retention
 
-        cutoff_date = timezone.now() - timedelta(days=days)
+        policy = retention.get_policy('analytics.AppEvent', days=days)
 
-        deleted_count, _ = AppEvent.objects.filter(
-            timestamp__lt=cutoff_date
-        ).delete()
+        # Bounded pk-range batches instead of one unbounded DELETE; archives
+        # the rows first when ANALYTICS_ARCHIVE_ENABLED
+        result = retention.purge(policy)
+        deleted_count = result['deleted']
 
         logger.info(f"Cleaned up {deleted_count} old events (older than {days} days)")
 
@@ -202,3 +196,22 @@ def cleanup_old_events(days=90):
     except Exception as e:
         logger.error(f"Error cleaning up old events: {e}")
         return {'error': str(e)}
+
+
+@shared_task
+def archive_old_events():
+    """
+    Copy aged AppEvent and PageView rows into the columnar archive.
+
+    Runs daily; see analytics.archive.
+    """
+    try:
+        from floor_app.operations.analytics import archive
+
+        results = archive.archive_all()
+
+        return {result['model']: result['rows'] for result in results}
+
+    except Exception as e:
+        logger.error(f"Error archiving events: {e}")
+        return {'error': str(e)}
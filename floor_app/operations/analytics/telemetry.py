@@ -0,0 +1,286 @@
+"""
+Request telemetry: one event record per request, handed to pluggable sinks.
+
+TelemetryMiddleware (analytics.middleware.telemetry) replaces the
+overlapping CurrentRequestMiddleware, AnalyticsMiddleware,
+EventTrackingMiddleware and QueryProfilingMiddleware. It:
+
+- stores the request once, in floor_app.middleware's thread-local;
+- times the request once;
+- describes the URL once: url/view name, module, event category and path
+  kind come from describe_route(), cached per URL pattern, so the keyword
+  scans of the old middlewares run once per route rather than per request;
+- builds one immutable RequestEvent and passes it to each sink.
+
+Sinks queue their rows on the analytics buffer (analytics.buffer), so the
+request itself does no analytics writes when buffering is on.
+
+Settings:
+ANALYTICS_TELEMETRY_SINKS = [                    # Dotted paths, in order
+    'floor_app.operations.analytics.telemetry.PageViewSink',
+    'floor_app.operations.analytics.telemetry.ErrorLogSink',
+    'floor_app.operations.analytics.telemetry.QueryProfileSink',
+    # 'floor_app.operations.analytics.telemetry.AppEventSink',
+]
+ANALYTICS_TELEMETRY_BUDGET_MS = 1.0    # Middleware + sink time per request
+ANALYTICS_TRACK_ANONYMOUS = False      # AppEventSink: track anonymous users
+ANALYTICS_EXCLUDED_PATHS = [...]       # AppEventSink: paths not tracked
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+
+from . import buffer as analytics_buffer
+from .utils import get_module_from_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SINKS = [
+    'floor_app.operations.analytics.telemetry.PageViewSink',
+    'floor_app.operations.analytics.telemetry.ErrorLogSink',
+    'floor_app.operations.analytics.telemetry.QueryProfileSink',
+]
+
+DEFAULT_EXCLUDED_PATHS = ['/admin/', '/static/', '/media/', '/__debug__/', '/favicon.ico']
+
+# Checked in order; the first keyword found in the URL decides the category
+CATEGORY_KEYWORDS = (
+    ('Inventory', ('inventory', 'cutter', 'stock')),
+    ('Production', ('production', 'job', 'jobcard')),
+    ('Planning', ('planning', 'schedule')),
+    ('Quality', ('quality', 'inspection')),
+    ('HR', ('hr', 'employee')),
+    ('Maintenance', ('maintenance',)),
+    ('Analytics', ('analytics', 'report')),
+)
+
+
+@dataclass(frozen=True)
+class RouteInfo:
+    """What a URL pattern says about the requests it serves."""
+
+    url_name: str
+    view_name: str
+    module: str
+    category: str
+    path_kind: str  # 'EXPORT', 'REPORT_VIEW', 'SEARCH' or ''
+
+
+@dataclass(frozen=True)
+class RequestEvent:
+    """Everything the sinks need to know about one finished request."""
+
+    timestamp: datetime
+    path: str
+    method: str
+    status_code: int
+    duration_ms: int
+    event_type: str
+    route: RouteInfo
+    user_id: Optional[int]
+    session_key: str
+    analytics_session_id: Optional[int]
+    query_string: str
+    query_params: tuple  # (key, value) pairs
+    referrer: str
+    client_ip: Optional[str]
+    user_agent: str
+    sql_profile: object = None  # core.query_profiler.RequestProfile when sampled
+    exception: Optional[tuple] = None  # (type name, message, traceback)
+
+
+def _category(text):
+    text = text.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return ''
+
+
+def _path_kind(text):
+    text = text.lower()
+    if 'export' in text:
+        return 'EXPORT'
+    if 'report' in text:
+        return 'REPORT_VIEW'
+    if 'search' in text:
+        return 'SEARCH'
+    return ''
+
+
+@lru_cache(maxsize=4096)
+def _describe(pattern, url_name, view_name, namespace):
+    # url_name without the namespace, as PageView.url_name always stored it
+    return RouteInfo(
+        url_name=url_name,
+        view_name=view_name,
+        module=get_module_from_url(url_name) or namespace,
+        category=_category(pattern),
+        path_kind=_path_kind(pattern),
+    )
+
+
+def describe_route(match, path):
+    """
+    RouteInfo for a request, cached per URL pattern.
+
+    Unresolved paths (404s) are described from the path itself; the
+    cache is bounded, so odd paths cannot grow it.
+    """
+    if match is None:
+        view_name = path.strip('/').replace('/', '_')[:200] or 'home'
+        return _describe(path, '', view_name, '')
+    return _describe(
+        match.route or path,
+        match.url_name or '',
+        match.view_name or '',
+        match.namespace or '',
+    )
+
+
+def get_event_type(method, route, query):
+    """Event type from the method, the path kind and the query string."""
+    if method == 'GET':
+        if route.path_kind == 'EXPORT' or query.get('export'):
+            return 'EXPORT'
+        if route.path_kind == 'REPORT_VIEW':
+            return 'REPORT_VIEW'
+        if route.path_kind == 'SEARCH' or query.get('q'):
+            return 'SEARCH'
+        return 'PAGE_VIEW'
+    if method == 'POST':
+        return 'ACTION'
+    if method in ('PUT', 'PATCH'):
+        return 'UPDATE'
+    if method == 'DELETE':
+        return 'DELETE'
+    return 'CUSTOM'
+
+
+def _save(row):
+    """Queue a model row on the analytics buffer, or save it right away."""
+    if analytics_buffer.is_enabled():
+        analytics_buffer.get_buffer().add(row)
+    else:
+        row.save()
+
+
+# ============================================================================
+# SINKS
+# ============================================================================
+
+class TelemetrySink:
+    """Receives every RequestEvent; must not raise or block on I/O."""
+
+    def handle(self, event):
+        raise NotImplementedError
+
+
+class PageViewSink(TelemetrySink):
+    """PageView for successful authenticated requests; session heartbeats."""
+
+    def handle(self, event):
+        if event.user_id is None or not event.analytics_session_id:
+            return
+        from .models import PageView, UserSession
+
+        if event.status_code < 400:
+            # A buffered page view also marks its session active
+            _save(PageView(
+                session_id=event.analytics_session_id,
+                user_id=event.user_id,
+                url=event.path[:500],
+                url_name=event.route.url_name[:100],
+                module=event.route.module[:50],
+                view_name=event.route.view_name[:100],
+                timestamp=event.timestamp,
+                referrer=event.referrer[:500],
+                load_time_ms=event.duration_ms,
+                query_params=dict(event.query_params),
+            ))
+            if analytics_buffer.is_enabled():
+                return
+
+        if analytics_buffer.is_enabled():
+            analytics_buffer.get_buffer().add(
+                analytics_buffer.Heartbeat(event.analytics_session_id, event.timestamp)
+            )
+        else:
+            UserSession.objects.filter(id=event.analytics_session_id).update(
+                last_activity=event.timestamp
+            )
+
+
+class AppEventSink(TelemetrySink):
+    """AppEvent row per request (what EventTrackingMiddleware logged)."""
+
+    def __init__(self):
+        self.track_anonymous = getattr(settings, 'ANALYTICS_TRACK_ANONYMOUS', False)
+        self.excluded_paths = tuple(getattr(settings, 'ANALYTICS_EXCLUDED_PATHS', DEFAULT_EXCLUDED_PATHS))
+
+    def handle(self, event):
+        if event.path.startswith(self.excluded_paths):
+            return
+        if event.user_id is None and not self.track_anonymous:
+            return
+        from .models import AppEvent
+
+        _save(AppEvent(
+            user_id=event.user_id,
+            event_type=event.event_type,
+            view_name=event.route.view_name or event.path.strip('/').replace('/', '_')[:200],
+            event_category=event.route.category,
+            http_path=event.path,
+            http_method=event.method,
+            query_string=event.query_string,
+            timestamp=event.timestamp,
+            duration_ms=event.duration_ms,
+            client_ip=event.client_ip,
+            user_agent=event.user_agent[:500],
+            session_key=event.session_key or '',
+        ))
+
+
+class ErrorLogSink(TelemetrySink):
+    """ErrorLog for requests whose view raised; written inline."""
+
+    def handle(self, event):
+        if event.exception is None:
+            return
+        from .models import ErrorLog
+
+        error_type, error_message, traceback_str = event.exception
+        ErrorLog.objects.create(
+            session_id=event.analytics_session_id or None,
+            user_id=event.user_id,
+            severity='error',
+            error_type=error_type[:100],
+            error_message=error_message,
+            url=event.path[:500],
+            module=event.route.module[:50],
+            view_name=event.route.view_name[:100],
+            traceback=traceback_str,
+            request_data={
+                'method': event.method,
+                'path': event.path,
+                'GET': dict(event.query_params),
+            },
+            user_agent=event.user_agent[:1000],
+            ip_address=event.client_ip,
+        )
+
+
+class QueryProfileSink(TelemetrySink):
+    """Per-view SQL statistics for sampled requests (core.query_profiler)."""
+
+    def handle(self, event):
+        if event.sql_profile is None:
+            return
+        from core import query_profiler
+
+        query_profiler.get_store().record(event.route.view_name or 'unresolved', event.sql_profile)
@@ -0,0 +1,13 @@
+"""
+Analytics module tests.
+
+Test suites:
+- test_buffer: Buffered page view / session heartbeat ingestion
+- test_telemetry: Single-pass telemetry middleware and sinks
+- test_rollups: Incremental, tiered event summaries
+- test_hll: HyperLogLog distinct-user sketches
+- test_rule_engine: Rule conditions compiled to SQL
+- test_rule_triggers: Event-driven rule triggering
+- test_rule_runner: Parallel scheduled rule execution
+- test_archive: Columnar archive of aged events
+"""
@@ -0,0 +1,94 @@
+"""
+Tests for the columnar event archive (analytics.archive).
+"""
+import shutil
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from core import retention
+
+from .. import archive
+from ..models import AppEvent
+
+UTC = dt_timezone.utc
+
+
+class EventArchiveTest(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        rows = [
+            # (user, view_name, category, duration_ms, timestamp)
+            (self.alice, 'inventory:item_list', 'Inventory', 120, datetime(2025, 1, 5, 9, tzinfo=UTC)),
+            (self.bob, 'inventory:item_list', 'Inventory', None, datetime(2025, 1, 5, 17, tzinfo=UTC)),
+            (None, 'hr:employee_list', 'HR', 40, datetime(2025, 1, 31, 23, 59, tzinfo=UTC)),
+            (self.alice, 'hr:employee_list', 'HR', 30, datetime(2025, 2, 1, 0, 0, tzinfo=UTC)),
+            (self.bob, 'inventory:item_detail', 'Inventory', 300, datetime(2025, 3, 10, 12, tzinfo=UTC)),
+        ]
+        for user, view_name, category, duration, timestamp in rows:
+            event = AppEvent.objects.create(user=user, event_type='PAGE_VIEW', view_name=view_name,
+                                            event_category=category, duration_ms=duration)
+            AppEvent.objects.filter(pk=event.pk).update(timestamp=timestamp)
+
+    def archive(self, before, **kwargs):
+        return archive.archive_events('analytics.AppEvent', before=before, root=self.root, **kwargs)
+
+    def test_queries_match_the_archived_rows(self):
+        result = self.archive(datetime(2025, 4, 1, tzinfo=UTC), batch_size=2)
+        self.assertEqual((result['rows'], result['months']), (5, 3))
+
+        events = archive.EventArchive('analytics.AppEvent', root=self.root)
+        self.assertEqual(events.archived_through, datetime(2025, 4, 1, tzinfo=UTC))
+        self.assertEqual(events.count(), 5)
+        self.assertEqual(events.count(datetime(2025, 1, 5, 12, tzinfo=UTC), datetime(2025, 2, 1, tzinfo=UTC)), 2)
+        self.assertEqual(events.count(category='Inventory', user=self.bob.pk), 2)
+        self.assertEqual(events.count(view='no:such_view'), 0)
+        self.assertEqual(events.group_by('view'), {
+            'inventory:item_list': 2, 'hr:employee_list': 2, 'inventory:item_detail': 1,
+        })
+        self.assertEqual(events.group_by('user', category='HR'), {None: 1, self.alice.pk: 1})
+        self.assertEqual(events.unique_users(end=datetime(2025, 2, 1, tzinfo=UTC)), 2)
+        self.assertEqual(events.trend(period='month'), {
+            date(2025, 1, 1): 3, date(2025, 2, 1): 1, date(2025, 3, 1): 1,
+        })
+        self.assertEqual(events.trend(period='day', category='Inventory'), {
+            date(2025, 1, 5): 2, date(2025, 3, 10): 1,
+        })
+
+    def test_runs_resume_without_duplicates(self):
+        self.assertEqual(self.archive(datetime(2025, 1, 10, tzinfo=UTC))['rows'], 2)
+        self.assertEqual(self.archive(datetime(2025, 1, 10, tzinfo=UTC))['rows'], 0)
+        self.assertEqual(self.archive(datetime(2025, 4, 1, tzinfo=UTC))['rows'], 3)
+
+        events = archive.EventArchive('analytics.AppEvent', root=self.root)
+        self.assertEqual(events.count(), 5)
+        self.assertEqual(events.count(end=datetime(2025, 2, 1, tzinfo=UTC)), 3)
+
+    def test_rows_appended_by_a_failed_run_are_discarded(self):
+        self.archive(datetime(2025, 1, 10, tzinfo=UTC))
+        partition = archive.MonthPartition(f'{self.root}/analytics.appevent/2025-01')
+
+        def failing_batches():
+            yield [(1736500000, None, 'x', 'y', None)]
+            raise RuntimeError('connection lost')
+
+        with self.assertRaises(RuntimeError):
+            partition.append(failing_batches(), 1736600000)
+
+        self.assertEqual(self.archive(datetime(2025, 4, 1, tzinfo=UTC))['rows'], 3)
+        events = archive.EventArchive('analytics.AppEvent', root=self.root)
+        self.assertEqual(events.count(), 5)
+        self.assertNotIn('x', events.group_by('view'))
+
+    def test_purge_archives_first(self):
+        with override_settings(ANALYTICS_ARCHIVE_ENABLED=True, ANALYTICS_ARCHIVE_ROOT=self.root):
+            result = retention.purge(retention.get_policy('analytics.AppEvent', days=90), sleep=0)
+
+        self.assertEqual(result['deleted'], 5)
+        self.assertFalse(AppEvent.objects.exists())
+        self.assertEqual(archive.EventArchive('analytics.AppEvent', root=self.root).count(), 5)
@@ -0,0 +1,101 @@
+"""
+Tests for buffered page view and session heartbeat ingestion.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, RequestFactory, override_settings
+from django.utils import timezone
+
+from .. import buffer as analytics_buffer
+from ..buffer import Heartbeat, TelemetryBuffer
+from ..middleware import AnalyticsMiddleware
+from ..models import PageView, UserSession
+
+
+class TelemetryBufferTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='viewer', password='testpass123')
+        self.session = UserSession.objects.create(user=self.user, session_key='abc')
+        self.other = UserSession.objects.create(user=self.user, session_key='def')
+
+    def make_page_view(self, session, when):
+        return PageView(session=session, user=self.user, url='/inventory/', timestamp=when)
+
+    def test_flush_bulk_inserts_and_coalesces_heartbeats(self):
+        buffer = TelemetryBuffer(background=False)
+        start = timezone.now() - timedelta(minutes=10)
+        buffer.add(self.make_page_view(self.session, start))
+        buffer.add(self.make_page_view(self.session, start + timedelta(minutes=2)))
+        buffer.add(Heartbeat(self.session.pk, start + timedelta(minutes=1)))
+        buffer.add(Heartbeat(self.other.pk, start + timedelta(minutes=3)))
+
+        self.assertEqual(PageView.objects.count(), 0)
+        # One INSERT for the page views, one UPDATE for both sessions
+        with self.assertNumQueries(2):
+            buffer.flush()
+
+        self.assertEqual(PageView.objects.count(), 2)
+        self.session.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.session.last_activity, start + timedelta(minutes=2))
+        self.assertEqual(self.other.last_activity, start + timedelta(minutes=3))
+        self.assertEqual(buffer.get_metrics()['written'], 4)
+
+    def test_page_view_keeps_request_time(self):
+        buffer = TelemetryBuffer(background=False)
+        when = timezone.now() - timedelta(hours=1)
+        buffer.add(self.make_page_view(self.session, when))
+        buffer.flush()
+        self.assertEqual(PageView.objects.get().timestamp, when)
+
+    def test_full_queue_writes_inline(self):
+        buffer = TelemetryBuffer(max_queue=1, background=False)
+        buffer.add(self.make_page_view(self.session, timezone.now()))
+        buffer.add(self.make_page_view(self.session, timezone.now()))
+
+        self.assertEqual(PageView.objects.count(), 1)
+        self.assertEqual(buffer.get_metrics()['overflow_writes'], 1)
+
+
+@override_settings(ANALYTICS_BUFFERED=True)
+class BufferedAnalyticsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username='browser', password='testpass123')
+        self.session = UserSession.objects.create(user=self.user, session_key='xyz')
+        self.original_buffer = analytics_buffer._buffer
+        analytics_buffer._buffer = TelemetryBuffer(background=False)
+
+    def tearDown(self):
+        analytics_buffer._buffer = self.original_buffer
+
+    def make_request(self, session_id):
+        request = self.factory.get('/inventory/')
+        request.user = self.user
+        request.session = {'analytics_session_id': session_id}
+        return request
+
+    def test_request_only_queues(self):
+        class Response:
+            status_code = 200
+
+        middleware = AnalyticsMiddleware(lambda request: Response())
+        with self.assertNumQueries(0):
+            middleware(self.make_request(self.session.pk))
+
+        metrics = analytics_buffer.get_buffer().get_metrics()
+        self.assertEqual(metrics['queue_depth'], 1)
+        analytics_buffer.get_buffer().flush()
+        self.assertEqual(PageView.objects.get().session, self.session)
+
+    def test_error_response_sends_heartbeat(self):
+        class Response:
+            status_code = 404
+
+        middleware = AnalyticsMiddleware(lambda request: Response())
+        middleware(self.make_request(self.session.pk))
+        analytics_buffer.get_buffer().flush()
+
+        self.assertEqual(PageView.objects.count(), 0)
+        self.assertEqual(analytics_buffer.get_buffer().get_metrics()['written'], 1)
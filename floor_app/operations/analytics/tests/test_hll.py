@@ -0,0 +1,47 @@
+"""
+Tests for HyperLogLog distinct-count sketches.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from ..hll import HyperLogLog, merge_all
+
+
+class HyperLogLogTest(SimpleTestCase):
+    def assertClose(self, estimate, actual, tolerance):
+        self.assertLessEqual(abs(estimate - actual), actual * tolerance, f"{estimate} vs {actual}")
+
+    def test_small_counts_are_exact(self):
+        sketch = HyperLogLog.from_values([1, 2, 3, 2, 1], precision=11)
+        self.assertEqual(sketch.count(), 3)
+        self.assertEqual(HyperLogLog(11).count(), 0)
+
+    def test_large_count_within_error(self):
+        sketch = HyperLogLog.from_values(range(50000), precision=11)
+        # Standard error is ~2.3%; allow three of them
+        self.assertClose(sketch.count(), 50000, 0.07)
+
+    def test_merge_is_union(self):
+        left = HyperLogLog.from_values(range(0, 6000), precision=12)
+        right = HyperLogLog.from_values(range(4000, 10000), precision=12)
+        merged = left | right
+        self.assertClose(merged.count(), 10000, 0.05)
+        self.assertEqual(merged.registers, HyperLogLog.from_values(range(10000), precision=12).registers)
+
+    def test_merge_folds_to_lower_precision(self):
+        fine = HyperLogLog.from_values(range(3000), precision=14)
+        coarse = HyperLogLog.from_values(range(3000), precision=10)
+        self.assertEqual(fine.reduce(10).registers, coarse.registers)
+        self.assertEqual((fine | coarse).precision, 10)
+
+    def test_serialization_round_trip_is_compact(self):
+        sketch = HyperLogLog.from_values(['alice', 'bob'], precision=11)
+        data = sketch.to_bytes()
+        self.assertLess(len(data), 100)
+        self.assertEqual(HyperLogLog.from_bytes(memoryview(data)).registers, sketch.registers)
+
+    @override_settings(ANALYTICS_HLL_PRECISION=9)
+    def test_merge_all_skips_empty_and_uses_setting(self):
+        data = [HyperLogLog.from_values([1, 2]).to_bytes(), b'', HyperLogLog.from_values([2, 3])]
+        merged = merge_all(data)
+        self.assertEqual((merged.precision, merged.count()), (9, 3))
+        self.assertEqual(merge_all([]).count(), 0)
@@ -0,0 +1,126 @@
+"""
+Tests for incremental, tiered EventSummary rollups.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import rollups
+from ..models import AppEvent, EventSummary, RollupWatermark
+
+UTC = dt_timezone.utc
+
+
+class RollupTest(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='testpass123')
+        self.bob = User.objects.create_user(username='bob', password='testpass123')
+        # Monday 2026-03-02
+        self.base = datetime(2026, 3, 2, 10, 0, tzinfo=UTC)
+
+    def event(self, user, minutes, view='inventory:item_list', category='Inventory', duration=100):
+        return AppEvent.objects.create(
+            user=user, event_type='PAGE_VIEW', view_name=view, event_category=category,
+            timestamp=self.base + timedelta(minutes=minutes), duration_ms=duration,
+        )
+
+    def summary(self, period_type, start, view_name='', event_category=''):
+        return EventSummary.objects.get(
+            period_type=period_type, period_start=start,
+            view_name=view_name, event_category=event_category, event_type='', user=None,
+        )
+
+    def test_hour_rows_and_derived_tiers(self):
+        self.event(self.alice, 5, duration=100)
+        self.event(self.bob, 10, duration=300)
+        self.event(self.alice, 70, view='hr:employee_list', category='HR', duration=None)
+
+        result = rollups.rollup_events()
+        self.assertEqual(result['events'], 3)
+
+        hour = self.summary('HOUR', self.base)
+        self.assertEqual(hour.event_count, 2)
+        self.assertEqual(hour.unique_users, 2)
+        self.assertEqual(hour.avg_duration_ms, 200)
+        self.assertEqual(self.summary('HOUR', self.base + timedelta(hours=1), event_category='HR').event_count, 1)
+
+        day = self.summary('DAY', datetime(2026, 3, 2, tzinfo=UTC))
+        self.assertEqual(day.event_count, 3)
+        self.assertEqual(day.unique_users, 2)
+        self.assertEqual(day.avg_duration_ms, 200)
+        self.assertEqual(self.summary('WEEK', datetime(2026, 3, 2, tzinfo=UTC)).event_count, 3)
+        month = self.summary('MONTH', datetime(2026, 3, 1, tzinfo=UTC), view_name='inventory:item_list')
+        self.assertEqual(month.event_count, 2)
+        self.assertEqual(month.period_end, datetime(2026, 4, 1, tzinfo=UTC))
+
+    def test_only_new_events_are_aggregated(self):
+        self.event(self.alice, 5)
+        rollups.rollup_events()
+        self.event(self.bob, 15, duration=300)
+        last = self.event(self.bob, 60 * 24 + 5)
+
+        result = rollups.rollup_events(batch_size=1)
+        self.assertEqual(result['events'], 2)
+        self.assertEqual(result['batches'], 2)
+        self.assertEqual(RollupWatermark.objects.get().last_id, last.pk)
+
+        hour = self.summary('HOUR', self.base)
+        self.assertEqual(hour.event_count, 2)
+        self.assertEqual(hour.avg_duration_ms, 200)
+        self.assertEqual(self.summary('WEEK', datetime(2026, 3, 2, tzinfo=UTC)).event_count, 3)
+
+        self.assertEqual(rollups.rollup_events()['events'], 0)
+
+    def test_recent_events_are_held_back(self):
+        settled = self.event(self.alice, 5)
+        # Ids of transactions that have not committed yet may sit below it
+        AppEvent.objects.create(user=self.bob, event_type='PAGE_VIEW', timestamp=timezone.now())
+
+        self.assertEqual(rollups.rollup_events()['events'], 1)
+        self.assertEqual(RollupWatermark.objects.get().last_id, settled.pk)
+
+        with override_settings(ROLLUP_SAFETY_LAG_SECONDS=0):
+            self.assertEqual(rollups.rollup_events()['events'], 1)
+
+    def test_rebuild_matches_incremental(self):
+        self.event(self.alice, 5)
+        self.event(self.bob, 70, duration=500)
+        rollups.rollup_events()
+        before = sorted(EventSummary.objects.values_list(
+            'period_type', 'period_start', 'view_name', 'event_category', 'event_count', 'unique_users'))
+
+        rollups.rebuild(self.base, self.base + timedelta(hours=3))
+        after = sorted(EventSummary.objects.values_list(
+            'period_type', 'period_start', 'view_name', 'event_category', 'event_count', 'unique_users'))
+        self.assertEqual(before, after)
+
+    def test_generate_summary_window(self):
+        self.event(self.alice, 5)
+        self.event(self.bob, 20, view='', category='')
+        start, end = self.base, self.base + timedelta(hours=1)
+
+        EventSummary.generate_summary('HOUR', start, end)
+        overall = self.summary('HOUR', start)
+        self.assertEqual((overall.event_count, overall.unique_users), (2, 2))
+        self.assertEqual(self.summary('HOUR', start, view_name='inventory:item_list').event_count, 1)
+        # Events without a view only count towards the overall row
+        self.assertEqual(EventSummary.objects.count(), 3)
+
+    def test_unique_users_between_merges_sketches(self):
+        self.event(self.alice, 5)
+        self.event(self.bob, 60 * 24 + 5)                  # next day
+        self.event(self.alice, 60 * 48 + 5)                # day after
+        self.event(self.bob, 60 * 48 + 65, view='hr:employee_list', category='HR')
+        rollups.rollup_events()
+
+        whole_days = datetime(2026, 3, 2, tzinfo=UTC), datetime(2026, 3, 5, tzinfo=UTC)
+        self.assertEqual(EventSummary.unique_users_between(*whole_days), 2)
+        # Partial days at both edges come from HOUR rows
+        self.assertEqual(rollups.unique_users_between(self.base, self.base + timedelta(days=2, minutes=10)), 2)
+        self.assertEqual(rollups.unique_users_between(*whole_days, event_category='HR'), 1)
+
+        with self.assertNumQueries(1):
+            rollups.unique_users_between(self.base, self.base + timedelta(days=30))
+        self.assertEqual(self.summary('WEEK', datetime(2026, 3, 2, tzinfo=UTC)).unique_users, 2)
@@ -0,0 +1,252 @@
+"""
+Tests for set-based rule evaluation (rule_engine.compiler / evaluator).
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import AppEvent, AutomationRule
+from ..rule_engine.compiler import compile_condition
+from ..rule_engine.conditions import (
+    ConditionParser, ConditionTree, CountCache, clear_rule_cache, compile_rule, count_pass, field_accessor, prefetch_counts,
+)
+from ..rule_engine.evaluator import RuleEvaluator
+
+
+class ConditionCompilerTest(TestCase):
+    """Compiled filters must select exactly what ConditionParser accepts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        alice = User.objects.create_user(username='alice', password='testpass123')
+        now = timezone.now()
+        rows = [
+            # (user, view_name, duration_ms, object_id, hours ago)
+            (alice, 'inventory:item_list', 50, 50, 1),
+            (alice, 'inventory:item_detail', 500, 20, 30),
+            (None, 'hr:employee_list', None, None, 2),
+            (None, 'hr:employee_detail', 1500, 1500, 100),
+            (alice, 'quality:ncr_list', None, 7, 0.5),
+        ]
+        for user, view_name, duration, object_id, hours in rows:
+            AppEvent.objects.create(
+                user=user, event_type='PAGE_VIEW', view_name=view_name, duration_ms=duration,
+                object_id=object_id, timestamp=now - timedelta(hours=hours),
+            )
+
+    def assertSameMatches(self, condition_def, exact=True):
+        compiled = compile_condition(AppEvent, condition_def)
+        if exact:
+            self.assertTrue(compiled.is_exact, f"{condition_def} did not compile")
+        in_sql = {
+            event.pk for event in AppEvent.objects.filter(compiled.q)
+            if compiled.is_exact or ConditionParser(compiled.residual).evaluate(event)['result']
+        }
+        in_python = {
+            event.pk for event in AppEvent.objects.all()
+            if ConditionParser(condition_def).evaluate(event)['result']
+        }
+        self.assertEqual(in_sql, in_python, condition_def)
+
+    def test_threshold(self):
+        for operator, value in [('<', 100), ('>=', 500), ('==', None), ('!=', None), ('!=', 500),
+                                ('in', [50, None]), ('not_in', [50, 500])]:
+            self.assertSameMatches({'type': 'threshold', 'field': 'duration_ms', 'operator': operator, 'value': value})
+        self.assertSameMatches({'type': 'threshold', 'field': 'user.username', 'operator': '==', 'value': 'alice'})
+        self.assertSameMatches({'type': 'threshold', 'field': 'user.username', 'operator': '!=', 'value': 'alice'})
+
+    def test_text_operators_match_case(self):
+        AppEvent.objects.create(event_type='PAGE_VIEW', view_name='HR:Employee_List')
+        like_is_exact = connection.vendor == 'postgresql'
+        for operator, value in [('startswith', 'hr:'), ('endswith', '_list'), ('contains', 'employee')]:
+            condition_def = {'type': 'threshold', 'field': 'view_name', 'operator': operator, 'value': value}
+            self.assertEqual(compile_condition(AppEvent, condition_def).is_exact, like_is_exact)
+            self.assertSameMatches(condition_def, exact=False)
+
+        # str(None) starts with 'No' in Python; a NULL column never matches LIKE
+        nullable = {'type': 'threshold', 'field': 'user.username', 'operator': 'startswith', 'value': 'No'}
+        self.assertFalse(compile_condition(AppEvent, nullable).is_exact)
+        self.assertSameMatches(nullable, exact=False)
+
+    def test_age(self):
+        for operator in ('>', '<='):
+            self.assertSameMatches({'type': 'age', 'field': 'timestamp', 'operator': operator, 'value': 1, 'unit': 'days'})
+
+    def test_field_comparison(self):
+        for operator in ('==', '!=', '<', '>='):
+            self.assertSameMatches({'type': 'field_comparison', 'field1': 'duration_ms',
+                                    'operator': operator, 'field2': 'object_id'})
+
+    def test_compound(self):
+        self.assertSameMatches({'type': 'compound', 'operator': 'OR', 'conditions': [
+            {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 1000},
+            {'type': 'compound', 'operator': 'AND', 'conditions': [
+                {'type': 'threshold', 'field': 'user_id', 'operator': '!=', 'value': None},
+                {'type': 'age', 'field': 'timestamp', 'operator': '<', 'value': 2, 'unit': 'hours'},
+            ]},
+        ]})
+
+    def test_uncompilable_parts_are_residual(self):
+        custom = {'type': 'custom', 'expression': 'obj.duration_ms > 100'}
+        self.assertEqual(compile_condition(AppEvent, custom).residual, custom)
+        # A property path and a related object are read in Python
+        for field in ('related_object', 'user'):
+            self.assertFalse(compile_condition(AppEvent, {'type': 'threshold', 'field': field, 'value': 1}).is_exact)
+
+        compiled = compile_condition(AppEvent, {'type': 'compound', 'operator': 'AND', 'conditions': [
+            {'type': 'threshold', 'field': 'view_name', 'operator': 'in',
+             'value': ['inventory:item_list', 'inventory:item_detail']},
+            custom,
+        ]})
+        self.assertEqual(compiled.residual, custom)
+        self.assertEqual(AppEvent.objects.filter(compiled.q).count(), 2)
+
+
+class SetBasedEvaluatorTest(TestCase):
+    def rule(self, condition_def):
+        return AutomationRule(target_model='analytics.AppEvent', condition_definition=condition_def)
+
+    def test_all_targets_are_evaluated(self):
+        AppEvent.objects.bulk_create([
+            AppEvent(event_type='PAGE_VIEW', view_name='inventory:item_list', duration_ms=i)
+            for i in range(1200)
+        ])
+        rule = self.rule({'type': 'threshold', 'field': 'duration_ms', 'operator': '>=', 'value': 1100})
+
+        with self.assertNumQueries(2):
+            result = RuleEvaluator(rule).evaluate()
+        self.assertTrue(result['triggered'])
+        self.assertEqual(result['context']['triggered_count'], 100)
+        self.assertEqual(result['context']['total_evaluated'], 1200)
+        self.assertEqual(len(result['context']['triggered_objects']), 10)
+
+        python = RuleEvaluator(rule, use_sql=False).evaluate()
+        self.assertEqual(python['context'], result['context'])
+
+    def test_residual_runs_over_prefiltered_rows(self):
+        AppEvent.objects.bulk_create([
+            AppEvent(event_type='PAGE_VIEW', view_name=view_name, duration_ms=duration)
+            for view_name, duration in [('hr:a', 10), ('hr:b', 300), ('inventory:c', 300)]
+        ])
+        rule = self.rule({'type': 'compound', 'operator': 'AND', 'conditions': [
+            {'type': 'threshold', 'field': 'view_name', 'operator': 'startswith', 'value': 'hr:'},
+            {'type': 'custom', 'expression': 'obj.duration_ms > 100'},
+        ]})
+        result = RuleEvaluator(rule).evaluate()
+        self.assertEqual(result['comment'], 'Triggered for 1 of 3 objects')
+        self.assertEqual(result['context']['triggered_count'],
+                         RuleEvaluator(rule, use_sql=False).evaluate()['context']['triggered_count'])
+        self.assertEqual(result['context']['triggered_objects'][0]['context']['operator'], 'AND')
+
+    def test_single_target_and_empty_table(self):
+        rule = self.rule({'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 5})
+        self.assertFalse(RuleEvaluator(rule).evaluate()['triggered'])
+
+        event = AppEvent.objects.create(event_type='PAGE_VIEW', view_name='x', duration_ms=10)
+        result = RuleEvaluator(rule).evaluate(target_object=event)
+        self.assertEqual(result['comment'], 'Triggered for 1 of 1 objects')
+
+
+class ConditionTreeTest(TestCase):
+    def test_test_agrees_with_evaluate(self):
+        event = AppEvent(view_name='hr:list', duration_ms=None, metadata={'items': 3}, timestamp=timezone.now())
+        definitions = [
+            {'type': 'threshold', 'field': 'metadata.items', 'operator': '>=', 'value': 3},
+            {'type': 'threshold', 'field': 'duration_ms', 'operator': '<', 'value': 3},     # None < 3 errors
+            {'type': 'threshold', 'field': 'view_name', 'operator': '~', 'value': 'hr'},     # bad operator
+            {'type': 'age', 'field': 'user.date_joined', 'operator': '>', 'value': 1, 'unit': 'eons'},
+            {'type': 'age', 'field': 'timestamp', 'operator': '<', 'value': 1, 'unit': 'hours'},
+            {'type': 'custom', 'expression': 'obj.view_name == "hr:list"'},
+            {'type': 'mystery'},
+            {'type': 'compound', 'operator': 'OR', 'conditions': [
+                {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 1},
+                {'type': 'threshold', 'field': 'view_name', 'operator': 'startswith', 'value': 'hr'},
+            ]},
+        ]
+        expected = [True, False, False, False, True, True, False, True]
+        for condition_def, result in zip(definitions, expected):
+            tree = ConditionTree(condition_def)
+            self.assertEqual(tree.evaluate(event)['result'], result, condition_def)
+            self.assertEqual(tree.test(event), result, condition_def)
+
+        self.assertEqual(ConditionParser(definitions[2]).evaluate(event)['context'], {'error': 'Invalid operator: ~'})
+        null_age = ConditionParser(definitions[3]).evaluate(event)
+        self.assertEqual(null_age['comment'], 'user.date_joined is null, cannot evaluate age')
+
+    def test_field_accessor(self):
+        event = AppEvent(view_name='x', metadata={'a': {'b': 2}})
+        self.assertEqual(field_accessor('metadata.a.b')(event), 2)
+        self.assertIsNone(field_accessor('user.username')(event))
+        self.assertIsNone(field_accessor('no_such_field')(event))
+        self.assertEqual(field_accessor('a')({'a': 1}), 1)
+
+    def test_rule_tree_cached_until_definition_changes(self):
+        clear_rule_cache()
+        rule = AutomationRule.objects.create(
+            name='Slow page', description='Slow page views', rule_code='SLOW_PAGE', rule_scope='GENERIC',
+            condition_definition={'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 1000},
+        )
+        tree = compile_rule(rule)
+        # Run statistics bump updated_at; the definition is unchanged
+        rule.total_executions += 1
+        rule.save()
+        self.assertIs(compile_rule(rule), tree)
+
+        rule.condition_definition = {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 5}
+        rule.save()
+        self.assertIsNot(compile_rule(rule), tree)
+        self.assertTrue(compile_rule(rule).test(AppEvent(duration_ms=10)))
+
+
+
+class CountCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username='alice', password='testpass123', is_staff=True)
+        User.objects.create_user(username='bob', password='testpass123')
+        cls.staff = {'type': 'queryset_count', 'model': 'auth.User', 'filters': {'is_staff': True}, 'operator': '>', 'value': 0}
+        cls.users = {'type': 'queryset_count', 'model': 'auth.User', 'filters': {}, 'operator': '>', 'value': 1}
+
+    def test_identical_counts_run_once_per_pass(self):
+        same_filters = dict(self.staff, value=5)
+        with count_pass() as cache:
+            with self.assertNumQueries(1):
+                self.assertTrue(ConditionTree(self.staff).test())
+                self.assertFalse(ConditionTree(same_filters).test())
+        self.assertEqual((cache.queries, cache.hits), (1, 1))
+
+        # Outside a pass every count queries
+        with self.assertNumQueries(2):
+            ConditionTree(self.staff).test()
+            ConditionTree(same_filters).test()
+
+    def test_counts_of_one_model_are_batched(self):
+        groups = {'type': 'queryset_count', 'model': 'auth.User', 'filters': {'groups__name': 'x'}, 'value': 0}
+        rules = [
+            AutomationRule(pk=i, condition_definition=definition)
+            for i, definition in enumerate([self.staff, self.users, groups, dict(self.staff, value=9)], start=1000)
+        ]
+        cache = CountCache()
+        # One aggregate query, inside a savepoint
+        with self.assertNumQueries(3):
+            prefetch_counts(rules, cache)
+        # The multi-valued join is left to its own query
+        self.assertEqual(sorted(cache.counts.values()), [1, 2])
+
+        with count_pass(cache):
+            with self.assertNumQueries(1):
+                results = [RuleEvaluator(rule).evaluate()['triggered'] for rule in rules]
+        self.assertEqual(results, [True, True, False, False])
+
+    def test_bad_filters_fail_alone(self):
+        bad = {'type': 'queryset_count', 'model': 'auth.User', 'filters': {'no_such_field': 1}, 'value': 0}
+        cache = CountCache()
+        prefetch_counts([AutomationRule(pk=2000, condition_definition=self.staff),
+                         AutomationRule(pk=2001, condition_definition=bad)], cache)
+        self.assertEqual(cache.counts, {})
+        with count_pass(cache):
+            self.assertTrue(ConditionTree(self.staff).test())
+            self.assertIn('error', ConditionTree(bad).evaluate()['context'])
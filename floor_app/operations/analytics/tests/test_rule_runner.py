@@ -0,0 +1,93 @@
+"""
+Tests for parallel scheduled rule execution (rule_engine.runner).
+"""
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from ..models import AutomationRule
+from ..rule_engine.evaluator import RuleEvaluator
+from ..rule_engine.runner import RuleRunner
+
+
+def make_rule(code, trigger_mode='SCHEDULED'):
+    return AutomationRule.objects.create(
+        name=code, description=code, rule_code=code, rule_scope='GENERIC', target_model='analytics.AppEvent',
+        condition_definition={'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 100},
+        trigger_mode=trigger_mode, is_active=True, is_approved=True,
+    )
+
+
+class RuleRunnerTest(TransactionTestCase):
+    def setUp(self):
+        for code in ('OK1', 'OK2', 'SLOW', 'BROKEN'):
+            make_rule(code)
+        make_rule('EVENT', trigger_mode='EVENT')
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def fake_execute(self, rule, *args, **kwargs):
+        if rule.rule_code == 'SLOW':
+            self.release.wait(5)
+        if rule.rule_code == 'BROKEN':
+            raise RuntimeError('boom')
+        return SimpleNamespace(was_triggered=rule.rule_code == 'OK1', comment=f'{rule.rule_code} done')
+
+    def run_rules(self, **kwargs):
+        execute = lambda rule, *a, **kw: self.fake_execute(rule, *a, **kw)  # noqa: E731
+        with mock.patch.object(AutomationRule, 'execute', execute):
+            return RuleEvaluator.evaluate_all_active_rules(**kwargs)
+
+    def test_slow_and_failing_rules_do_not_affect_others(self):
+        started = time.monotonic()
+        results = self.run_rules(executor='thread', workers=4, timeout=0.5)
+        self.assertLess(time.monotonic() - started, 3)
+
+        statuses = {r['rule_code']: r['status'] for r in results['rule_results']}
+        self.assertEqual(statuses, {'OK1': 'ok', 'OK2': 'ok', 'SLOW': 'timeout', 'BROKEN': 'error'})
+        self.assertEqual(
+            (results['total_evaluated'], results['total_triggered'], results['total_errors'], results['total_timeouts']),
+            (2, 1, 1, 1),
+        )
+        # Slowest first
+        self.assertEqual(results['rule_results'][0]['rule_code'], 'SLOW')
+        self.assertGreaterEqual(results['rule_results'][0]['duration_ms'], 500)
+        broken = next(r for r in results['rule_results'] if r['rule_code'] == 'BROKEN')
+        self.assertEqual(broken['error'], 'boom')
+
+    def test_queued_rules_do_not_wait_for_a_stuck_worker(self):
+        make_rule('TAIL')  # Ordered by name, so queued behind SLOW
+        started = time.monotonic()
+        results = self.run_rules(executor='thread', workers=1, timeout=0.5)
+        self.assertLess(time.monotonic() - started, 3)
+
+        statuses = {r['rule_code']: r['status'] for r in results['rule_results']}
+        self.assertEqual(statuses, {'OK1': 'ok', 'OK2': 'ok', 'SLOW': 'timeout', 'BROKEN': 'error', 'TAIL': 'ok'})
+
+    def test_batch_deadline(self):
+        runner = RuleRunner(executor='thread', workers=2, timeout=0.2)
+        with mock.patch('floor_app.operations.analytics.rule_engine.runner.execute_rule',
+                        lambda *args: self.release.wait(5)):
+            # Queued futures never start, so no per-rule timeout applies
+            with mock.patch('concurrent.futures.Future.running', return_value=False):
+                started = time.monotonic()
+                results = runner._run_pool([1, 2, 3], count_cache=None)
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual([r['status'] for r in results], ['timeout'] * 3)
+        self.assertEqual(results[0]['error'], 'Batch deadline passed')
+
+    def test_serial_executor(self):
+        self.release.set()
+        results = self.run_rules(executor='serial')
+        self.assertEqual(results['executor'], 'serial')
+        self.assertEqual((results['total_evaluated'], results['total_errors']), (3, 1))
+        self.assertEqual(results['total_timeouts'], 0)
+
+    def test_unknown_executor(self):
+        with self.assertRaises(ValueError):
+            RuleRunner(executor='cluster')
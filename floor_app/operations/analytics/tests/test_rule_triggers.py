@@ -0,0 +1,117 @@
+"""
+Tests for event-driven rule triggering (rule_engine.triggers).
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import AppEvent, AutomationRule, AutomationRuleExecution
+from ..rule_engine import triggers
+
+
+def make_rule(code, condition_def, target_model='analytics.AppEvent', **kwargs):
+    return AutomationRule.objects.create(
+        name=code, description=code, rule_code=code, rule_scope='GENERIC', target_model=target_model,
+        condition_definition=condition_def, trigger_mode='EVENT', is_active=True, is_approved=True, **kwargs
+    )
+
+
+class RuleDependencyIndexTest(TestCase):
+    def test_affected_rules(self):
+        slow = make_rule('SLOW', {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 100})
+        staff = make_rule('STAFF', {'type': 'queryset_count', 'model': 'auth.User',
+                                    'filters': {'is_staff': True}, 'operator': '>', 'value': 5})
+        scheduled = make_rule('SCHEDULED', {'type': 'threshold', 'field': 'view_name', 'value': 'x'})
+        AutomationRule.objects.filter(pk=scheduled.pk).update(trigger_mode='SCHEDULED')
+
+        index = triggers.RuleDependencyIndex(
+            AutomationRule.objects.filter(is_active=True, is_approved=True, trigger_mode='EVENT')
+        )
+        self.assertEqual(index.affected(AppEvent, {'duration_ms'}), {slow.pk: triggers.OBJECT})
+        self.assertEqual(index.affected(AppEvent, {'view_name'}), {})
+        self.assertEqual(index.affected(AppEvent, None), {slow.pk: triggers.OBJECT})
+        self.assertEqual(index.affected(AppEvent, deleted=True), {})
+
+        self.assertEqual(index.affected(User, {'email'}), {})
+        self.assertEqual(index.affected(User, {'is_staff'}), {staff.pk: triggers.RULE})
+        self.assertEqual(index.affected(User, deleted=True), {staff.pk: triggers.RULE})
+        self.assertEqual(index.watched_fields(AppEvent), ['duration_ms'])
+
+    def test_reverse_relation_path_is_watched_as_any_field(self):
+        slow = make_rule('SLOW', {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 100})
+        busy = make_rule('BUSY', {'type': 'threshold', 'field': 'app_events.count', 'operator': '>', 'value': 5},
+                         target_model='auth.User')
+
+        index = triggers.RuleDependencyIndex(AutomationRule.objects.all())
+        self.assertEqual(index.affected(AppEvent, {'duration_ms'}), {slow.pk: triggers.OBJECT})
+        self.assertEqual(index.affected(User, {'email'}), {busy.pk: triggers.OBJECT})
+        self.assertEqual(index.watched_fields(User), [])
+
+
+class EventTriggeredRuleTest(TestCase):
+    def setUp(self):
+        self.rule = make_rule('SLOW', {'type': 'threshold', 'field': 'duration_ms', 'operator': '>', 'value': 100})
+        triggers.build_index()
+        self.original_queue = triggers._queue
+        self.queue = triggers._queue = triggers.RuleTriggerQueue(max_objects=3, background=False)
+
+    def tearDown(self):
+        triggers.disconnect_all()
+        triggers._queue = self.original_queue
+
+    def executions(self):
+        return list(AutomationRuleExecution.objects.filter(rule=self.rule).order_by('pk').values_list('object_id', 'was_triggered'))
+
+    def test_saves_are_coalesced_per_object(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = AppEvent.objects.create(event_type='PAGE_VIEW', view_name='a', duration_ms=500)
+            second = AppEvent.objects.create(event_type='PAGE_VIEW', view_name='b', duration_ms=5)
+            first.duration_ms = 600
+            first.save()
+        self.queue.flush()
+        self.assertEqual(sorted(self.executions()), sorted([(first.pk, True), (second.pk, False)]))
+
+    def test_unwatched_changes_do_not_trigger(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = AppEvent.objects.create(event_type='PAGE_VIEW', view_name='a', duration_ms=500)
+        self.queue.flush()
+
+        loaded = AppEvent.objects.get(pk=event.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded.view_name = 'renamed'
+            loaded.save()
+            AppEvent.objects.get(pk=event.pk).save(update_fields=['view_name'])
+        self.assertEqual(self.queue.get_metrics()['queue_depth'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            loaded.duration_ms = 50
+            loaded.save()
+        self.queue.flush()
+        self.assertEqual(self.executions(), [(event.pk, True), (event.pk, False)])
+
+    def test_bursts_run_the_rule_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AppEvent.objects.bulk_create([AppEvent(event_type='PAGE_VIEW', duration_ms=500) for _ in range(2)])
+            for _ in range(5):
+                AppEvent.objects.create(event_type='PAGE_VIEW', duration_ms=500)
+        self.queue.flush()
+        # More than max_objects changed: one set-based run over all targets
+        execution = AutomationRuleExecution.objects.get(rule=self.rule)
+        self.assertIsNone(execution.object_id)
+        self.assertEqual(execution.context_data['triggered_count'], 7)
+
+    def test_rolled_back_and_rule_edits(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            AppEvent.objects.create(event_type='PAGE_VIEW', duration_ms=500)
+        self.assertEqual(self.queue.get_metrics()['queue_depth'], 0)
+
+        # Run statistics do not rebuild the index; disabling the rule does
+        index = triggers.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.save(update_fields=['total_executions', 'updated_at'])
+        self.assertIs(triggers.get_index(), index)
+
+        triggers.connect()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.is_active = False
+            self.rule.save()
+        self.assertEqual(triggers.get_index().models, {})
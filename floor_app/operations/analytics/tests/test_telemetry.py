@@ -0,0 +1,124 @@
+"""
+Tests for the single-pass telemetry middleware and its sinks.
+"""
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import resolve
+
+from core import query_profiler
+from floor_app.middleware import get_current_request
+from .. import telemetry
+from ..middleware import TelemetryMiddleware
+from ..middleware.telemetry import OverheadStats
+from ..models import AppEvent, ErrorLog, PageView, UserSession
+
+
+class DescribeRouteTest(TestCase):
+    def test_route_info_is_cached_per_pattern(self):
+        match = resolve('/analytics/')
+        first = telemetry.describe_route(match, '/analytics/')
+        self.assertIs(telemetry.describe_route(match, '/analytics/'), first)
+        self.assertEqual(first.category, 'Analytics')
+        self.assertEqual(first.view_name, match.view_name)
+
+    def test_unresolved_path(self):
+        route = telemetry.describe_route(None, '/inventory/missing/')
+        self.assertEqual(route.view_name, 'inventory_missing')
+        self.assertEqual(route.category, 'Inventory')
+
+    def test_event_type(self):
+        route = telemetry.RouteInfo('', '', '', '', 'REPORT_VIEW')
+        self.assertEqual(telemetry.get_event_type('GET', route, {}), 'REPORT_VIEW')
+        self.assertEqual(telemetry.get_event_type('GET', route, {'export': 'csv'}), 'EXPORT')
+        self.assertEqual(telemetry.get_event_type('POST', route, {}), 'ACTION')
+
+
+@override_settings(ANALYTICS_BUFFERED=False, ANALYTICS_TRACK_ANONYMOUS=False)
+class TelemetryMiddlewareTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_superuser(username='tracked', password='testpass123')
+        self.session = UserSession.objects.create(user=self.user, session_key='abc')
+        self.stats = OverheadStats(budget_ms=1.0)
+
+    def make_request(self, path='/analytics/'):
+        request = self.factory.get(path, {'page': '2'})
+        request.user = self.user
+        request.session = self.client.session
+        request.session['analytics_session_id'] = self.session.pk
+        return request
+
+    def make_middleware(self, view, *sinks):
+        return TelemetryMiddleware(view, sinks=list(sinks), stats=self.stats)
+
+    def test_page_view_and_app_event_from_one_pass(self):
+        seen = {}
+
+        def view(request):
+            seen['current'] = get_current_request()
+            request.resolver_match = resolve('/analytics/')
+            return HttpResponse('ok')
+
+        request = self.make_request()
+        middleware = self.make_middleware(view, telemetry.PageViewSink(), telemetry.AppEventSink())
+        middleware(request)
+
+        self.assertIs(seen['current'], request)
+        self.assertIsNone(get_current_request())
+
+        page_view = PageView.objects.get()
+        self.assertEqual(page_view.session, self.session)
+        self.assertEqual(page_view.query_params, {'page': '2'})
+        event = AppEvent.objects.get()
+        self.assertEqual(event.event_type, 'PAGE_VIEW')
+        self.assertEqual(event.event_category, 'Analytics')
+        self.assertEqual(self.stats.as_dict()['requests'], 1)
+
+    def test_exception_logged_by_error_sink(self):
+        middleware = None
+
+        def failing_view(request):
+            # What the handler does when the view raises
+            middleware.process_exception(request, ValueError('boom'))
+            return HttpResponse(status=500)
+
+        middleware = self.make_middleware(failing_view, telemetry.ErrorLogSink())
+        middleware(self.make_request())
+
+        error = ErrorLog.objects.get()
+        self.assertEqual(error.error_type, 'ValueError')
+        self.assertEqual(error.error_message, 'boom')
+        self.assertEqual(error.user, self.user)
+
+    def test_failing_sink_does_not_break_request(self):
+        class BrokenSink(telemetry.TelemetrySink):
+            def handle(self, event):
+                raise RuntimeError('sink down')
+
+        middleware = self.make_middleware(lambda request: HttpResponse('ok'), BrokenSink())
+        self.assertEqual(middleware(self.make_request()).status_code, 200)
+
+    @override_settings(SQL_PROFILER_ENABLED=True, SQL_PROFILER_SAMPLE_RATE=1.0)
+    def test_sampled_request_is_profiled(self):
+        query_profiler.get_store().reset()
+
+        def view(request):
+            request.resolver_match = resolve('/analytics/')
+            PageView.objects.count()
+            return HttpResponse('ok')
+
+        self.make_middleware(view, telemetry.QueryProfileSink())(self.make_request())
+
+        stats = query_profiler.get_store().aggregate()[resolve('/analytics/').view_name]
+        self.assertEqual(stats['requests'], 1)
+        self.assertGreaterEqual(stats['queries'], 1)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_telemetry', '--path', '/analytics/', '--requests', '20', stdout=out)
+        self.assertIn('telemetry', out.getvalue())
+        self.assertEqual(PageView.objects.count(), 0)
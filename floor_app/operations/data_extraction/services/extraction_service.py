@@ -9,6 +9,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from core import sequences
 from datetime import datetime
 from ..models import (
     DataExtraction, ExtractedField, FieldMapping, ImportHistory,
@@ -26,17 +27,7 @@ class ExtractionService:
         """Generate unique extraction number"""
         year = timezone.now().year
         prefix = f"EXT-{year}-"
-        last = DataExtraction.objects.filter(
-            extraction_number__startswith=prefix
-        ).order_by('-extraction_number').first()
-
-        if last:
-            last_num = int(last.extraction_number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f"{prefix}{new_num:06d}"
+        return sequences.next_number(DataExtraction.objects, 'extraction_number', prefix, width=6)
 
     @classmethod
     @transaction.atomic
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q, Count, Avg, Sum
 from django.db import transaction
+from core import sequences
 from floor_app.operations.fives.models import (
     FiveSAuditTemplate, FiveSAudit, FiveSPhoto, FiveSLeaderboard,
     FiveSAchievement, FiveSUserAchievement, FiveSCompetition,
@@ -31,18 +32,7 @@ class FiveSService:
         """Generate unique audit number. Format: 5S-YYYY-NNNN"""
         year = timezone.now().year
         prefix = f"5S-{year}-"
-
-        last_audit = FiveSAudit.objects.filter(
-            audit_number__startswith=prefix
-        ).order_by('-audit_number').first()
-
-        if last_audit:
-            last_number = int(last_audit.audit_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(FiveSAudit.objects, 'audit_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -3,6 +3,7 @@ from typing import Dict, Any
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
+from core import sequences
 from floor_app.operations.hiring.models import JobPosting, Candidate, JobApplication, Interview, JobOffer
 
 User = get_user_model()
@@ -12,9 +13,7 @@ class HiringService:
     def generate_job_code(cls) -> str:
         year = timezone.now().year
         prefix = f"JOB-{year}-"
-        last_job = JobPosting.objects.filter(job_code__startswith=prefix).order_by('-job_code').first()
-        new_number = 1 if not last_job else int(last_job.job_code.split('-')[-1]) + 1
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(JobPosting.objects, 'job_code', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -10,6 +10,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q, Count, Avg, F
 from django.db import transaction
+from core import sequences
 from floor_app.operations.hoc.models import (
     HazardCategory,
     HazardObservation,
@@ -33,19 +34,7 @@ class HOCService:
         """
         year = timezone.now().year
         prefix = f"HOC-{year}-"
-
-        # Get last number for this year
-        last_hoc = HazardObservation.objects.filter(
-            card_number__startswith=prefix
-        ).order_by('-card_number').first()
-
-        if last_hoc:
-            last_number = int(last_hoc.card_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(HazardObservation.objects, 'card_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -6,6 +6,7 @@ Tracks employee attendance, overtime, and time management.
 
 from django.db import models
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import AuditMixin
 
 
@@ -303,17 +304,7 @@ class OvertimeRequest(AuditMixin):
         """Generate next request number"""
         year = timezone.now().year
         prefix = f'OT-{year}-'
-        last_req = cls.objects.filter(
-            request_number__startswith=prefix
-        ).order_by('-request_number').first()
-
-        if last_req:
-            last_num = int(last_req.request_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.objects, 'request_number', prefix, width=5)
 
 
 class AttendanceSummary(AuditMixin):
@@ -7,6 +7,7 @@ balances, and accruals.
 
 from django.db import models
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import AuditMixin, SoftDeleteMixin
 
 
@@ -457,14 +458,4 @@ class LeaveRequest(AuditMixin, SoftDeleteMixin):
         """Generate next request number"""
         year = timezone.now().year
         prefix = f'LV-{year}-'
-        last_req = cls.all_objects.filter(
-            request_number__startswith=prefix
-        ).order_by('-request_number').first()
-
-        if last_req:
-            last_num = int(last_req.request_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'request_number', prefix, width=5)
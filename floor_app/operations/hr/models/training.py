@@ -6,6 +6,7 @@ Tracks employee training, certifications, and professional development.
 
 from django.db import models
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import AuditMixin, SoftDeleteMixin
 
 
@@ -200,17 +201,7 @@ class TrainingSession(AuditMixin, SoftDeleteMixin):
         """Generate session code"""
         year = timezone.now().year
         prefix = f'{program.code}-{year}-'
-        last_session = cls.all_objects.filter(
-            session_code__startswith=prefix
-        ).order_by('-session_code').first()
-
-        if last_session:
-            last_num = int(last_session.session_code.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:03d}"
+        return sequences.next_number(cls.all_objects, 'session_code', prefix, width=3)
 
 
 class EmployeeTraining(AuditMixin):
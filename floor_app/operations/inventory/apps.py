@@ -13,5 +13,5 @@ class InventoryConfig(AppConfig):
     verbose_name = 'Inventory & Materials Management'
 
     def ready(self):
-        # Import signals to register them (if any)
-        pass
+        # Import signals to register them
+        import floor_app.operations.inventory.signals  # noqa
@@ -0,0 +1,45 @@
+"""
+Management command to verify the closed cutter ledger periods.
+
+Recomputes every closed month from the full InventoryTransaction history
+and reports the CutterLedgerPeriod rows that differ - drift from bulk
+writes or imports that bypass signals. --close first closes the complete
+months not closed yet (summary refreshes also close them on first use
+after a month ends); --fix rebuilds the rows that differ.
+
+Usage:
+    python manage.py reconcile_cutter_ledger
+    python manage.py reconcile_cutter_ledger --close --fix
+"""
+from django.core.management.base import BaseCommand
+
+from floor_app.operations.inventory.services.cutter_ledger import CutterLedger
+
+
+class Command(BaseCommand):
+    help = 'Verify closed cutter ledger periods against the full transaction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--close', action='store_true', help='Close complete months first')
+        parser.add_argument('--fix', action='store_true', help='Rebuild the periods that differ')
+
+    def handle(self, *args, **options):
+        ledger = CutterLedger()
+
+        if options['close']:
+            closed = ledger.close_periods()
+            self.stdout.write(f'Closed {closed} months (through {ledger.closed_through()})')
+
+        differences = ledger.reconcile(fix=options['fix'])
+        for difference in differences:
+            self.stdout.write(self.style.WARNING(
+                f"  - item {difference['item_id']} / category {difference['ownership_category_id']} "
+                f"{difference['period_start']:%Y-%m}: stored {difference['stored']} "
+                f"expected {difference['expected']}"
+            ))
+
+        verb = 'rebuilt' if options['fix'] else 'found'
+        style = self.style.SUCCESS if not differences or options['fix'] else self.style.ERROR
+        self.stdout.write(style(
+            f'Reconciled periods through {ledger.closed_through()}: {len(differences)} differences {verb}'
+        ))
@@ -0,0 +1,36 @@
+"""
+Management command to recalculate the cutter inventory summaries.
+
+Refreshes every CutterInventorySummary (or those of the given SKUs) in
+bulk: the ledger totals of all rows come from one pair of grouped queries
+and rows are written with one UPDATE per distinct set of values (see
+CutterInventorySummary.refresh_all). Schedule it e.g. hourly from cron.
+
+Usage:
+    python manage.py refresh_cutter_summaries
+    python manage.py refresh_cutter_summaries --sku CT-1313 --sku CT-1608
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from floor_app.operations.inventory.models import CutterInventorySummary
+
+
+class Command(BaseCommand):
+    help = 'Recalculate cutter inventory summaries in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sku', action='append', dest='skus', help='Only this item SKU (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Summaries per UPDATE')
+
+    def handle(self, *args, **options):
+        queryset = None
+        if options['skus']:
+            queryset = CutterInventorySummary.objects.filter(item__sku__in=options['skus'])
+
+        started = time.perf_counter()
+        count = CutterInventorySummary.refresh_all(queryset, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed {count} cutter summaries in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_delete_bitdesignrevision_delete_bomheader_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CutterLedgerClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(help_text='First day of the closed month', unique=True)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cutter Ledger Close',
+                'verbose_name_plural': 'Cutter Ledger Closes',
+                'db_table': 'inventory_cutter_ledger_close',
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CutterLedgerPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(help_text='First day of the month')),
+                ('quantity_in', models.DecimalField(decimal_places=4, default=Decimal('0'), help_text='Sum of quantity_in in the month', max_digits=14)),
+                ('quantity_out', models.DecimalField(decimal_places=4, default=Decimal('0'), help_text='Sum of quantity_out in the month', max_digits=14)),
+                ('consumed', models.DecimalField(decimal_places=4, default=Decimal('0'), help_text='Sum of positive quantity_out in the month', max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_periods', to='inventory.item')),
+                ('ownership_category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_periods', to='inventory.cutterownershipcategory')),
+            ],
+            options={
+                'verbose_name': 'Cutter Ledger Period',
+                'verbose_name_plural': 'Cutter Ledger Periods',
+                'db_table': 'inventory_cutter_ledger_period',
+                'ordering': ['period_start'],
+                'indexes': [models.Index(fields=['period_start'], name='ix_clp_period')],
+                'unique_together': {('item', 'ownership_category', 'period_start')},
+            },
+        ),
+    ]
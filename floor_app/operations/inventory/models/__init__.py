@@ -40,6 +40,8 @@ from .cutter import (
     CutterDetail,
     CutterPriceHistory,
     CutterInventorySummary,
+    CutterLedgerPeriod,
+    CutterLedgerClose,
 )
 
 from .cutter_bom_grid import (
@@ -75,6 +77,8 @@ __all__ = [
     'CutterDetail',
     'CutterPriceHistory',
     'CutterInventorySummary',
+    'CutterLedgerPeriod',
+    'CutterLedgerClose',
     # Cutter BOM & Map Grid
     'CutterBOMGridHeader',
     'CutterBOMGridCell',
@@ -7,9 +7,11 @@ matching the Excel "Cutter Inventory" workbook structure:
 - CutterDetail: Extension of Item with cutter-specific attributes (SAP#, type, size, grade, chamfer)
 - CutterPriceHistory: Time-based pricing for quotations
 - CutterInventorySummary: Computed inventory levels and forecasting
+- CutterLedgerPeriod / CutterLedgerClose: Closed monthly transaction totals
+  that balances and consumption windows are computed from
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Sum, Q
 from django.utils import timezone
 from datetime import timedelta
@@ -476,37 +478,44 @@ class CutterInventorySummary(models.Model):
         - forecast
         - status
         """
-        from .transactions import InventoryTransaction
-        from django.db.models import Sum, Q
-        from datetime import timedelta
+        from floor_app.operations.inventory.services.cutter_ledger import CutterLedger
 
-        # Calculate current balance
-        # Sum(additions) - Sum(subtractions) for this item + ownership category
-        transactions = InventoryTransaction.objects.filter(
-            item=self.item,
-            ownership_category=self.ownership_category
-        )
+        # Balance and consumption windows from closed monthly periods plus
+        # the transactions after them (see CutterLedger)
+        totals = CutterLedger().window_totals(
+            self.ledger_windows(),
+            item=self.item_id,
+            ownership_category=self.ownership_category_id,
+        ).get((self.item_id, self.ownership_category_id), {})
 
-        additions = transactions.aggregate(total=Sum('quantity_in'))['total'] or Decimal('0.00')
-        subtractions = transactions.aggregate(total=Sum('quantity_out'))['total'] or Decimal('0.00')
-        self.current_balance = additions - subtractions
+        self.apply_ledger_totals(totals)
+        self.save()
 
-        # Calculate consumption metrics
+    @staticmethod
+    def ledger_windows():
+        """CutterLedger windows behind the balance and consumption fields."""
         today = timezone.now().date()
+        return {
+            'lifetime': None,
+            '6month': today - timedelta(days=182),
+            '3month': today - timedelta(days=91),
+        }
 
-        # 6-month consumption
-        date_6mo_ago = today - timedelta(days=182)
-        self.consumption_6month = transactions.filter(
-            transaction_date__gte=date_6mo_ago,
-            quantity_out__gt=0
-        ).aggregate(total=Sum('quantity_out'))['total'] or Decimal('0.00')
+    def apply_ledger_totals(self, totals):
+        """
+        Set the computed fields from CutterLedger.window_totals() of this
+        item and category (see ledger_windows); does not save.
+        """
+        # Calculate current balance
+        # Sum(additions) - Sum(subtractions) for this item + ownership category
+        lifetime = totals.get('lifetime', {})
+        additions = lifetime.get('quantity_in') or Decimal('0.00')
+        subtractions = lifetime.get('quantity_out') or Decimal('0.00')
+        self.current_balance = additions - subtractions
 
-        # 3-month consumption
-        date_3mo_ago = today - timedelta(days=91)
-        self.consumption_3month = transactions.filter(
-            transaction_date__gte=date_3mo_ago,
-            quantity_out__gt=0
-        ).aggregate(total=Sum('quantity_out'))['total'] or Decimal('0.00')
+        # Calculate consumption metrics (quantity_out > 0 only)
+        self.consumption_6month = totals.get('6month', {}).get('consumed') or Decimal('0.00')
+        self.consumption_3month = totals.get('3month', {}).get('consumed') or Decimal('0.00')
 
         # 2-month consumption (6mo / 3, rounded up)
         self.consumption_2month = (self.consumption_6month / Decimal('3.0')).quantize(Decimal('0.01'))
@@ -540,4 +549,164 @@ class CutterInventorySummary(models.Model):
         else:
             self.status = 'OK'
 
-        self.save()
+    # Fields set by apply_ledger_totals
+    COMPUTED_FIELDS = (
+        'current_balance', 'consumption_6month', 'consumption_3month', 'consumption_2month',
+        'safety_stock', 'bom_requirement', 'on_order', 'forecast', 'status',
+    )
+
+    @classmethod
+    def refresh_all(cls, queryset=None, batch_size=1000):
+        """
+        Recalculate many summary records at once.
+
+        Same results as refresh() per record, but the ledger totals of all
+        records come from one pair of grouped queries, and the writes run
+        in one transaction: one UPDATE covers every record that ends up
+        with the same numbers (e.g. all idle cutters), records with numbers
+        of their own are written with bulk_update, and records whose
+        numbers did not change only get last_calculated.
+
+        Args:
+            queryset: Summaries to refresh (default: all)
+            batch_size: Most records per UPDATE
+
+        Returns:
+            int: Number of summaries refreshed
+        """
+        from collections import defaultdict
+        from floor_app.operations.inventory.services.cutter_ledger import CutterLedger
+
+        summaries = list((cls.objects.all() if queryset is None else queryset).order_by())
+        if not summaries:
+            return 0
+
+        items = None if queryset is None else {summary.item_id for summary in summaries}
+        totals = CutterLedger().window_totals(cls.ledger_windows(), items=items)
+
+        fields = [cls._meta.get_field(name) for name in cls.COMPUTED_FIELDS]
+        quantums = {
+            field.name: Decimal(1).scaleb(-field.decimal_places)
+            for field in fields if isinstance(field, models.DecimalField)
+        }
+
+        def stored_values(summary):
+            # As the database stores them, so unchanged records compare equal
+            return tuple(
+                getattr(summary, name).quantize(quantums[name]) if name in quantums else getattr(summary, name)
+                for name in cls.COMPUTED_FIELDS
+            )
+
+        changed = defaultdict(list)
+        unchanged = []
+        for summary in summaries:
+            before = stored_values(summary)
+            summary.apply_ledger_totals(totals.get((summary.item_id, summary.ownership_category_id), {}))
+            after = stored_values(summary)
+            if after == before:
+                unchanged.append(summary)
+            else:
+                changed[after].append(summary)
+
+        now = timezone.now()
+        groups = [((), unchanged), *changed.items()]
+        with transaction.atomic():
+            for values, group in groups:
+                pks = [summary.pk for summary in group]
+                for i in range(0, len(pks), batch_size):
+                    cls.objects.filter(pk__in=pks[i:i + batch_size]).update(
+                        last_calculated=now, **dict(zip(cls.COMPUTED_FIELDS, values))
+                    )
+        return len(summaries)
+
+
+class CutterLedgerPeriod(models.Model):
+    """
+    Closed monthly InventoryTransaction totals per cutter per ownership category.
+
+    A month is closed once (CutterLedgerClose); from then on balances and
+    consumption windows read these rows instead of its transactions, so
+    CutterInventorySummary.refresh only aggregates activity since the last
+    close. Months are local (TIME_ZONE) calendar months. Rows exist only
+    for months with activity.
+
+    Later changes to a closed month's transactions rebuild its row (see
+    inventory.signals); reconcile_cutter_ledger verifies all rows against
+    the full transaction history.
+    """
+
+    item = models.ForeignKey(
+        'Item',
+        on_delete=models.CASCADE,
+        related_name='ledger_periods'
+    )
+
+    ownership_category = models.ForeignKey(
+        CutterOwnershipCategory,
+        on_delete=models.CASCADE,
+        related_name='ledger_periods'
+    )
+
+    period_start = models.DateField(
+        help_text="First day of the month"
+    )
+
+    quantity_in = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=Decimal('0'),
+        help_text="Sum of quantity_in in the month"
+    )
+
+    quantity_out = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=Decimal('0'),
+        help_text="Sum of quantity_out in the month"
+    )
+
+    consumed = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        default=Decimal('0'),
+        help_text="Sum of positive quantity_out in the month"
+    )
+
+    transaction_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "inventory_cutter_ledger_period"
+        verbose_name = "Cutter Ledger Period"
+        verbose_name_plural = "Cutter Ledger Periods"
+        unique_together = ['item', 'ownership_category', 'period_start']
+        ordering = ['period_start']
+        indexes = [
+            models.Index(fields=['period_start'], name='ix_clp_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}/{self.ownership_category_id} {self.period_start:%Y-%m}: +{self.quantity_in} -{self.quantity_out}"
+
+
+class CutterLedgerClose(models.Model):
+    """A month whose transactions have been rolled into CutterLedgerPeriod."""
+
+    period_start = models.DateField(
+        unique=True,
+        help_text="First day of the closed month"
+    )
+
+    transaction_count = models.IntegerField(default=0)
+
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "inventory_cutter_ledger_close"
+        verbose_name = "Cutter Ledger Close"
+        verbose_name_plural = "Cutter Ledger Closes"
+        ordering = ['-period_start']
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m} closed {self.closed_at:%Y-%m-%d}"
@@ -90,10 +90,9 @@ class CutterBOMGridHeader(AuditMixin):
 
     def recalculate_totals(self):
         """Recalculate total primary and secondary cutter counts."""
-        cells = self.cells.filter(cutter_type__isnull=False)
+        from floor_app.operations.inventory.services.cutter_grid import CutterGridEngine
 
-        self.total_primary_cutters = cells.filter(is_primary=True).count()
-        self.total_secondary_cutters = cells.filter(is_primary=False).count()
+        self.total_primary_cutters, self.total_secondary_cutters = CutterGridEngine(self.pk).totals()
         self.save(update_fields=['total_primary_cutters', 'total_secondary_cutters'])
 
     def refresh_summaries(self):
@@ -101,68 +100,68 @@ class CutterBOMGridHeader(AuditMixin):
         CutterBOMSummary.refresh_for_grid(self)
 
     def assign_all_sequence_numbers(self):
-        """Assign sequence numbers to all cells based on ordering scheme."""
+        """
+        Assign sequence numbers to all cells based on ordering scheme.
+
+        The cells are fetched once and numbered in memory; only cells whose
+        sequence changed are written, with a single bulk_update.
+
+        Returns:
+            int: Number of cells renumbered
+        """
+        cells = list(
+            self.cells.filter(cutter_type__isnull=False).only(
+                # grid_header: the related manager links each cell back to self
+                'id', 'grid_header', 'blade_number', 'pocket_number', 'is_primary',
+                'formation_order', 'cutter_sequence'
+            )
+        )
+
         if self.cutter_ordering_scheme == 'CONTINUOUS':
-            self._assign_continuous_sequence()
+            runs = self._continuous_sequence(cells)
         elif self.cutter_ordering_scheme == 'RESET_PER_TYPE':
-            self._assign_reset_per_type_sequence()
+            runs = self._reset_per_type_sequence(cells)
         elif self.cutter_ordering_scheme == 'FORMATION':
-            self._assign_formation_sequence()
+            runs = self._formation_sequence(cells)
+        else:
+            return 0
+
+        changed = []
+        for run in runs:
+            for sequence, cell in enumerate(run, start=1):
+                if cell.cutter_sequence != sequence:
+                    cell.cutter_sequence = sequence
+                    changed.append(cell)
+
+        # bulk_update skips save(), so no summary refresh per cell
+        if changed:
+            CutterBOMGridCell.objects.bulk_update(changed, ['cutter_sequence'], batch_size=500)
+        return len(changed)
+
+    @staticmethod
+    def _continuous_sequence(cells):
+        """Continuous numbering 1 to N across all blades."""
+        # Order by blade, then primary first, then pocket
+        return [sorted(cells, key=lambda c: (c.blade_number, not c.is_primary, c.pocket_number))]
 
-    def _assign_continuous_sequence(self):
-        """Assign continuous numbering 1 to N across all blades."""
-        sequence = 1
+    @staticmethod
+    def _reset_per_type_sequence(cells):
+        """Primary cutters 1 to N, then secondary cutters restarting at 1."""
+        def position(cell):
+            return (cell.blade_number, cell.pocket_number)
 
-        # Order by blade, then primary first, then pocket
-        cells = self.cells.filter(cutter_type__isnull=False).order_by(
-            'blade_number',
-            '-is_primary',  # Primary first (True > False)
-            'pocket_number'
-        )
+        return [
+            sorted((c for c in cells if c.is_primary), key=position),
+            sorted((c for c in cells if not c.is_primary), key=position),
+        ]
 
-        for cell in cells:
-            cell.cutter_sequence = sequence
-            cell.save(update_fields=['cutter_sequence'])
-            sequence += 1
-
-    def _assign_reset_per_type_sequence(self):
-        """Assign sequence numbers, resetting when switching from primary to secondary."""
-        # Primary cutters: 1 to N
-        primary_cells = self.cells.filter(
-            cutter_type__isnull=False,
-            is_primary=True
-        ).order_by('blade_number', 'pocket_number')
-
-        sequence = 1
-        for cell in primary_cells:
-            cell.cutter_sequence = sequence
-            cell.save(update_fields=['cutter_sequence'])
-            sequence += 1
-
-        # Secondary cutters: restart at 1
-        secondary_cells = self.cells.filter(
-            cutter_type__isnull=False,
-            is_primary=False
-        ).order_by('blade_number', 'pocket_number')
-
-        sequence = 1
-        for cell in secondary_cells:
-            cell.cutter_sequence = sequence
-            cell.save(update_fields=['cutter_sequence'])
-            sequence += 1
-
-    def _assign_formation_sequence(self):
-        """Assign sequence based on formation_order (apex to gauge)."""
-        cells = self.cells.filter(
-            cutter_type__isnull=False,
-            formation_order__isnull=False
-        ).order_by('formation_order')
-
-        sequence = 1
-        for cell in cells:
-            cell.cutter_sequence = sequence
-            cell.save(update_fields=['cutter_sequence'])
-            sequence += 1
+    @staticmethod
+    def _formation_sequence(cells):
+        """Numbering by formation_order (apex to gauge); unordered cells keep their number."""
+        return [sorted(
+            (c for c in cells if c.formation_order is not None),
+            key=lambda c: (c.formation_order, c.pk)
+        )]
 
     def get_availability_summary(self):
         """
@@ -409,17 +408,25 @@ class CutterBOMSummary(models.Model):
 
         return summaries
 
-    def get_remaining_for_map(self, map_header):
+    def get_remaining_for_map(self, map_header, engine=None):
         """
         Calculate how many more of this cutter type are needed in a map.
 
+        Args:
+            map_header: CutterMapHeader instance
+            engine: CutterGridEngine of the map, shared when asking for
+                several cutter types (loads the map cells once)
+
         Returns:
             int: Positive = still need, Negative = over-entered, 0 = perfect
         """
+        from floor_app.operations.inventory.services.cutter_grid import CutterGridEngine
+
+        if engine is None:
+            engine = CutterGridEngine(self.grid_header_id, map_header)
+
         # Count how many of this type are in the map
-        entered_count = map_header.cells.filter(
-            actual_cutter_type=self.cutter_type
-        ).count()
+        entered_count = engine.actual_count(self.cutter_type_id)
 
         remaining = self.required_quantity - entered_count
         return remaining
@@ -456,6 +463,56 @@ class CutterMapHeader(AuditMixin):
         ('HAS_ERRORS', 'Has Errors'),
     )
 
+    # Status -> UI colour, per map type
+    COLOR_SCHEMES = {
+        'DESIGN': {
+            'EMPTY': '#f5f5f5',
+            'CORRECT': '#e3f2fd',
+            'PRIMARY': '#1976d2',
+            'SECONDARY': '#90caf9',
+            'CRITICAL': '#ffebee',
+        },
+        'AS_RECEIVED': {
+            'EMPTY': '#f8f9fa',
+            'CORRECT': '#d4edda',
+            'SUBSTITUTED': '#fff3cd',
+            'DAMAGED': '#f8d7da',
+            'MISSING': '#e2e3e5',
+        },
+        'AS_BUILT': {
+            'EMPTY': '#f8f9fa',
+            'CORRECT': '#d4edda',
+            'SUBSTITUTED': '#ffe0b2',
+            'PENDING': '#fff3cd',
+            'ISSUE': '#f8d7da',
+        },
+        'POST_EVAL': {
+            'EMPTY': '#f8f9fa',
+            'CORRECT': '#d4edda',
+            'MINOR_WEAR': '#fff3cd',
+            'DAMAGED': '#f8d7da',
+            'NEEDS_REWORK': '#ffe0b2',
+        },
+        'POST_NDT': {
+            'EMPTY': '#f8f9fa',
+            'PASS': '#d4edda',
+            'REVIEW': '#fff3cd',
+            'FAIL': '#f8d7da',
+        },
+        'POST_REWORK': {
+            'EMPTY': '#f8f9fa',
+            'REWORKED': '#d1ecf1',
+            'REPLACED': '#cfe2ff',
+            'ISSUE': '#f8d7da',
+        },
+        'FINAL': {
+            'EMPTY': '#f8f9fa',
+            'APPROVED': '#d4edda',
+            'CONDITIONAL': '#fff3cd',
+            'REJECTED': '#f8d7da',
+        },
+    }
+
     # Link to job/work order
     job_card = models.ForeignKey(
         'production.JobCard',
@@ -567,55 +624,14 @@ class CutterMapHeader(AuditMixin):
         """
         Validate this map against source BOM.
 
+        The BOM grid and map cells are read once each (see
+        services.cutter_grid), however many pockets the bit has.
+
         Returns dict with validation results.
         """
-        validation_result = {
-            'is_valid': True,
-            'errors': [],
-            'warnings': [],
-            'summary': {}
-        }
+        from floor_app.operations.inventory.services.cutter_grid import CutterGridEngine
 
-        # Check each BOM summary
-        for summary in self.source_bom_grid.summaries.all():
-            cutter_type = summary.cutter_type
-            required = summary.required_quantity
-
-            # Count actual in map
-            actual = self.cells.filter(
-                actual_cutter_type=cutter_type
-            ).count()
-
-            remaining = required - actual
-
-            validation_result['summary'][cutter_type.id] = {
-                'cutter_type': str(cutter_type),
-                'required': required,
-                'actual': actual,
-                'remaining': remaining,
-                'status': 'OK' if remaining == 0 else ('UNDER' if remaining > 0 else 'OVER')
-            }
-
-            if remaining > 0:
-                validation_result['warnings'].append(
-                    f"{cutter_type}: Need {remaining} more (has {actual}/{required})"
-                )
-            elif remaining < 0:
-                validation_result['errors'].append(
-                    f"{cutter_type}: Over-entered by {abs(remaining)} (has {actual}/{required})"
-                )
-                validation_result['is_valid'] = False
-
-        # Check for empty required cells
-        empty_required = self.cells.filter(
-            required_cutter_type__isnull=False,
-            actual_cutter_type__isnull=True
-        ).count()
-
-        if empty_required > 0:
-            validation_result['warnings'].append(
-                f"{empty_required} required cells are still empty"
-            )
+        validation_result = CutterGridEngine.for_map(self).validate()
 
         # Update validation status
         if not validation_result['is_valid']:
@@ -642,56 +658,7 @@ class CutterMapHeader(AuditMixin):
 
         Returns dict of status -> color mappings.
         """
-        color_schemes = {
-            'DESIGN': {
-                'EMPTY': '#f5f5f5',
-                'CORRECT': '#e3f2fd',
-                'PRIMARY': '#1976d2',
-                'SECONDARY': '#90caf9',
-                'CRITICAL': '#ffebee',
-            },
-            'AS_RECEIVED': {
-                'EMPTY': '#f8f9fa',
-                'CORRECT': '#d4edda',
-                'SUBSTITUTED': '#fff3cd',
-                'DAMAGED': '#f8d7da',
-                'MISSING': '#e2e3e5',
-            },
-            'AS_BUILT': {
-                'EMPTY': '#f8f9fa',
-                'CORRECT': '#d4edda',
-                'SUBSTITUTED': '#ffe0b2',
-                'PENDING': '#fff3cd',
-                'ISSUE': '#f8d7da',
-            },
-            'POST_EVAL': {
-                'EMPTY': '#f8f9fa',
-                'CORRECT': '#d4edda',
-                'MINOR_WEAR': '#fff3cd',
-                'DAMAGED': '#f8d7da',
-                'NEEDS_REWORK': '#ffe0b2',
-            },
-            'POST_NDT': {
-                'EMPTY': '#f8f9fa',
-                'PASS': '#d4edda',
-                'REVIEW': '#fff3cd',
-                'FAIL': '#f8d7da',
-            },
-            'POST_REWORK': {
-                'EMPTY': '#f8f9fa',
-                'REWORKED': '#d1ecf1',
-                'REPLACED': '#cfe2ff',
-                'ISSUE': '#f8d7da',
-            },
-            'FINAL': {
-                'EMPTY': '#f8f9fa',
-                'APPROVED': '#d4edda',
-                'CONDITIONAL': '#fff3cd',
-                'REJECTED': '#f8d7da',
-            },
-        }
-
-        return color_schemes.get(self.map_type, color_schemes['DESIGN'])
+        return self.COLOR_SCHEMES.get(self.map_type, self.COLOR_SCHEMES['DESIGN'])
 
 
 class CutterMapCell(AuditMixin):
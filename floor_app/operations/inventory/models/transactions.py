@@ -11,6 +11,7 @@ Every stock movement or status change is recorded here for:
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PostingMixin
 
 
@@ -318,17 +319,7 @@ class InventoryTransaction(PostingMixin):
         """Generate a unique transaction number."""
         from datetime import datetime
         prefix = datetime.now().strftime("TXN%Y%m%d")
-        last = cls.objects.filter(
-            transaction_number__startswith=prefix
-        ).order_by('-transaction_number').first()
-
-        if last:
-            last_seq = int(last.transaction_number[-6:])
-            new_seq = last_seq + 1
-        else:
-            new_seq = 1
-
-        return f"{prefix}{new_seq:06d}"
+        return sequences.next_number(cls.objects, 'transaction_number', prefix, width=6, block=True)
 
     def save(self, *args, **kwargs):
         if not self.transaction_number:
@@ -6,8 +6,10 @@ Business logic services for inventory operations.
 
 from .bom_validator import CutterBOMValidator
 from .availability_service import CutterAvailabilityService
+from .cutter_grid import CutterGridEngine
 
 __all__ = [
     'CutterBOMValidator',
     'CutterAvailabilityService',
+    'CutterGridEngine',
 ]
@@ -164,61 +164,22 @@ class CutterBOMValidator:
         Returns:
             ValidationResult with complete validation summary
         """
-        from floor_app.operations.inventory.models import CutterBOMSummary
-
-        errors = []
-        warnings = []
-        summary_data = {}
-
-        # Validate each cutter type in BOM
-        for summary in self.bom_grid.summaries.all():
-            cutter_type = summary.cutter_type
-            required = summary.required_quantity
-
-            # Count actual in map
-            actual = self.map_header.cells.filter(
-                actual_cutter_type=cutter_type
-            ).count()
+        from .cutter_grid import CutterGridEngine
 
-            remaining = required - actual
+        result = CutterGridEngine.for_map(self.map_header).validate()
+        errors = result['errors']
+        warnings = result['warnings']
 
-            summary_data[str(cutter_type)] = {
-                'cutter_type_id': cutter_type.id,
-                'required': required,
-                'actual': actual,
-                'remaining': remaining,
-                'status': 'OK' if remaining == 0 else ('UNDER' if remaining > 0 else 'OVER')
+        summary_data = {}
+        for cutter_type_id, counts in result['summary'].items():
+            summary_data[counts['cutter_type']] = {
+                'cutter_type_id': cutter_type_id,
+                'required': counts['required'],
+                'actual': counts['actual'],
+                'remaining': counts['remaining'],
+                'status': counts['status'],
             }
 
-            if remaining > 0:
-                warnings.append(
-                    f"{cutter_type}: Need {remaining} more (has {actual}/{required})"
-                )
-            elif remaining < 0:
-                errors.append(
-                    f"{cutter_type}: Over-entered by {abs(remaining)} (has {actual}/{required})"
-                )
-
-        # Check for substitutions
-        substitutions = self.map_header.cells.filter(
-            required_cutter_type__isnull=False,
-            actual_cutter_type__isnull=False
-        ).exclude(
-            required_cutter_type=models.F('actual_cutter_type')
-        ).count()
-
-        if substitutions > 0:
-            warnings.append(f"{substitutions} cells have substitutions")
-
-        # Check for empty required cells
-        empty_required = self.map_header.cells.filter(
-            required_cutter_type__isnull=False,
-            actual_cutter_type__isnull=True
-        ).count()
-
-        if empty_required > 0:
-            warnings.append(f"{empty_required} required cells are still empty")
-
         # Overall validation
         is_valid = len(errors) == 0
 
@@ -229,8 +190,8 @@ class CutterBOMValidator:
                 'summary': summary_data,
                 'total_errors': len(errors),
                 'total_warnings': len(warnings),
-                'empty_required': empty_required,
-                'substitutions': substitutions,
+                'empty_required': result['empty_required'],
+                'substitutions': result['substitutions'],
             },
             warnings=warnings + errors
         )
@@ -242,26 +203,13 @@ class CutterBOMValidator:
         Returns:
             Dict mapping cutter_type_id to remaining quantity info
         """
-        from floor_app.operations.inventory.models import CutterBOMSummary
-
-        remaining = {}
+        from .cutter_grid import CutterGridEngine
 
-        for summary in self.bom_grid.summaries.all():
-            cutter_type = summary.cutter_type
-            required = summary.required_quantity
+        remaining = CutterGridEngine.for_map(self.map_header).remaining()
 
-            # Count actual in map
-            actual = self.map_header.cells.filter(
-                actual_cutter_type=cutter_type
-            ).count()
-
-            remaining[cutter_type.id] = {
-                'cutter_type': str(cutter_type),
-                'required': required,
-                'actual': actual,
-                'remaining': required - actual,
-                'percentage': int((actual / required * 100) if required > 0 else 0),
-            }
+        for info in remaining.values():
+            required = info['required']
+            info['percentage'] = int((info['actual'] / required * 100) if required > 0 else 0)
 
         return remaining
 
@@ -353,7 +301,3 @@ class CutterBOMValidator:
                 'has_inventory': True,
             }
         )
-
-
-# Import models at end to avoid circular imports
-from django.db import models
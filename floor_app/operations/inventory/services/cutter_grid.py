@@ -0,0 +1,275 @@
+"""
+Cutter Grid Engine
+
+Dense in-memory view of a cutter BOM grid and one of its maps.
+
+Validating a map used to count the map cells once per BOM summary row,
+plus once more for the empty cells; remaining quantities and grid totals
+queried the cells again. CutterGridEngine instead loads each side once:
+
+1. the BOM grid cells (with the cutter type labels) - one query;
+2. the map cells - one query;
+
+into flat arrays indexed by blade, pocket and primary/secondary, with the
+cutter types numbered densely (0 = empty cell). Required, actual and
+remaining counts are then bincounts over those arrays, and substitutions,
+empty cells and colours come from a single pass over the slots. Each side
+is loaded on first use, so an engine used only for map counts never reads
+the BOM cells.
+
+NumPy is not a dependency of this project: the arrays are stdlib
+`array`s and the counting is plain Python, which is a few hundred
+microseconds for a 300-pocket bit.
+
+Usage:
+    engine = CutterGridEngine.for_map(map_header)
+    result = engine.validate()
+"""
+
+from array import array
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+# Cell sides, in the order of the slot index
+PRIMARY, SECONDARY = 0, 1
+
+
+def bincount(values, length: int) -> List[int]:
+    """Occurrences of each value in range(length)."""
+    counts = [0] * length
+    for value in values:
+        counts[value] += 1
+    return counts
+
+
+class CutterGridEngine:
+    """
+    Required-versus-actual cutter counts of a BOM grid and a map.
+
+    Args:
+        grid_id: CutterBOMGridHeader pk
+        map_header: CutterMapHeader compared with the grid (optional)
+    """
+
+    def __init__(self, grid_id: int, map_header=None):
+        self.grid_id = grid_id
+        self.map_header = map_header
+        # Cutter type pk -> dense index (0 is kept for empty cells)
+        self.type_ids: List[Optional[int]] = [None]
+        self.type_index: Dict[int, int] = {}
+        self.labels: Dict[int, str] = {}
+
+    @classmethod
+    def for_map(cls, map_header):
+        return cls(map_header.source_bom_grid_id, map_header)
+
+    def _index(self, type_id: Optional[int]) -> int:
+        if type_id is None:
+            return 0
+        index = self.type_index.get(type_id)
+        if index is None:
+            index = self.type_index[type_id] = len(self.type_ids)
+            self.type_ids.append(type_id)
+        return index
+
+    @staticmethod
+    def _shape(rows) -> Tuple[int, int]:
+        blades = max((row[0] for row in rows), default=0)
+        pockets = max((row[1] for row in rows), default=0)
+        return blades, pockets
+
+    @staticmethod
+    def slot(blade: int, pocket: int, is_primary: bool, pockets: int) -> int:
+        """Array position of a cell."""
+        return ((blade - 1) * pockets + (pocket - 1)) * 2 + (PRIMARY if is_primary else SECONDARY)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def bom(self):
+        """(blades, pockets, cutter type per slot) of the BOM grid."""
+        from floor_app.operations.inventory.models import CutterBOMGridCell, CutterDetail
+
+        rows = list(
+            CutterBOMGridCell.objects.filter(grid_header_id=self.grid_id).values_list(
+                'blade_number', 'pocket_number', 'is_primary', 'cutter_type_id',
+                'cutter_type__sap_number', 'cutter_type__cutter_type',
+                'cutter_type__cutter_size', 'cutter_type__grade',
+            ).order_by('blade_number', '-is_primary', 'pocket_number')
+        )
+        blades, pockets = self._shape(rows)
+        types = array('i', bytes(4 * blades * pockets * 2))
+
+        for blade, pocket, is_primary, type_id, sap_number, cutter_type, size, grade in rows:
+            types[self.slot(blade, pocket, is_primary, pockets)] = self._index(type_id)
+            if type_id is not None and type_id not in self.labels:
+                self.labels[type_id] = str(CutterDetail(
+                    item_id=type_id, sap_number=sap_number, cutter_type=cutter_type,
+                    cutter_size=size, grade=grade,
+                ))
+        return blades, pockets, types
+
+    @cached_property
+    def map(self):
+        """(pockets, required type, actual type and status per slot) of the map."""
+        if self.map_header is None:
+            raise ValueError("CutterGridEngine has no map")
+
+        rows = list(self.map_header.cells.values_list(
+            'blade_number', 'pocket_number', 'is_primary',
+            'required_cutter_type_id', 'actual_cutter_type_id', 'status',
+        ))
+        blades, pockets = self._shape(rows)
+        size = blades * pockets * 2
+        required = array('i', bytes(4 * size))
+        actual = array('i', bytes(4 * size))
+        statuses = [None] * size
+
+        for blade, pocket, is_primary, required_id, actual_id, status in rows:
+            slot = self.slot(blade, pocket, is_primary, pockets)
+            required[slot] = self._index(required_id)
+            actual[slot] = self._index(actual_id)
+            statuses[slot] = status
+        return pockets, required, actual, statuses
+
+    # ------------------------------------------------------------------
+    # Counts
+    # ------------------------------------------------------------------
+
+    def bom_types(self) -> List[int]:
+        """Cutter type pks of the BOM, in grid order."""
+        self.bom  # Loading the BOM fills self.labels
+        return list(self.labels)
+
+    def required_counts(self) -> Dict[int, Dict[str, int]]:
+        """Required total, primary and secondary count per BOM cutter type."""
+        _blades, _pockets, types = self.bom
+        length = len(self.type_ids)
+        primary = bincount(types[PRIMARY::2], length)
+        secondary = bincount(types[SECONDARY::2], length)
+
+        counts = {}
+        for type_id in self.bom_types():
+            index = self.type_index[type_id]
+            counts[type_id] = {
+                'total': primary[index] + secondary[index],
+                'primary': primary[index],
+                'secondary': secondary[index],
+            }
+        return counts
+
+    def totals(self) -> Tuple[int, int]:
+        """(primary, secondary) cells of the BOM holding a cutter type."""
+        _blades, _pockets, types = self.bom
+        return (
+            sum(1 for index in types[PRIMARY::2] if index),
+            sum(1 for index in types[SECONDARY::2] if index),
+        )
+
+    def actual_counts(self) -> List[int]:
+        """Map cells holding each cutter type, by dense index."""
+        _pockets, _required, actual, _statuses = self.map
+        return bincount(actual, len(self.type_ids))
+
+    def actual_count(self, type_id: int) -> int:
+        """Map cells holding one cutter type."""
+        actual = self.actual_counts()
+        index = self.type_index.get(type_id)
+        return actual[index] if index else 0
+
+    def remaining(self) -> Dict[int, Dict]:
+        """Required, actual and remaining quantity per BOM cutter type."""
+        required_counts = self.required_counts()
+        # Counted after the BOM is loaded, so every BOM type has an index
+        actual = self.actual_counts()
+        result = {}
+        for type_id, required in required_counts.items():
+            count = actual[self.type_index[type_id]]
+            result[type_id] = {
+                'cutter_type': self.labels[type_id],
+                'required': required['total'],
+                'actual': count,
+                'remaining': required['total'] - count,
+            }
+        return result
+
+    def cell_states(self) -> Dict[str, List]:
+        """
+        One pass over the map slots.
+
+        Returns:
+            dict: 'substitutions' ((blade, pocket, is_primary, required pk,
+            actual pk) per substituted cell), 'empty_required' (count) and
+            'colors' ({(blade, pocket, is_primary): colour})
+        """
+        pockets, required, actual, statuses = self.map
+        scheme = self.map_header.get_color_scheme()
+        substitutions = []
+        empty_required = 0
+        colors = {}
+
+        for slot, status in enumerate(statuses):
+            if status is None:
+                continue
+            position, side = divmod(slot, 2)
+            blade, pocket = divmod(position, pockets)
+            cell = (blade + 1, pocket + 1, side == PRIMARY)
+
+            colors[cell] = scheme.get(status, '#ffffff')
+            if required[slot]:
+                if not actual[slot]:
+                    empty_required += 1
+                elif actual[slot] != required[slot]:
+                    substitutions.append(cell + (self.type_ids[required[slot]], self.type_ids[actual[slot]]))
+
+        return {
+            'substitutions': substitutions,
+            'empty_required': empty_required,
+            'colors': colors,
+        }
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def validate(self) -> Dict:
+        """
+        Validate the map against the BOM grid.
+
+        Returns:
+            dict: is_valid, errors, warnings, summary (per cutter type pk),
+            substitutions and empty_required
+        """
+        result = {
+            'is_valid': True,
+            'errors': [],
+            'warnings': [],
+            'summary': {},
+        }
+
+        for type_id, counts in self.remaining().items():
+            label, required, actual, remaining = (
+                counts['cutter_type'], counts['required'], counts['actual'], counts['remaining']
+            )
+            result['summary'][type_id] = dict(
+                counts, status='OK' if remaining == 0 else ('UNDER' if remaining > 0 else 'OVER')
+            )
+
+            if remaining > 0:
+                result['warnings'].append(f"{label}: Need {remaining} more (has {actual}/{required})")
+            elif remaining < 0:
+                result['errors'].append(f"{label}: Over-entered by {abs(remaining)} (has {actual}/{required})")
+                result['is_valid'] = False
+
+        states = self.cell_states()
+        substitutions = len(states['substitutions'])
+        if substitutions > 0:
+            result['warnings'].append(f"{substitutions} cells have substitutions")
+        if states['empty_required'] > 0:
+            result['warnings'].append(f"{states['empty_required']} required cells are still empty")
+
+        result['substitutions'] = substitutions
+        result['empty_required'] = states['empty_required']
+        return result
@@ -0,0 +1,341 @@
+"""
+Cutter Ledger Service
+
+Period-closed balances for cutter inventory.
+
+CutterInventorySummary.refresh used to aggregate the full InventoryTransaction
+history of an item and ownership category four times (lifetime in, lifetime
+out, 6-month and 3-month consumption), so its cost grew with history.
+CutterLedger instead:
+
+1. closes complete months into CutterLedgerPeriod rows (one grouped
+   aggregate per month, run once) - lazily, on the first window_totals()
+   call after a month ends;
+2. answers a window [start, now) as the closed months inside it plus the
+   raw transactions of the partial month at its start and of the months
+   not closed yet - so every window reads at most about two months of
+   transactions, however long the history.
+
+Closed months stay correct when their transactions change: saves and
+deletes of a backdated transaction rebuild that month's row (see
+inventory.signals). Bulk writes bypass signals; reconcile() compares every
+closed row with the full transaction history and can repair drift.
+
+Usage:
+    python manage.py reconcile_cutter_ledger --close
+    python manage.py reconcile_cutter_ledger --fix
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from typing import Dict, List, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+# Totals kept per period and window
+FIELDS = ('quantity_in', 'quantity_out', 'consumed')
+
+# Reconciliation compares at the precision of the transaction quantities
+PRECISION = Decimal('0.0001')
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+def ceil_month(day: date) -> date:
+    """First month start on or after `day`."""
+    return day if day.day == 1 else next_month(day)
+
+
+def local_midnight(day: date) -> datetime:
+    """Start of a local calendar day, as transaction_date filters with a date use."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _transactions():
+    from floor_app.operations.inventory.models import InventoryTransaction
+
+    return InventoryTransaction.objects.filter(item__isnull=False, cutter_ownership_category__isnull=False)
+
+
+def _transaction_sums(prefix='total_', q=None):
+    """Sum aggregates of InventoryTransaction rows matching `q`."""
+    positive = Q(quantity_out__gt=0) if q is None else q & Q(quantity_out__gt=0)
+    return {
+        f'{prefix}quantity_in': Sum('quantity_in', filter=q),
+        f'{prefix}quantity_out': Sum('quantity_out', filter=q),
+        f'{prefix}consumed': Sum('quantity_out', filter=positive),
+    }
+
+
+class CutterLedger:
+    """
+    Monthly closing and window totals of cutter InventoryTransactions.
+
+    Totals are keyed by (item_id, ownership_category_id); only transactions
+    with both set count, as in CutterInventorySummary.
+    """
+
+    def closed_through(self) -> Optional[date]:
+        """First day after the last closed month, or None if nothing is closed."""
+        from floor_app.operations.inventory.models import CutterLedgerClose
+
+        last = CutterLedgerClose.objects.order_by('-period_start').values_list('period_start', flat=True).first()
+        return next_month(last) if last else None
+
+    # ------------------------------------------------------------------
+    # Closing
+    # ------------------------------------------------------------------
+
+    def period_totals(self, start: date, end: date, item=None, ownership_category=None) -> Dict:
+        """Raw transaction totals per (item, category) for local days [start, end)."""
+        rows = _transactions().filter(
+            transaction_date__gte=local_midnight(start),
+            transaction_date__lt=local_midnight(end),
+        )
+        if item is not None:
+            rows = rows.filter(item=item)
+        if ownership_category is not None:
+            rows = rows.filter(cutter_ownership_category=ownership_category)
+
+        totals = {}
+        for row in rows.values('item_id', 'cutter_ownership_category_id').annotate(
+            transaction_count=Count('pk'), **_transaction_sums()
+        ).order_by():
+            totals[(row['item_id'], row['cutter_ownership_category_id'])] = {
+                'transaction_count': row['transaction_count'],
+                **{field: row[f'total_{field}'] or Decimal('0') for field in FIELDS},
+            }
+        return totals
+
+    def close_periods(self, through: Optional[date] = None) -> int:
+        """
+        Close every complete month before the month of `through` (default:
+        today) that is not closed yet.
+
+        Returns:
+            int: Number of months closed
+        """
+        target = month_start(through or timezone.localdate())
+        start = self.closed_through()
+        if start is None:
+            first = _transactions().order_by('transaction_date').values_list('transaction_date', flat=True).first()
+            if first is None:
+                return 0
+            start = month_start(timezone.localdate(first))
+
+        closed = 0
+        while start < target:
+            self._close_month(start)
+            start = next_month(start)
+            closed += 1
+        return closed
+
+    def ensure_closed(self) -> Optional[date]:
+        """
+        Close the complete months not closed yet; return closed_through().
+
+        Only the first call after a month ends does any closing.
+        """
+        closed_through = self.closed_through()
+        if closed_through is not None and closed_through >= month_start(timezone.localdate()):
+            return closed_through
+        try:
+            if not self.close_periods():
+                return closed_through
+        except IntegrityError:
+            # Another process closed the month first
+            pass
+        return self.closed_through()
+
+    def _close_month(self, period_start: date):
+        from floor_app.operations.inventory.models import CutterLedgerClose, CutterLedgerPeriod
+
+        totals = self.period_totals(period_start, next_month(period_start))
+        with transaction.atomic():
+            CutterLedgerPeriod.objects.filter(period_start=period_start).delete()
+            CutterLedgerPeriod.objects.bulk_create([
+                CutterLedgerPeriod(item_id=item_id, ownership_category_id=category_id,
+                                   period_start=period_start, **values)
+                for (item_id, category_id), values in totals.items()
+            ], batch_size=1000)
+            CutterLedgerClose.objects.create(
+                period_start=period_start,
+                transaction_count=sum(values['transaction_count'] for values in totals.values()),
+            )
+
+    def rebuild_period(self, item_id, ownership_category_id, period_start: date):
+        """Recompute one closed month of one item and category."""
+        from floor_app.operations.inventory.models import CutterLedgerPeriod
+
+        period_start = month_start(period_start)
+        values = self.period_totals(
+            period_start, next_month(period_start), item=item_id, ownership_category=ownership_category_id
+        ).get((item_id, ownership_category_id))
+        key = {'item_id': item_id, 'ownership_category_id': ownership_category_id, 'period_start': period_start}
+        if values is None:
+            CutterLedgerPeriod.objects.filter(**key).delete()
+        else:
+            CutterLedgerPeriod.objects.update_or_create(**key, defaults=values)
+
+    def transaction_changed(self, item_id, ownership_category_id, transaction_date):
+        """Keep closed months in step with a saved or deleted transaction."""
+        if item_id is None or ownership_category_id is None or transaction_date is None:
+            return
+        period_start = month_start(timezone.localdate(transaction_date))
+        if period_start >= month_start(timezone.localdate()):
+            # The current month is never closed
+            return
+        closed_through = self.closed_through()
+        if closed_through and period_start < closed_through:
+            self.rebuild_period(item_id, ownership_category_id, period_start)
+
+    # ------------------------------------------------------------------
+    # Window totals
+    # ------------------------------------------------------------------
+
+    def window_totals(self, windows: Dict[str, Optional[date]], item=None, ownership_category=None,
+                      items=None) -> Dict:
+        """
+        Totals of transactions dated on/after each window start.
+
+        Args:
+            windows: name -> first local day of the window (None = all history)
+            item / ownership_category: Optional filters (instance or pk)
+            items: Optional item pks to restrict to
+
+        Returns:
+            dict: (item_id, ownership_category_id) -> name ->
+                {'quantity_in', 'quantity_out', 'consumed'} (Decimal or None)
+        """
+        from floor_app.operations.inventory.models import CutterLedgerPeriod
+
+        closed_through = self.ensure_closed()
+        closed_dt = local_midnight(closed_through) if closed_through else None
+        totals = {}
+
+        def add(key, name, field, value):
+            if value is None:
+                return
+            window = totals.setdefault(key, {}).setdefault(name, dict.fromkeys(FIELDS))
+            window[field] = value if window[field] is None else window[field] + value
+
+        # Closed months fully inside each window
+        if closed_through:
+            periods = CutterLedgerPeriod.objects.filter(period_start__lt=closed_through)
+            if item is not None:
+                periods = periods.filter(item=item)
+            if items is not None:
+                periods = periods.filter(item__in=items)
+            if ownership_category is not None:
+                periods = periods.filter(ownership_category=ownership_category)
+
+            aggregates = {}
+            for name, start in windows.items():
+                q = None if start is None else Q(period_start__gte=ceil_month(start))
+                for field in FIELDS:
+                    aggregates[f'{name}_{field}'] = Sum(field, filter=q)
+            for row in periods.values('item_id', 'ownership_category_id').annotate(**aggregates).order_by():
+                key = (row['item_id'], row['ownership_category_id'])
+                for name in windows:
+                    for field in FIELDS:
+                        add(key, name, field, row[f'{name}_{field}'])
+
+        # Transactions outside the closed months of each window
+        window_filters = {}
+        for name, start in windows.items():
+            start_dt = local_midnight(start) if start else None
+            if closed_dt is None:
+                q = Q(transaction_date__gte=start_dt) if start_dt else Q()
+            else:
+                q = Q(transaction_date__gte=max(start_dt, closed_dt) if start_dt else closed_dt)
+                if start_dt and start_dt < closed_dt:
+                    # Partial month at the window start
+                    q |= Q(transaction_date__gte=start_dt,
+                           transaction_date__lt=min(local_midnight(ceil_month(start)), closed_dt))
+            window_filters[name] = q
+
+        rows = _transactions()
+        if item is not None:
+            rows = rows.filter(item=item)
+        if items is not None:
+            rows = rows.filter(item__in=items)
+        if ownership_category is not None:
+            rows = rows.filter(cutter_ownership_category=ownership_category)
+        if all(window_filters.values()):
+            # Only read the rows some window needs (the date index)
+            rows = rows.filter(reduce(or_, window_filters.values()))
+
+        aggregates = {}
+        for name, q in window_filters.items():
+            aggregates.update(_transaction_sums(f'{name}_', q or None))
+        for row in rows.values('item_id', 'cutter_ownership_category_id').annotate(**aggregates).order_by():
+            key = (row['item_id'], row['cutter_ownership_category_id'])
+            for name in windows:
+                for field in FIELDS:
+                    add(key, name, field, row[f'{name}_{field}'])
+
+        return totals
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def reconcile(self, fix: bool = False) -> List[Dict]:
+        """
+        Compare every closed period row with the transactions it covers.
+
+        Args:
+            fix: Rebuild the rows that differ
+
+        Returns:
+            list of dicts (item_id, ownership_category_id, period_start,
+            stored, expected) for each difference; stored or expected is
+            None for a missing / unexpected row
+        """
+        from floor_app.operations.inventory.models import CutterLedgerPeriod
+
+        closed_through = self.closed_through()
+        if closed_through is None:
+            return []
+
+        def rounded(values, prefix=''):
+            return tuple((values[prefix + field] or Decimal('0')).quantize(PRECISION) for field in FIELDS)
+
+        expected = {}
+        for row in _transactions().filter(transaction_date__lt=local_midnight(closed_through)).annotate(
+            period=TruncMonth('transaction_date')
+        ).values('item_id', 'cutter_ownership_category_id', 'period').annotate(**_transaction_sums()).order_by():
+            period = row['period']
+            period_start = timezone.localdate(period) if isinstance(period, datetime) else period
+            expected[(row['item_id'], row['cutter_ownership_category_id'], period_start)] = rounded(row, 'total_')
+
+        stored = {
+            (row['item_id'], row['ownership_category_id'], row['period_start']): rounded(row)
+            for row in CutterLedgerPeriod.objects.filter(period_start__lt=closed_through).values(
+                'item_id', 'ownership_category_id', 'period_start', *FIELDS
+            )
+        }
+
+        differences = []
+        for key in sorted(set(expected) | set(stored), key=lambda k: (k[2], k[0], k[1])):
+            if expected.get(key) == stored.get(key):
+                continue
+            item_id, category_id, period_start = key
+            differences.append({
+                'item_id': item_id, 'ownership_category_id': category_id, 'period_start': period_start,
+                'stored': stored.get(key), 'expected': expected.get(key),
+            })
+            if fix:
+                self.rebuild_period(item_id, category_id, period_start)
+        return differences
@@ -0,0 +1,46 @@
+"""
+Inventory Signals
+
+Keep closed cutter ledger periods (CutterLedgerPeriod) in step with
+changes to the transactions of a closed month.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import InventoryTransaction
+from .services.cutter_ledger import CutterLedger
+
+LEDGER_FIELDS = ('item_id', 'cutter_ownership_category_id', 'transaction_date')
+# As passed in save(update_fields=...)
+LEDGER_FIELD_NAMES = {'item', 'item_id', 'cutter_ownership_category', 'cutter_ownership_category_id', 'transaction_date'}
+
+
+@receiver(pre_save, sender=InventoryTransaction)
+def remember_ledger_position(sender, instance, raw=False, update_fields=None, **kwargs):
+    """An edit may move a transaction out of a closed month - keep where it was."""
+    instance._ledger_previous = None
+    if raw or instance._state.adding:
+        # A new posting has no previous position
+        return
+    if update_fields is not None and not LEDGER_FIELD_NAMES & set(update_fields):
+        # The position cannot have changed
+        return
+    instance._ledger_previous = sender.objects.filter(pk=instance.pk).values_list(*LEDGER_FIELDS).first()
+
+
+@receiver(post_save, sender=InventoryTransaction)
+def update_ledger_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    positions = {tuple(getattr(instance, field) for field in LEDGER_FIELDS)}
+    if getattr(instance, '_ledger_previous', None):
+        positions.add(instance._ledger_previous)
+    ledger = CutterLedger()
+    for position in positions:
+        ledger.transaction_changed(*position)
+
+
+@receiver(post_delete, sender=InventoryTransaction)
+def update_ledger_on_delete(sender, instance, **kwargs):
+    CutterLedger().transaction_changed(*(getattr(instance, field) for field in LEDGER_FIELDS))
@@ -4,5 +4,6 @@ Inventory module tests.
 Test suites:
 - test_location_crud: Location CRUD functionality tests
 - test_bit_design_crud: Bit Design CRUD functionality tests
+- test_cutter_ledger: Period-closed cutter balances
 - test_models: Inventory model tests
 """
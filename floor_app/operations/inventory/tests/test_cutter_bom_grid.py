@@ -0,0 +1,214 @@
+"""
+Tests for the Cutter BOM grid (models.cutter_bom_grid).
+"""
+
+from django.test import TestCase
+
+from floor_app.operations.engineering.models import BitDesign, BitDesignLevel, BitDesignRevision, BOMHeader
+from floor_app.operations.inventory.models import (
+    ConditionType,
+    CutterBOMGridCell,
+    CutterBOMGridHeader,
+    CutterDetail,
+    CutterMapHeader,
+    Item,
+    ItemCategory,
+    OwnershipType,
+    SerialUnit,
+    UnitOfMeasure,
+)
+from floor_app.operations.inventory.services import CutterBOMValidator, CutterGridEngine
+from floor_app.operations.production.models import JobCard
+
+
+class CutterGridTestMixin:
+    """Builds a BOM grid with two cutter types."""
+
+    def setUp(self):
+        level = BitDesignLevel.objects.create(code='L5', name='Complete Bit', description='Head, body and cutters')
+        design = BitDesign.objects.create(design_code='DES-GRID', name='Grid Bit', level=level)
+        mat = BitDesignRevision.objects.create(bit_design=design, mat_number='MAT-GRID-R01', revision_code='R01')
+        bom = BOMHeader.objects.create(bom_number='BOM-GRID-001', name='Grid BOM', target_mat=mat)
+        self.grid = CutterBOMGridHeader.objects.create(bom_header=bom, blade_count=3, max_pockets_per_blade=4)
+
+        category = ItemCategory.objects.create(code='CUTTER', name='Cutters')
+        uom = UnitOfMeasure.objects.create(code='EA', name='Each')
+        self.cutter_a = self.create_cutter('1313', category, uom)
+        self.cutter_b = self.create_cutter('1613', category, uom)
+        self.bit = Item.objects.create(sku='BIT-GRID', name='Grid Bit', category=category, uom=uom)
+
+    def create_cutter(self, size, category, uom):
+        item = Item.objects.create(sku=f'CT-{size}', name=f'Cutter {size}', category=category, uom=uom)
+        return CutterDetail.objects.create(
+            item=item, sap_number=f'SAP-{size}', cutter_type='Round', cutter_size=size, grade='CT97', category='P'
+        )
+
+    def create_cells(self, blades=3, pockets=4):
+        """Pockets 1-2 are secondary; every third pocket holds cutter_b."""
+        cells = []
+        for blade in range(1, blades + 1):
+            for pocket in range(1, pockets + 1):
+                cells.append(CutterBOMGridCell(
+                    grid_header=self.grid,
+                    blade_number=blade,
+                    pocket_number=pocket,
+                    is_primary=pocket > 2,
+                    cutter_type=self.cutter_b if (blade + pocket) % 3 == 0 else self.cutter_a,
+                    formation_order=(pockets - pocket) * blades + blade,
+                ))
+        CutterBOMGridCell.objects.bulk_create(cells)
+        self.grid.refresh_summaries()
+
+
+class CutterBOMSequenceTest(CutterGridTestMixin, TestCase):
+    """Renumbering must follow the ordering schemes."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_cells()
+        # An empty pocket is never numbered
+        CutterBOMGridCell.objects.create(grid_header=self.grid, blade_number=3, pocket_number=5)
+
+    def sequences(self, *ordering):
+        return list(
+            self.grid.cells.filter(cutter_type__isnull=False).order_by(*ordering).values_list('cutter_sequence', flat=True)
+        )
+
+    def renumber(self, scheme):
+        self.grid.cutter_ordering_scheme = scheme
+        return self.grid.assign_all_sequence_numbers()
+
+    def test_continuous(self):
+        self.assertEqual(self.renumber('CONTINUOUS'), 12)
+        self.assertEqual(self.sequences('blade_number', '-is_primary', 'pocket_number'), list(range(1, 13)))
+        self.assertIsNone(self.grid.cells.get(pocket_number=5).cutter_sequence)
+
+    def test_reset_per_type(self):
+        self.renumber('RESET_PER_TYPE')
+        cells = self.grid.cells.filter(cutter_type__isnull=False).order_by('blade_number', 'pocket_number')
+        primary = cells.filter(is_primary=True)
+        secondary = cells.filter(is_primary=False)
+        self.assertEqual([c.cutter_sequence for c in primary], list(range(1, 7)))
+        self.assertEqual([c.cutter_sequence for c in secondary], list(range(1, 7)))
+
+    def test_formation(self):
+        self.renumber('FORMATION')
+        self.assertEqual(self.sequences('formation_order'), list(range(1, 13)))
+
+    def test_unchanged_cells_not_written(self):
+        self.renumber('CONTINUOUS')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.grid.assign_all_sequence_numbers(), 0)
+
+        # Switching scheme only writes the cells whose number moved
+        with self.assertNumQueries(2):
+            changed = self.renumber('RESET_PER_TYPE')
+        self.assertLess(changed, 12)
+
+
+class CutterGridEngineTest(CutterGridTestMixin, TestCase):
+    """Map validation from one read of the BOM cells and one of the map cells."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_cells()
+        serial_unit = SerialUnit.objects.create(
+            item=self.bit, serial_number='SN-GRID-1',
+            condition=ConditionType.objects.create(code='NEW', name='New'),
+            ownership=OwnershipType.objects.create(code='ARDT', name='ARDT'),
+        )
+        job_card = JobCard.objects.create(job_card_number='JC-GRID-1', serial_unit=serial_unit)
+        self.map = CutterMapHeader.objects.create(job_card=job_card, map_type='AS_BUILT', source_bom_grid=self.grid)
+        self.map.create_from_bom()
+
+    def fill(self, count, cutter_type=None, status='CORRECT'):
+        """Install cutters in the first `count` empty cells (default: the required type)."""
+        for cell in self.map.cells.filter(actual_cutter_type__isnull=True)[:count]:
+            cell.actual_cutter_type = cutter_type or cell.required_cutter_type
+            cell.status = status
+            cell.save()
+
+    def test_counts_match_summaries(self):
+        engine = CutterGridEngine.for_map(self.map)
+        required = engine.required_counts()
+        for summary in self.grid.summaries.all():
+            self.assertEqual(required[summary.cutter_type_id], {
+                'total': summary.required_quantity,
+                'primary': summary.primary_count,
+                'secondary': summary.secondary_count,
+            })
+        self.assertEqual(engine.totals(), (6, 6))
+
+    def test_remaining_and_empty_cells(self):
+        self.fill(5)
+        engine = CutterGridEngine.for_map(self.map)
+        remaining = engine.remaining()
+        self.assertEqual(sum(r['actual'] for r in remaining.values()), 5)
+        self.assertEqual(sum(r['remaining'] for r in remaining.values()), 7)
+        self.assertEqual(engine.cell_states()['empty_required'], 7)
+
+        for summary in self.grid.summaries.all():
+            self.assertEqual(
+                summary.get_remaining_for_map(self.map, engine=engine),
+                remaining[summary.cutter_type_id]['remaining'],
+            )
+
+    def test_substitutions_and_colors(self):
+        self.fill(12)
+        cell = self.map.cells.filter(required_cutter_type=self.cutter_a).first()
+        cell.actual_cutter_type = self.cutter_b
+        cell.status = 'SUBSTITUTED'
+        cell.save()
+
+        states = CutterGridEngine.for_map(self.map).cell_states()
+        self.assertEqual(states['substitutions'], [
+            (cell.blade_number, cell.pocket_number, cell.is_primary, self.cutter_a.pk, self.cutter_b.pk)
+        ])
+        self.assertEqual(states['colors'][(cell.blade_number, cell.pocket_number, cell.is_primary)], '#ffe0b2')
+        self.assertEqual(len(states['colors']), 12)
+
+    def test_validate_against_bom(self):
+        self.fill(12)
+        self.map.refresh_from_db()
+        # Two reads and the status update, whatever the pocket count
+        with self.assertNumQueries(3):
+            result = self.map.validate_against_bom()
+        self.assertTrue(result['is_valid'])
+        self.assertEqual(self.map.validation_status, 'VALID')
+
+        extra = self.map.cells.filter(required_cutter_type=self.cutter_a).first()
+        extra.actual_cutter_type = self.cutter_b
+        extra.save()
+        result = self.map.validate_against_bom()
+        self.assertFalse(result['is_valid'])
+        self.assertEqual(result['summary'][self.cutter_b.pk]['status'], 'OVER')
+        self.assertEqual(result['summary'][self.cutter_a.pk]['status'], 'UNDER')
+        self.assertEqual(result['substitutions'], 1)
+        self.assertEqual(self.map.validation_status, 'HAS_ERRORS')
+
+    def test_validate_messages(self):
+        self.fill(10)
+        cell = self.map.cells.filter(actual_cutter_type=self.cutter_a).first()
+        cell.actual_cutter_type = self.cutter_b
+        cell.save()
+
+        result = CutterGridEngine.for_map(self.map).validate()
+        self.assertFalse(result['is_valid'])
+        self.assertEqual((result['substitutions'], result['empty_required']), (1, 2))
+        self.assertIn('1 cells have substitutions', result['warnings'])
+        self.assertIn('2 required cells are still empty', result['warnings'])
+        self.assertTrue(any('Over-entered' in error for error in result['errors']))
+
+    def test_validator_uses_engine(self):
+        self.fill(3)
+        result = CutterBOMValidator(self.map).validate_entire_map()
+        self.assertEqual(result.data['empty_required'], 9)
+        self.assertEqual(
+            {data['cutter_type_id'] for data in result.data['summary'].values()},
+            {self.cutter_a.pk, self.cutter_b.pk},
+        )
+
+    def test_recalculate_totals(self):
+        with self.assertNumQueries(2):
+            self.grid.recalculate_totals()
+        self.assertEqual((self.grid.total_primary_cutters, self.grid.total_secondary_cutters), (6, 6))
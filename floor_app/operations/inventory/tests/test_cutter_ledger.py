@@ -0,0 +1,159 @@
+"""
+Tests for period-closed cutter balances (services.cutter_ledger).
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from floor_app.operations.inventory.models import (
+    CutterInventorySummary,
+    CutterLedgerPeriod,
+    CutterOwnershipCategory,
+    InventoryTransaction,
+    Item,
+    ItemCategory,
+    UnitOfMeasure,
+)
+from floor_app.operations.inventory.services.cutter_ledger import CutterLedger
+
+
+class CutterLedgerTest(TestCase):
+    """Closed periods must give the same numbers as the full history."""
+
+    def setUp(self):
+        category = ItemCategory.objects.create(code='CUTTER', name='Cutters')
+        uom = UnitOfMeasure.objects.create(code='EA', name='Each')
+        self.item = Item.objects.create(sku='CT-1313', name='Cutter 1313', category=category, uom=uom)
+        self.category = CutterOwnershipCategory.objects.create(code='NEW', name='New Stock', short_name='New')
+        self.other = CutterOwnershipCategory.objects.create(code='ENO', name='ENO As New', short_name='ENO')
+        self.summary = CutterInventorySummary.objects.create(item=self.item, ownership_category=self.category)
+        self.ledger = CutterLedger()
+
+        # (days ago, in, out)
+        for days, quantity_in, quantity_out in [
+            (400, 100, 0), (250, 0, 30), (170, 0, 12), (120, 20, 0), (80, 0, 7),
+            (60, 0, -2), (40, 0, 5), (10, 0, 3), (1, 4, 0),
+        ]:
+            self.post(days, quantity_in, quantity_out)
+        self.post(30, 50, 20, category=self.other)
+
+    def post(self, days, quantity_in, quantity_out, category=None):
+        return InventoryTransaction.objects.create(
+            transaction_type='ADJUSTMENT', item=self.item, cutter_ownership_category=category or self.category,
+            quantity=quantity_in - quantity_out, quantity_in=quantity_in, quantity_out=quantity_out,
+            transaction_date=timezone.now() - timedelta(days=days, hours=6),
+        )
+
+    def full_history(self):
+        rows = InventoryTransaction.objects.filter(item=self.item, cutter_ownership_category=self.category)
+        now = timezone.now()
+
+        def consumed(days):
+            start = timezone.localdate(now) - timedelta(days=days)
+            return sum(r.quantity_out for r in rows if r.quantity_out > 0 and timezone.localdate(r.transaction_date) >= start)
+
+        balance = sum(r.quantity_in for r in rows) - sum(r.quantity_out for r in rows)
+        return balance, consumed(182), consumed(91)
+
+    def refreshed(self):
+        self.summary.refresh()
+        self.summary.refresh_from_db()
+        return self.summary.current_balance, self.summary.consumption_6month, self.summary.consumption_3month
+
+    def test_closed_periods_match_full_history(self):
+        self.assertGreater(self.ledger.close_periods(), 10)
+        self.assertEqual(self.ledger.close_periods(), 0)
+        self.assertEqual(self.refreshed(), self.full_history())
+        self.assertEqual(self.refreshed(), (Decimal('69.00'), Decimal('27.00'), Decimal('15.00')))
+
+    def test_refresh_closes_complete_months(self):
+        self.assertIsNone(self.ledger.closed_through())
+        self.assertEqual(self.refreshed(), self.full_history())
+        self.assertEqual(self.ledger.closed_through(), timezone.localdate().replace(day=1))
+        self.assertEqual(self.ledger.close_periods(), 0)
+
+        # Refresh reads closed months from their period rows, not the
+        # transactions (a bulk update bypasses the signals)
+        expected = self.refreshed()
+        InventoryTransaction.objects.filter(quantity_in=100).update(quantity_in=1000)
+        self.assertEqual(self.refreshed(), expected)
+
+    def test_backdated_changes_rebuild_closed_periods(self):
+        self.ledger.close_periods()
+
+        late = self.post(100, 0, 9)
+        self.assertEqual(self.refreshed(), self.full_history())
+
+        late.transaction_date -= timedelta(days=150)
+        late.save()
+        self.assertEqual(self.refreshed(), self.full_history())
+
+        late.delete()
+        self.assertEqual(self.refreshed(), self.full_history())
+        self.assertEqual(self.ledger.reconcile(), [])
+
+    def test_reconcile_finds_and_repairs_drift(self):
+        self.ledger.close_periods()
+        # Bulk updates bypass the signals
+        InventoryTransaction.objects.filter(quantity_out=30).update(quantity_out=35)
+
+        differences = self.ledger.reconcile(fix=True)
+        self.assertEqual(len(differences), 1)
+        self.assertEqual(differences[0]['stored'][1], Decimal('30.0000'))
+        self.assertEqual(differences[0]['expected'][1], Decimal('35.0000'))
+        self.assertEqual(self.ledger.reconcile(), [])
+        self.assertEqual(self.refreshed(), self.full_history())
+        self.assertTrue(CutterLedgerPeriod.objects.filter(ownership_category=self.other).exists())
+
+    def test_saves_that_cannot_touch_closed_months_skip_ledger_lookups(self):
+        self.ledger.close_periods()
+
+        def selected_tables(action):
+            with CaptureQueriesContext(connection) as queries:
+                action()
+            return ' '.join(query['sql'] for query in queries if query['sql'].startswith('SELECT'))
+
+        posting = None
+
+        def create():
+            nonlocal posting
+            posting = self.post(0, 1, 0)
+
+        def annotate():
+            posting.notes = 'Counted twice'
+            posting.save(update_fields=['notes'])
+
+        for action in (create, annotate):
+            tables = selected_tables(action)
+            self.assertNotIn('inventory_transaction', tables)
+            self.assertNotIn('cutter_ledger_close', tables)
+
+    def test_refresh_all_matches_refresh(self):
+        self.ledger.close_periods()
+        other = CutterInventorySummary.objects.create(item=self.item, ownership_category=self.other)
+        expected = {}
+        for summary in (self.summary, other):
+            summary.refresh()
+            summary.refresh_from_db()
+            expected[summary.pk] = (summary.current_balance, summary.consumption_6month, summary.safety_stock, summary.status)
+        CutterInventorySummary.objects.update(current_balance=0, consumption_6month=0, safety_stock=0, status='OK')
+
+        # Summaries, closed_through, periods, transactions, then one UPDATE
+        # per changed summary (their numbers differ) inside a savepoint
+        with self.assertNumQueries(8):
+            self.assertEqual(CutterInventorySummary.refresh_all(), 2)
+
+        # Nothing changed: one UPDATE of last_calculated
+        with self.assertNumQueries(7):
+            CutterInventorySummary.refresh_all()
+
+        for summary in CutterInventorySummary.objects.all():
+            self.assertEqual(
+                (summary.current_balance, summary.consumption_6month, summary.safety_stock, summary.status),
+                expected[summary.pk],
+            )
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q, Count
 from django.db import transaction
+from core import sequences
 from floor_app.operations.journey_management.models import (
     JourneyPlan, JourneyWaypoint, JourneyCheckIn, JourneyDocument, JourneyStatusHistory
 )
@@ -21,18 +22,7 @@ class JourneyService:
         """Generate unique journey number. Format: JRN-YYYY-NNNN"""
         year = timezone.now().year
         prefix = f"JRN-{year}-"
-
-        last_journey = JourneyPlan.objects.filter(
-            journey_number__startswith=prefix
-        ).order_by('-journey_number').first()
-
-        if last_journey:
-            last_number = int(last_journey.journey_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(JourneyPlan.objects, 'journey_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db.models import Q, Count
 from django.db import transaction
+from core import sequences
 from floor_app.operations.meetings.models import (
     MeetingRoom, RoomBooking, MorningMeetingGroup, MorningMeeting,
     MorningMeetingAttendance, MeetingActionItem
@@ -26,18 +27,7 @@ class MeetingService:
         """Generate unique booking number. Format: BK-YYYY-NNNN"""
         year = timezone.now().year
         prefix = f"BK-{year}-"
-
-        last_booking = RoomBooking.objects.filter(
-            booking_number__startswith=prefix
-        ).order_by('-booking_number').first()
-
-        if last_booking:
-            last_number = int(last_booking.booking_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(RoomBooking.objects, 'booking_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -182,18 +172,7 @@ class MeetingService:
         """Generate unique morning meeting number. Format: MM-YYYY-NNNN"""
         year = timezone.now().year
         prefix = f"MM-{year}-"
-
-        last_meeting = MorningMeeting.objects.filter(
-            meeting_number__startswith=prefix
-        ).order_by('-meeting_number').first()
-
-        if last_meeting:
-            last_number = int(last_meeting.meeting_number.split('-')[-1])
-            new_number = last_number + 1
-        else:
-            new_number = 1
-
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(MorningMeeting.objects, 'meeting_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .supplier import Currency, PaymentTerms
 
@@ -438,17 +439,7 @@ class SupplierInvoice(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next internal reference number"""
         year = timezone.now().year
         prefix = f'INV-{year}-'
-        last_inv = cls.all_objects.filter(
-            internal_reference__startswith=prefix
-        ).order_by('-internal_reference').first()
-
-        if last_inv:
-            last_num = int(last_inv.internal_reference.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'internal_reference', prefix, width=5)
 
 
 class SupplierInvoiceLine(AuditMixin):
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .supplier import Currency, Incoterms, PaymentTerms
 
@@ -399,17 +400,7 @@ class PurchaseOrder(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next PO number"""
         year = timezone.now().year
         prefix = f'PO-{year}-'
-        last_po = cls.all_objects.filter(
-            po_number__startswith=prefix
-        ).order_by('-po_number').first()
-
-        if last_po:
-            last_num = int(last_po.po_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'po_number', prefix, width=5)
 
 
 class PurchaseOrderLine(AuditMixin):
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 
 
@@ -256,17 +257,7 @@ class GoodsReceiptNote(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next GRN number"""
         year = timezone.now().year
         prefix = f'GRN-{year}-'
-        last_grn = cls.all_objects.filter(
-            grn_number__startswith=prefix
-        ).order_by('-grn_number').first()
-
-        if last_grn:
-            last_num = int(last_grn.grn_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'grn_number', prefix, width=5)
 
 
 class GRNLine(AuditMixin):
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 
 
@@ -274,17 +275,7 @@ class PurchaseRequisition(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next PR number"""
         year = timezone.now().year
         prefix = f'PR-{year}-'
-        last_pr = cls.all_objects.filter(
-            pr_number__startswith=prefix
-        ).order_by('-pr_number').first()
-
-        if last_pr:
-            last_num = int(last_pr.pr_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'pr_number', prefix, width=5)
 
 
 class PurchaseRequisitionLine(AuditMixin):
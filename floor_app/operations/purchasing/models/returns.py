@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 
 
@@ -294,17 +295,7 @@ class PurchaseReturn(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next return number"""
         year = timezone.now().year
         prefix = f'RET-{year}-'
-        last_return = cls.all_objects.filter(
-            return_number__startswith=prefix
-        ).order_by('-return_number').first()
-
-        if last_return:
-            last_num = int(last_return.return_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'return_number', prefix, width=5)
 
 
 class PurchaseReturnLine(AuditMixin):
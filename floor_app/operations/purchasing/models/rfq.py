@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .supplier import Currency, Incoterms, PaymentTerms
 
@@ -174,17 +175,7 @@ class RequestForQuotation(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next RFQ number"""
         year = timezone.now().year
         prefix = f'RFQ-{year}-'
-        last_rfq = cls.all_objects.filter(
-            rfq_number__startswith=prefix
-        ).order_by('-rfq_number').first()
-
-        if last_rfq:
-            last_num = int(last_rfq.rfq_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'rfq_number', prefix, width=5)
 
 
 class RFQLine(AuditMixin):
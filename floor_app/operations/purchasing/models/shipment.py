@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .supplier import Currency, Incoterms
 
@@ -319,17 +320,7 @@ class OutboundShipment(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next shipment number"""
         year = timezone.now().year
         prefix = f'SHP-{year}-'
-        last_shp = cls.all_objects.filter(
-            shipment_number__startswith=prefix
-        ).order_by('-shipment_number').first()
-
-        if last_shp:
-            last_num = int(last_shp.shipment_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'shipment_number', prefix, width=5)
 
 
 class ShipmentLine(AuditMixin):
@@ -640,17 +631,7 @@ class CustomerReturn(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next customer return number"""
         year = timezone.now().year
         prefix = f'CR-{year}-'
-        last_cr = cls.all_objects.filter(
-            return_number__startswith=prefix
-        ).order_by('-return_number').first()
-
-        if last_cr:
-            last_num = int(last_cr.return_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'return_number', prefix, width=5)
 
 
 class CustomerReturnLine(AuditMixin):
@@ -8,6 +8,7 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 
 
@@ -282,17 +283,7 @@ class InternalTransferOrder(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next transfer number"""
         year = timezone.now().year
         prefix = f'TO-{year}-'
-        last_to = cls.all_objects.filter(
-            transfer_number__startswith=prefix
-        ).order_by('-transfer_number').first()
-
-        if last_to:
-            last_num = int(last_to.transfer_number.split('-')[-1])
-            next_num = last_num + 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'transfer_number', prefix, width=5)
 
 
 class TransferOrderLine(AuditMixin):
@@ -5,6 +5,7 @@ Final quality decisions and release authorization for jobs.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .reference import AcceptanceCriteriaTemplate
 from .ncr import NonconformanceReport
@@ -176,21 +177,9 @@ class QualityDisposition(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         year = timezone.now().year
         prefix = f"COC-{year}-"
 
-        # Find the latest COC number
-        last_disp = QualityDisposition.all_objects.filter(
-            coc_number__startswith=prefix
-        ).order_by('-coc_number').first()
-
-        if last_disp and last_disp.coc_number:
-            try:
-                last_num = int(last_disp.coc_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-
-        self.coc_number = f"{prefix}{next_num:05d}"
+        self.coc_number = sequences.next_number(
+            QualityDisposition.all_objects, 'coc_number', prefix, width=5
+        )
         self.coc_generated_at = timezone.now()
         self.save()
         return self.coc_number
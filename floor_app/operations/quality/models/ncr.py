@@ -5,6 +5,7 @@ NCR lifecycle management including root cause analysis and corrective actions.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .reference import DefectCategory, RootCauseCategory
 
@@ -230,21 +231,7 @@ class NonconformanceReport(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next NCR number."""
         year = timezone.now().year
         prefix = f"NCR-{year}-"
-
-        last_ncr = cls.all_objects.filter(
-            ncr_number__startswith=prefix
-        ).order_by('-ncr_number').first()
-
-        if last_ncr:
-            try:
-                last_num = int(last_ncr.ncr_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:04d}"
+        return sequences.next_number(cls.all_objects, 'ncr_number', prefix, width=4)
 
 
 class NCRRootCauseAnalysis(PublicIdMixin, AuditMixin, SoftDeleteMixin):
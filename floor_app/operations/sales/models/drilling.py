@@ -5,6 +5,7 @@ Tracks drilling runs, operational parameters, and bit performance in the field.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .customer import Customer, Rig, Well
 
@@ -329,18 +330,7 @@ class DrillingRun(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate unique run number."""
         year = timezone.now().year
         prefix = f"RUN-{year}-"
-        last_run = cls.all_objects.filter(
-            run_number__startswith=prefix
-        ).order_by('-run_number').first()
-        if last_run:
-            try:
-                last_num = int(last_run.run_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:06d}"
+        return sequences.next_number(cls.all_objects, 'run_number', prefix, width=6)
 
     def save(self, *args, **kwargs):
         """Calculate footage and ROP if possible."""
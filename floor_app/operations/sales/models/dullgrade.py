@@ -5,6 +5,7 @@ IADC-style dull grading for PDC bits after drilling runs.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .customer import Customer, Rig, Well
 
@@ -333,18 +334,7 @@ class DullGradeEvaluation(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate unique evaluation number."""
         year = timezone.now().year
         prefix = f"DG-{year}-"
-        last_eval = cls.all_objects.filter(
-            evaluation_number__startswith=prefix
-        ).order_by('-evaluation_number').first()
-        if last_eval:
-            try:
-                last_num = int(last_eval.evaluation_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:06d}"
+        return sequences.next_number(cls.all_objects, 'evaluation_number', prefix, width=6)
 
     def save(self, *args, **kwargs):
         """Generate IADC dull grade string before saving."""
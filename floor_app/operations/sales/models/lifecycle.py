@@ -5,6 +5,7 @@ Central event log for tracking complete bit lifecycle from manufacture to scrap.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .customer import Customer, Rig, Well
 
@@ -263,18 +264,7 @@ class BitLifecycleEvent(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate unique event number."""
         year = timezone.now().year
         prefix = f"BLE-{year}-"
-        last_event = cls.all_objects.filter(
-            event_number__startswith=prefix
-        ).order_by('-event_number').first()
-        if last_event:
-            try:
-                last_num = int(last_event.event_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:06d}"
+        return sequences.next_number(cls.all_objects, 'event_number', prefix, width=6)
 
     @classmethod
     def create_event(cls, serial_unit_id, bit_serial_number, event_type, **kwargs):
@@ -516,18 +506,7 @@ class Shipment(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate unique shipment number."""
         year = timezone.now().year
         prefix = f"SHP-{year}-"
-        last_ship = cls.all_objects.filter(
-            shipment_number__startswith=prefix
-        ).order_by('-shipment_number').first()
-        if last_ship:
-            try:
-                last_num = int(last_ship.shipment_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:06d}"
+        return sequences.next_number(cls.all_objects, 'shipment_number', prefix, width=6)
 
     @property
     def is_overdue(self):
@@ -709,18 +688,7 @@ class JunkSale(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate unique junk sale number."""
         year = timezone.now().year
         prefix = f"JNK-{year}-"
-        last_sale = cls.all_objects.filter(
-            junk_sale_number__startswith=prefix
-        ).order_by('-junk_sale_number').first()
-        if last_sale:
-            try:
-                last_num = int(last_sale.junk_sale_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:06d}"
+        return sequences.next_number(cls.all_objects, 'junk_sale_number', prefix, width=6)
 
     def save(self, *args, **kwargs):
         """Calculate total sale value before saving."""
@@ -5,6 +5,7 @@ Forecasting and order management.
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from core import sequences
 from floor_app.mixins import PublicIdMixin, AuditMixin, SoftDeleteMixin
 from .customer import Customer, Rig, Well
 
@@ -176,18 +177,7 @@ class SalesOpportunity(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next opportunity number."""
         year = timezone.now().year
         prefix = f"OPP-{year}-"
-        last_opp = cls.all_objects.filter(
-            opportunity_number__startswith=prefix
-        ).order_by('-opportunity_number').first()
-        if last_opp:
-            try:
-                last_num = int(last_opp.opportunity_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:04d}"
+        return sequences.next_number(cls.all_objects, 'opportunity_number', prefix, width=4)
 
     @property
     def is_open(self):
@@ -367,18 +357,7 @@ class SalesOrder(PublicIdMixin, AuditMixin, SoftDeleteMixin):
         """Generate next order number."""
         year = timezone.now().year
         prefix = f"SO-{year}-"
-        last_order = cls.all_objects.filter(
-            order_number__startswith=prefix
-        ).order_by('-order_number').first()
-        if last_order:
-            try:
-                last_num = int(last_order.order_number.split('-')[-1])
-                next_num = last_num + 1
-            except ValueError:
-                next_num = 1
-        else:
-            next_num = 1
-        return f"{prefix}{next_num:05d}"
+        return sequences.next_number(cls.all_objects, 'order_number', prefix, width=5)
 
     @property
     def is_on_time(self):
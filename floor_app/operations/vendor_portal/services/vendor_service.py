@@ -5,6 +5,7 @@ from datetime import date
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.db import transaction
+from core import sequences
 from floor_app.operations.vendor_portal.models import Vendor, RFQ, Quotation, PurchaseOrder
 
 User = get_user_model()
@@ -17,9 +18,7 @@ class VendorService:
     def generate_rfq_number(cls) -> str:
         year = timezone.now().year
         prefix = f"RFQ-{year}-"
-        last_rfq = RFQ.objects.filter(rfq_number__startswith=prefix).order_by('-rfq_number').first()
-        new_number = 1 if not last_rfq else int(last_rfq.rfq_number.split('-')[-1]) + 1
-        return f"{prefix}{new_number:04d}"
+        return sequences.next_number(RFQ.objects, 'rfq_number', prefix, width=4)
 
     @classmethod
     @transaction.atomic
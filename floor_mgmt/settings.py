@@ -66,8 +66,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'floor_app.middleware.CurrentRequestMiddleware',
-    'floor_app.operations.analytics.middleware.AnalyticsMiddleware',
+    # Current request, page views, SQL profiling (see analytics.telemetry)
+    'floor_app.operations.analytics.middleware.TelemetryMiddleware',
 ]
 
 if RUNNING_TESTS:
@@ -128,6 +128,23 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Without CACHE_BACKEND each worker has its own LocMemCache; caches that
+# other workers must invalidate (user display preferences) are then
+# skipped. Point it at a shared backend in production, e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory.
+
+cache_backend = config('CACHE_BACKEND', default=None)
+
+if cache_backend:
+    CACHES = {
+        'default': {
+            'BACKEND': cache_backend,
+            'LOCATION': config('CACHE_LOCATION', default=''),
+        }
+    }
+
 if RUNNING_TESTS:
     class DisableMigrations(dict):
         def __contains__(self, item):
@@ -243,3 +260,67 @@ REST_FRAMEWORK = {
     'DATE_FORMAT': '%Y-%m-%d',
 }
 
+
+
+# Global search / autocomplete
+# The in-memory autocomplete index loads in a background thread, which
+# would race test transactions, so tests use the database search path.
+AUTOCOMPLETE_ENABLED = config('AUTOCOMPLETE_ENABLED', default=not RUNNING_TESTS, cast=bool)
+AUTOCOMPLETE_LATENCY_BUDGET_MS = config('AUTOCOMPLETE_LATENCY_BUDGET_MS', default=30, cast=int)
+
+# The search index (core.search_index) only covers rows saved after the
+# migration, so it stays off until `manage.py rebuild_search_index` has
+# backfilled it; until then search scans the models directly.
+SEARCH_INDEX_ENABLED = config('SEARCH_INDEX_ENABLED', default=False, cast=bool)
+
+# Activity logs are queued and bulk-written by a background thread (see
+# core.activity_buffer); tests write them inline.
+ACTIVITY_LOG_BUFFERED = config('ACTIVITY_LOG_BUFFERED', default=not RUNNING_TESTS, cast=bool)
+
+# Page views and session heartbeats from AnalyticsMiddleware are queued and
+# bulk-written (see analytics.buffer); at most ANALYTICS_BUFFER_QUEUE_SIZE
+# queued rows are lost if a process dies.
+ANALYTICS_BUFFERED = config('ANALYTICS_BUFFERED', default=not RUNNING_TESTS, cast=bool)
+ANALYTICS_BUFFER_FLUSH_INTERVAL = config('ANALYTICS_BUFFER_FLUSH_INTERVAL', default=2.0, cast=float)
+ANALYTICS_BUFFER_QUEUE_SIZE = config('ANALYTICS_BUFFER_QUEUE_SIZE', default=5000, cast=int)
+
+# Time TelemetryMiddleware and its sinks may add to a request
+ANALYTICS_TELEMETRY_BUDGET_MS = config('ANALYTICS_TELEMETRY_BUDGET_MS', default=1.0, cast=float)
+
+# Per-view SQL profiling (core.query_profiler); off unless enabled, and
+# only a sample of requests is profiled when it is on.
+SQL_PROFILER_ENABLED = config('SQL_PROFILER_ENABLED', default=False, cast=bool)
+SQL_PROFILER_SAMPLE_RATE = config('SQL_PROFILER_SAMPLE_RATE', default=0.05, cast=float)
+SQL_PROFILER_DUPLICATE_THRESHOLD = config('SQL_PROFILER_DUPLICATE_THRESHOLD', default=5, cast=int)
+SQL_PROFILER_SLOW_MS = config('SQL_PROFILER_SLOW_MS', default=500, cast=int)
+
+# Distinct-user sketches in analytics summaries (analytics.hll): 2**precision
+# one-byte registers per row, standard error about 1.04 / sqrt(2**precision).
+ANALYTICS_HLL_PRECISION = config('ANALYTICS_HLL_PRECISION', default=11, cast=int)
+
+# Event summary rollups (analytics.rollups) leave events younger than this
+# for the next run, so ids of still-open transactions are not skipped.
+ROLLUP_SAFETY_LAG_SECONDS = config('ROLLUP_SAFETY_LAG_SECONDS', default=300, cast=int)
+
+# Event-driven automation rules (analytics.rule_engine.triggers): saves of
+# watched models queue the affected rules, coalesced per debounce window.
+AUTOMATION_EVENT_RULES_ENABLED = config('AUTOMATION_EVENT_RULES_ENABLED', default=not RUNNING_TESTS, cast=bool)
+AUTOMATION_RULE_DEBOUNCE_SECONDS = config('AUTOMATION_RULE_DEBOUNCE_SECONDS', default=2.0, cast=float)
+
+# Scheduled automation rules (analytics.rule_engine.runner): run on a pool
+# of 'thread' or 'process' workers ('serial' runs them inline), each rule
+# with its own connection and timeout.
+AUTOMATION_RULE_EXECUTOR = config('AUTOMATION_RULE_EXECUTOR', default='thread')
+AUTOMATION_RULE_WORKERS = config('AUTOMATION_RULE_WORKERS', default=4, cast=int)
+AUTOMATION_RULE_TIMEOUT_SECONDS = config('AUTOMATION_RULE_TIMEOUT_SECONDS', default=60, cast=float)
+
+# Columnar archive of aged AppEvent / PageView rows (analytics.archive):
+# rows older than ANALYTICS_ARCHIVE_AFTER_DAYS are copied into monthly
+# column files before the retention purge deletes them.
+ANALYTICS_ARCHIVE_ENABLED = config('ANALYTICS_ARCHIVE_ENABLED', default=not RUNNING_TESTS, cast=bool)
+ANALYTICS_ARCHIVE_ROOT = config('ANALYTICS_ARCHIVE_ROOT', default=str(BASE_DIR / 'archive' / 'analytics'))
+ANALYTICS_ARCHIVE_AFTER_DAYS = config('ANALYTICS_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+
+# Document number sequences (core.sequences): high-rate sequences reserve
+# this many numbers per process at a time instead of one per document.
+DOCUMENT_SEQUENCE_BLOCK_SIZE = config('DOCUMENT_SEQUENCE_BLOCK_SIZE', default=20, cast=int)